@@ -0,0 +1,38 @@
+"""Benchmark de la simulation d'approvisionnement sur des catalogues synthétiques.
+
+Usage (depuis la racine du dépôt) :
+
+    python -m benchmarks.bench_approvisionnement [--produits 10000] [--jours 365] [--repetitions 5]
+"""
+import argparse
+import sys
+
+from benchmarks.bench_moteur import catalogue_synthetique, chronometrer
+from kizuna.approvisionnement import ParametresApprovisionnement, simuler_approvisionnement
+from kizuna.moteur import ParametresSimulation, preparer_catalogue, simuler
+
+BUDGET_MS = 1000.0
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--produits', type=int, default=10_000)
+    parser.add_argument('--jours', type=int, default=365)
+    parser.add_argument('--repetitions', type=int, default=5)
+    args = parser.parse_args(argv)
+
+    df_optimise = simuler(preparer_catalogue(catalogue_synthetique(args.produits)), ParametresSimulation()).df_optimise
+    simuler_approvisionnement(df_optimise)  # préchauffage
+
+    depassement = False
+    print(f"{args.produits:,} produits, {args.jours} jours, {args.repetitions} répétitions (budget {BUDGET_MS:.0f} ms)")
+    for libelle, aleatoire in (("Demande constante", False), ("Demande Poisson", True)):
+        parametres = ParametresApprovisionnement(horizon=args.jours, demande_aleatoire=aleatoire)
+        mediane, pire = chronometrer(lambda: simuler_approvisionnement(df_optimise, parametres), args.repetitions)
+        depassement |= mediane > BUDGET_MS
+        print(f"  {libelle:<20} médiane {mediane:7.1f} ms   max {pire:7.1f} ms")
+    return 1 if depassement else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,183 @@
+"""Benchmark du démarrage à froid de l'application : imports, premier rendu, préchauffage des caches.
+
+Chaque mesure s'exécute dans un processus neuf, dans un répertoire neuf (ni
+cache disque du catalogue ni cache mémoire), sur un catalogue synthétique :
+
+- imports : durée des imports en tête du script de l'application, et modules
+  lourds (Plotly Express, SciPy, HiGHS, ReportLab, XlsxWriter) qu'ils chargent ;
+- froid : premier rendu d'une session sans préchauffage (``streamlit.testing``),
+  et durée depuis le lancement du processus ;
+- préchauffé : durée du préchauffage (``ressources.prechauffer``, comme le
+  lance ``python -m kizuna.demarrage``) par étape, puis premier rendu.
+
+Le module n'importe que la bibliothèque standard : les processus de mesure
+partent sans pandas ni Streamlit. Le rapport JSON se compare d'une version à
+l'autre avec ``--comparer``.
+
+Usage (depuis la racine du dépôt) :
+
+    python -m benchmarks.bench_demarrage [--produits 57,10000] [--repetitions 3]
+        [--sortie bench_demarrage.json] [--comparer ancien.json]
+"""
+import argparse
+import ast
+import json
+import multiprocessing
+import os
+import platform
+import statistics
+import sys
+import tempfile
+import time
+from datetime import datetime
+
+RACINE = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+SCRIPT = os.path.join(RACINE, 'kizuna_optimisation_v9.py')
+
+PRODUITS = (57, 10_000)
+REPETITIONS = 3
+MESURES = ('imports', 'froid', 'prechauffe')
+MODULES_LOURDS = ('plotly.express', 'scipy', 'highspy', 'reportlab', 'xlsxwriter')
+DELAI_RENDU = 600  # secondes, pour les gros catalogues
+INDICATEURS = {  # clé du rapport -> libellé
+    'imports_s': "Imports du script",
+    'premier_rendu_froid_s': "Premier rendu à froid",
+    'prechauffage_s': "Préchauffage",
+    'premier_rendu_prechauffe_s': "Premier rendu préchauffé",
+}
+
+
+def imports_du_script(chemin=SCRIPT):
+    """Instructions ``import`` du niveau module du script, compilées à part."""
+    with open(chemin, encoding='utf-8') as f:
+        arbre = ast.parse(f.read(), chemin)
+    imports = [noeud for noeud in arbre.body if isinstance(noeud, (ast.Import, ast.ImportFrom))]
+    return compile(ast.Module(body=imports, type_ignores=[]), chemin, 'exec')
+
+
+def modules_lourds_charges():
+    return [nom for nom in MODULES_LOURDS if nom in sys.modules]
+
+
+def mesurer(mesure, dossier):
+    """Une mesure, dans le processus courant (appelée dans un processus neuf)."""
+    debut = time.perf_counter()
+    sys.path.insert(0, RACINE)
+    os.chdir(dossier)  # l'application lit le catalogue (et écrit son cache disque) dans le répertoire courant
+
+    if mesure == 'imports':
+        exec(imports_du_script(), {'__name__': 'imports'})
+        return {'imports_s': time.perf_counter() - debut, 'modules_lourds': modules_lourds_charges()}
+
+    resultat = {}
+    if mesure == 'prechauffe':
+        from kizuna import ressources
+
+        resultat['etapes_prechauffage_ms'] = ressources.prechauffer()
+        resultat['prechauffage_s'] = time.perf_counter() - debut
+
+    from streamlit.testing.v1 import AppTest
+
+    at = AppTest.from_file(SCRIPT, default_timeout=DELAI_RENDU)
+    debut_rendu = time.perf_counter()
+    at.run()
+    resultat.update({
+        f'premier_rendu_{mesure}_s': time.perf_counter() - debut_rendu,
+        f'demarrage_{mesure}_s': time.perf_counter() - debut,
+        'modules_lourds': modules_lourds_charges(),
+        'erreurs': [e.message for e in at.exception],
+    })
+    return resultat
+
+
+def mesurer_configuration(n_produits, repetitions, contexte):
+    """Médiane de chaque indicateur sur ``repetitions`` processus neufs par mesure."""
+    # Importés ici seulement : les processus de mesure doivent partir sans pandas
+    from benchmarks.bench_moteur import catalogue_synthetique
+    from benchmarks.bench_sessions import FICHIER_CATALOGUE
+
+    catalogue = catalogue_synthetique(n_produits)
+    configuration = {'produits': n_produits, 'erreurs': []}
+    valeurs = {}
+    for mesure in MESURES:
+        for _ in range(repetitions):
+            with tempfile.TemporaryDirectory() as dossier:
+                catalogue.to_csv(os.path.join(dossier, FICHIER_CATALOGUE), index=False)
+                with contexte.Pool(1) as pool:
+                    resultat = pool.apply(mesurer, (mesure, dossier))
+            configuration['erreurs'] += resultat.pop('erreurs', [])
+            configuration[f'modules_lourds_{mesure}'] = resultat.pop('modules_lourds')
+            if 'etapes_prechauffage_ms' in resultat:
+                for etape, duree in resultat.pop('etapes_prechauffage_ms').items():
+                    valeurs.setdefault(f'prechauffage_ms/{etape}', []).append(duree)
+            for cle, valeur in resultat.items():
+                valeurs.setdefault(cle, []).append(valeur)
+
+    configuration.update({cle: statistics.median(mesures) for cle, mesures in valeurs.items()
+                          if '/' not in cle})
+    configuration['etapes_prechauffage_ms'] = {cle.split('/', 1)[1]: statistics.median(mesures)
+                                               for cle, mesures in valeurs.items() if '/' in cle}
+    return configuration
+
+
+def comparer(rapport, reference):
+    """Lignes de comparaison des indicateurs entre deux rapports, par taille de catalogue commune."""
+    anciennes = {c['produits']: c for c in reference['configurations']}
+    lignes = []
+    for c in rapport['configurations']:
+        ancienne = anciennes.get(c['produits'])
+        if ancienne is None:
+            continue
+        ecarts = [f"{libelle} {ancienne[cle]:.2f} -> {c[cle]:.2f} s ({c[cle] / ancienne[cle] - 1:+.0%})"
+                  for cle, libelle in INDICATEURS.items() if ancienne.get(cle) and cle in c]
+        lignes.append(f"  {c['produits']:>7,} produits : " + "   ".join(ecarts))
+    return lignes
+
+
+def entiers(texte):
+    return tuple(int(x) for x in texte.split(','))
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--produits', type=entiers, default=PRODUITS, help="tailles de catalogue (ex. 57,10000)")
+    parser.add_argument('--repetitions', type=int, default=REPETITIONS, help="processus par mesure (médiane)")
+    parser.add_argument('--sortie', default='bench_demarrage.json')
+    parser.add_argument('--comparer', help="rapport JSON d'une version précédente")
+    args = parser.parse_args(argv)
+
+    from benchmarks.bench_sessions import version_code
+
+    rapport = {
+        'version': version_code(),
+        'date': datetime.now().isoformat(timespec='seconds'),
+        'python': platform.python_version(),
+        'processeurs': os.cpu_count(),
+        'configurations': [],
+    }
+    contexte = multiprocessing.get_context('spawn')
+    for n_produits in args.produits:
+        resultat = mesurer_configuration(n_produits, args.repetitions, contexte)
+        rapport['configurations'].append(resultat)
+        print(f"{n_produits:>7,} produits : "
+              + "   ".join(f"{libelle} {resultat[cle]:6.2f} s" for cle, libelle in INDICATEURS.items())
+              + (f"   {len(resultat['erreurs'])} erreur(s)" if resultat['erreurs'] else ""))
+        print(f"          modules lourds chargés par les imports : "
+              f"{', '.join(resultat['modules_lourds_imports']) or 'aucun'}")
+        print("          préchauffage : " + ", ".join(
+            f"{etape} {duree:.0f} ms" for etape, duree in resultat['etapes_prechauffage_ms'].items()))
+
+    with open(args.sortie, 'w', encoding='utf-8') as f:
+        json.dump(rapport, f, ensure_ascii=False, indent=1)
+    print(f"Rapport : {args.sortie}")
+
+    if args.comparer:
+        with open(args.comparer, encoding='utf-8') as f:
+            reference = json.load(f)
+        print(f"Comparaison avec {reference.get('version')} ({reference.get('date')}) :")
+        print("\n".join(comparer(rapport, reference)) or "  aucune configuration commune")
+    return 1 if any(c['erreurs'] for c in rapport['configurations']) else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
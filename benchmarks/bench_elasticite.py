@@ -0,0 +1,106 @@
+"""Benchmark de l'estimation des élasticités-prix sur un historique synthétique.
+
+Chaque catégorie a une élasticité vraie, chaque produit la sienne autour de
+celle de sa catégorie ; les prix changent par paliers (une partie des produits
+ne change de prix qu'une fois ou jamais) et les quantités suivent une loi de
+Poisson autour de la demande log-log. Mesure l'ajustement en lot, la
+prédiction pour tout le catalogue, et l'erreur d'estimation avec et sans
+rapprochement de la catégorie.
+
+Usage (depuis la racine du dépôt) :
+
+    python -m benchmarks.bench_elasticite [--produits 5000] [--mois 24] [--sites 3]
+"""
+import argparse
+import sys
+import time
+
+import numpy as np
+import pandas as pd
+
+from benchmarks.bench_moteur import catalogue_synthetique, chronometrer
+from kizuna.elasticite import BORNES_ELASTICITE, ajuster_elasticites, quantites_ajustees
+from kizuna.historique import construire_historique
+from kizuna.moteur import preparer_catalogue
+
+
+def agregats_synthetiques(catalogue, n_mois, n_sites, rng):
+    """Agrégats mensuels par site et élasticités vraies de chaque produit."""
+    n_produits = len(catalogue)
+    codes, categories = pd.factorize(catalogue['Catégorie'])
+    vraie_categorie = rng.uniform(-2.0, -0.3, len(categories))
+    vraie = np.clip(vraie_categorie[codes] + rng.normal(0, 0.3, n_produits), *BORNES_ELASTICITE)
+
+    # Prix par paliers : chaque mois, 10 % des produits changent de prix (de -15 % à +25 %) ;
+    # un tiers des produits garde le même prix sur toute la période
+    changements = rng.random((n_produits, n_mois)) < 0.10
+    changements[: n_produits // 3] = False
+    paliers = np.where(changements, rng.uniform(-0.15, 0.25, (n_produits, n_mois)), 0.0)
+    prix_base = catalogue['Prix Unitaire (FCFA)'].to_numpy(dtype=float)
+    prix = prix_base[:, None] * np.exp(np.cumsum(np.log1p(paliers), axis=1))
+
+    niveau_site = rng.uniform(0.5, 1.5, n_sites)
+    demande = (catalogue['Quantité Période'].to_numpy(dtype=float)[:, None, None]
+               * (prix / prix_base[:, None])[:, :, None] ** vraie[:, None, None] * niveau_site)
+    quantites = rng.poisson(demande)
+
+    i_produit, i_mois, i_site = np.indices(quantites.shape).reshape(3, -1)
+    mois = pd.period_range('2024-01', periods=n_mois, freq='M').astype(str)
+    agregats = pd.DataFrame({
+        'Site': np.char.add("Site ", i_site.astype(str)),
+        'Mois': mois[i_mois],
+        'Catégorie': catalogue['Catégorie'].to_numpy()[i_produit],
+        'Produit': catalogue['Produit'].to_numpy()[i_produit],
+        'Quantité': quantites.ravel(),
+        'CA TTC': np.rint(quantites.ravel() * prix[i_produit, i_mois]),
+    })
+    return agregats, vraie
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--produits', type=int, default=5_000)
+    parser.add_argument('--mois', type=int, default=24)
+    parser.add_argument('--sites', type=int, default=3)
+    parser.add_argument('--repetitions', type=int, default=5)
+    args = parser.parse_args(argv)
+
+    rng = np.random.default_rng(0)
+    catalogue = preparer_catalogue(catalogue_synthetique(args.produits))
+    agregats, vraie = agregats_synthetiques(catalogue, args.mois, args.sites, rng)
+    print(f"{args.produits:,} produits × {args.mois} mois × {args.sites} sites ({len(agregats):,} agrégats)")
+
+    debut = time.perf_counter()
+    historique = construire_historique(agregats, catalogue)
+    print(f"  Construction de l'historique {time.perf_counter() - debut:7.2f} s")
+
+    mediane, pire = chronometrer(lambda: ajuster_elasticites(historique), args.repetitions)
+    print(f"  Ajustement en lot            {mediane:7.1f} ms (pire {pire:.1f} ms)")
+
+    coefficients = ajuster_elasticites(historique)
+    elasticites = coefficients['Élasticité'].to_numpy()
+    quantites = catalogue['Quantité Période'].to_numpy()
+    prix = catalogue['Prix Unitaire (FCFA)'].to_numpy(dtype=float)
+    nouveaux_prix = prix * rng.uniform(0.8, 1.3, len(prix))
+    mediane, pire = chronometrer(lambda: quantites_ajustees(quantites, prix, nouveaux_prix, elasticites), 50)
+    print(f"  Prédiction du catalogue      {mediane:7.2f} ms (pire {pire:.2f} ms)")
+
+    # Erreur absolue moyenne par rapport à l'élasticité vraie
+    brute = coefficients['Élasticité produit'].to_numpy()
+    variation = coefficients['Variation log-prix'].to_numpy()
+    estimee = ~np.isnan(brute)
+    peu_de_variation = variation < np.median(variation[estimee])
+    print("  Erreur absolue moyenne       pente brute   retenue")
+    for libelle, masque in [
+        ("produits dont le prix a varié", estimee),
+        ("  dont variation faible", estimee & peu_de_variation),
+        ("prix quasi constant", ~estimee),
+    ]:
+        erreur_brute = np.abs(brute[masque] - vraie[masque]).mean() if (masque & estimee).any() else np.nan
+        erreur = np.abs(elasticites[masque] - vraie[masque]).mean()
+        print(f"    {libelle:<28} {erreur_brute:9.3f} {erreur:9.3f}  ({masque.sum():,} produits)")
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
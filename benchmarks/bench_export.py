@@ -0,0 +1,48 @@
+"""Benchmark des exports de rapports : premier export, puis ré-export avec images en cache.
+
+Usage (depuis la racine du dépôt) :
+
+    python -m benchmarks.bench_export [--produits 10000] [--scenarios 3]
+"""
+import argparse
+import sys
+import tempfile
+import time
+
+from benchmarks.bench_moteur import catalogue_synthetique
+from kizuna.approvisionnement import simuler_approvisionnement
+from kizuna.export import FORMATS, CacheImages, Rapport, exporter
+from kizuna.moteur import MODES_OPTIMISATION, ParametresSimulation, comparer_categories, preparer_catalogue, simuler
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--produits', type=int, default=10_000)
+    parser.add_argument('--scenarios', type=int, default=len(MODES_OPTIMISATION))
+    args = parser.parse_args(argv)
+
+    catalogue = preparer_catalogue(catalogue_synthetique(args.produits))
+    rapports = []
+    for numero in range(args.scenarios):
+        mode = MODES_OPTIMISATION[numero % len(MODES_OPTIMISATION)]
+        resultat = simuler(catalogue, ParametresSimulation(mode_optimisation=mode))
+        rapports.append(Rapport(
+            nom=f"{mode} {numero + 1}", periode="synthétique", totaux=resultat.totaux,
+            df_optimise=resultat.df_optimise, categories=comparer_categories(catalogue, resultat.df_optimise),
+            appro=simuler_approvisionnement(resultat.df_optimise), marge_brute_visee_pct=50,
+        ))
+
+    print(f"{args.produits:,} produits, {args.scenarios} scénario(s), formats {', '.join(FORMATS)}")
+    with tempfile.TemporaryDirectory() as dossier:
+        for libelle in ("Premier export", "Ré-export"):
+            images = CacheImages(dossier=dossier)
+            debut = time.perf_counter()
+            fichiers = exporter(rapports, FORMATS, images)
+            duree = time.perf_counter() - debut
+            tailles = ", ".join(f"{nom.rsplit('.', 1)[1]} {len(contenu) / 1024:,.0f} Ko" for nom, contenu in fichiers.items())
+            print(f"  {libelle:<15} {duree:6.2f} s   images rendues {images.rendus}, réutilisées {images.reutilises}   ({tailles})")
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
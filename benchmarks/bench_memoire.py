@@ -0,0 +1,83 @@
+"""Rapport mémoire : octets par produit du catalogue et du tableau optimisé.
+
+Compare le schéma compact (``kizuna.schema``) à l'ancienne disposition :
+chaînes Python pour catégories et produits, montants en float64, quantités en
+int64 et toutes les colonnes dérivées matérialisées.
+
+Usage (depuis la racine du dépôt) :
+
+    python -m benchmarks.bench_memoire [--produits 100000]
+"""
+import argparse
+import sys
+
+import numpy as np
+import pandas as pd
+
+from benchmarks.bench_moteur import catalogue_synthetique
+from kizuna.moteur import COLONNES_CALCULEES, ParametresSimulation, avec_colonnes, preparer_catalogue, simuler
+from kizuna.schema import COLONNES_CATEGORIELLES
+
+
+def disposition_historique(df):
+    """``df`` avec toutes ses colonnes dérivées, chaînes en objets, nombres en 64 bits."""
+    calculables = [nom for nom in COLONNES_CALCULEES
+                   if nom not in ('Variation Quantité', 'CA Optimisé', 'Marge Valeur Optimisée',
+                                  'Dépenses Additionnelles', 'CA Additionnel')
+                   or 'Quantité Optimisée' in df.columns]
+    complet = avec_colonnes(df, calculables).copy()
+    for nom in complet.columns:
+        if nom in COLONNES_CATEGORIELLES:
+            complet[nom] = complet[nom].astype(str).astype(object)
+        elif complet[nom].dtype.kind == 'i' and 'Quantité' not in nom and 'Variation' not in nom:
+            complet[nom] = complet[nom].astype(np.float64)
+        elif complet[nom].dtype.kind == 'i':
+            complet[nom] = complet[nom].astype(np.int64)
+    return complet
+
+
+def octets_par_colonne(df, partage=False):
+    """Octets de chaque colonne.
+
+    Avec ``partage``, les chaînes des colonnes catégorie/produit appartiennent
+    déjà au catalogue : seuls les pointeurs (objets) ou les codes
+    (catégorielles) sont comptés.
+    """
+    octets = df.memory_usage(index=False, deep=True)
+    if partage:
+        for nom in COLONNES_CATEGORIELLES:
+            colonne = df[nom]
+            octets[nom] = colonne.cat.codes.nbytes if isinstance(colonne.dtype, pd.CategoricalDtype) else colonne.array.nbytes
+    return octets
+
+
+def rapport(libelle, avant, apres, n_produits, partage=False):
+    print(f"\n{libelle}")
+    par_colonne_avant, par_colonne_apres = octets_par_colonne(avant, partage), octets_par_colonne(apres, partage)
+    for nom in par_colonne_avant.index:
+        octets_apres = par_colonne_apres.get(nom)
+        apres_txt = f"{octets_apres / n_produits:8.1f}" if octets_apres is not None else "  calculé"
+        print(f"  {nom:<28} {par_colonne_avant[nom] / n_produits:8.1f} → {apres_txt}  octets/produit")
+    total_avant, total_apres = par_colonne_avant.sum() / n_produits, par_colonne_apres.sum() / n_produits
+    print(f"  {'Total':<28} {total_avant:8.1f} → {total_apres:8.1f}  octets/produit "
+          f"({total_apres / total_avant:.0%})")
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--produits', type=int, default=100_000)
+    args = parser.parse_args(argv)
+
+    catalogue = preparer_catalogue(catalogue_synthetique(args.produits))
+    df_optimise = simuler(catalogue, ParametresSimulation()).df_optimise
+
+    print(f"{args.produits:,} produits")
+    rapport("Catalogue", disposition_historique(catalogue), catalogue, args.produits)
+    # Le tableau optimisé partage les chaînes (avant) ou les dictionnaires (après) du catalogue
+    assert df_optimise['Produit'].dtype is catalogue['Produit'].dtype
+    rapport("Tableau optimisé", disposition_historique(df_optimise), df_optimise, args.produits, partage=True)
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,66 @@
+"""Benchmark du moteur de simulation sur des catalogues synthétiques.
+
+Usage (depuis la racine du dépôt) :
+
+    python -m benchmarks.bench_moteur [--produits 100000] [--repetitions 20]
+"""
+import argparse
+import statistics
+import sys
+import time
+
+import numpy as np
+import pandas as pd
+
+from kizuna.moteur import MODES_OPTIMISATION, ParametresSimulation, preparer_catalogue, simuler
+
+BUDGET_MS = 50.0
+
+CATEGORIES = [
+    "Bières", "Grillades", "Plats Chauds", "Accompagnements", "Boissons Gazeuses",
+    "Eau Minérale et Gazeuse", "Alcool Mix", "Liqueur", "Services",
+]
+
+
+def catalogue_synthetique(n_produits, graine=0):
+    """Catalogue aléatoire au format de ``produits_par_categorie_avril.csv``."""
+    rng = np.random.default_rng(graine)
+    return pd.DataFrame({
+        'Catégorie': rng.choice(CATEGORIES, n_produits),
+        'Produit': [f"Produit {i}" for i in range(n_produits)],
+        'Prix Unitaire (FCFA)': rng.choice([500.0, 900.0, 1000.0, 1500.0, 2500.0, 5000.0], n_produits),
+        'Marge (%)': rng.uniform(-65, 100, n_produits),
+        'Quantité Avril': rng.integers(1, 230, n_produits),
+    })
+
+
+def chronometrer(fonction, repetitions):
+    durees = []
+    for _ in range(repetitions):
+        debut = time.perf_counter()
+        fonction()
+        durees.append((time.perf_counter() - debut) * 1000)
+    return statistics.median(durees), max(durees)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--produits', type=int, default=100_000)
+    parser.add_argument('--repetitions', type=int, default=20)
+    args = parser.parse_args(argv)
+
+    catalogue = preparer_catalogue(catalogue_synthetique(args.produits))
+    simuler(catalogue, ParametresSimulation())  # préchauffage
+
+    depassement = False
+    print(f"{args.produits:,} produits, {args.repetitions} répétitions (budget {BUDGET_MS:.0f} ms)")
+    for mode in MODES_OPTIMISATION:
+        params = ParametresSimulation(mode_optimisation=mode)
+        mediane, pire = chronometrer(lambda: simuler(catalogue, params), args.repetitions)
+        depassement |= mediane > BUDGET_MS
+        print(f"  {mode:<35} médiane {mediane:7.2f} ms   max {pire:7.2f} ms")
+    return 1 if depassement else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
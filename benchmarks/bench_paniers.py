@@ -0,0 +1,85 @@
+"""Benchmark de l'analyse des paniers sur des exports de caisse synthétiques.
+
+Écrit des exports journaliers (une ligne par article vendu), les analyse d'un
+coup, puis mesure l'ajout incrémental d'un jour supplémentaire. Le pic mémoire
+(RSS) reste borné par la taille des blocs, pas par le nombre de lignes.
+
+Usage (depuis la racine du dépôt) :
+
+    python -m benchmarks.bench_paniers [--lignes 2000000] [--jours 30] [--produits 300]
+"""
+import argparse
+import os
+import resource
+import sys
+import tempfile
+import time
+
+import numpy as np
+import pandas as pd
+
+from benchmarks.bench_moteur import catalogue_synthetique
+from kizuna.ingestion import TAILLE_BLOC
+from kizuna.paniers import classer_paires, ingerer
+
+
+def ecrire_export_jour(chemin, jour, n_lignes, n_produits, rng, articles_par_ticket=3):
+    """Export d'un jour : tickets de ``articles_par_ticket`` lignes en moyenne, produits tirés selon une loi de Zipf."""
+    tailles = rng.integers(1, 2 * articles_par_ticket, n_lignes)
+    tickets = np.repeat(np.arange(len(tailles)), tailles)[:n_lignes]
+    produits = np.minimum(rng.zipf(1.3, n_lignes), n_produits) - 1
+    pd.DataFrame({
+        'Date': f"{jour} 20:00:00",
+        'Ticket': tickets,
+        'Catégorie': "Synthétique",
+        'Produit': np.char.add("Produit ", produits.astype(str)),
+        'Quantité': 1,
+        'Montant TTC': 1000,
+    }).to_csv(chemin, index=False)
+
+
+def pic_memoire_mo():
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--lignes', type=int, default=2_000_000, help="lignes de tickets au total")
+    parser.add_argument('--jours', type=int, default=30)
+    parser.add_argument('--produits', type=int, default=300)
+    parser.add_argument('--taille-bloc', type=int, default=TAILLE_BLOC)
+    args = parser.parse_args(argv)
+
+    rng = np.random.default_rng(0)
+    jours = pd.date_range('2025-04-01', periods=args.jours + 1).strftime('%Y-%m-%d')
+    lignes_par_jour = args.lignes // args.jours
+    catalogue = catalogue_synthetique(args.produits)
+
+    with tempfile.TemporaryDirectory() as dossier:
+        chemins = [os.path.join(dossier, f"tickets_{jour}.csv") for jour in jours]
+        for chemin, jour in zip(chemins, jours):
+            ecrire_export_jour(chemin, jour, lignes_par_jour, args.produits, rng)
+        memoire_avant = pic_memoire_mo()
+        print(f"{lignes_par_jour * args.jours:,} lignes sur {args.jours} jours, {args.produits} produits, "
+              f"blocs de {args.taille_bloc / 2**20:.0f} Mo (pic mémoire avant analyse {memoire_avant:.0f} Mo)")
+
+        etat_dossier = os.path.join(dossier, 'paniers')
+        debut = time.perf_counter()
+        etat = ingerer(chemins[:-1], etat_dossier, args.taille_bloc)
+        duree = time.perf_counter() - debut
+        print(f"  Analyse complète      {duree:7.2f} s  ({lignes_par_jour * args.jours / duree:,.0f} lignes/s, "
+              f"{etat.tickets:,} tickets, {etat.paires.nnz:,} comptages)")
+
+        debut = time.perf_counter()
+        etat = ingerer(chemins, etat_dossier, args.taille_bloc)
+        print(f"  Jour supplémentaire   {time.perf_counter() - debut:7.2f} s")
+
+        debut = time.perf_counter()
+        classement = classer_paires(etat, catalogue)
+        print(f"  Classement des paires {(time.perf_counter() - debut) * 1000:7.1f} ms  ({len(classement):,} paires)")
+        print(f"  Pic mémoire (RSS)     {pic_memoire_mo():7.0f} Mo")
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,260 @@
+"""Benchmark de charge de l'application : sessions concurrentes sur des catalogues synthétiques.
+
+Chaque session rejoue, sans navigateur (``streamlit.testing``), une séquence
+d'interactions de revue mensuelle : modification de prix, changement de mode
+d'optimisation, détails par produit, curseur de dépenses. Les sessions d'une
+configuration tournent en parallèle dans un même processus, comme sur le
+serveur, et partagent donc ses caches. Chaque configuration (taille du
+catalogue × nombre de sessions) s'exécute dans un processus neuf, qui part à
+froid et dont on relève le pic de mémoire résidente.
+
+Le rapport JSON (latences p50/p95/p99 des reruns, par action, pic RSS, durées
+par étape du profileur) se compare d'une version à l'autre avec ``--comparer``.
+
+Usage (depuis la racine du dépôt) :
+
+    python -m benchmarks.bench_sessions [--produits 57,1000,10000,100000] [--sessions 1,20]
+        [--sortie bench_sessions.json] [--comparer ancien.json]
+"""
+import argparse
+import json
+import logging
+import multiprocessing
+import os
+import platform
+import resource
+import subprocess
+import sys
+import tempfile
+import time
+from collections import defaultdict
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
+
+import numpy as np
+
+from benchmarks.bench_moteur import catalogue_synthetique
+
+RACINE = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+SCRIPT = os.path.join(RACINE, 'kizuna_optimisation_v9.py')
+FICHIER_CATALOGUE = 'produits_par_categorie_avril.csv'  # nom attendu par l'application
+
+PRODUITS = (57, 1_000, 10_000, 100_000)
+SESSIONS = (1, 20)
+PERCENTILES = (50, 95, 99)
+DELAI_RERUN = 600  # secondes, pour les gros catalogues sous charge
+
+
+def percentiles(durees):
+    if not durees:
+        return {}
+    valeurs = np.asarray(durees, dtype=float)
+    return {**{f'p{p}': float(np.percentile(valeurs, p)) for p in PERCENTILES},
+            'max': float(valeurs.max()), 'mesures': len(valeurs)}
+
+
+def _widget(elements, libelle):
+    return next(e for e in elements if e.label == libelle)
+
+
+def sequence_revue(at, graine):
+    """Interactions d'une session, dans l'ordre : (action, fonction qui prépare le rerun)."""
+    rng = np.random.default_rng(graine)
+
+    def modifier_prix():
+        grille = at.session_state['grille_prix']
+        lignes = rng.choice(len(grille), size=min(5, len(grille)), replace=False)
+        at.session_state['editeur_prix_0'] = {
+            'edited_rows': {int(i): {'Prix Unitaire (FCFA)': float(grille['Prix Unitaire (FCFA)'].iat[i]) + 100}
+                            for i in lignes},
+            'added_rows': [], 'deleted_rows': [],
+        }
+
+    def changer_mode(mode):
+        return lambda: at.radio(key='mode_optimisation_0').set_value(mode)
+
+    def cocher(libelle, valeur):
+        return lambda: _widget(at.sidebar.checkbox, libelle).set_value(valeur)
+
+    def deplacer_seuil(fraction):
+        def action():
+            curseur = _widget(at.slider, "Afficher les produits avec des dépenses supérieures à")
+            curseur.set_value(int(curseur.max * fraction) // 1000 * 1000)
+        return action
+
+    return [
+        ("Chargement", lambda: None),
+        ("Modification des prix", modifier_prix),
+        ("Mode : Maximiser les produits rentables", changer_mode("Maximiser les produits rentables")),
+        ("Mode : Augmentation uniforme", changer_mode("Augmentation uniforme")),
+        ("Détails par produit", cocher("Afficher les détails par produit", True)),
+        ("Dépenses par produit", cocher("Afficher les depenses par produit", True)),
+        ("Seuil de dépenses 25 %", deplacer_seuil(0.25)),
+        ("Seuil de dépenses 50 %", deplacer_seuil(0.5)),
+        ("Mode : Équilibré", changer_mode("Équilibré")),
+        ("Modification des prix", modifier_prix),
+    ]
+
+
+def partager_runtime():
+    """Rend le runtime simulé d'AppTest commun à toutes les sessions du processus.
+
+    AppTest installe puis efface ``Runtime._instance`` à chaque rerun, ce qui
+    suppose une seule session à la fois : une session qui termine son rerun
+    couperait le runtime des autres. ``Runtime.instance()`` retombe donc ici sur
+    un runtime simulé commun, et l'option ``global.appTest`` reste activée.
+    Comme sur le serveur, le script n'est compilé qu'une fois pour toutes les
+    sessions (des compilations simultanées échouent sous CPython 3.11).
+    """
+    from unittest.mock import MagicMock
+
+    from streamlit import config
+    from streamlit.runtime import Runtime
+    from streamlit.runtime.caching.storage.dummy_cache_storage import MemoryCacheStorageManager
+    from streamlit.runtime.media_file_manager import MediaFileManager
+    from streamlit.runtime.memory_media_file_storage import MemoryMediaFileStorage
+    from streamlit.runtime.scriptrunner.script_cache import ScriptCache
+
+    commun = MagicMock(spec=Runtime)
+    commun.media_file_mgr = MediaFileManager(MemoryMediaFileStorage("/mock/media"))
+    commun.cache_storage_manager = MemoryCacheStorageManager()
+    Runtime.instance = classmethod(lambda cls: cls._instance or commun)
+    Runtime.exists = classmethod(lambda cls: True)
+    config.set_option('global.appTest', True)
+
+    cache_script = ScriptCache()
+    compiler = ScriptCache.get_bytecode
+    ScriptCache.get_bytecode = lambda self, chemin: compiler(cache_script, chemin)
+    # Les sessions lues hors de leur thread de script le signalent à chaque accès
+    logging.getLogger('streamlit.runtime.scriptrunner.script_run_context').setLevel(logging.ERROR)
+
+
+def executer_session(numero):
+    """Rejoue la séquence dans une nouvelle session ; renvoie mesures, durées par étape et erreurs."""
+    from streamlit.testing.v1 import AppTest
+
+    at = AppTest.from_file(SCRIPT, default_timeout=DELAI_RERUN)
+    at.query_params['profil'] = '1'  # active le profileur de la session
+    mesures, erreurs = [], []
+    for action, preparer in sequence_revue(at, numero):
+        try:
+            preparer()
+            debut = time.perf_counter()
+            at.run()
+            mesures.append((action, (time.perf_counter() - debut) * 1000))
+            if at.exception:
+                erreurs.append(f"{action} : {at.exception[0].message}")
+        except Exception as e:  # une session en échec ne doit pas arrêter les autres
+            erreurs.append(f"{action} : {e!r}")
+            break
+    profileur = at.session_state['profileur'] if 'profileur' in at.session_state else None
+    etapes = {nom: list(durees) for nom, durees in profileur.durees.items()} if profileur else {}
+    return mesures, etapes, erreurs
+
+
+def executer_configuration(n_produits, n_sessions):
+    """Une configuration, dans le processus courant (appelée dans un processus neuf)."""
+    sys.path.insert(0, RACINE)
+    partager_runtime()
+    with tempfile.TemporaryDirectory() as dossier:
+        # L'application lit le catalogue (et écrit son cache disque) dans le répertoire courant
+        catalogue_synthetique(n_produits).to_csv(os.path.join(dossier, FICHIER_CATALOGUE), index=False)
+        os.chdir(dossier)
+
+        debut = time.perf_counter()
+        with ThreadPoolExecutor(max_workers=n_sessions) as pool:
+            sessions = list(pool.map(executer_session, range(n_sessions)))
+        duree = time.perf_counter() - debut
+
+    latences, par_action, etapes, erreurs = [], defaultdict(list), defaultdict(list), []
+    for mesures, durees_etapes, erreurs_session in sessions:
+        for action, duree_ms in mesures:
+            latences.append(duree_ms)
+            par_action[action].append(duree_ms)
+        for nom, durees in durees_etapes.items():
+            etapes[nom] += durees
+        erreurs += erreurs_session
+
+    return {
+        'produits': n_produits,
+        'sessions': n_sessions,
+        'duree_s': duree,
+        'reruns': len(latences),
+        'reruns_par_s': len(latences) / duree if duree else 0.0,
+        'latence_ms': percentiles(latences),
+        'latence_par_action_ms': {action: percentiles(d) for action, d in par_action.items()},
+        'etapes_ms': {nom: percentiles(d) for nom, d in sorted(etapes.items())},
+        'rss_max_mo': resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024,  # Ko sous Linux
+        'erreurs': erreurs,
+    }
+
+
+def version_code():
+    try:
+        return subprocess.run(['git', 'describe', '--always', '--dirty'], cwd=RACINE, capture_output=True,
+                              text=True, check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def comparer(rapport, reference):
+    """Lignes de comparaison p50 / p95 / RSS entre deux rapports, par configuration commune."""
+    anciennes = {(c['produits'], c['sessions']): c for c in reference['configurations']}
+    lignes = []
+    for c in rapport['configurations']:
+        ancienne = anciennes.get((c['produits'], c['sessions']))
+        if ancienne is None or not c['latence_ms'] or not ancienne['latence_ms']:
+            continue
+        ecarts = [f"{cle} {ancienne['latence_ms'][cle]:8.0f} -> {c['latence_ms'][cle]:8.0f} ms "
+                  f"({c['latence_ms'][cle] / ancienne['latence_ms'][cle] - 1:+.0%})" for cle in ('p50', 'p95')]
+        lignes.append(f"  {c['produits']:>7,} produits × {c['sessions']:>2} sessions : " + "   ".join(ecarts)
+                      + f"   RSS {ancienne['rss_max_mo']:.0f} -> {c['rss_max_mo']:.0f} Mo")
+    return lignes
+
+
+def entiers(texte):
+    return tuple(int(x) for x in texte.split(','))
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--produits', type=entiers, default=PRODUITS, help="tailles de catalogue (ex. 57,1000)")
+    parser.add_argument('--sessions', type=entiers, default=SESSIONS, help="sessions concurrentes (ex. 1,20)")
+    parser.add_argument('--sortie', default='bench_sessions.json')
+    parser.add_argument('--comparer', help="rapport JSON d'une version précédente")
+    args = parser.parse_args(argv)
+
+    rapport = {
+        'version': version_code(),
+        'date': datetime.now().isoformat(timespec='seconds'),
+        'python': platform.python_version(),
+        'processeurs': os.cpu_count(),
+        'configurations': [],
+    }
+    contexte = multiprocessing.get_context('spawn')
+    for n_produits in args.produits:
+        for n_sessions in args.sessions:
+            # Un processus neuf par configuration : caches froids et pic RSS propre
+            with contexte.Pool(1) as pool:
+                resultat = pool.apply(executer_configuration, (n_produits, n_sessions))
+            rapport['configurations'].append(resultat)
+            latence = resultat['latence_ms']
+            print(f"{n_produits:>7,} produits × {n_sessions:>2} sessions : "
+                  f"p50 {latence.get('p50', float('nan')):8.0f} ms   p95 {latence.get('p95', float('nan')):8.0f} ms   "
+                  f"{resultat['reruns_par_s']:5.1f} reruns/s   RSS max {resultat['rss_max_mo']:6.0f} Mo"
+                  + (f"   {len(resultat['erreurs'])} erreur(s)" if resultat['erreurs'] else ""))
+
+    with open(args.sortie, 'w', encoding='utf-8') as f:
+        json.dump(rapport, f, ensure_ascii=False, indent=1)
+    print(f"Rapport : {args.sortie}")
+
+    if args.comparer:
+        with open(args.comparer, encoding='utf-8') as f:
+            reference = json.load(f)
+        print(f"Comparaison avec {reference.get('version')} ({reference.get('date')}) :")
+        print("\n".join(comparer(rapport, reference)) or "  aucune configuration commune")
+    return 1 if any(c['erreurs'] for c in rapport['configurations']) else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
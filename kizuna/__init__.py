@@ -0,0 +1,27 @@
+from kizuna.moteur import (
+    MODES_OPTIMISATION,
+    TAUX_TVA,
+    CoutsFixes,
+    ParametresSimulation,
+    ResultatSimulation,
+    Totaux,
+    appliquer_prix_ttc,
+    comparer_categories,
+    preparer_catalogue,
+    simuler,
+    ttc_to_ht,
+)
+
+__all__ = [
+    'MODES_OPTIMISATION',
+    'TAUX_TVA',
+    'CoutsFixes',
+    'ParametresSimulation',
+    'ResultatSimulation',
+    'Totaux',
+    'appliquer_prix_ttc',
+    'comparer_categories',
+    'preparer_catalogue',
+    'simuler',
+    'ttc_to_ht',
+]
@@ -0,0 +1,197 @@
+"""Simulation jour par jour des stocks et des commandes fournisseurs.
+
+Chaque produit est rattaché, par sa catégorie, à un fournisseur qui a son
+délai de livraison, sa quantité minimale de commande, son point de commande,
+son stock cible (ces deux derniers en jours de demande) et son délai de
+paiement. Chaque jour, les livraisons arrivent, la demande est servie dans la
+limite du stock, puis tout produit dont la position de stock (stock +
+commandes en cours) est descendue au point de commande est recommandé jusqu'au
+stock cible (politique (s, S)). Les jours sont parcourus un à un, mais chaque
+journée est une mise à jour vectorielle de tous les produits à la fois.
+
+Le résultat donne les bons de commande (par jour et par fournisseur), les
+lignes de commande par produit et les décaissements jour par jour de chaque
+fournisseur, paiement à la livraison plus son délai de paiement.
+"""
+from dataclasses import dataclass
+
+import numpy as np
+import pandas as pd
+
+from kizuna.moteur import valeurs
+
+JOURS_PAR_MOIS = 30
+NON_APPLICABLE = "Non applicable"  # catégories sans stock (services)
+
+
+@dataclass(frozen=True)
+class Fournisseur:
+    delai_livraison: int  # jours entre la commande et la livraison
+    quantite_minimale: int  # unités par ligne de commande
+    point_commande: float  # jours de demande : on commande quand la position de stock y descend
+    stock_cible: float  # jours de demande visés après commande
+    delai_paiement: int = 0  # jours après la livraison
+
+
+FOURNISSEURS = {
+    "Distributeur de boissons": Fournisseur(delai_livraison=2, quantite_minimale=24, point_commande=4, stock_cible=10,
+                                            delai_paiement=15),
+    "Boucher / Fournisseur de viande": Fournisseur(delai_livraison=1, quantite_minimale=5, point_commande=2,
+                                                   stock_cible=4),
+    "Fournisseur alimentaire": Fournisseur(delai_livraison=1, quantite_minimale=10, point_commande=3, stock_cible=7,
+                                           delai_paiement=7),
+}
+
+# Fournisseur de chaque catégorie ; les catégories absentes vont au fournisseur par défaut
+FOURNISSEUR_PAR_CATEGORIE = {
+    "Bières": "Distributeur de boissons",
+    "Grillades": "Boucher / Fournisseur de viande",
+    "Plats Chauds": "Fournisseur alimentaire",
+    "Accompagnements": "Fournisseur alimentaire",
+    "Boissons Gazeuses": "Distributeur de boissons",
+    "Eau Minérale et Gazeuse": "Distributeur de boissons",
+    "Alcool Mix": "Distributeur de boissons",
+    "Liqueur": "Distributeur de boissons",
+    "Services": NON_APPLICABLE,
+}
+FOURNISSEUR_PAR_DEFAUT = "Fournisseur alimentaire"
+
+
+@dataclass(frozen=True)
+class ParametresApprovisionnement:
+    horizon: int = JOURS_PAR_MOIS  # jours simulés
+    stock_initial: float = None  # jours de demande actuelle en stock au départ ; None : stock cible du fournisseur
+    demande_aleatoire: bool = False  # demande journalière tirée selon une loi de Poisson (sinon constante)
+    graine: int = 42
+
+
+@dataclass
+class ResultatApprovisionnement:
+    bons_commande: pd.DataFrame  # un bon par jour de commande et par fournisseur
+    lignes_commande: pd.DataFrame  # une ligne par produit commandé
+    decaissements: pd.DataFrame  # jours × fournisseurs, montants payés chaque jour (FCFA HT)
+    ruptures: np.ndarray  # unités demandées non servies, par produit
+    stock_final: np.ndarray
+
+    @property
+    def decaissements_cumules(self):
+        return self.decaissements.cumsum()
+
+    def achats_par_fournisseur(self):
+        """Montant commandé sur l'horizon par fournisseur, par ordre décroissant."""
+        return self.bons_commande.groupby('Fournisseur')['Montant'].sum().sort_values(ascending=False)
+
+    def par_semaine(self):
+        """Commandes et décaissements par semaine de l'horizon (jours 1–7, 8–14, …)."""
+        semaines_commande = (self.bons_commande['Jour'] - 1) // 7 + 1
+        commandes = self.bons_commande.groupby(semaines_commande).agg(
+            Commandes=('Montant', 'size'), Commandé=('Montant', 'sum')
+        )
+        decaisse = self.decaissements.sum(axis=1)
+        decaisse = decaisse.groupby((decaisse.index - 1) // 7 + 1).sum().rename('Décaissé')
+        semaines = pd.RangeIndex(1, decaisse.index.max() + 1, name='Semaine')
+        return commandes.join(decaisse, how='outer').reindex(semaines).fillna(0)
+
+
+def fournisseurs_des_produits(df, fournisseur_par_categorie=None):
+    """Fournisseur de chaque produit du catalogue, d'après sa catégorie."""
+    correspondance = FOURNISSEUR_PAR_CATEGORIE if fournisseur_par_categorie is None else fournisseur_par_categorie
+    return df['Catégorie'].map(correspondance).astype(object).fillna(FOURNISSEUR_PAR_DEFAUT).to_numpy()
+
+
+def simuler_approvisionnement(df_optimise, parametres=None, fournisseurs=None, fournisseur_par_categorie=None):
+    """Stocks et commandes jour par jour pour servir la demande optimisée.
+
+    La demande journalière est la quantité optimisée (mensuelle) divisée par
+    ``JOURS_PAR_MOIS`` ; le stock de départ est calculé sur la demande actuelle
+    (quantité de la période), comme au début du mois avant l'optimisation.
+    """
+    pa = parametres or ParametresApprovisionnement()
+    fournisseurs = FOURNISSEURS if fournisseurs is None else fournisseurs
+
+    noms_produits = fournisseurs_des_produits(df_optimise, fournisseur_par_categorie)
+    stockes = noms_produits != NON_APPLICABLE
+    produits = np.flatnonzero(stockes)
+    noms = sorted(set(noms_produits[stockes].tolist()))
+    codes = np.searchsorted(noms, noms_produits[stockes])
+
+    # Paramètres fournisseur étendus aux produits
+    def par_produit(attribut, dtype):
+        return np.array([getattr(fournisseurs[nom], attribut) for nom in noms], dtype=dtype)[codes]
+
+    delai = par_produit('delai_livraison', np.intp)
+    delai_paiement = par_produit('delai_paiement', np.intp)
+    minimum = par_produit('quantite_minimale', float)
+
+    demande_jour = df_optimise['Quantité Optimisée'].to_numpy(dtype=float)[produits] / JOURS_PAR_MOIS
+    actuelle_jour = df_optimise['Quantité Période'].to_numpy(dtype=float)[produits] / JOURS_PAR_MOIS
+    cout = valeurs(df_optimise, 'Coût Unitaire')[produits]
+    point_commande = demande_jour * par_produit('point_commande', float)
+    cible = demande_jour * par_produit('stock_cible', float)
+    jours_initiaux = par_produit('stock_cible', float) if pa.stock_initial is None else pa.stock_initial
+    stock = np.ceil(actuelle_jour * jours_initiaux)
+
+    n, horizon = len(produits), pa.horizon
+    if pa.demande_aleatoire:
+        demande = np.random.default_rng(pa.graine).poisson(demande_jour, size=(horizon, n)).astype(float)
+    else:
+        demande = np.broadcast_to(demande_jour, (horizon, n))
+
+    # Livraisons à venir : une ligne par jour, jusqu'au délai de livraison le plus long
+    arrivees = np.zeros((horizon + (delai.max() if n else 0) + 1, n))
+    commandes = np.zeros((horizon, n))
+    en_commande = np.zeros(n)
+    ruptures = np.zeros(n)
+    colonnes = np.arange(n)
+    actifs = demande_jour > 0  # un produit sans demande n'est jamais recommandé
+
+    for jour in range(horizon):
+        stock += arrivees[jour]
+        en_commande -= arrivees[jour]
+        servi = np.minimum(stock, demande[jour])
+        ruptures += demande[jour] - servi
+        stock -= servi
+
+        position = stock + en_commande
+        quantite = np.where(actifs & (position <= point_commande),
+                            np.ceil(np.maximum(cible - position, minimum)), 0.0)
+        arrivees[jour + delai, colonnes] += quantite
+        en_commande += quantite
+        commandes[jour] = quantite
+
+    # Lignes de commande (jour, produit) : seules les cases non nulles de la matrice
+    jours, positions = np.nonzero(commandes)
+    quantites = commandes[jours, positions]
+    lignes = pd.DataFrame({
+        'Jour': jours + 1,
+        'Livraison': jours + 1 + delai[positions],
+        'Paiement': jours + 1 + delai[positions] + delai_paiement[positions],
+        'Fournisseur': np.asarray(noms, dtype=object)[codes[positions]],
+        # Les catégorielles du catalogue gardent leur dictionnaire
+        'Catégorie': df_optimise['Catégorie'].array.take(produits[positions]),
+        'Produit': df_optimise['Produit'].array.take(produits[positions]),
+        'Quantité': quantites,
+        'Montant': quantites * cout[positions],
+    })
+    bons = lignes.groupby(['Jour', 'Fournisseur'], sort=True).agg(
+        Livraison=('Livraison', 'first'), Paiement=('Paiement', 'max'), Lignes=('Produit', 'size'),
+        Unités=('Quantité', 'sum'), Montant=('Montant', 'sum'),
+    ).reset_index()
+
+    # Décaissements jours × fournisseurs ; ceux qui tombent après l'horizon n'y figurent pas
+    decaissements = np.zeros((horizon, len(noms)))
+    dans_horizon = lignes['Paiement'].to_numpy() <= horizon
+    np.add.at(decaissements, (lignes['Paiement'].to_numpy()[dans_horizon] - 1, codes[positions][dans_horizon]),
+              lignes['Montant'].to_numpy()[dans_horizon])
+
+    stock_final = np.zeros(len(df_optimise))
+    stock_final[produits] = stock
+    ruptures_produits = np.zeros(len(df_optimise))
+    ruptures_produits[produits] = ruptures
+    return ResultatApprovisionnement(
+        bons_commande=bons,
+        lignes_commande=lignes,
+        decaissements=pd.DataFrame(decaissements, columns=noms, index=pd.RangeIndex(1, horizon + 1, name='Jour')),
+        ruptures=ruptures_produits,
+        stock_final=stock_final,
+    )
@@ -0,0 +1,108 @@
+"""Cache des résultats d'optimisation, indexé par l'empreinte des paramètres.
+
+Le cache est borné (éviction LRU) et les entrées expirent après ``ttl``
+secondes. Il est partagé entre les sessions : les valeurs mises en cache ne
+doivent pas être modifiées par l'appelant.
+"""
+import hashlib
+import os
+import threading
+import time
+from collections import OrderedDict
+from dataclasses import dataclass
+
+import numpy as np
+import pandas as pd
+
+
+def version_fichier(chemin):
+    """Version d'un fichier source : date de modification et taille."""
+    stat = os.stat(chemin)
+    return (os.path.abspath(chemin), stat.st_mtime_ns, stat.st_size)
+
+
+def empreinte(*elements):
+    """Hachage stable (entre reruns et processus) d'une suite de paramètres."""
+    h = hashlib.blake2b(digest_size=16)
+    for element in elements:
+        if isinstance(element, np.ndarray):
+            h.update(str((element.dtype, element.shape)).encode())
+            h.update(np.ascontiguousarray(element).tobytes())
+        elif isinstance(element, (pd.Series, pd.DataFrame)):
+            h.update(pd.util.hash_pandas_object(element, index=True).to_numpy().tobytes())
+        else:
+            # Les dataclasses gelées ont un repr déterministe
+            h.update(repr(element).encode())
+        h.update(b'\x1f')
+    return h.hexdigest()
+
+
+@dataclass
+class StatistiquesCache:
+    succes: int = 0
+    echecs: int = 0
+    evictions: int = 0
+    expirations: int = 0
+
+    @property
+    def taux_succes(self):
+        total = self.succes + self.echecs
+        return self.succes / total if total else 0.0
+
+
+class CacheResultats:
+    def __init__(self, taille_max=32, ttl=1800.0):
+        self.taille_max = taille_max
+        self.ttl = ttl
+        self.stats = StatistiquesCache()
+        self._entrees = OrderedDict()
+        self._verrou = threading.Lock()
+
+    def __len__(self):
+        return len(self._entrees)
+
+    def __contains__(self, cle):
+        with self._verrou:
+            return self._valide(cle)
+
+    def _valide(self, cle):
+        entree = self._entrees.get(cle)
+        if entree is None:
+            return False
+        if time.monotonic() - entree[0] > self.ttl:
+            del self._entrees[cle]
+            self.stats.expirations += 1
+            return False
+        return True
+
+    def get(self, cle, defaut=None):
+        with self._verrou:
+            if self._valide(cle):
+                self._entrees.move_to_end(cle)
+                self.stats.succes += 1
+                return self._entrees[cle][1]
+            self.stats.echecs += 1
+            return defaut
+
+    def set(self, cle, valeur):
+        with self._verrou:
+            self._entrees[cle] = (time.monotonic(), valeur)
+            self._entrees.move_to_end(cle)
+            while len(self._entrees) > self.taille_max:
+                self._entrees.popitem(last=False)
+                self.stats.evictions += 1
+
+    def obtenir(self, cle, calcul):
+        """Valeur en cache pour ``cle``, sinon ``calcul()`` mis en cache."""
+        valeur = self.get(cle, _ABSENT)
+        if valeur is _ABSENT:
+            valeur = calcul()
+            self.set(cle, valeur)
+        return valeur
+
+    def vider(self):
+        with self._verrou:
+            self._entrees.clear()
+
+
+_ABSENT = object()
@@ -0,0 +1,84 @@
+"""Cache disque colonnaire (Arrow IPC / Feather) du catalogue préparé.
+
+Le catalogue CSV est lu et mis au schéma compact (``schema``) une seule fois ;
+le résultat est écrit au format Arrow non compressé (catégorielles en
+dictionnaires), relu ensuite par
+projection mémoire (``memory_map``) sans analyse CSV. Le cache est invalidé
+quand le fichier source change : la date de modification et la taille servent
+de test rapide, l'empreinte du contenu tranche quand seule la date a bougé.
+"""
+import hashlib
+import json
+import os
+
+import pandas as pd
+import pyarrow as pa
+import pyarrow.feather as feather
+
+from kizuna.moteur import preparer_catalogue
+
+DOSSIER_CACHE = '.cache_catalogue'
+VERSION_FORMAT = 3  # à incrémenter si le schéma du catalogue préparé change
+
+
+def empreinte_fichier(chemin, taille_bloc=1024 * 1024):
+    h = hashlib.blake2b(digest_size=16)
+    with open(chemin, 'rb') as f:
+        for bloc in iter(lambda: f.read(taille_bloc), b''):
+            h.update(bloc)
+    return h.hexdigest()
+
+
+def _chemins_cache(chemin_source, dossier_cache):
+    base = os.path.join(dossier_cache, os.path.splitext(os.path.basename(chemin_source))[0])
+    return base + '.arrow', base + '.json'
+
+
+def _signature(chemin_source):
+    stat = os.stat(chemin_source)
+    return {'mtime_ns': stat.st_mtime_ns, 'taille': stat.st_size, 'format': VERSION_FORMAT}
+
+
+def lire_cache(chemin_arrow):
+    """Relit le catalogue depuis le fichier Arrow projeté en mémoire."""
+    table = feather.read_table(chemin_arrow, memory_map=True)
+    return table.to_pandas(split_blocks=True)
+
+
+def ecrire_cache(df, chemin_arrow):
+    temporaire = chemin_arrow + '.tmp'
+    feather.write_feather(pa.Table.from_pandas(df, preserve_index=False), temporaire, compression='uncompressed')
+    os.replace(temporaire, chemin_arrow)
+
+
+def charger_catalogue(chemin_source, dossier_cache=DOSSIER_CACHE, preparer=preparer_catalogue):
+    """Catalogue préparé depuis le cache disque s'il est à jour, sinon depuis le CSV."""
+    chemin_arrow, chemin_meta = _chemins_cache(chemin_source, dossier_cache)
+    signature = _signature(chemin_source)
+
+    meta = None
+    if os.path.exists(chemin_arrow) and os.path.exists(chemin_meta):
+        with open(chemin_meta, encoding='utf-8') as f:
+            meta = json.load(f)
+
+    if meta is not None and meta['format'] == VERSION_FORMAT:
+        if meta['mtime_ns'] == signature['mtime_ns'] and meta['taille'] == signature['taille']:
+            return lire_cache(chemin_arrow)
+        # Fichier touché : on ne reconstruit que si son contenu a réellement changé
+        contenu = empreinte_fichier(chemin_source)
+        if meta['contenu'] == contenu:
+            _ecrire_meta(chemin_meta, {**signature, 'contenu': contenu})
+            return lire_cache(chemin_arrow)
+
+    df = preparer(pd.read_csv(chemin_source))
+    os.makedirs(dossier_cache, exist_ok=True)
+    ecrire_cache(df, chemin_arrow)
+    _ecrire_meta(chemin_meta, {**signature, 'contenu': empreinte_fichier(chemin_source)})
+    return df
+
+
+def _ecrire_meta(chemin_meta, meta):
+    temporaire = chemin_meta + '.tmp'
+    with open(temporaire, 'w', encoding='utf-8') as f:
+        json.dump(meta, f)
+    os.replace(temporaire, chemin_meta)
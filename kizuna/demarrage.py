@@ -0,0 +1,46 @@
+"""Lancement du serveur avec préchauffage des caches partagés.
+
+Streamlit ne charge rien avant la première visite : le premier utilisateur
+après un déploiement paierait la lecture du catalogue, l'historique et les
+premiers résultats d'optimisation. Ce lanceur démarre le serveur dans le
+processus courant et, en parallèle, remplit les caches du processus
+(``ressources.prechauffer``) : le premier rerun n'a plus qu'à les lire, ou
+attend la fin d'un chargement déjà en cours.
+
+Usage (depuis la racine du dépôt, mêmes options que ``streamlit run``) :
+
+    python -m kizuna.demarrage [--server.port 8501] [...]
+"""
+import os
+import sys
+import threading
+import time
+
+RACINE = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+SCRIPT = os.path.join(RACINE, 'kizuna_optimisation_v9.py')
+
+
+def prechauffer_en_arriere_plan():
+    from kizuna import ressources
+
+    debut = time.perf_counter()
+    try:
+        durees = ressources.prechauffer()
+    except Exception as e:  # le serveur reste utilisable : les sessions chargeront elles-mêmes
+        print(f"Préchauffage interrompu : {e!r}", file=sys.stderr)
+        return
+    etapes = ", ".join(f"{nom} {duree:.0f} ms" for nom, duree in durees.items())
+    print(f"Caches préchauffés en {time.perf_counter() - debut:.1f} s ({etapes})", flush=True)
+
+
+def main(argv=None):
+    from streamlit.web import cli as stcli
+
+    argv = sys.argv[1:] if argv is None else argv
+    threading.Thread(target=prechauffer_en_arriere_plan, name='prechauffage', daemon=True).start()
+    sys.argv = ['streamlit', 'run', SCRIPT, *argv]
+    return stcli.main()
+
+
+if __name__ == '__main__':
+    sys.exit(main())
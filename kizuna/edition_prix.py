@@ -0,0 +1,196 @@
+"""Édition groupée des prix TTC : catalogue de base partagé et surcouche par session.
+
+Le catalogue de base (période choisie, prix TTC arrondis au FCFA) est construit
+une fois et partagé en lecture seule entre les sessions. L'état d'édition d'une
+session ne garde que sa surcouche : les prix qu'elle a modifiés (position →
+prix TTC), les agrégats par catégorie et le journal. À chaque rerun, seules les
+lignes dont le prix a réellement changé sont recalculées, et leurs écarts sont
+reportés dans les agrégats existants. Le catalogue édité partage avec la base
+toutes les colonnes sauf le prix TTC et la marge (%) ; les colonnes HT et les
+marges en valeur se calculent à la demande (``moteur.valeurs``).
+
+Avec des élasticités-prix (``elasticite``), la quantité de référence d'une
+ligne modifiée devient la quantité attendue au nouveau prix, et son CA TTC
+cette quantité valorisée au nouveau prix : l'optimisation et le seuil de
+rentabilité partent alors de la demande ajustée.
+"""
+from dataclasses import dataclass, field
+
+import numpy as np
+import pandas as pd
+
+from kizuna.elasticite import quantites_ajustees
+from kizuna.moteur import (
+    appliquer_prix_ttc,
+    marge_a_cout_constant,
+    sommes_par_categorie,
+    ttc_to_ht,
+    valeurs,
+)
+from kizuna.schema import en_montants, en_quantites
+
+COLONNES_AGREGATS = ['CA', 'Marge Valeur']
+COLONNES_PRIX = ['Prix Unitaire (FCFA)', 'Marge (%)']
+COLONNES_DEMANDE = ['Quantité Période', 'CA TTC']  # recalculées aussi quand la demande suit les prix
+
+
+@dataclass
+class EtatPrix:
+    base: pd.DataFrame  # partagé entre les sessions : jamais modifié
+    agregats_categorie: pd.DataFrame
+    modifications: dict = field(default_factory=dict)  # position -> prix TTC saisi
+    journal: list = field(default_factory=list)
+    elasticites: np.ndarray = None  # par ligne de la base ; None : la demande ne dépend pas du prix
+
+    @property
+    def colonnes_editees(self):
+        return COLONNES_PRIX if self.elasticites is None else COLONNES_PRIX + COLONNES_DEMANDE
+
+
+def agreger_par_categorie(df):
+    """CA et marge (HT) par catégorie."""
+    return sommes_par_categorie(df, COLONNES_AGREGATS)
+
+
+def _lignes_recalculees(base, positions, prix_ttc, elasticites=None):
+    """Prix, marge (%), demande et agrégats des lignes ``positions`` de ``base`` aux prix ``prix_ttc``.
+
+    Le coût unitaire de la base est conservé ; la marge (%) en découle. Sans
+    ``elasticites`` (par ligne de ``base``), la quantité est celle de la base.
+    Le CA TTC est la quantité valorisée au nouveau prix TTC.
+    """
+    lignes = base.iloc[positions]
+    marge_pct = marge_a_cout_constant(prix_ttc, valeurs(lignes, 'Coût Unitaire'))
+    quantite = lignes['Quantité Période'].to_numpy()
+    if elasticites is not None:
+        quantite = en_quantites(quantites_ajustees(
+            quantite, lignes['Prix Unitaire (FCFA)'].to_numpy(), prix_ttc, elasticites[positions]
+        ))
+    ca = ttc_to_ht(prix_ttc) * quantite
+    return {
+        'Prix Unitaire (FCFA)': prix_ttc,
+        'Marge (%)': marge_pct,
+        'Quantité Période': quantite,
+        'CA TTC': en_montants(prix_ttc * quantite),
+        'CA': ca,
+        'Marge Valeur': ca * (marge_pct / 100),
+    }
+
+
+def catalogue_de_base(df):
+    """Catalogue aux prix TTC arrondis au FCFA, marges recalculées à coût unitaire constant.
+
+    Destiné à être construit une fois par période et partagé entre les sessions.
+    Un catalogue préparé (``preparer_catalogue``) a déjà ses prix au FCFA.
+    """
+    if df['Prix Unitaire (FCFA)'].dtype.kind in 'iu':
+        return df
+    return appliquer_prix_ttc(df, df['Prix Unitaire (FCFA)'].to_numpy())
+
+
+def initialiser_etat(base, elasticites=None):
+    """État d'une session sans modification : la surcouche est vide."""
+    return EtatPrix(base=base, agregats_categorie=agreger_par_categorie(base), elasticites=elasticites)
+
+
+def _valeurs_courantes(etat, positions, colonnes):
+    """Valeurs des lignes ``positions`` telles que la session les voit (base + surcouche)."""
+    lignes_base = etat.base.iloc[positions]
+    courantes = np.column_stack([valeurs(lignes_base, col) for col in colonnes]).astype(float)
+    modifiees = np.array([p in etat.modifications for p in positions.tolist()], dtype=bool)
+    if modifiees.any():
+        lignes = positions[modifiees]
+        recalculees = _lignes_recalculees(etat.base, lignes, np.array([etat.modifications[p] for p in lignes.tolist()]),
+                                          etat.elasticites)
+        courantes[modifiees] = np.column_stack([recalculees[col] for col in colonnes])
+    return courantes
+
+
+def prix_courants(etat):
+    """Prix TTC vus par la session : ceux de la base, sauf les lignes modifiées."""
+    prix = etat.base['Prix Unitaire (FCFA)'].to_numpy().copy()
+    if etat.modifications:
+        prix[list(etat.modifications)] = list(etat.modifications.values())
+    return prix
+
+
+def appliquer_modifications(etat, prix_ttc):
+    """Reporte dans ``etat`` les prix TTC saisis ; renvoie les positions modifiées.
+
+    Les prix manquants (cellule vidée) sont ignorés. Sans modification, rien
+    n'est recalculé.
+    """
+    courants = prix_courants(etat)
+    prix_ttc = np.asarray(prix_ttc, dtype=float)
+    prix_ttc = en_montants(np.where(np.isnan(prix_ttc), courants, prix_ttc))
+
+    positions = np.flatnonzero(prix_ttc != courants)
+    if len(positions) == 0:
+        return positions
+
+    anciens = _valeurs_courantes(etat, positions, COLONNES_AGREGATS)
+    prix_base = etat.base['Prix Unitaire (FCFA)'].to_numpy()
+    for p in positions.tolist():
+        # Revenir au prix de base retire la ligne de la surcouche
+        if prix_ttc[p] == prix_base[p]:
+            etat.modifications.pop(p, None)
+        else:
+            etat.modifications[p] = int(prix_ttc[p])
+    nouveaux = _valeurs_courantes(etat, positions, COLONNES_AGREGATS)
+
+    # Report des écarts dans les agrégats par catégorie
+    lignes = etat.base.iloc[positions]
+    ecarts = pd.DataFrame(nouveaux - anciens, columns=COLONNES_AGREGATS, index=lignes['Catégorie'])
+    ecarts = ecarts.groupby(level=0, observed=True).sum()
+    etat.agregats_categorie.loc[ecarts.index, COLONNES_AGREGATS] += ecarts
+
+    etat.journal.extend(
+        {'Produit': produit, 'Catégorie': categorie, 'Ancien prix TTC': float(ancien), 'Nouveau prix TTC': float(nouveau)}
+        for produit, categorie, ancien, nouveau in zip(
+            lignes['Produit'], lignes['Catégorie'], courants[positions], prix_ttc[positions]
+        )
+    )
+    return positions
+
+
+def catalogue_edite(etat):
+    """Catalogue aux prix de la session : la base elle-même s'il n'y a aucune modification.
+
+    Sinon, seuls le prix TTC et la marge (%) — et la demande si elle suit les
+    prix — sont recopiés (puis recalculés sur les lignes modifiées) ; les
+    autres colonnes restent celles de la base.
+    """
+    if not etat.modifications:
+        return etat.base
+    positions = np.fromiter(etat.modifications, dtype=np.intp, count=len(etat.modifications))
+    recalculees = _lignes_recalculees(etat.base, positions, np.fromiter(etat.modifications.values(), dtype=float),
+                                      etat.elasticites)
+
+    edite = etat.base.copy(deep=False)
+    for col in etat.colonnes_editees:
+        colonne = etat.base[col].to_numpy(copy=True)
+        colonne[positions] = recalculees[col]
+        edite[col] = colonne
+    return edite
+
+
+def prix_par_produit(etat):
+    """Surcouche de la session indexée par produit (pour l'enregistrer hors de la session)."""
+    produits = etat.base['Produit'].to_numpy()
+    return {produits[p]: prix for p, prix in sorted(etat.modifications.items())}
+
+
+def grille_aux_prix(grille, prix_par_produit):
+    """Grille de départ dont les prix des produits indiqués sont remplacés ; les autres colonnes sont partagées.
+
+    Les produits absents de la grille sont ignorés.
+    """
+    if not prix_par_produit:
+        return grille
+    prix = grille['Prix Unitaire (FCFA)'].to_numpy(copy=True)
+    modifies = pd.Series(prix_par_produit, dtype=float)
+    positions = pd.Index(grille['Produit']).get_indexer(modifies.index)
+    prix[positions[positions >= 0]] = en_montants(modifies.to_numpy())[positions >= 0]
+    colonnes = {col: grille[col] for col in grille.columns}
+    colonnes['Prix Unitaire (FCFA)'] = pd.Series(prix, index=grille.index)
+    return pd.DataFrame(colonnes, copy=False)
@@ -0,0 +1,145 @@
+"""Élasticité-prix de la demande, estimée par produit et par catégorie sur l'historique des ventes.
+
+Le modèle est log-log : ``log quantité = constante + élasticité × log prix``,
+le prix étant le prix moyen réalisé (CA TTC / quantité) de chaque mois et de
+chaque site. Toutes les régressions sont faites d'un coup sur les tableaux
+``(produits, mois, sites)`` de l'historique : prix et quantités sont centrés
+par produit et par site (les écarts de niveau entre sites ne comptent pas),
+puis les sommes ``Σ Δlog prix²`` et ``Σ Δlog prix × Δlog quantité`` de chaque
+produit donnent sa pente.
+
+Un produit dont le prix a peu varié a une pente très bruitée : elle est tirée
+vers celle de sa catégorie (moyenne pondérée par la variation de prix
+observée), elle-même tirée vers l'élasticité *a priori* quand la catégorie n'a
+guère connu de changement de prix. Sans aucune variation de prix dans
+l'historique, tous les produits reçoivent donc l'élasticité a priori.
+
+À l'exécution, la quantité attendue à un nouveau prix n'est qu'une
+multiplication : ``quantité × (prix / prix de référence) ** élasticité``.
+
+Usage :
+
+    python -m kizuna.elasticite --agregats .ingestion/agregats.csv \\
+        --reference produits_par_categorie_avril.csv --sortie elasticites.csv
+"""
+import argparse
+import sys
+
+import numpy as np
+import pandas as pd
+
+from kizuna.catalogue import charger_catalogue
+from kizuna.historique import construire_historique
+
+ELASTICITE_A_PRIORI = -1.0  # -1 : une hausse de prix de 10 % fait perdre environ 10 % des ventes
+BORNES_ELASTICITE = (-4.0, 0.0)  # une demande qui monterait avec le prix est un artefact de l'historique
+
+# Poids des valeurs vers lesquelles les pentes sont tirées, en Σ Δlog prix² :
+# 0.02 équivaut à une dizaine de mois dont le prix s'écarte de ±4,5 % de sa moyenne
+FORCE_CATEGORIE = 0.02
+FORCE_A_PRIORI = 0.05
+# En deçà (arrondis du CA, remises ponctuelles), la pente brute d'un produit n'est pas publiée
+VARIATION_MIN = 1e-4
+
+COLONNES_COEFFICIENTS = [
+    'Catégorie', 'Produit', 'Observations', 'Variation log-prix', 'Élasticité produit', 'Élasticité catégorie',
+    'Élasticité',
+]
+
+
+def _moments(historique):
+    """Observations, Σ Δlog prix² et Σ Δlog prix × Δlog quantité de chaque produit."""
+    quantites = historique.quantites.astype(float)
+    observe = (quantites > 0) & (historique.ca_ttc > 0)
+    with np.errstate(divide='ignore', invalid='ignore'):
+        log_prix = np.log(np.where(observe, historique.ca_ttc / quantites, 1.0))
+        log_quantite = np.log(np.where(observe, quantites, 1.0))
+
+    # Centrage par produit et par site, sur les seuls mois observés
+    n = observe.sum(axis=1, keepdims=True)
+    diviseur = np.maximum(n, 1)
+    ecart_prix = np.where(observe, log_prix - (log_prix * observe).sum(axis=1, keepdims=True) / diviseur, 0.0)
+    ecart_quantite = np.where(
+        observe, log_quantite - (log_quantite * observe).sum(axis=1, keepdims=True) / diviseur, 0.0
+    )
+    return (observe.sum(axis=(1, 2)), (ecart_prix ** 2).sum(axis=(1, 2)),
+            (ecart_prix * ecart_quantite).sum(axis=(1, 2)))
+
+
+def ajuster_elasticites(historique, a_priori=ELASTICITE_A_PRIORI, force_categorie=FORCE_CATEGORIE,
+                        force_a_priori=FORCE_A_PRIORI):
+    """Table des élasticités des produits de ``historique`` (une ligne par produit, dans son ordre).
+
+    ``Élasticité produit`` est la pente brute (NaN si le prix n'a pas
+    sensiblement varié) ; ``Élasticité`` est la valeur retenue, après rapprochement de la
+    catégorie et bornage à ``BORNES_ELASTICITE``.
+    """
+    observations, variation_prix, covariation = _moments(historique)
+    codes = historique.codes_categorie
+    n_categories = len(historique.categories)
+
+    variation_categorie = np.bincount(codes, weights=variation_prix, minlength=n_categories)
+    covariation_categorie = np.bincount(codes, weights=covariation, minlength=n_categories)
+    elasticite_categorie = np.clip(
+        (covariation_categorie + force_a_priori * a_priori) / (variation_categorie + force_a_priori),
+        *BORNES_ELASTICITE
+    )
+    elasticite = np.clip(
+        (covariation + force_categorie * elasticite_categorie[codes]) / (variation_prix + force_categorie),
+        *BORNES_ELASTICITE
+    )
+    with np.errstate(divide='ignore', invalid='ignore'):
+        brute = np.where(variation_prix > VARIATION_MIN, covariation / variation_prix, np.nan)
+
+    return pd.DataFrame({
+        'Catégorie': np.asarray(historique.categories, dtype=object)[codes],
+        'Produit': np.asarray(historique.produits, dtype=object),
+        'Observations': observations,
+        'Variation log-prix': variation_prix,
+        'Élasticité produit': brute,
+        'Élasticité catégorie': elasticite_categorie[codes],
+        'Élasticité': elasticite,
+    }, columns=COLONNES_COEFFICIENTS)
+
+
+def elasticites_catalogue(coefficients, catalogue, a_priori=ELASTICITE_A_PRIORI):
+    """Élasticité de chaque ligne de ``catalogue`` ; ``a_priori`` pour les produits absents de la table."""
+    positions = pd.Index(coefficients['Produit'].astype(str)).get_indexer(catalogue['Produit'].astype(str))
+    return np.where(positions >= 0, coefficients['Élasticité'].to_numpy()[positions], a_priori)
+
+
+def quantites_ajustees(quantites, prix_reference, prix, elasticites):
+    """Quantités attendues aux prix ``prix`` (flottants) ; inchangées si l'un des prix est nul."""
+    prix_reference = np.asarray(prix_reference, dtype=float)
+    prix = np.asarray(prix, dtype=float)
+    with np.errstate(divide='ignore', invalid='ignore'):
+        ratio = np.where((prix_reference > 0) & (prix > 0), prix / prix_reference, 1.0)
+    return quantites * ratio ** elasticites
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Estimation des élasticités-prix par produit et par catégorie.")
+    parser.add_argument('--agregats', default='.ingestion/agregats.csv', help="agrégats mensuels de l'ingestion")
+    parser.add_argument('--reference', required=True, help="catalogue de référence (produits et catégories)")
+    parser.add_argument('--a-priori', type=float, default=ELASTICITE_A_PRIORI,
+                        help="élasticité retenue sans variation de prix")
+    parser.add_argument('--sortie', help="chemin CSV de la table des élasticités")
+    args = parser.parse_args(argv)
+
+    historique = construire_historique(
+        pd.read_csv(args.agregats, dtype={'Mois': str, 'Site': str}), charger_catalogue(args.reference)
+    )
+    coefficients = ajuster_elasticites(historique, args.a_priori)
+    estimes = coefficients['Élasticité produit'].notna().sum()
+    print(f"{len(coefficients)} produits sur {len(historique.mois)} mois et {len(historique.sites)} site(s), "
+          f"{estimes} avec une variation de prix observée")
+    categories = coefficients.groupby('Catégorie', sort=True)['Élasticité catégorie'].first()
+    print(categories.to_string(float_format=lambda x: f"{x:.2f}"))
+    if args.sortie:
+        coefficients.to_csv(args.sortie, index=False)
+        print(f"{len(coefficients)} élasticités -> {args.sortie}")
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,324 @@
+"""Export des rapports de scénarios : classeur Excel multi-feuilles et rapport PDF.
+
+Un rapport reprend, pour un scénario (courant ou enregistré), la synthèse
+financière, la comparaison par catégorie, l'analyse détaillée par produit, les
+dépenses additionnelles et la répartition par fournisseur. Plusieurs
+scénarios s'exportent dans un même classeur (colonne « Scénario » sur chaque
+feuille) et un même PDF (une partie par scénario).
+
+Les exports sont préparés dans un pool de threads dédié (``lancer_export``),
+la page reste utilisable pendant ce temps. Les images statiques des graphiques
+(rendues par Kaleido) sont gardées sur disque sous l'empreinte du contenu de
+la figure : ré-exporter des sections inchangées ne relance pas le rendu.
+
+XlsxWriter, ReportLab et Kaleido ne sont importés qu'au premier export :
+l'application importe ce module à chaque démarrage.
+"""
+import io
+import os
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass
+from datetime import datetime
+
+import pandas as pd
+
+from kizuna.approvisionnement import simuler_approvisionnement
+from kizuna.cache import empreinte
+from kizuna.figures import figure_ca_categories, figure_marge_categories, figures_fournisseurs
+from kizuna.moteur import avec_colonnes
+from kizuna.sauvegarde import resultats_enregistres
+
+DOSSIER_IMAGES = '.cache_images'
+FORMATS = ['Excel', 'PDF']
+LIGNES_PDF = 30  # lignes des tableaux par produit dans le PDF (le classeur les contient toutes)
+TAILLE_IMAGE = (900, 450)  # pixels
+
+# Indicateurs de la synthèse : libellé -> champ de ``Totaux``
+SYNTHESE = {
+    "CA actuel": 'ca_total_actuel',
+    "CA optimisé": 'ca_optimise',
+    "Marge brute actuelle": 'marge_brute_actuelle',
+    "Marge brute optimisée": 'marge_optimisee',
+    "Marge brute actuelle (%)": 'marge_brute_pct_actuelle',
+    "Marge brute optimisée (%)": 'marge_pct_optimisee',
+    "Dépenses additionnelles": 'depenses_additionnelles_total',
+    "Résultat net actuel": 'resultat_net_actuel',
+    "Résultat net projeté": 'resultat_net_optimise',
+    "Seuil de rentabilité": 'seuil_rentabilite',
+}
+
+# Colonnes des tableaux par produit -> libellés de l'application
+COLONNES_PRODUITS = {
+    'Catégorie': 'Catégorie',
+    'Produit': 'Produit',
+    'Prix Unitaire (FCFA)': 'Prix',
+    'Marge (%)': 'Marge (%)',
+    'Quantité Période': 'Qté Période',
+    'Quantité Optimisée': 'Qté Optimisée',
+    'Variation Quantité': 'Var. Qté',
+    'CA': 'CA',
+    'CA Optimisé': 'CA Optimisé',
+    'Marge Valeur': 'Marge Actuelle',
+    'Marge Valeur Optimisée': 'Marge Optimisée',
+}
+COLONNES_DEPENSES = {
+    'Catégorie': 'Catégorie',
+    'Produit': 'Produit',
+    'Prix Unitaire (FCFA)': 'Prix',
+    'Coût Unitaire': 'Coût Unitaire',
+    'Marge (%)': 'Marge (%)',
+    'Quantité Période': 'Qté Actuelle',
+    'Quantité Optimisée': 'Qté Optimisée',
+    'Variation Quantité': 'Var. Qté',
+    'Dépenses Additionnelles': 'Dépenses Additionnelles',
+    'CA Additionnel': 'CA Additionnel',
+}
+
+
+@dataclass(frozen=True)
+class Rapport:
+    nom: str
+    periode: str
+    totaux: object  # moteur.Totaux
+    df_optimise: pd.DataFrame
+    categories: pd.DataFrame  # moteur.comparer_categories
+    appro: object  # approvisionnement.ResultatApprovisionnement
+    marge_brute_visee_pct: float
+
+
+def rapport_enregistre(scenario):
+    """Rapport d'un scénario enregistré (``sauvegarde.charger``), approvisionnement compris."""
+    resultat, _, categories = resultats_enregistres(scenario)
+    periode = scenario.mois + (f" — sites : {', '.join(scenario.sites)}" if scenario.sites else "")
+    return Rapport(
+        nom=scenario.nom, periode=periode, totaux=scenario.totaux, df_optimise=resultat.df_optimise,
+        categories=categories, appro=simuler_approvisionnement(resultat.df_optimise),
+        marge_brute_visee_pct=scenario.valeurs.get('marge_brute_visee_pct', 50),
+    )
+
+
+def tableau_synthese(rapport):
+    return pd.DataFrame({'Indicateur': list(SYNTHESE),
+                         'Valeur': [getattr(rapport.totaux, champ) for champ in SYNTHESE.values()]})
+
+
+def tableau_produits(df_optimise):
+    """Analyse détaillée par produit, triée comme à l'écran (catégorie, marge optimisée décroissante)."""
+    tableau = avec_colonnes(df_optimise, list(COLONNES_PRODUITS))[list(COLONNES_PRODUITS)]
+    tableau = tableau.sort_values(['Catégorie', 'Marge Valeur Optimisée'], ascending=[True, False])
+    return tableau.rename(columns=COLONNES_PRODUITS).reset_index(drop=True)
+
+
+def tableau_depenses(df_optimise):
+    """Produits à dépenses additionnelles positives, par dépenses décroissantes."""
+    tableau = avec_colonnes(df_optimise, list(COLONNES_DEPENSES))[list(COLONNES_DEPENSES)]
+    tableau = tableau[tableau['Dépenses Additionnelles'] > 0]
+    tableau = tableau.sort_values('Dépenses Additionnelles', ascending=False)
+    return tableau.rename(columns=COLONNES_DEPENSES).reset_index(drop=True)
+
+
+def tableau_fournisseurs(appro):
+    """Bons, unités, montant commandé et décaissé sur l'horizon, par fournisseur."""
+    par_fournisseur = appro.bons_commande.groupby('Fournisseur').agg(
+        Bons=('Montant', 'size'), Lignes=('Lignes', 'sum'), Unités=('Unités', 'sum'), Commandé=('Montant', 'sum')
+    )
+    par_fournisseur['Décaissé'] = appro.decaissements.sum().reindex(par_fournisseur.index).fillna(0)
+    return par_fournisseur.sort_values('Commandé', ascending=False).reset_index()
+
+
+def feuilles(rapport):
+    """Tableaux du rapport, par nom de feuille."""
+    return {
+        'Synthèse': tableau_synthese(rapport),
+        'Catégories': rapport.categories.reset_index(drop=True),
+        'Produits': tableau_produits(rapport.df_optimise),
+        'Dépenses': tableau_depenses(rapport.df_optimise),
+        'Fournisseurs': tableau_fournisseurs(rapport.appro),
+        'Bons de commande': rapport.appro.bons_commande,
+    }
+
+
+@dataclass
+class CacheImages:
+    """Images PNG des figures, sur disque, indexées par l'empreinte de leur contenu."""
+    dossier: str = DOSSIER_IMAGES
+    rendus: int = 0
+    reutilises: int = 0
+
+    def png(self, fig, largeur=TAILLE_IMAGE[0], hauteur=TAILLE_IMAGE[1]):
+        cle = empreinte(fig.to_json(), largeur, hauteur)
+        chemin = os.path.join(self.dossier, cle + '.png')
+        if os.path.exists(chemin):
+            with open(chemin, 'rb') as f:
+                image = f.read()
+            self.reutilises += 1
+        else:
+            import plotly.io as pio
+
+            image = pio.to_image(fig, format='png', width=largeur, height=hauteur)
+            os.makedirs(self.dossier, exist_ok=True)
+            temporaire = chemin + '.tmp'
+            with open(temporaire, 'wb') as f:
+                f.write(image)
+            os.replace(temporaire, chemin)
+            self.rendus += 1
+        return image
+
+
+def figures(rapport):
+    fig_fournisseurs, fig_decaissements = figures_fournisseurs(rapport.appro)
+    return [
+        figure_ca_categories(rapport.categories),
+        figure_marge_categories(rapport.categories, rapport.marge_brute_visee_pct),
+        fig_fournisseurs,
+        fig_decaissements,
+    ]
+
+
+def exporter_excel(rapports):
+    """Classeur ``.xlsx`` : une feuille par section, les scénarios empilés (colonne « Scénario »).
+
+    Les cellules sont écrites colonne par colonne directement par XlsxWriter,
+    sans le formatage cellule par cellule de ``DataFrame.to_excel``.
+    """
+    par_feuille = {}
+    for rapport in rapports:
+        for nom, tableau in feuilles(rapport).items():
+            par_feuille.setdefault(nom, []).append(tableau.assign(**{'Scénario': rapport.nom}))
+
+    import xlsxwriter
+
+    sortie = io.BytesIO()
+    classeur = xlsxwriter.Workbook(sortie, {'in_memory': True})
+    entete = classeur.add_format({'bold': True, 'bg_color': '#dbe4f0', 'text_wrap': True, 'valign': 'top'})
+    entier = classeur.add_format({'num_format': '#,##0'})
+    decimal = classeur.add_format({'num_format': '#,##0.00'})
+    for nom, tableaux in par_feuille.items():
+        tableau = pd.concat(tableaux, ignore_index=True)
+        tableau = tableau[['Scénario'] + [col for col in tableau.columns if col != 'Scénario']]
+        feuille = classeur.add_worksheet(nom)
+        feuille.write_row(0, 0, list(tableau.columns), entete)
+        for position, col in enumerate(tableau.columns):
+            valeurs = tableau[col]
+            if pd.api.types.is_numeric_dtype(valeurs):
+                format_ = decimal if '%' in col or col == 'Valeur' else entier
+                # Cellules vides pour les valeurs manquantes
+                cellules = valeurs.astype(object).where(valeurs.notna(), None).tolist()
+            else:
+                format_, cellules = None, valeurs.astype(str).tolist()
+            feuille.set_column(position, position, max(12, min(len(str(col)) + 2, 30)), format_)
+            feuille.write_column(1, position, cellules)
+        feuille.freeze_panes(1, 0)
+        feuille.autofilter(0, 0, len(tableau), len(tableau.columns) - 1)
+    classeur.close()
+    return sortie.getvalue()
+
+
+def _texte(valeur, pourcentage=False):
+    if isinstance(valeur, float):
+        return f"{valeur:,.2f}" if pourcentage else f"{valeur:,.0f}"
+    if isinstance(valeur, int):
+        return f"{valeur:,}"
+    return str(valeur)
+
+
+def _table_pdf(tableau, largeur_page, style_cellule):
+    """Table ReportLab : nombres formatés à droite, textes (noms de produits…) renvoyés à la ligne."""
+    from reportlab.lib import colors
+    from reportlab.platypus import Paragraph, Table, TableStyle
+
+    pourcentages = ['%' in str(col) for col in tableau.columns]
+    if 'Indicateur' in tableau.columns:
+        pourcentages = [False, None]  # synthèse : pourcentage selon la ligne
+    lignes = []
+    for ligne in tableau.itertuples(index=False):
+        cellules = []
+        for valeur, pourcentage in zip(ligne, pourcentages):
+            if pourcentage is None:
+                pourcentage = '%' in ligne[0]
+            cellules.append(Paragraph(valeur, style_cellule) if isinstance(valeur, str) else _texte(valeur, pourcentage))
+        lignes.append(cellules)
+    table = Table([[Paragraph(str(col), style_cellule) for col in tableau.columns]] + lignes, repeatRows=1,
+                  colWidths=[largeur_page / len(tableau.columns)] * len(tableau.columns))
+    table.setStyle(TableStyle([
+        ('FONTSIZE', (0, 0), (-1, -1), 7),
+        ('BACKGROUND', (0, 0), (-1, 0), colors.HexColor('#dbe4f0')),
+        ('ALIGN', (1, 1), (-1, -1), 'RIGHT'),
+        ('VALIGN', (0, 0), (-1, -1), 'MIDDLE'),
+        ('GRID', (0, 0), (-1, -1), 0.25, colors.grey),
+        ('ROWBACKGROUNDS', (0, 1), (-1, -1), [colors.white, colors.HexColor('#f5f5f5')]),
+    ]))
+    return table
+
+
+def exporter_pdf(rapports, images=None):
+    """Rapport PDF : une partie par scénario (synthèse, graphiques, tableaux principaux)."""
+    from reportlab.lib.pagesizes import A4, landscape
+    from reportlab.lib.styles import ParagraphStyle, getSampleStyleSheet
+    from reportlab.lib.units import cm
+    from reportlab.platypus import Image, PageBreak, Paragraph, SimpleDocTemplate, Spacer, Table
+
+    images = images or CacheImages()
+    styles = getSampleStyleSheet()
+    style_cellule = ParagraphStyle('cellule', parent=styles['Normal'], fontSize=7, leading=8)
+    sortie = io.BytesIO()
+    document = SimpleDocTemplate(sortie, pagesize=landscape(A4), title="Simulation Financière KIZUNA",
+                                 leftMargin=1.5 * cm, rightMargin=1.5 * cm, topMargin=1.5 * cm, bottomMargin=1.5 * cm)
+    largeur = document.width
+    largeur_image = largeur / 2 - 0.2 * cm
+    hauteur_image = largeur_image * TAILLE_IMAGE[1] / TAILLE_IMAGE[0]
+
+    elements = []
+    for numero, rapport in enumerate(rapports):
+        if numero:
+            elements.append(PageBreak())
+        tableaux = feuilles(rapport)
+        elements += [
+            Paragraph(f"Scénario « {rapport.nom} »", styles['Title']),
+            Paragraph(f"Période : {rapport.periode} — exporté le {datetime.now():%d/%m/%Y %H:%M}", styles['Normal']),
+            Spacer(1, 0.4 * cm),
+            _table_pdf(tableaux['Synthèse'], largeur / 2, style_cellule),
+            Spacer(1, 0.4 * cm),
+        ]
+        rendus = [Image(io.BytesIO(images.png(fig)), largeur_image, hauteur_image) for fig in figures(rapport)]
+        elements.append(Table([rendus[0:2], rendus[2:4]]))
+        for titre, nom, lignes in [
+            ("Comparaison par catégorie", 'Catégories', None),
+            (f"Analyse détaillée par produit ({LIGNES_PDF} premières marges optimisées)", 'Produits', LIGNES_PDF),
+            (f"Dépenses additionnelles ({LIGNES_PDF} premiers produits)", 'Dépenses', LIGNES_PDF),
+            ("Fournisseurs", 'Fournisseurs', None),
+        ]:
+            tableau = tableaux[nom]
+            if nom == 'Produits':
+                tableau = tableau.sort_values('Marge Optimisée', ascending=False)
+            elements += [Paragraph(titre, styles['Heading2']), _table_pdf(tableau.head(lignes), largeur, style_cellule)]
+    document.build(elements)
+    return sortie.getvalue()
+
+
+MIMES = {
+    '.xlsx': 'application/vnd.openxmlformats-officedocument.spreadsheetml.sheet',
+    '.pdf': 'application/pdf',
+}
+
+
+def exporter(rapports, formats, images=None):
+    """Fichiers exportés : nom de fichier -> contenu."""
+    base = f"kizuna_{rapports[0].nom if len(rapports) == 1 else 'scenarios'}_{datetime.now():%Y%m%d_%H%M}"
+    base = "".join(c if c.isalnum() or c in '-_' else '_' for c in base)
+    fichiers = {}
+    if 'Excel' in formats:
+        fichiers[base + '.xlsx'] = exporter_excel(rapports)
+    if 'PDF' in formats:
+        fichiers[base + '.pdf'] = exporter_pdf(rapports, images)
+    return fichiers
+
+
+def creer_executeur_export():
+    # Un seul export à la fois : le rendu des images passe par un unique processus Kaleido
+    return ThreadPoolExecutor(max_workers=1, thread_name_prefix='export')
+
+
+def lancer_export(executeur, preparer, formats, images=None):
+    """Soumet l'export ; ``preparer()`` construit la liste des rapports dans le thread d'export."""
+    return executeur.submit(lambda: exporter(preparer(), formats, images))
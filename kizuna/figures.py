@@ -0,0 +1,93 @@
+"""Figures Plotly partagées par l'application et les exports de rapports.
+
+Ces fonctions ne dépendent que des tableaux de résultats : elles peuvent être
+appelées hors de Streamlit (exports en arrière-plan). Plotly n'est importé
+qu'à la construction de la première figure, pas au chargement du module.
+"""
+
+
+def figure_ca_categories(cat_compare):
+    import plotly.graph_objects as go
+
+    fig1 = go.Figure()
+    fig1.add_trace(go.Bar(
+        x=cat_compare['Catégorie'],
+        y=cat_compare['CA'],
+        name='CA Actuel',
+        marker_color='lightgray'
+    ))
+    fig1.add_trace(go.Bar(
+        x=cat_compare['Catégorie'],
+        y=cat_compare['CA Optimisé'],
+        name='CA Optimisé',
+        marker_color='royalblue'
+    ))
+    fig1.update_layout(
+        title="Comparaison du CA par Catégorie",
+        xaxis_title="Catégorie",
+        yaxis_title="Chiffre d'Affaires (FCFA)",
+        barmode='group'
+    )
+    return fig1
+
+
+def figure_marge_categories(cat_compare, marge_brute_visee_pct):
+    import plotly.graph_objects as go
+
+    fig2 = go.Figure()
+    fig2.add_trace(go.Bar(
+        x=cat_compare['Catégorie'],
+        y=cat_compare['Marge %'],
+        name='Marge % Actuelle',
+        marker_color='coral'
+    ))
+    fig2.add_trace(go.Bar(
+        x=cat_compare['Catégorie'],
+        y=cat_compare['Marge % Optimisée'],
+        name='Marge % Optimisée',
+        marker_color='green'
+    ))
+    # Ligne de référence pour la marge visée
+    fig2.add_shape(
+        type="line",
+        x0=-0.5,
+        y0=marge_brute_visee_pct,
+        x1=len(cat_compare)-0.5,
+        y1=marge_brute_visee_pct,
+        line=dict(color="red", width=2, dash="dash")
+    )
+    fig2.add_annotation(
+        x=len(cat_compare)-1,
+        y=marge_brute_visee_pct,
+        text=f"Objectif: {marge_brute_visee_pct}%",
+        showarrow=False,
+        yshift=10
+    )
+    fig2.update_layout(
+        title="Comparaison de la Marge % par Catégorie",
+        xaxis_title="Catégorie",
+        yaxis_title="Marge (%)",
+        barmode='group'
+    )
+    return fig2
+
+
+def figures_fournisseurs(appro):
+    import plotly.express as px
+
+    achats = appro.achats_par_fournisseur().rename_axis('Fournisseur').reset_index()
+    fig_fournisseurs = px.pie(
+        achats,
+        values='Montant',
+        names='Fournisseur',
+        title="Répartition des achats du mois par fournisseur",
+        hole=0.4,
+        color_discrete_sequence=px.colors.qualitative.Set3
+    )
+    fig_decaissements = px.line(
+        appro.decaissements_cumules,
+        labels={'value': 'Décaissements cumulés (FCFA)', 'variable': 'Fournisseur'},
+        title="Décaissements cumulés par fournisseur",
+        color_discrete_sequence=px.colors.qualitative.Set3
+    )
+    return fig_fournisseurs, fig_decaissements
@@ -0,0 +1,135 @@
+"""Évaluation groupée d'une grille de scénarios sur les facteurs par tranche de marge.
+
+Le facteur d'un produit ne dépend que de sa tranche de marge et de la valeur du
+curseur de cette tranche. Pour chaque tranche, on calcule donc en une seule
+opération diffusée (valeurs du curseur × produits de la tranche) les totaux
+arrondis exactement comme dans ``moteur.completer_optimisation`` ; les totaux des
+scénarios s'obtiennent ensuite par simple indexation et somme sur les tranches.
+"""
+import itertools
+
+import numpy as np
+import pandas as pd
+
+from kizuna.moteur import SEUILS_MARGE, calculer_situation_actuelle, valeurs
+
+# Plages des curseurs de la barre latérale : (min, max, pas)
+PLAGES_FACTEURS = {
+    'facteur_prod_forte_marge': (1.0, 5.0, 0.5),
+    'facteur_prod_moy_marge': (1.0, 4.0, 0.5),
+    'facteur_prod_faible_marge': (1.0, 4.0, 0.5),
+    'facteur_prod_tres_faible_marge': (0.0, 2.0, 0.1),
+}
+
+FACTEURS = list(PLAGES_FACTEURS)
+
+
+def valeurs_curseur(minimum, maximum, pas):
+    return np.round(np.arange(minimum, maximum + pas / 2, pas), 6)
+
+
+def construire_grille(plages=None):
+    """Produit cartésien des valeurs de chaque curseur, une ligne par scénario."""
+    plages = plages or PLAGES_FACTEURS
+    valeurs = [valeurs_curseur(*plages[nom]) for nom in FACTEURS]
+    return pd.DataFrame(list(itertools.product(*valeurs)), columns=FACTEURS)
+
+
+def _groupes_produits(df, params, actuel):
+    """Découpe le catalogue en groupes (masque, coefficient par produit, curseur pilote).
+
+    Le facteur d'un produit du groupe vaut ``coefficient × valeur du curseur`` ;
+    un curseur ``None`` signifie un facteur constant égal au coefficient.
+    """
+    marge_pct = df['Marge (%)'].to_numpy(dtype=float)
+    s1, s2, s3 = SEUILS_MARGE
+    tres_faible = marge_pct < s1
+    faible = (marge_pct >= s1) & (marge_pct < s2)
+    moyenne = (marge_pct >= s2) & (marge_pct < s3)
+    forte = ~(marge_pct < s3)
+    un = np.ones(len(marge_pct))
+
+    if params.mode_optimisation == "Équilibré":
+        return [
+            (tres_faible, un, 'facteur_prod_tres_faible_marge'),
+            (faible, un, 'facteur_prod_faible_marge'),
+            (moyenne, un, 'facteur_prod_moy_marge'),
+            (forte, un, 'facteur_prod_forte_marge'),
+        ]
+    if params.mode_optimisation == "Maximiser les produits rentables":
+        score = marge_pct * df['Prix Unitaire (FCFA)'].to_numpy(dtype=float) / 1000
+        max_score = score.max() if len(score) else 1.0
+        return [
+            (tres_faible, un, 'facteur_prod_tres_faible_marge'),
+            (faible, un, 'facteur_prod_faible_marge'),
+            (moyenne, un, 'facteur_prod_moy_marge'),
+            (forte, 0.8 + 0.4 * (score / max_score), 'facteur_prod_forte_marge'),
+        ]
+    if params.mode_optimisation == "Augmentation uniforme":
+        ratio_augmentation_requis = actuel['seuil_rentabilite'] / actuel['ca_total_actuel']
+        facteur_uniforme = min(4.0, max(1.1, ratio_augmentation_requis * 0.8))
+        return [
+            (marge_pct < 0, un, 'facteur_prod_tres_faible_marge'),
+            (marge_pct >= 0, un * facteur_uniforme, None),
+        ]
+    raise ValueError(f"Mode d'optimisation inconnu : {params.mode_optimisation!r}")
+
+
+def _totaux_par_valeur(df, masque, coefficient, niveaux):
+    """CA, marge et dépenses additionnelles d'un groupe pour chaque valeur du curseur (``niveaux``)."""
+    quantite = df['Quantité Période'].to_numpy()[masque]
+    prix_ttc = df['Prix Unitaire (FCFA)'].to_numpy(dtype=float)[masque]
+    marge = df['Marge (%)'].to_numpy(dtype=float)[masque] / 100
+    cout_unitaire = valeurs(df, 'Coût Unitaire')[masque]
+
+    # Matrice valeurs × produits du groupe
+    quantite_optimisee = np.round(quantite * coefficient[masque] * niveaux[:, None])
+    ca = quantite_optimisee @ prix_ttc
+    marge_valeur = quantite_optimisee @ (prix_ttc * marge)
+    depenses = (quantite_optimisee - quantite) @ cout_unitaire
+    return ca, marge_valeur, depenses
+
+
+def evaluer_grille(df, params, grille=None):
+    """Totaux optimisés de chaque scénario de ``grille`` (une colonne par curseur).
+
+    Les paramètres autres que les facteurs (coûts, mode, marge visée) sont pris
+    dans ``params``.
+    """
+    grille = construire_grille() if grille is None else grille
+    actuel = calculer_situation_actuelle(df, params)
+    n_scenarios = len(grille)
+
+    ca_optimise = np.zeros(n_scenarios)
+    marge_optimisee = np.zeros(n_scenarios)
+    depenses_additionnelles_total = np.zeros(n_scenarios)
+    for masque, coefficient, curseur in _groupes_produits(df, params, actuel):
+        if curseur is None:
+            valeurs, indices = np.ones(1), np.zeros(n_scenarios, dtype=int)
+        else:
+            valeurs, indices = np.unique(grille[curseur].to_numpy(dtype=float), return_inverse=True)
+        ca, marge_valeur, depenses = _totaux_par_valeur(df, masque, coefficient, valeurs)
+        ca_optimise += ca[indices]
+        marge_optimisee += marge_valeur[indices]
+        depenses_additionnelles_total += depenses[indices]
+
+    resultat_net_optimise = marge_optimisee - params.couts_fixes.total_projetes - params.cout_variable
+    with np.errstate(divide='ignore', invalid='ignore'):
+        marge_pct_optimisee = np.where(ca_optimise > 0, marge_optimisee / ca_optimise * 100, 0.0)
+
+    resultats = grille.reset_index(drop=True).copy()
+    resultats['ca_optimise'] = ca_optimise
+    resultats['marge_optimisee'] = marge_optimisee
+    resultats['marge_pct_optimisee'] = marge_pct_optimisee
+    resultats['resultat_net_optimise'] = resultat_net_optimise
+    resultats['depenses_additionnelles_total'] = depenses_additionnelles_total
+    resultats['objectif_atteint'] = ca_optimise >= actuel['seuil_rentabilite']
+    return resultats
+
+
+def front_pareto(resultats, cout='depenses_additionnelles_total', gain='resultat_net_optimise'):
+    """Scénarios non dominés : aucun autre n'offre plus de gain pour moins de dépenses."""
+    tries = resultats.sort_values([cout, gain], ascending=[True, False])
+    gains = tries[gain].to_numpy()
+    meilleur_precedent = np.concatenate(([-np.inf], np.maximum.accumulate(gains)[:-1]))
+    return tries[gains > meilleur_precedent]
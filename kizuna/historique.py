@@ -0,0 +1,155 @@
+"""Historique des ventes par produit × mois × site, stocké sous forme de tableaux.
+
+Les quantités et le CA TTC sont rangés dans des tableaux denses
+``(produits, mois, sites)`` sur un axe mensuel continu, si bien qu'un décalage
+d'une position sur l'axe des mois correspond au mois précédent. Les cumuls par
+catégorie sont précalculés à la construction : changer de période ou de site
+ne fait que découper ces tableaux, sans relire l'historique.
+"""
+from dataclasses import dataclass
+
+import numpy as np
+import pandas as pd
+
+from kizuna.ingestion import SITE_PAR_DEFAUT
+from kizuna.moteur import appliquer_quantites
+
+
+@dataclass(frozen=True)
+class HistoriqueVentes:
+    produits: pd.Index  # noms de produits, dans l'ordre du catalogue
+    mois: pd.PeriodIndex  # axe mensuel continu
+    sites: pd.Index
+    quantites: np.ndarray  # (produits, mois, sites)
+    ca_ttc: np.ndarray  # (produits, mois, sites)
+    categories: pd.Index
+    codes_categorie: np.ndarray  # catégorie de chaque produit
+    quantites_categorie: np.ndarray  # (catégories, mois, sites)
+    ca_categorie: np.ndarray  # (catégories, mois, sites)
+
+    def position_mois(self, mois):
+        return self.mois.get_loc(pd.Period(mois, freq='M'))
+
+    def masque_sites(self, sites=None):
+        if not sites:
+            return np.ones(len(self.sites), dtype=bool)
+        return self.sites.isin(sites)
+
+
+def _cumuls_categorie(codes, valeurs, n_categories):
+    """Somme des lignes de ``valeurs`` par code de catégorie (axe 0)."""
+    cumuls = np.zeros((n_categories,) + valeurs.shape[1:], dtype=valeurs.dtype)
+    np.add.at(cumuls, codes, valeurs)
+    return cumuls
+
+
+def construire_historique(agregats, catalogue):
+    """Historique à partir des agrégats d'ingestion (Site, Mois, Catégorie, Produit, Quantité, CA TTC).
+
+    Les produits sont ceux de ``catalogue`` (qui porte les marges) ; les ventes de
+    produits inconnus du catalogue sont ignorées.
+    """
+    produits = pd.Index(catalogue['Produit'])
+    codes_categorie, categories = pd.factorize(catalogue['Catégorie'])
+
+    mois_ventes = pd.PeriodIndex(agregats['Mois'], freq='M')
+    mois = pd.period_range(mois_ventes.min(), mois_ventes.max(), freq='M')
+    codes_sites, sites = pd.factorize(agregats['Site'].astype(str), sort=True)
+
+    i_produit = produits.get_indexer(agregats['Produit'])
+    connus = i_produit >= 0
+    forme = (len(produits), len(mois), len(sites))
+    plat = np.ravel_multi_index(
+        (i_produit[connus], mois.get_indexer(mois_ventes)[connus], codes_sites[connus]), forme
+    )
+    taille = int(np.prod(forme))
+    quantites = np.bincount(plat, weights=agregats['Quantité'].to_numpy()[connus], minlength=taille)
+    ca_ttc = np.bincount(plat, weights=agregats['CA TTC'].to_numpy()[connus], minlength=taille)
+    quantites = quantites.reshape(forme).astype(np.int64)
+    ca_ttc = ca_ttc.reshape(forme)
+
+    return HistoriqueVentes(
+        produits=produits,
+        mois=mois,
+        sites=pd.Index(sites),
+        quantites=quantites,
+        ca_ttc=ca_ttc,
+        categories=pd.Index(categories),
+        codes_categorie=codes_categorie,
+        quantites_categorie=_cumuls_categorie(codes_categorie, quantites, len(categories)),
+        ca_categorie=_cumuls_categorie(codes_categorie, ca_ttc, len(categories)),
+    )
+
+
+def historique_depuis_catalogue(catalogue, mois, site=SITE_PAR_DEFAUT):
+    """Historique d'une seule période à partir d'un catalogue au format de l'application."""
+    agregats = pd.DataFrame({
+        'Site': site,
+        'Mois': str(pd.Period(mois, freq='M')),
+        'Catégorie': catalogue['Catégorie'],
+        'Produit': catalogue['Produit'],
+        'Quantité': catalogue['Quantité Période'],
+        'CA TTC': catalogue['CA TTC'],
+    })
+    return construire_historique(agregats, catalogue)
+
+
+def _moyenne_periode(historique, valeurs, mois, sites, fenetre):
+    """Somme sur les sites choisis, moyenne sur les ``fenetre`` mois se terminant à ``mois``."""
+    fin = historique.position_mois(mois) + 1
+    debut = max(0, fin - fenetre)
+    return valeurs[:, debut:fin][:, :, historique.masque_sites(sites)].sum(axis=2).mean(axis=1)
+
+
+def quantites_periode(historique, mois, sites=None, fenetre=1):
+    """Quantité par produit pour ``mois`` sur les sites choisis.
+
+    Avec ``fenetre > 1``, moyenne glissante des ``fenetre`` mois se terminant à
+    ``mois`` (limitée au début de l'historique), arrondie à l'unité.
+    """
+    return np.rint(_moyenne_periode(historique, historique.quantites, mois, sites, fenetre)).astype(np.int64)
+
+
+def ca_periode(historique, mois, sites=None, fenetre=1):
+    """CA TTC par produit sur la même tranche de mois et de sites que ``quantites_periode``."""
+    return _moyenne_periode(historique, historique.ca_ttc, mois, sites, fenetre)
+
+
+def appliquer_periode(catalogue, historique, mois, sites=None, fenetre=1):
+    """Catalogue dont les quantités et le CA TTC de référence sont ceux de la période choisie.
+
+    Le CA TTC est celui encaissé sur la période (donc aux prix réellement
+    pratiqués), comme dans l'évolution des ventes par catégorie.
+    """
+    positions = historique.produits.get_indexer(catalogue['Produit'])
+    connus = positions >= 0
+    quantites = np.where(connus, quantites_periode(historique, mois, sites, fenetre)[positions], 0)
+    ca_ttc = np.where(connus, ca_periode(historique, mois, sites, fenetre)[positions], 0.0)
+    return appliquer_quantites(catalogue, quantites, ca_ttc)
+
+
+def _variation(valeurs, decalage):
+    """Variation relative (%) de chaque mois par rapport au mois ``decalage`` plus tôt."""
+    variation = np.full(valeurs.shape, np.nan)
+    if valeurs.shape[1] > decalage:
+        precedent = valeurs[:, :-decalage]
+        with np.errstate(divide='ignore', invalid='ignore'):
+            variation[:, decalage:] = np.where(precedent > 0, (valeurs[:, decalage:] / precedent - 1) * 100, np.nan)
+    return variation
+
+
+def evolutions_categories(historique, sites=None):
+    """Quantités et CA TTC par catégorie et par mois, avec variations M-1 et N-1 (%)."""
+    masque = historique.masque_sites(sites)
+    quantites = historique.quantites_categorie[:, :, masque].sum(axis=2)
+    ca_ttc = historique.ca_categorie[:, :, masque].sum(axis=2)
+
+    n_categories, n_mois = ca_ttc.shape
+    return pd.DataFrame({
+        'Catégorie': np.repeat(historique.categories, n_mois),
+        'Mois': np.tile(historique.mois.astype(str), n_categories),
+        'Quantité': quantites.ravel(),
+        'CA TTC': ca_ttc.ravel(),
+        'Variation CA M-1 (%)': _variation(ca_ttc, 1).ravel(),
+        'Variation CA N-1 (%)': _variation(ca_ttc, 12).ravel(),
+    })
@@ -0,0 +1,248 @@
+"""Ingestion en flux des exports de caisse (lignes de tickets) vers le catalogue.
+
+Les exports (CSV ou JSONL, une ligne par article vendu) sont lus par blocs de
+lignes complètes, à mémoire bornée, et agrégés par site, mois, catégorie et
+produit. L'état d'ingestion (agrégats + manifeste des octets déjà traités par
+fichier) est enregistré après chaque bloc, en un seul fichier Arrow remplacé
+d'un coup (le manifeste est dans les métadonnées du schéma) : une ingestion
+interrompue reprend là où elle s'est arrêtée sans jamais recompter un bloc, et
+un fichier complété ou un nouveau fichier du jour ne fait relire que les
+données nouvelles. ``agregats.csv``, lu par l'application, n'en est qu'un
+export réécrit après le point de reprise : il peut avoir un bloc de retard
+après une interruption, jamais d'avance, et la reprise ne le relit pas.
+
+Usage :
+
+    python -m kizuna.ingestion exports/*.csv --etat .ingestion \\
+        --reference produits_par_categorie_avril.csv --mois 2025-04 --sortie catalogue.csv
+"""
+import argparse
+import glob
+import io
+import json
+import os
+import sys
+from dataclasses import dataclass, field
+
+import pandas as pd
+import pyarrow as pa
+import pyarrow.feather as feather
+
+# Colonnes attendues dans les exports de caisse
+COLONNES_TICKETS = {
+    'date': 'Date',
+    'site': 'Site',
+    'ticket': 'Ticket',
+    'categorie': 'Catégorie',
+    'produit': 'Produit',
+    'quantite': 'Quantité',
+    'montant': 'Montant TTC',
+}
+SITE_PAR_DEFAUT = "KIZUNA"
+
+CLES_AGREGATS = ['Site', 'Mois', 'Catégorie', 'Produit']
+COLONNES_AGREGATS = CLES_AGREGATS + ['Quantité', 'CA TTC', 'Lignes']
+
+TAILLE_BLOC = 64 * 1024 * 1024  # octets lus par bloc
+CLE_MANIFESTE = b'kizuna.manifeste'  # métadonnée du schéma Arrow du point de reprise
+
+
+@dataclass
+class EtatIngestion:
+    dossier: str
+    agregats: pd.DataFrame = field(default_factory=lambda: pd.DataFrame(columns=COLONNES_AGREGATS))
+    manifeste: dict = field(default_factory=dict)
+
+    @property
+    def chemin_etat(self):
+        return os.path.join(self.dossier, 'etat.arrow')
+
+    @property
+    def chemin_agregats(self):
+        return os.path.join(self.dossier, 'agregats.csv')
+
+    @property
+    def chemin_manifeste(self):
+        """Manifeste séparé des versions précédentes, relu seulement en l'absence de ``etat.arrow``."""
+        return os.path.join(self.dossier, 'manifeste.json')
+
+
+def charger_etat(dossier):
+    etat = EtatIngestion(dossier=dossier)
+    if os.path.exists(etat.chemin_etat):
+        table = feather.read_table(etat.chemin_etat)
+        etat.manifeste = json.loads(table.schema.metadata[CLE_MANIFESTE])
+        etat.agregats = table.to_pandas()
+    elif os.path.exists(etat.chemin_manifeste):
+        with open(etat.chemin_manifeste, encoding='utf-8') as f:
+            etat.manifeste = json.load(f)
+        etat.agregats = pd.read_csv(etat.chemin_agregats, dtype={'Mois': str, 'Site': str})
+    return etat
+
+
+def _ecrire_atomique(chemin, ecrire):
+    temporaire = chemin + '.tmp'
+    ecrire(temporaire)
+    os.replace(temporaire, chemin)
+
+
+def exporter_agregats(etat):
+    _ecrire_atomique(etat.chemin_agregats, lambda chemin: etat.agregats.to_csv(chemin, index=False))
+
+
+def enregistrer_etat(etat):
+    """Enregistre agrégats et manifeste en un seul remplacement de fichier, puis l'export CSV."""
+    os.makedirs(etat.dossier, exist_ok=True)
+    table = pa.Table.from_pandas(etat.agregats, preserve_index=False)
+    table = table.replace_schema_metadata({
+        **(table.schema.metadata or {}),
+        CLE_MANIFESTE: json.dumps(etat.manifeste, ensure_ascii=False).encode('utf-8'),
+    })
+    _ecrire_atomique(etat.chemin_etat, lambda chemin: feather.write_feather(table, chemin))
+    if os.path.exists(etat.chemin_manifeste):
+        os.remove(etat.chemin_manifeste)  # le point de reprise fait désormais foi
+    exporter_agregats(etat)
+
+
+def _export_en_retard(etat):
+    return os.path.exists(etat.chemin_etat) and (
+        not os.path.exists(etat.chemin_agregats)
+        or os.path.getmtime(etat.chemin_agregats) < os.path.getmtime(etat.chemin_etat)
+    )
+
+
+def _format(chemin):
+    return 'jsonl' if chemin.endswith(('.jsonl', '.ndjson')) else 'csv'
+
+
+def lire_blocs(chemin, debut=0, taille_bloc=TAILLE_BLOC):
+    """Itère sur ``(lignes, fin)`` : un DataFrame de lignes complètes et l'offset atteint.
+
+    Pour les CSV, l'en-tête est relu puis réinjecté devant chaque bloc, ce qui
+    permet de reprendre à n'importe quel offset de début de ligne.
+    """
+    format_ = _format(chemin)
+    with open(chemin, 'rb') as f:
+        entete = f.readline() if format_ == 'csv' else b''
+        position = max(debut, f.tell())
+        f.seek(position)
+        while True:
+            bloc = f.readlines(taille_bloc)
+            if not bloc:
+                return
+            # Une dernière ligne incomplète (fichier en cours d'écriture) est laissée pour plus tard
+            if not bloc[-1].endswith(b'\n'):
+                bloc.pop()
+                if not bloc:
+                    return
+            donnees = b''.join(bloc)
+            position += len(donnees)
+            if format_ == 'csv':
+                lignes = pd.read_csv(io.BytesIO(entete + donnees))
+            else:
+                lignes = pd.read_json(io.BytesIO(donnees), lines=True)
+            yield lignes, position
+
+
+def agreger_lignes(lignes):
+    """Agrège des lignes de tickets par site, mois, catégorie et produit."""
+    c = COLONNES_TICKETS
+    site = lignes[c['site']] if c['site'] in lignes else pd.Series(SITE_PAR_DEFAUT, index=lignes.index)
+    return (
+        pd.DataFrame({
+            'Site': site.astype(str),
+            'Mois': pd.to_datetime(lignes[c['date']]).dt.to_period('M').astype(str),
+            'Catégorie': lignes[c['categorie']],
+            'Produit': lignes[c['produit']],
+            'Quantité': pd.to_numeric(lignes[c['quantite']]),
+            'CA TTC': pd.to_numeric(lignes[c['montant']]),
+            'Lignes': 1,
+        })
+        .groupby(CLES_AGREGATS, as_index=False, sort=False)
+        .sum()
+    )
+
+
+def fusionner_agregats(*agregats):
+    non_vides = [a for a in agregats if len(a)]
+    if not non_vides:
+        return pd.DataFrame(columns=COLONNES_AGREGATS)
+    return pd.concat(non_vides, ignore_index=True).groupby(CLES_AGREGATS, as_index=False).sum()
+
+
+def ingerer(sources, dossier_etat, taille_bloc=TAILLE_BLOC):
+    """Ingère les fichiers ``sources`` (chemins ou motifs glob) ; renvoie l'état à jour.
+
+    Seuls les octets non encore traités de chaque fichier sont lus. Un fichier
+    plus court que lors de la dernière ingestion (réécrit) est signalé par
+    ``ValueError`` plutôt que compté deux fois.
+    """
+    etat = charger_etat(dossier_etat)
+    if _export_en_retard(etat):
+        exporter_agregats(etat)  # interruption entre le point de reprise et l'export
+    chemins = sorted({chemin for motif in sources for chemin in (glob.glob(motif) or [motif])})
+
+    for chemin in chemins:
+        cle = os.path.abspath(chemin)
+        deja_traite = etat.manifeste.get(cle, {}).get('octets', 0)
+        taille = os.path.getsize(chemin)
+        if taille < deja_traite:
+            raise ValueError(f"{chemin} a été tronqué depuis la dernière ingestion ({taille} < {deja_traite} octets)")
+        if taille == deja_traite:
+            continue
+
+        for lignes, fin in lire_blocs(chemin, deja_traite, taille_bloc):
+            etat.agregats = fusionner_agregats(etat.agregats, agreger_lignes(lignes))
+            etat.manifeste[cle] = {
+                'octets': fin,
+                'lignes': etat.manifeste.get(cle, {}).get('lignes', 0) + len(lignes),
+            }
+            # Point de reprise après chaque bloc
+            enregistrer_etat(etat)
+    return etat
+
+
+def construire_catalogue(agregats, mois, reference, sites=None, colonne_quantite='Quantité Avril'):
+    """Catalogue au format de l'application pour un mois donné.
+
+    Le prix unitaire est le prix TTC moyen réellement encaissé ; la marge (%)
+    provient du catalogue de ``reference`` (les tickets ne portent pas les coûts).
+    Les produits absents de la référence sont écartés.
+    """
+    selection = agregats[agregats['Mois'] == mois]
+    if sites is not None:
+        selection = selection[selection['Site'].isin(sites)]
+    ventes = selection.groupby(['Catégorie', 'Produit'], as_index=False)[['Quantité', 'CA TTC']].sum()
+    ventes = ventes[ventes['Quantité'] > 0]
+    ventes['Prix Unitaire (FCFA)'] = ventes['CA TTC'] / ventes['Quantité']
+
+    catalogue = ventes.merge(reference[['Produit', 'Marge (%)']], on='Produit', how='inner')
+    catalogue = catalogue.rename(columns={'Quantité': colonne_quantite})
+    return catalogue[['Catégorie', 'Produit', 'Prix Unitaire (FCFA)', 'Marge (%)', colonne_quantite]]
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Ingestion incrémentale des exports de caisse.")
+    parser.add_argument('sources', nargs='+', help="fichiers CSV/JSONL de lignes de tickets (motifs glob acceptés)")
+    parser.add_argument('--etat', default='.ingestion', help="dossier de l'état d'ingestion")
+    parser.add_argument('--taille-bloc', type=int, default=TAILLE_BLOC, help="octets lus par bloc")
+    parser.add_argument('--reference', help="catalogue de référence portant les marges")
+    parser.add_argument('--mois', help="mois du catalogue à produire (AAAA-MM)")
+    parser.add_argument('--site', action='append', help="restreindre le catalogue à ce(s) site(s)")
+    parser.add_argument('--sortie', help="chemin du catalogue CSV produit")
+    args = parser.parse_args(argv)
+
+    etat = ingerer(args.sources, args.etat, args.taille_bloc)
+    print(f"{len(etat.manifeste)} fichier(s) suivis, {len(etat.agregats)} lignes d'agrégats")
+
+    if args.sortie:
+        if not (args.reference and args.mois):
+            parser.error("--sortie nécessite --reference et --mois")
+        catalogue = construire_catalogue(etat.agregats, args.mois, pd.read_csv(args.reference), args.site)
+        catalogue.to_csv(args.sortie, index=False)
+        print(f"Catalogue {args.mois} : {len(catalogue)} produits -> {args.sortie}")
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
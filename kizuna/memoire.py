@@ -0,0 +1,91 @@
+"""Mémoire détenue par une session, hors données partagées entre sessions.
+
+Les tableaux NumPy (et colonnes de DataFrame) qui partagent leur tampon avec
+un objet partagé (catalogue de base, historique) ne sont pas comptés : une
+session qui ne fait que référencer la base ne coûte que sa surcouche.
+"""
+import sys
+from collections import deque
+from dataclasses import fields, is_dataclass
+
+import numpy as np
+import pandas as pd
+
+
+def _index(obj):
+    # Un RangeIndex ne stocke que ses bornes
+    return [] if isinstance(obj.index, pd.RangeIndex) else [obj.index.to_numpy()]
+
+
+def _tampons(serie):
+    # Catégorielle : codes et catégories, sans matérialiser les valeurs
+    if isinstance(serie.dtype, pd.CategoricalDtype):
+        return [serie.cat.codes.to_numpy(), serie.cat.categories.to_numpy()]
+    return [serie.to_numpy()]
+
+
+def tableaux(obj):
+    """Tampons NumPy d'un DataFrame, d'une Series ou d'un tableau (pour ``partages``)."""
+    if isinstance(obj, pd.DataFrame):
+        return [t for i in range(obj.shape[1]) for t in _tampons(obj.iloc[:, i])] + _index(obj)
+    if isinstance(obj, pd.Series):
+        return _tampons(obj) + _index(obj)
+    if isinstance(obj, np.ndarray):
+        return [obj]
+    return []
+
+
+def _taille_tableau(tableau, partages):
+    if any(np.may_share_memory(tableau, autre) for autre in partages):
+        return 0
+    if tableau.dtype == object:
+        # Pointeurs + objets référencés (chaînes, le plus souvent)
+        return tableau.nbytes + sum(sys.getsizeof(x) for x in tableau.ravel())
+    return tableau.nbytes
+
+
+def taille_objet(obj, partages=(), _vus=None):
+    """Octets détenus par ``obj`` (parcours récursif), hors tampons partagés avec ``partages``.
+
+    ``partages`` est une liste de tableaux NumPy (voir ``tableaux``). Chaque
+    objet n'est compté qu'une fois.
+    """
+    vus = set() if _vus is None else _vus
+    if id(obj) in vus:
+        return 0
+    vus.add(id(obj))
+
+    if isinstance(obj, (pd.DataFrame, pd.Series, np.ndarray)):
+        return sum(_taille_tableau(t, partages) for t in tableaux(obj))
+    if isinstance(obj, dict):
+        return sys.getsizeof(obj) + sum(
+            taille_objet(k, partages, vus) + taille_objet(v, partages, vus) for k, v in obj.items()
+        )
+    if isinstance(obj, (list, tuple, set, frozenset, deque)):
+        return sys.getsizeof(obj) + sum(taille_objet(x, partages, vus) for x in obj)
+    if is_dataclass(obj) and not isinstance(obj, type):
+        return sys.getsizeof(obj) + sum(taille_objet(getattr(obj, f.name), partages, vus) for f in fields(obj))
+    if hasattr(obj, '__dict__') and not isinstance(obj, type):
+        return sys.getsizeof(obj) + taille_objet(vars(obj), partages, vus)
+    return sys.getsizeof(obj)
+
+
+def memoire_session(session, partages=(), objets_partages=()):
+    """Taille (octets) de chaque entrée de l'état de session, par ordre décroissant.
+
+    Les ``objets_partages`` (cache des résultats, pool de threads…) référencés
+    par la session ne sont pas parcourus.
+    """
+    tailles = {
+        cle: taille_objet(valeur, partages, {id(objet) for objet in objets_partages})
+        for cle, valeur in session.items()
+    }
+    return pd.Series(tailles, dtype='int64').sort_values(ascending=False)
+
+
+def formater_octets(octets):
+    for unite in ('o', 'Ko', 'Mo'):
+        if abs(octets) < 1024:
+            return f"{octets:,.0f} {unite}" if unite == 'o' else f"{octets:,.1f} {unite}"
+        octets /= 1024
+    return f"{octets:,.1f} Go"
@@ -0,0 +1,377 @@
+"""Moteur de simulation KIZUNA, sans dépendance à Streamlit.
+
+Toutes les opérations travaillent sur des colonnes entières (NumPy/pandas) :
+pas de ``.apply`` ligne à ligne ni d'écriture ``df.at``. Les tableaux ne
+stockent que les colonnes du schéma compact (voir ``schema``) ; les autres se
+lisent avec ``valeurs``, qui les calcule à la demande.
+"""
+from dataclasses import dataclass, field, fields
+
+import numpy as np
+import pandas as pd
+
+from kizuna.schema import en_montants, en_quantites, typer_catalogue
+
+
+TAUX_TVA = 0.1925
+
+MODES_OPTIMISATION = ["Équilibré", "Maximiser les produits rentables", "Augmentation uniforme"]
+
+# Bornes des tranches de marge (%) : très faible < 20 <= faible < 35 <= moyenne < 50 <= forte
+SEUILS_MARGE = (20, 35, 50)
+
+COLONNES_SOURCE = ['Catégorie', 'Produit', 'Prix Unitaire (FCFA)', 'Marge (%)', 'Quantité Période']
+
+# Les exports mensuels historiques nomment la colonne de quantités d'après le mois
+COLONNES_QUANTITE_HISTORIQUES = ['Quantité Avril']
+
+
+def ttc_to_ht(prix_ttc, taux_tva=TAUX_TVA):
+    return prix_ttc / (1 + taux_tva)
+
+
+@dataclass(frozen=True)
+class CoutsFixes:
+    # Coûts fixes personnel
+    salaire_directeur: float = 200000
+    salaire_serveuse: float = 40000
+    # Coûts fixes divers
+    electricite: float = 67593
+    abonnement_canal: float = 54000
+    transport: float = 50000
+    recharge_infinity: float = 30000
+    carnet_recu: float = 2050
+    boite_cure_dents: float = 100
+    emballage_oumbe: float = 100
+    # Coûts fixes projetés
+    salaire_serveuse_1: float = 60000
+    salaire_serveuse_2: float = 60000
+    loyer: float = 400000
+    erp: float = 90000
+    web_email: float = 40000
+
+    @property
+    def total_actuels(self):
+        return (self.salaire_directeur + self.salaire_serveuse + self.electricite + self.abonnement_canal
+                + self.transport + self.recharge_infinity + self.carnet_recu + self.boite_cure_dents
+                + self.emballage_oumbe)
+
+    @property
+    def total_projetes(self):
+        # On remplace le salaire actuel de la serveuse par les deux nouveaux postes
+        return (self.total_actuels + self.salaire_serveuse_1 + self.salaire_serveuse_2 + self.loyer
+                + self.erp + self.web_email - self.salaire_serveuse)
+
+
+@dataclass(frozen=True)
+class ParametresSimulation:
+    couts_fixes: CoutsFixes = field(default_factory=CoutsFixes)
+    cout_variable: float = 27540
+    marge_brute_visee_pct: float = 50
+    mode_optimisation: str = "Équilibré"
+    facteur_prod_forte_marge: float = 2.5
+    facteur_prod_moy_marge: float = 2.0
+    facteur_prod_faible_marge: float = 1.5
+    facteur_prod_tres_faible_marge: float = 0.9
+
+    @property
+    def cout_fixe_total(self):
+        return self.couts_fixes.total_projetes + self.cout_variable
+
+    @property
+    def seuil_rentabilite(self):
+        return self.cout_fixe_total / (self.marge_brute_visee_pct / 100)
+
+
+@dataclass(frozen=True)
+class Totaux:
+    # Situation actuelle
+    ca_total_actuel: float
+    marge_brute_actuelle: float
+    marge_brute_pct_actuelle: float
+    cout_total_actuel: float
+    total_charges_actuel: float
+    resultat_net_actuel: float
+    resultat_net_pct_actuel: float
+    total_fixes_actuels: float
+    total_fixes_projetes: float
+    seuil_rentabilite: float
+    # Après optimisation
+    ca_optimise: float
+    marge_optimisee: float
+    marge_pct_optimisee: float
+    cout_matiere_optimise: float
+    depenses_additionnelles_total: float
+    total_charges_optimise: float
+    resultat_net_optimise: float
+    resultat_net_pct_optimise: float
+
+    def en_dict(self):
+        return {f.name: getattr(self, f.name) for f in fields(self)}
+
+
+@dataclass
+class ResultatSimulation:
+    df_optimise: pd.DataFrame
+    totaux: Totaux
+
+
+def _pct(numerateur, denominateur):
+    return (numerateur / denominateur) * 100 if denominateur > 0 else 0
+
+
+def _marge(df):
+    return df['Marge (%)'].to_numpy(dtype=float) / 100
+
+
+# Colonnes calculées à la demande, à partir des colonnes stockées
+COLONNES_CALCULEES = {
+    'Prix Unitaire HT': lambda df: ttc_to_ht(df['Prix Unitaire (FCFA)'].to_numpy(dtype=float)),
+    'Coût Unitaire': lambda df: valeurs(df, 'Prix Unitaire HT') * (1 - _marge(df)),
+    'CA': lambda df: valeurs(df, 'Prix Unitaire HT') * df['Quantité Période'].to_numpy(),
+    'Marge Valeur': lambda df: valeurs(df, 'CA') * _marge(df),
+    # Marge de la période de référence : CA TTC réalisé moins le coût d'achat TTC des quantités vendues
+    'Marge Valeur TTC': lambda df: (df['CA TTC'].to_numpy()
+                                    - valeurs(df, 'Coût Unitaire') * (1 + TAUX_TVA) * df['Quantité Période'].to_numpy()),
+    # Tableau optimisé
+    'Variation Quantité': lambda df: df['Quantité Optimisée'].to_numpy() - df['Quantité Période'].to_numpy(),
+    'CA Optimisé': lambda df: df['Quantité Optimisée'].to_numpy() * df['Prix Unitaire (FCFA)'].to_numpy(),
+    'Marge Valeur Optimisée': lambda df: valeurs(df, 'CA Optimisé') * _marge(df),
+    'Dépenses Additionnelles': lambda df: valeurs(df, 'Variation Quantité') * valeurs(df, 'Coût Unitaire'),
+    'CA Additionnel': lambda df: valeurs(df, 'Variation Quantité') * df['Prix Unitaire (FCFA)'].to_numpy(),
+}
+
+
+def valeurs(df, nom):
+    """Colonne ``nom`` en tableau NumPy : stockée dans ``df``, sinon calculée (``COLONNES_CALCULEES``)."""
+    if nom in df.columns:
+        return df[nom].to_numpy()
+    return COLONNES_CALCULEES[nom](df)
+
+
+def avec_colonnes(df, noms):
+    """Copie superficielle de ``df`` complétée des colonnes calculées ``noms`` (affichage, export)."""
+    complet = df.copy(deep=False)
+    for nom in noms:
+        if nom not in complet.columns:
+            complet[nom] = valeurs(df, nom)
+    return complet
+
+
+def sommes_par_categorie(df, noms):
+    """Sommes des colonnes ``noms`` (stockées ou calculées) par catégorie.
+
+    Le regroupement se fait sur les codes de la catégorielle ``Catégorie``.
+    """
+    colonnes = pd.DataFrame({nom: valeurs(df, nom) for nom in noms}, index=df['Catégorie'])
+    return colonnes.groupby(level=0, observed=True).sum()
+
+
+def marge_a_cout_constant(prix_ttc, cout_unitaire):
+    """Marge (%) de prix TTC donnés pour un coût unitaire HT donné (0 pour un prix nul)."""
+    prix_ht = ttc_to_ht(np.asarray(prix_ttc, dtype=float))
+    with np.errstate(divide='ignore', invalid='ignore'):
+        return np.where(prix_ht > 0, (1 - cout_unitaire / prix_ht) * 100, 0.0)
+
+
+def preparer_catalogue(df):
+    """Catalogue brut (export CSV) au schéma compact.
+
+    Le CA TTC de référence est celui du fichier (prix × quantité). Les prix TTC
+    sont arrondis au FCFA à coût unitaire constant : leur marge (%) est
+    recalculée.
+    """
+    df = df.rename(columns={col: 'Quantité Période' for col in COLONNES_QUANTITE_HISTORIQUES})
+    prix_ttc = df['Prix Unitaire (FCFA)'].to_numpy(dtype=float)
+    cout_unitaire = ttc_to_ht(prix_ttc) * (1 - _marge(df))
+    prix_arrondis = np.rint(prix_ttc)
+    return typer_catalogue(df.assign(**{
+        'CA TTC': prix_ttc * df['Quantité Période'].to_numpy(),
+        'Prix Unitaire (FCFA)': prix_arrondis,
+        'Marge (%)': marge_a_cout_constant(prix_arrondis, cout_unitaire),
+    }))
+
+
+def appliquer_quantites(df, quantites, ca_ttc=None):
+    """Remplace les quantités de référence et le CA TTC qui en dépend.
+
+    Sans ``ca_ttc`` (CA encaissé sur la nouvelle période), le nouveau CA TTC
+    est valorisé au prix moyen réalisé sur la période de référence (au prix de
+    carte pour un produit qui n'y a pas été vendu). Les colonnes inchangées
+    restent partagées avec ``df`` (copie superficielle).
+    """
+    df = df.copy(deep=False)
+    quantites = en_quantites(quantites)
+    if ca_ttc is None:
+        ca_ttc = prix_moyen_realise(df) * quantites
+    df['Quantité Période'] = quantites
+    df['CA TTC'] = en_montants(ca_ttc)
+    return df
+
+
+def prix_moyen_realise(df):
+    """Prix TTC moyen réalisé sur la période de référence (prix de carte pour un produit non vendu)."""
+    quantites = df['Quantité Période'].to_numpy()
+    with np.errstate(divide='ignore', invalid='ignore'):
+        return np.where(quantites > 0, df['CA TTC'].to_numpy() / quantites,
+                        df['Prix Unitaire (FCFA)'].to_numpy(dtype=float))
+
+
+def appliquer_prix_ttc(df, prix_ttc):
+    """Applique de nouveaux prix TTC (arrondis au FCFA) en conservant le coût unitaire de chaque produit.
+
+    La marge (%) est recalculée à partir du coût unitaire ; ``CA TTC`` (et donc
+    ``Marge Valeur TTC``) reste celui du mois de référence. Les colonnes
+    inchangées restent partagées avec ``df``.
+    """
+    df = df.copy(deep=False)
+    prix_ttc = en_montants(prix_ttc)
+    df['Marge (%)'] = marge_a_cout_constant(prix_ttc, valeurs(df, 'Coût Unitaire'))
+    df['Prix Unitaire (FCFA)'] = prix_ttc
+    return df
+
+
+def facteurs_par_tranche(marge_pct, forte, moyenne, faible, tres_faible):
+    """Facteur d'augmentation de chaque produit selon sa tranche de marge."""
+    s1, s2, s3 = SEUILS_MARGE
+    return np.select(
+        [marge_pct < s1, marge_pct < s2, marge_pct < s3],
+        [tres_faible, faible, moyenne],
+        default=forte,
+    )
+
+
+def calculer_facteurs(df, params, seuil_rentabilite, ca_total_actuel, max_score=None):
+    """Facteur d'augmentation des ventes par produit pour le mode choisi.
+
+    ``max_score`` fixe le score de référence du mode « Maximiser les produits
+    rentables » (par défaut, le meilleur score du catalogue).
+    """
+    marge_pct = df['Marge (%)'].to_numpy(dtype=float)
+    n = len(marge_pct)
+
+    if params.mode_optimisation == "Équilibré":
+        # Stratégie équilibrée - basée sur la marge
+        facteurs = facteurs_par_tranche(
+            marge_pct,
+            params.facteur_prod_forte_marge,
+            params.facteur_prod_moy_marge,
+            params.facteur_prod_faible_marge,
+            params.facteur_prod_tres_faible_marge,
+        ).astype(float)
+    elif params.mode_optimisation == "Maximiser les produits rentables":
+        # Favoriser les produits rentables, pondérés par leur score marge × prix
+        score = marge_pct * df['Prix Unitaire (FCFA)'].to_numpy(dtype=float) / 1000
+        if max_score is None:
+            max_score = score.max() if n else 1.0
+        forte = params.facteur_prod_forte_marge * (0.8 + 0.4 * (score / max_score))
+        facteurs = facteurs_par_tranche(
+            marge_pct,
+            forte,
+            params.facteur_prod_moy_marge,
+            params.facteur_prod_faible_marge,
+            params.facteur_prod_tres_faible_marge,
+        ).astype(float)
+    elif params.mode_optimisation == "Augmentation uniforme":
+        # Facteur uniforme basé sur le ratio requis, limité entre 1.1 et 4.0
+        ratio_augmentation_requis = seuil_rentabilite / ca_total_actuel
+        facteur_uniforme = min(4.0, max(1.1, ratio_augmentation_requis * 0.8))
+        facteurs = np.full(n, facteur_uniforme)
+        # Mais garder facteur_prod_tres_faible_marge pour les produits non rentables
+        facteurs[marge_pct < 0] = params.facteur_prod_tres_faible_marge
+    else:
+        raise ValueError(f"Mode d'optimisation inconnu : {params.mode_optimisation!r}")
+
+    # Si le facteur est 0 pour les produits à très faible marge, mettre à 0 les quantités
+    if params.facteur_prod_tres_faible_marge == 0:
+        facteurs[marge_pct < 0] = 0
+    return facteurs
+
+
+def calculer_situation_actuelle(df, params):
+    """Totaux de la situation actuelle et seuil de rentabilité visé."""
+    couts = params.couts_fixes
+    ca_total_actuel = float(df['CA TTC'].sum())
+    marge_brute_actuelle = float(valeurs(df, 'Marge Valeur TTC').sum())
+    cout_total_actuel = ca_total_actuel - marge_brute_actuelle
+    total_charges_actuel = cout_total_actuel + couts.total_actuels + params.cout_variable
+    resultat_net_actuel = ca_total_actuel - total_charges_actuel
+    return {
+        'ca_total_actuel': ca_total_actuel,
+        'marge_brute_actuelle': marge_brute_actuelle,
+        'marge_brute_pct_actuelle': _pct(marge_brute_actuelle, ca_total_actuel),
+        'cout_total_actuel': cout_total_actuel,
+        'total_charges_actuel': total_charges_actuel,
+        'resultat_net_actuel': resultat_net_actuel,
+        'resultat_net_pct_actuel': _pct(resultat_net_actuel, ca_total_actuel),
+        'total_fixes_actuels': couts.total_actuels,
+        'total_fixes_projetes': couts.total_projetes,
+        'seuil_rentabilite': params.seuil_rentabilite,
+    }
+
+
+def completer_optimisation(df, facteurs, quantite_optimisee=None):
+    """Construit le tableau optimisé à partir des facteurs d'augmentation par produit.
+
+    Si ``quantite_optimisee`` est fournie (mode Solveur), elle remplace l'arrondi
+    de ``Quantité Période × facteur``. Les colonnes du catalogue restent
+    partagées avec ``df`` : seuls le facteur et la quantité optimisée sont
+    stockés, les montants optimisés se calculent à la demande.
+    """
+    df_optimise = df.copy(deep=False)
+    if quantite_optimisee is None:
+        quantite_optimisee = np.round(df['Quantité Période'].to_numpy() * facteurs)
+
+    df_optimise['Facteur Augmentation'] = facteurs
+    df_optimise['Quantité Optimisée'] = en_quantites(quantite_optimisee)
+    return df_optimise
+
+
+def totaliser(df_optimise, params, actuel):
+    """Totaux après optimisation, avec les coûts fixes projetés."""
+    ca_optimise = float(valeurs(df_optimise, 'CA Optimisé').sum())
+    marge_optimisee = float(valeurs(df_optimise, 'Marge Valeur Optimisée').sum())
+    cout_matiere_optimise = ca_optimise - marge_optimisee
+    total_charges_optimise = cout_matiere_optimise + params.couts_fixes.total_projetes + params.cout_variable
+    resultat_net_optimise = ca_optimise - total_charges_optimise
+    return Totaux(
+        **actuel,
+        ca_optimise=ca_optimise,
+        marge_optimisee=marge_optimisee,
+        marge_pct_optimisee=_pct(marge_optimisee, ca_optimise),
+        cout_matiere_optimise=cout_matiere_optimise,
+        depenses_additionnelles_total=float(valeurs(df_optimise, 'Dépenses Additionnelles').sum()),
+        total_charges_optimise=total_charges_optimise,
+        resultat_net_optimise=resultat_net_optimise,
+        resultat_net_pct_optimise=_pct(resultat_net_optimise, ca_optimise),
+    )
+
+
+def simuler(df, params):
+    """Optimise les ventes du catalogue ``df`` (déjà préparé) selon ``params``."""
+    actuel = calculer_situation_actuelle(df, params)
+    facteurs = calculer_facteurs(df, params, actuel['seuil_rentabilite'], actuel['ca_total_actuel'])
+    df_optimise = completer_optimisation(df, facteurs)
+    return ResultatSimulation(df_optimise=df_optimise, totaux=totaliser(df_optimise, params, actuel))
+
+
+def comparer_categories(df, df_optimise, cat_actuel=None):
+    """Comparaison actuel / optimisé du CA et de la marge par catégorie.
+
+    ``cat_actuel`` permet de fournir des agrégats ``CA`` / ``Marge Valeur`` déjà
+    tenus à jour (voir ``edition_prix``) au lieu de les recalculer.
+    """
+    if cat_actuel is None:
+        cat_actuel = sommes_par_categorie(df, ['CA', 'Marge Valeur'])
+    cat_actuel = cat_actuel[['CA', 'Marge Valeur']].copy()
+    cat_actuel['Marge %'] = (cat_actuel['Marge Valeur'] / cat_actuel['CA']) * 100
+
+    cat_optimise = sommes_par_categorie(df_optimise, ['CA Optimisé', 'Marge Valeur Optimisée'])
+    cat_optimise['Marge % Optimisée'] = (cat_optimise['Marge Valeur Optimisée'] / cat_optimise['CA Optimisé']) * 100
+
+    cat_compare = cat_actuel.join(cat_optimise, how='inner').reset_index()
+    cat_compare['Variation CA %'] = ((cat_compare['CA Optimisé'] / cat_compare['CA']) - 1) * 100
+    cat_compare['Variation Marge %'] = cat_compare['Marge % Optimisée'] - cat_compare['Marge %']
+
+    # Tri par CA optimisé décroissant
+    return cat_compare.sort_values(by='CA Optimisé', ascending=False)
@@ -0,0 +1,273 @@
+"""Analyse des paniers : quels produits se vendent ensemble, d'après les lignes de tickets.
+
+Chaque bloc d'export de caisse (lu par ``ingestion.lire_blocs``) devient une
+matrice d'incidence creuse tickets × produits (1 si le produit figure sur le
+ticket) ; le produit ``Xᵀ X`` donne en une opération le nombre de tickets de
+chaque paire de produits, et sur sa diagonale celui de chaque produit. Ces
+comptages s'additionnent d'un bloc à l'autre : seule la table des paires
+(produits × produits, creuse, triangle supérieur) est conservée, jamais les
+tickets, d'où une mémoire bornée par la taille des blocs.
+
+La table des paires et le manifeste des octets déjà traités par fichier sont
+enregistrés après chaque bloc dans un même fichier ``.npz``, remplacé d'un
+coup comme le point de reprise de l'ingestion : une analyse interrompue
+reprend sans recompter un bloc, et un nouveau jour d'export ne fait lire que
+les données nouvelles. Support, confiance et lift
+s'en déduisent à la demande (``classer_paires``).
+
+Usage :
+
+    python -m kizuna.paniers exports/*.csv --etat .paniers \\
+        --reference produits_par_categorie_avril.csv --top 20
+"""
+import argparse
+import glob
+import json
+import os
+import sys
+from dataclasses import dataclass, field
+
+import numpy as np
+import pandas as pd
+from scipy import sparse
+
+from kizuna.ingestion import COLONNES_TICKETS, SITE_PAR_DEFAUT, TAILLE_BLOC, _ecrire_atomique, lire_blocs
+
+CLES_TICKET = ['Site', 'Jour', 'Ticket']
+TICKETS_MIN = 5  # paires vues sur moins de tickets : lift trop bruité pour être classé
+
+COLONNES_PAIRES = [
+    'Produit A', 'Produit B', 'Tickets', 'Support', 'Confiance A→B', 'Confiance B→A', 'Lift',
+    'Marge combinée (%)', 'Score',
+]
+
+
+@dataclass
+class EtatPaniers:
+    dossier: str
+    produits: list = field(default_factory=list)  # colonne de chaque produit dans ``paires``
+    tickets: int = 0
+    paires: sparse.csr_matrix = field(default_factory=lambda: sparse.csr_matrix((0, 0), dtype=np.int64))
+    manifeste: dict = field(default_factory=dict)
+
+    @property
+    def chemin_etat(self):
+        return os.path.join(self.dossier, 'etat.npz')
+
+    @property
+    def chemin_paires(self):
+        """Table des paires séparée des versions précédentes, relue seulement en l'absence de ``etat.npz``."""
+        return os.path.join(self.dossier, 'paires.npz')
+
+    @property
+    def chemin_manifeste(self):
+        return os.path.join(self.dossier, 'manifeste.json')
+
+
+def _appliquer_meta(etat, meta):
+    etat.produits, etat.tickets, etat.manifeste = meta['produits'], meta['tickets'], meta['fichiers']
+
+
+def charger_etat(dossier):
+    etat = EtatPaniers(dossier=dossier)
+    if os.path.exists(etat.chemin_etat):
+        with np.load(etat.chemin_etat) as archive:
+            _appliquer_meta(etat, json.loads(str(archive['meta'])))
+            etat.paires = sparse.csr_matrix(
+                (archive['data'], archive['indices'], archive['indptr']), shape=tuple(archive['shape'])
+            )
+    elif os.path.exists(etat.chemin_manifeste):
+        with open(etat.chemin_manifeste, encoding='utf-8') as f:
+            _appliquer_meta(etat, json.load(f))
+        etat.paires = sparse.load_npz(etat.chemin_paires).tocsr()
+    return etat
+
+
+def enregistrer_etat(etat):
+    """Enregistre la table des paires et le manifeste dans un seul fichier, remplacé d'un coup."""
+    os.makedirs(etat.dossier, exist_ok=True)
+    paires = etat.paires.tocsr()
+    meta = json.dumps({'produits': etat.produits, 'tickets': etat.tickets, 'fichiers': etat.manifeste},
+                      ensure_ascii=False)
+
+    def ecrire(chemin):
+        with open(chemin, 'wb') as f:  # fichier ouvert : numpy n'ajoute pas l'extension .npz au temporaire
+            np.savez(f, data=paires.data, indices=paires.indices, indptr=paires.indptr,
+                     shape=np.array(paires.shape), meta=np.array(meta))
+    _ecrire_atomique(etat.chemin_etat, ecrire)
+    for ancien in (etat.chemin_manifeste, etat.chemin_paires):
+        if os.path.exists(ancien):
+            os.remove(ancien)  # le point de reprise unique fait désormais foi
+
+
+def paniers_des_lignes(lignes):
+    """Lignes de tickets réduites à (site, jour, ticket, produit) ; les retours et annulations sont écartés."""
+    c = COLONNES_TICKETS
+    site = lignes[c['site']] if c['site'] in lignes else pd.Series(SITE_PAR_DEFAUT, index=lignes.index)
+    paniers = pd.DataFrame({
+        'Site': site.astype(str),
+        'Jour': pd.to_datetime(lignes[c['date']]).dt.floor('D'),
+        'Ticket': lignes[c['ticket']].astype(str),
+        'Produit': lignes[c['produit']].astype(str),
+    })
+    if c['quantite'] in lignes:
+        paniers = paniers[pd.to_numeric(lignes[c['quantite']]).to_numpy() > 0]
+    return paniers
+
+
+def _separer_dernier_ticket(paniers):
+    """(lignes complètes, lignes du dernier ticket) : ce ticket peut se poursuivre dans le bloc suivant."""
+    if paniers.empty:
+        return paniers, paniers
+    # Filtre sur le numéro de ticket d'abord, puis sur le site et le jour parmi les seules lignes retenues
+    dernier = paniers['Ticket'].to_numpy() == paniers['Ticket'].iat[-1]
+    candidats = paniers[dernier]
+    dernier[dernier] = (candidats[CLES_TICKET] == candidats[CLES_TICKET].iloc[-1]).all(axis=1).to_numpy()
+    return paniers[~dernier], paniers[dernier]
+
+
+def _attente_depuis_json(en_attente):
+    paniers = pd.DataFrame(en_attente, columns=CLES_TICKET + ['Produit'], dtype=str)
+    paniers['Jour'] = pd.to_datetime(paniers['Jour'])
+    return paniers
+
+
+def _attente_en_json(paniers):
+    return paniers.astype({'Jour': str}).to_dict('list')
+
+
+def _ajouter_produits(etat, noms):
+    nouveaux = pd.Index(pd.unique(noms)).difference(pd.Index(etat.produits), sort=False)
+    if len(nouveaux):
+        etat.produits = etat.produits + list(nouveaux)
+        etat.paires = etat.paires.copy()
+        etat.paires.resize((len(etat.produits), len(etat.produits)))
+    return pd.Index(etat.produits)
+
+
+def compter_paniers(etat, paniers):
+    """Ajoute à ``etat`` les tickets de ``paniers`` (lignes de tickets complets)."""
+    if paniers.empty:
+        return
+    index_produits = _ajouter_produits(etat, paniers['Produit'])
+    tickets = paniers.groupby(CLES_TICKET, sort=False).ngroup().to_numpy()
+    produits = index_produits.get_indexer(paniers['Produit'])
+    n_tickets, n_produits = tickets.max() + 1, len(index_produits)
+
+    # Incidence binaire : un produit compté une fois par ticket, quel que soit le nombre de lignes
+    incidence = sparse.csr_matrix((np.ones(len(tickets), dtype=np.int32), (tickets, produits)),
+                                  shape=(n_tickets, n_produits))
+    incidence.data[:] = 1
+    cooccurrences = sparse.triu(incidence.T @ incidence, format='csr').astype(np.int64)
+    etat.paires = etat.paires + cooccurrences
+    etat.tickets += int(n_tickets)
+
+
+def ingerer(sources, dossier_etat, taille_bloc=TAILLE_BLOC):
+    """Ingère les fichiers ``sources`` (chemins ou motifs glob) ; renvoie l'état à jour.
+
+    Le dernier ticket d'un bloc est compté avec le bloc suivant (il est gardé
+    dans le manifeste d'ici là) ; une fois le fichier lu jusqu'au bout, il est
+    considéré complet.
+    """
+    etat = charger_etat(dossier_etat)
+    chemins = sorted({chemin for motif in sources for chemin in (glob.glob(motif) or [motif])})
+
+    for chemin in chemins:
+        cle = os.path.abspath(chemin)
+        suivi = etat.manifeste.get(cle, {})
+        deja_traite = suivi.get('octets', 0)
+        taille = os.path.getsize(chemin)
+        if taille < deja_traite:
+            raise ValueError(f"{chemin} a été tronqué depuis la dernière analyse ({taille} < {deja_traite} octets)")
+        if taille == deja_traite:
+            continue
+
+        en_attente = _attente_depuis_json(suivi.get('en_attente', {}))
+        for lignes, fin in lire_blocs(chemin, deja_traite, taille_bloc):
+            paniers = paniers_des_lignes(lignes)
+            if len(en_attente):
+                paniers = pd.concat([en_attente, paniers], ignore_index=True)
+            complets, en_attente = _separer_dernier_ticket(paniers)
+            compter_paniers(etat, complets)
+            suivi = {
+                'octets': fin,
+                'lignes': suivi.get('lignes', 0) + len(lignes),
+                'en_attente': _attente_en_json(en_attente),
+            }
+            etat.manifeste[cle] = suivi
+            # Point de reprise après chaque bloc
+            enregistrer_etat(etat)
+
+        # Fichier lu jusqu'au bout : le ticket en attente est complet
+        if suivi.get('octets') == taille and suivi.get('en_attente') is not None:
+            compter_paniers(etat, en_attente)
+            etat.manifeste[cle] = {k: v for k, v in suivi.items() if k != 'en_attente'}
+            enregistrer_etat(etat)
+    return etat
+
+
+def classer_paires(etat, catalogue, tickets_min=TICKETS_MIN):
+    """Paires de produits avec support, confiance et lift, classées par lift pondéré par la marge.
+
+    Le score vaut ``lift × marge combinée / 100``, la marge combinée étant la
+    moyenne des ``Marge (%)`` des deux produits dans ``catalogue`` : une paire
+    très associée mais peu rentable est classée après une paire associée et
+    rentable. Les produits absents du catalogue sont écartés.
+    """
+    paires = etat.paires.tocoo()
+    tickets_produit = etat.paires.diagonal()
+    garder = (paires.row < paires.col) & (paires.data >= tickets_min)
+    a, b, communs = paires.row[garder], paires.col[garder], paires.data[garder]
+
+    marges = pd.Series(catalogue['Marge (%)'].to_numpy(dtype=float), index=catalogue['Produit'].astype(str))
+    marges = marges[~marges.index.duplicated()].reindex(etat.produits).to_numpy()
+    marge_combinee = (marges[a] + marges[b]) / 2
+    connues = ~np.isnan(marge_combinee)
+    a, b, communs, marge_combinee = a[connues], b[connues], communs[connues], marge_combinee[connues]
+
+    n_a, n_b = tickets_produit[a], tickets_produit[b]
+    lift = communs * etat.tickets / (n_a * n_b)
+    produits = np.asarray(etat.produits, dtype=object)
+    classement = pd.DataFrame({
+        'Produit A': produits[a],
+        'Produit B': produits[b],
+        'Tickets': communs,
+        'Support': communs / etat.tickets,
+        'Confiance A→B': communs / n_a,
+        'Confiance B→A': communs / n_b,
+        'Lift': lift,
+        'Marge combinée (%)': marge_combinee,
+        'Score': lift * marge_combinee / 100,
+    }, columns=COLONNES_PAIRES)
+    return classement.sort_values(['Score', 'Tickets'], ascending=False, kind='stable', ignore_index=True)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Analyse incrémentale des paniers (produits vendus ensemble).")
+    parser.add_argument('sources', nargs='+', help="fichiers CSV/JSONL de lignes de tickets (motifs glob acceptés)")
+    parser.add_argument('--etat', default='.paniers', help="dossier de la table des paires")
+    parser.add_argument('--taille-bloc', type=int, default=TAILLE_BLOC, help="octets lus par bloc")
+    parser.add_argument('--reference', help="catalogue portant les marges, pour classer les paires")
+    parser.add_argument('--tickets-min', type=int, default=TICKETS_MIN, help="tickets communs minimum d'une paire")
+    parser.add_argument('--top', type=int, default=20, help="paires affichées")
+    parser.add_argument('--sortie', help="chemin CSV du classement complet")
+    args = parser.parse_args(argv)
+
+    etat = ingerer(args.sources, args.etat, args.taille_bloc)
+    print(f"{len(etat.manifeste)} fichier(s) suivis, {etat.tickets:,} tickets, "
+          f"{len(etat.produits)} produits, {etat.paires.nnz:,} paires et produits comptés")
+
+    if args.reference:
+        classement = classer_paires(etat, pd.read_csv(args.reference), args.tickets_min)
+        print(classement.head(args.top).to_string(index=False, float_format=lambda x: f"{x:,.3f}"))
+        if args.sortie:
+            classement.to_csv(args.sortie, index=False)
+            print(f"{len(classement)} paires -> {args.sortie}")
+    elif args.sortie:
+        parser.error("--sortie nécessite --reference")
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
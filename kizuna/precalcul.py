@@ -0,0 +1,168 @@
+"""Précalcul spéculatif, en arrière-plan, des résultats de chaque mode d'optimisation.
+
+Dès qu'un résultat est affiché, les autres modes sont calculés pour les mêmes
+entrées dans un pool de threads partagé par le processus, et rangés dans le
+cache des résultats sous leur propre empreinte : passer d'un mode à l'autre
+ne fait alors plus qu'une lecture du cache. Quand les entrées changent, les
+tâches devenues inutiles sont annulées (retirées de la file si elles n'ont pas
+démarré, interrompues entre deux étapes sinon) et leur résultat n'est pas
+mis en cache.
+
+Le mode affiché ne passe pas par ce pool : l'application le calcule de façon
+synchrone, en déclarant ce calcul au premier plan (``PremierPlan``). Tant
+qu'un calcul de premier plan est en cours dans le processus, les tâches
+d'arrière-plan ne démarrent pas et celles en cours s'arrêtent à l'étape
+suivante pour lui laisser le processeur.
+"""
+import threading
+from contextlib import contextmanager
+from concurrent.futures import CancelledError, ThreadPoolExecutor, TimeoutError
+from dataclasses import dataclass
+
+from kizuna.moteur import comparer_categories, simuler
+
+TACHES_SIMULTANEES = 2  # threads du pool partagé par les sessions, pour les modes non affichés
+ATTENTE_PREMIER_PLAN = 0.1  # secondes entre deux vérifications de l'annulation pendant l'attente
+
+
+class CalculAnnule(Exception):
+    """Les entrées ont changé pendant le calcul : son résultat ne sert plus."""
+
+
+def verifier(annulation):
+    if annulation.is_set():
+        raise CalculAnnule
+
+
+class PremierPlan:
+    """Calculs synchrones en cours dans le processus : l'arrière-plan leur cède la place."""
+
+    def __init__(self):
+        self._en_cours = 0
+        self._condition = threading.Condition()
+
+    @contextmanager
+    def calcul(self):
+        with self._condition:
+            self._en_cours += 1
+        try:
+            yield
+        finally:
+            with self._condition:
+                self._en_cours -= 1
+                self._condition.notify_all()
+
+    def attendre(self, annulation):
+        """Attend qu'aucun calcul de premier plan ne soit en cours (ou que ``annulation`` soit levée)."""
+        with self._condition:
+            while self._en_cours and not annulation.is_set():
+                self._condition.wait(ATTENTE_PREMIER_PLAN)
+
+
+class _Pause:
+    """Annulation vue par une tâche d'arrière-plan : chaque vérification cède d'abord la place au premier plan."""
+
+    def __init__(self, annulation, premier_plan):
+        self.annulation = annulation
+        self.premier_plan = premier_plan
+
+    def is_set(self):
+        self.premier_plan.attendre(self.annulation)
+        return self.annulation.is_set()
+
+
+def optimiser_mode(df, params, agregats_categorie, annulation):
+    """Résultat d'optimisation et comparaison par catégorie, comme le calcul synchrone de l'application.
+
+    ``agregats_categorie`` doit être une copie : l'édition des prix met à jour
+    les agrégats de la session en place.
+    """
+    verifier(annulation)
+    resultat = simuler(df, params)
+    verifier(annulation)
+    return resultat, None, comparer_categories(df, resultat.df_optimise, agregats_categorie)
+
+
+def creer_executeur(taches_simultanees=TACHES_SIMULTANEES):
+    return ThreadPoolExecutor(max_workers=taches_simultanees, thread_name_prefix='precalcul')
+
+
+@dataclass
+class Tache:
+    future: object
+    annulation: threading.Event
+
+    def terminee(self, delai=None):
+        """Vrai si la tâche a fini (résultat en cache, ou annulée) dans le délai ; ses erreurs sont relevées."""
+        try:
+            self.future.result(timeout=delai)
+        except TimeoutError:
+            return False
+        except (CancelledError, CalculAnnule):
+            pass
+        return True
+
+
+class Precalculs:
+    """Tâches d'arrière-plan d'une session, indexées par clé de résultat.
+
+    Les résultats ne sont conservés que dans le cache : une tâche finie ne
+    garde aucune référence vers sa valeur. Avec ``premier_plan`` (partagé par
+    le processus), chaque tâche attend avant de démarrer, et entre deux
+    étapes, qu'aucun calcul synchrone ne soit en cours.
+    """
+
+    def __init__(self, executeur, cache, premier_plan=None):
+        self.executeur = executeur
+        self.cache = cache
+        self.premier_plan = premier_plan or PremierPlan()
+        self._taches = {}
+        self._verrou = threading.Lock()
+
+    def _executer(self, cle, calcul, annulation):
+        pause = _Pause(annulation, self.premier_plan)
+        verifier(pause)
+        valeur = calcul(pause)
+        verifier(annulation)
+        self.cache.set(cle, valeur)
+
+    def lancer(self, cle, calcul):
+        """Soumet ``calcul(annulation)`` sauf si ``cle`` est en cache ou déjà en cours ; renvoie la tâche ou ``None``."""
+        with self._verrou:
+            tache = self._taches.get(cle)
+            if tache is not None and not tache.future.done():
+                return tache
+            if cle in self.cache:
+                return None
+            annulation = threading.Event()
+            tache = Tache(self.executeur.submit(self._executer, cle, calcul, annulation), annulation)
+            self._taches[cle] = tache
+            return tache
+
+    def reprendre(self, cle):
+        """Retire ``cle`` de l'arrière-plan pour un calcul synchrone.
+
+        Une tâche encore en file est annulée et ``None`` est renvoyé : l'appelant
+        calcule lui-même. Une tâche déjà démarrée est renvoyée pour être attendue.
+        """
+        with self._verrou:
+            tache = self._taches.get(cle)
+            if tache is None or tache.future.done() or tache.future.cancel():
+                self._taches.pop(cle, None)
+                return None
+            return tache
+
+    def garder(self, cles):
+        """Annule les tâches dont la clé n'est pas dans ``cles`` et oublie les tâches terminées."""
+        with self._verrou:
+            for cle, tache in list(self._taches.items()):
+                if cle not in cles:
+                    tache.annulation.set()
+                    tache.future.cancel()
+                if cle not in cles or tache.future.done():
+                    del self._taches[cle]
+
+    def en_cours(self, cle):
+        with self._verrou:
+            tache = self._taches.get(cle)
+            return tache is not None and not tache.future.done()
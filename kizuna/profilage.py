@@ -0,0 +1,74 @@
+"""Profilage des reruns : durée de chaque étape nommée du script.
+
+Un ``Profileur`` par session garde un historique glissant des durées par
+étape et par rerun, d'où l'on tire médiane et 95e percentile. Inactif, il ne
+fait rien d'autre qu'ouvrir un contexte vide.
+"""
+import json
+import time
+from collections import defaultdict, deque
+from contextlib import contextmanager
+from datetime import datetime
+
+import numpy as np
+import pandas as pd
+
+TAILLE_HISTORIQUE = 200  # mesures gardées par étape
+
+
+class Profileur:
+    def __init__(self, taille_historique=TAILLE_HISTORIQUE):
+        self.actif = False
+        self.taille_historique = taille_historique
+        self.durees = defaultdict(lambda: deque(maxlen=taille_historique))  # étape -> durées (ms)
+        self.reruns = deque(maxlen=taille_historique)
+        self._rerun = None
+
+    def debut_rerun(self):
+        self._rerun = {'debut': time.perf_counter(), 'horodatage': datetime.now().isoformat(timespec='seconds'),
+                       'etapes': {}}
+
+    def fin_rerun(self):
+        """Clôt le rerun courant ; les reruns partiels (fragments) ne passent pas par ici."""
+        if not self.actif or self._rerun is None:
+            return
+        rerun, self._rerun = self._rerun, None
+        total = (time.perf_counter() - rerun.pop('debut')) * 1000
+        self.durees['Rerun complet'].append(total)
+        self.reruns.append({**rerun, 'total_ms': total})
+
+    @contextmanager
+    def etape(self, nom):
+        if not self.actif:
+            yield
+            return
+        debut = time.perf_counter()
+        try:
+            yield
+        finally:
+            duree = (time.perf_counter() - debut) * 1000
+            self.durees[nom].append(duree)
+            if self._rerun is not None:
+                self._rerun['etapes'][nom] = self._rerun['etapes'].get(nom, 0.0) + duree
+
+    def statistiques(self):
+        """Par étape : nombre de mesures, dernière durée, p50, p95 et maximum (ms)."""
+        lignes = []
+        for nom, durees in self.durees.items():
+            valeurs = np.fromiter(durees, dtype=float)
+            p50, p95 = np.percentile(valeurs, [50, 95])
+            lignes.append({'Étape': nom, 'Mesures': len(valeurs), 'Dernier (ms)': valeurs[-1],
+                           'p50 (ms)': p50, 'p95 (ms)': p95, 'Max (ms)': valeurs.max()})
+        colonnes = ['Étape', 'Mesures', 'Dernier (ms)', 'p50 (ms)', 'p95 (ms)', 'Max (ms)']
+        return pd.DataFrame(lignes, columns=colonnes).sort_values('p50 (ms)', ascending=False, ignore_index=True)
+
+    def exporter_json(self):
+        return json.dumps({
+            'statistiques': self.statistiques().to_dict(orient='records'),
+            'durees_ms': {nom: list(durees) for nom, durees in self.durees.items()},
+            'reruns': list(self.reruns),
+        }, ensure_ascii=False, indent=1)
+
+    def vider(self):
+        self.durees.clear()
+        self.reruns.clear()
@@ -0,0 +1,199 @@
+"""Ressources partagées par toutes les sessions du serveur Streamlit, et leur préchauffage.
+
+Les chargements et objets gardés une fois par processus (``st.cache_resource``)
+sont définis ici plutôt que dans le script de l'application : le script les
+importe, et le lanceur (``demarrage``) les remplit dès le démarrage du
+serveur. Une même fonction donne la même entrée de cache, qu'elle soit
+appelée par une session ou par le préchauffage (qui s'exécute dans un
+contexte de rerun sans session) ; une session qui arrive pendant le
+préchauffage attend le calcul en cours au lieu de le refaire.
+
+C'est le seul module du paquet qui dépend de Streamlit.
+"""
+import os
+import threading
+from dataclasses import replace
+
+import pandas as pd
+import streamlit as st
+
+from kizuna.cache import CacheResultats, empreinte, version_fichier
+from kizuna.catalogue import charger_catalogue
+from kizuna.edition_prix import agreger_par_categorie, catalogue_de_base
+from kizuna.elasticite import ELASTICITE_A_PRIORI, ajuster_elasticites
+from kizuna.export import creer_executeur_export
+from kizuna.figures import figure_ca_categories
+from kizuna.historique import appliquer_periode, construire_historique, historique_depuis_catalogue
+from kizuna.moteur import MODES_OPTIMISATION, ParametresSimulation
+from kizuna.precalcul import PremierPlan, creer_executeur, optimiser_mode
+from kizuna.profilage import Profileur
+
+FICHIER_CATALOGUE = "produits_par_categorie_avril.csv"
+MOIS_CATALOGUE = "2025-04"  # mois couvert par FICHIER_CATALOGUE, utilisé sans historique ingéré
+AGREGATS_HISTORIQUE = os.path.join(".ingestion", "agregats.csv")  # produit par python -m kizuna.ingestion
+ETAT_PANIERS = os.path.join(".paniers", "etat.npz")  # produit par python -m kizuna.paniers
+
+
+def version_catalogue():
+    return version_fichier(FICHIER_CATALOGUE) if os.path.exists(FICHIER_CATALOGUE) else None
+
+
+def version_agregats():
+    return version_fichier(AGREGATS_HISTORIQUE) if os.path.exists(AGREGATS_HISTORIQUE) else None
+
+
+# Cache des résultats d'optimisation (et des figures qui en dérivent)
+@st.cache_resource
+def cache_resultats():
+    return CacheResultats(taille_max=128, ttl=3600)
+
+
+# Pool de threads du précalcul des autres modes
+@st.cache_resource
+def executeur_precalcul():
+    return creer_executeur()
+
+
+# Calculs synchrones en cours, devant lesquels le précalcul s'efface
+@st.cache_resource
+def premier_plan():
+    return PremierPlan()
+
+
+# Thread des exports de rapports (Excel/PDF)
+@st.cache_resource
+def executeur_export():
+    return creer_executeur_export()
+
+
+# Catalogue préparé (la version du fichier source invalide le cache mémoire quand le CSV change ;
+# un seul exemplaire par processus, partagé en lecture seule par toutes les sessions)
+@st.cache_resource
+def charger_donnees(version):
+    try:
+        # Catalogue et métriques par produit, relus depuis le cache disque colonnaire s'il est à jour
+        return charger_catalogue(FICHIER_CATALOGUE)
+    except Exception as e:
+        st.error(f"Erreur lors du chargement des données: {e}")
+        return None
+
+
+# Historique produit × mois × site, construit une fois par version des sources
+@st.cache_resource
+def charger_historique(version_catalogue, version_agregats):
+    catalogue = charger_donnees(version_catalogue)
+    if version_agregats is None:
+        return historique_depuis_catalogue(catalogue, MOIS_CATALOGUE)
+    return construire_historique(pd.read_csv(AGREGATS_HISTORIQUE, dtype={'Mois': str, 'Site': str}), catalogue)
+
+
+# Élasticités-prix par produit, estimées une fois par version des sources et par valeur a priori
+@st.cache_resource
+def charger_elasticites(version_catalogue, version_agregats, a_priori):
+    return ajuster_elasticites(charger_historique(version_catalogue, version_agregats), a_priori)
+
+
+# Table des paires de produits vendus ensemble, relue quand une analyse des paniers l'a mise à jour
+@st.cache_resource
+def charger_paniers(version):
+    from kizuna.paniers import charger_etat  # SciPy n'est chargé que si une analyse des paniers existe
+
+    return charger_etat(os.path.dirname(ETAT_PANIERS))
+
+
+# Catalogue de la période aux prix arrondis et grille de prix de départ, partagés en lecture seule :
+# chaque session n'y ajoute que sa surcouche de prix modifiés
+@st.cache_resource(max_entries=16)
+def catalogue_periode(version_catalogue, version_agregats, cle_periode):
+    mois, sites, fenetre = cle_periode
+    base = catalogue_de_base(appliquer_periode(
+        charger_donnees(version_catalogue), charger_historique(version_catalogue, version_agregats),
+        mois, list(sites) or None, fenetre
+    ))
+    # La grille reprend les colonnes de la base sans les recopier
+    grille = pd.DataFrame({col: base[col] for col in ['Catégorie', 'Produit', 'Prix Unitaire (FCFA)']}, copy=False)
+    return base, grille
+
+
+def cle_optimisation(df, params, contraintes=None, cle_periode=None):
+    """Empreinte d'un résultat d'optimisation, partagée par les sessions.
+
+    Couvre les sources (catalogue et historique ingéré), la période et les
+    sites (``cle_periode``), les quantités, CA TTC et prix édités, et les
+    paramètres : deux sessions n'obtiennent le même résultat que pour les
+    mêmes entrées.
+    """
+    return empreinte(
+        version_catalogue(), version_agregats(), cle_periode, df['Quantité Période'].to_numpy(),
+        df['CA TTC'].to_numpy(), df['Prix Unitaire (FCFA)'].to_numpy(), params, contraintes
+    )
+
+
+def contexte_hors_session():
+    """Contexte de rerun sans session ni navigateur (messages ignorés), pour le thread courant.
+
+    ``st.cache_resource`` ne lit ni n'écrit ses entrées hors d'un rerun : sans
+    ce contexte, le préchauffage calculerait tout sans rien garder. Construit
+    comme celui du ``ScriptRunner`` de Streamlit 1.37.
+    """
+    from streamlit.runtime.fragment import MemoryFragmentStorage
+    from streamlit.runtime.memory_uploaded_file_manager import MemoryUploadedFileManager
+    from streamlit.runtime.pages_manager import PagesManager
+    from streamlit.runtime.scriptrunner import ScriptRunContext, add_script_run_ctx, get_script_run_ctx
+    from streamlit.runtime.state import SafeSessionState, SessionState
+
+    if get_script_run_ctx(suppress_warning=True) is None:
+        script = os.path.abspath("kizuna_optimisation_v9.py")
+        add_script_run_ctx(ctx=ScriptRunContext(
+            session_id="prechauffage",
+            _enqueue=lambda message: None,
+            query_string="",
+            session_state=SafeSessionState(SessionState(), yield_callback=lambda: None),
+            uploaded_file_mgr=MemoryUploadedFileManager("/prechauffage"),
+            main_script_path=script,
+            user_info={"email": None},
+            fragment_storage=MemoryFragmentStorage(),
+            pages_manager=PagesManager(script, setup_watcher=False),
+        ))
+
+
+def prechauffer(params=None):
+    """Remplit les caches du processus pour la page par défaut ; renvoie la durée de chaque étape (ms).
+
+    Catalogue, historique, catalogue de la période par défaut (dernier mois,
+    tous les sites, mois seul) et élasticités, puis les résultats des modes
+    heuristiques pour ``params`` (par défaut, les valeurs initiales de la barre
+    latérale) et une première figure, qui charge Plotly.
+    """
+    contexte_hors_session()
+    params = params or ParametresSimulation()
+    profileur = Profileur()
+    profileur.actif = True
+
+    with profileur.etape("Catalogue"):
+        version = version_catalogue()
+        catalogue = charger_donnees(version)
+    if catalogue is None:
+        return {}
+    with profileur.etape("Historique"):
+        historique = charger_historique(version, version_agregats())
+    with profileur.etape("Catalogue de la période"):
+        sites = tuple(historique.sites) if len(historique.sites) > 1 else ()
+        cle_periode = (str(historique.mois[-1]), sites, 1)
+        base, _ = catalogue_periode(version, version_agregats(), cle_periode)
+    with profileur.etape("Élasticités-prix"):
+        charger_elasticites(version, version_agregats(), ELASTICITE_A_PRIORI)
+
+    cache = cache_resultats()
+    agregats_categorie = agreger_par_categorie(base)
+    resultats = {}
+    with profileur.etape("Optimisation des modes"):
+        for mode in MODES_OPTIMISATION:
+            params_mode = replace(params, mode_optimisation=mode)
+            resultats[mode] = cache.obtenir(
+                cle_optimisation(base, params_mode, cle_periode=cle_periode),
+                lambda: optimiser_mode(base, params_mode, agregats_categorie, threading.Event())
+            )
+    with profileur.etape("Première figure"):
+        figure_ca_categories(resultats[params.mode_optimisation][2])
+    return {nom: durees[-1] for nom, durees in profileur.durees.items()}
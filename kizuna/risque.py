@@ -0,0 +1,150 @@
+"""Simulation Monte Carlo du risque de demande sur le résultat net projeté.
+
+Pour chaque scénario, la demande de chaque produit est tirée autour de sa
+quantité optimisée (loi de Poisson, ou binomiale négative pour une demande
+plus dispersée, avec approximation normale pour les fortes demandes). Le CA,
+la marge et le résultat net de tous les scénarios s'obtiennent par un produit matriciel (scénarios × produits). Les scénarios
+sont découpés en lots répartis sur un pool de processus ; chaque lot a sa
+propre graine dérivée de la graine principale, si bien que les résultats ne
+dépendent pas du nombre de processus. Le pool est créé au premier calcul
+parallèle et gardé pour les suivants (démarrer un processus et y réimporter
+NumPy coûte plus que bien des simulations) ; un seul processeur, ou peu de
+tirages, et les lots sont simulés dans le processus courant.
+"""
+import multiprocessing
+import os
+import threading
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from dataclasses import dataclass
+
+import numpy as np
+
+LOIS_DEMANDE = ["Poisson", "Binomiale négative"]
+PERCENTILES = (5, 25, 50, 75, 95)
+
+# Au-delà de cette intensité, Poisson(λ) est tiré comme N(λ, λ) arrondi (écart négligeable, ~4× plus rapide)
+SEUIL_APPROXIMATION_NORMALE = 30
+# En deçà de ce nombre de tirages (scénarios × produits), le pool coûte plus qu'il ne rapporte
+SEUIL_TIRAGES_POOL = 5_000_000
+
+_pools = {}  # nombre de processus -> pool, gardé jusqu'à la fin du processus
+_verrou_pools = threading.Lock()
+
+
+@dataclass(frozen=True)
+class ParametresRisque:
+    n_scenarios: int = 100_000
+    loi: str = "Poisson"
+    dispersion: float = 10.0  # binomiale négative : variance = μ + μ² / dispersion
+    graine: int = 42
+    taille_lot: int = 5_000
+    processus: int = 0  # 0 : autant que de processeurs, 1 : pas de pool
+
+
+@dataclass
+class ResultatRisque:
+    ca: np.ndarray
+    resultat_net: np.ndarray
+    seuil_rentabilite: float
+
+    @property
+    def probabilite_seuil(self):
+        """Probabilité que le CA atteigne le seuil de rentabilité."""
+        return float(np.mean(self.ca >= self.seuil_rentabilite))
+
+    @property
+    def probabilite_benefice(self):
+        return float(np.mean(self.resultat_net >= 0))
+
+    def percentiles(self, valeurs=PERCENTILES):
+        return {
+            'ca': dict(zip(valeurs, np.percentile(self.ca, valeurs))),
+            'resultat_net': dict(zip(valeurs, np.percentile(self.resultat_net, valeurs))),
+        }
+
+
+def _tirer_poisson(rng, n, intensite, k):
+    """``n`` tirages de Poisson par produit ; approximation normale (arrondie, bornée à 0) au-delà de la colonne ``k``.
+
+    ``intensite`` est soit un vecteur par produit, soit une matrice (n, produits).
+    """
+    m = intensite.shape[-1]
+    demande = np.empty((n, m), dtype=np.float32)
+    demande[:, :k] = rng.poisson(intensite[..., :k], size=(n, k))
+    fortes = intensite[..., k:].astype(np.float32)
+    bruit = rng.standard_normal((n, m - k), dtype=np.float32)
+    bruit *= np.sqrt(fortes)
+    bruit += fortes
+    np.rint(bruit, out=bruit)
+    np.maximum(bruit, 0, out=demande[:, k:])
+    return demande
+
+
+def _simuler_lot(graine, n, moyennes, valeurs, loi, dispersion, k):
+    """CA et marge de ``n`` scénarios ; ``valeurs`` a pour colonnes prix TTC et marge unitaire.
+
+    Les produits sont ordonnés de sorte que les ``k`` premiers aient une demande
+    moyenne sous ``SEUIL_APPROXIMATION_NORMALE``.
+    """
+    rng = np.random.default_rng(graine)
+    if loi == "Poisson":
+        intensite = moyennes
+    elif loi == "Binomiale négative":
+        # Mélange gamma-Poisson : moyenne μ, variance μ + μ² / dispersion
+        intensite = rng.gamma(dispersion, moyennes / dispersion, size=(n, len(moyennes)))
+    else:
+        raise ValueError(f"Loi de demande inconnue : {loi!r}")
+    return _tirer_poisson(rng, n, intensite, k) @ valeurs
+
+
+def pool_processus(processus):
+    """Pool de ``processus`` processus, créé au premier appel puis réutilisé."""
+    with _verrou_pools:
+        pool = _pools.get(processus)
+        if pool is None:
+            # « spawn » : les processus ne dupliquent pas les threads du serveur Streamlit
+            contexte = multiprocessing.get_context('spawn')
+            pool = _pools[processus] = ProcessPoolExecutor(max_workers=processus, mp_context=contexte)
+        return pool
+
+
+def _simuler_lots(arguments, processus):
+    pool = pool_processus(processus)
+    try:
+        return list(pool.map(_simuler_lot, *zip(*arguments)))
+    except BrokenProcessPool:
+        # Un processus a été tué : le pool est recréé au prochain calcul
+        with _verrou_pools:
+            if _pools.get(processus) is pool:
+                del _pools[processus]
+        raise
+
+
+def simuler_risque(df_optimise, params, parametres_risque=None):
+    """Distribution du CA et du résultat net autour des quantités optimisées."""
+    pr = parametres_risque or ParametresRisque()
+    moyennes = df_optimise['Quantité Optimisée'].to_numpy(dtype=float)
+    prix_ttc = df_optimise['Prix Unitaire (FCFA)'].to_numpy(dtype=float)
+    valeurs = np.column_stack((prix_ttc, prix_ttc * df_optimise['Marge (%)'].to_numpy(dtype=float) / 100))
+
+    # Produits à faible demande d'abord : tirage exact, puis approximation normale
+    ordre = np.argsort(moyennes >= SEUIL_APPROXIMATION_NORMALE, kind='stable')
+    moyennes, valeurs = moyennes[ordre], valeurs[ordre]
+    k = int(np.count_nonzero(moyennes < SEUIL_APPROXIMATION_NORMALE))
+
+    tailles = [pr.taille_lot] * (pr.n_scenarios // pr.taille_lot)
+    if pr.n_scenarios % pr.taille_lot:
+        tailles.append(pr.n_scenarios % pr.taille_lot)
+    graines = np.random.SeedSequence(pr.graine).spawn(len(tailles))
+    arguments = [(g, n, moyennes, valeurs, pr.loi, pr.dispersion, k) for g, n in zip(graines, tailles)]
+
+    processus = pr.processus or os.cpu_count() or 1
+    if processus == 1 or len(arguments) == 1 or pr.n_scenarios * len(moyennes) < SEUIL_TIRAGES_POOL:
+        lots = [_simuler_lot(*a) for a in arguments]
+    else:
+        lots = _simuler_lots(arguments, processus)
+
+    totaux = np.vstack(lots)
+    resultat_net = totaux[:, 1] - params.couts_fixes.total_projetes - params.cout_variable
+    return ResultatRisque(ca=totaux[:, 0], resultat_net=resultat_net, seuil_rentabilite=params.seuil_rentabilite)
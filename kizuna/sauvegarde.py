@@ -0,0 +1,227 @@
+"""Scénarios enregistrés localement (SQLite) et comparaison de deux scénarios.
+
+Un scénario enregistré garde les valeurs de la barre latérale, la surcouche
+des prix modifiés et les résultats calculés : totaux et tableau optimisé par
+produit, sérialisé en Arrow IPC dans une colonne BLOB. Rouvrir un scénario ne
+relance donc pas l'optimisation. La table des scénarios est indexée par nom,
+date d'enregistrement et période (mois, sites) ; la liste ne lit jamais les
+résultats, qui sont dans une table à part.
+"""
+import json
+import os
+import sqlite3
+from contextlib import closing, contextmanager
+from dataclasses import dataclass
+from datetime import datetime
+
+import numpy as np
+import pandas as pd
+import pyarrow as pa
+
+from kizuna.moteur import ResultatSimulation, Totaux, avec_colonnes, comparer_categories
+from kizuna.solveur import SolutionSolveur
+
+CHEMIN_BASE = os.path.join('.scenarios', 'scenarios.db')
+TOUS_SITES = 'Tous'
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS scenarios (
+    id INTEGER PRIMARY KEY,
+    nom TEXT NOT NULL UNIQUE,
+    enregistre_le TEXT NOT NULL,
+    mois TEXT NOT NULL,
+    sites TEXT NOT NULL,
+    fenetre INTEGER NOT NULL,
+    mode_optimisation TEXT NOT NULL,
+    ca_optimise REAL NOT NULL,
+    resultat_net_optimise REAL NOT NULL,
+    cle_resultats TEXT NOT NULL,
+    valeurs TEXT NOT NULL,
+    totaux TEXT NOT NULL,
+    solveur TEXT
+);
+CREATE INDEX IF NOT EXISTS idx_scenarios_date ON scenarios (enregistre_le);
+CREATE INDEX IF NOT EXISTS idx_scenarios_periode ON scenarios (mois, sites);
+
+CREATE TABLE IF NOT EXISTS prix_modifies (
+    scenario_id INTEGER NOT NULL REFERENCES scenarios (id) ON DELETE CASCADE,
+    produit TEXT NOT NULL,
+    prix_ttc REAL NOT NULL,
+    PRIMARY KEY (scenario_id, produit)
+) WITHOUT ROWID;
+
+CREATE TABLE IF NOT EXISTS resultats (
+    scenario_id INTEGER PRIMARY KEY REFERENCES scenarios (id) ON DELETE CASCADE,
+    produits BLOB NOT NULL
+);
+"""
+
+COLONNES_LISTE = ['id', 'nom', 'enregistre_le', 'mois', 'sites', 'fenetre', 'mode_optimisation',
+                  'ca_optimise', 'resultat_net_optimise']
+
+# Colonnes par produit comparées entre deux scénarios
+COLONNES_COMPARAISON = ['Prix Unitaire (FCFA)', 'Marge (%)', 'Quantité Optimisée', 'CA Optimisé',
+                        'Marge Valeur Optimisée', 'Dépenses Additionnelles']
+COLONNES_SOMMABLES = ['Quantité Optimisée', 'CA Optimisé', 'Marge Valeur Optimisée', 'Dépenses Additionnelles']
+
+
+@dataclass(frozen=True)
+class ScenarioEnregistre:
+    id: int
+    nom: str
+    enregistre_le: str
+    mois: str
+    sites: tuple
+    fenetre: int
+    mode_optimisation: str
+    cle_resultats: str
+    valeurs: dict  # widgets de la barre latérale
+    totaux: Totaux
+    solveur: dict  # statut du solveur (mode Solveur), sinon None
+    prix: dict  # produit -> prix TTC modifié
+    produits: pd.DataFrame  # tableau optimisé par produit
+
+
+@contextmanager
+def connexion(chemin=CHEMIN_BASE):
+    """Connexion SQLite (schéma créé au besoin), validée en sortie de bloc."""
+    dossier = os.path.dirname(chemin)
+    if dossier:
+        os.makedirs(dossier, exist_ok=True)
+    with closing(sqlite3.connect(chemin)) as conn:
+        conn.execute("PRAGMA foreign_keys = ON")
+        conn.execute("PRAGMA journal_mode = WAL")
+        conn.executescript(SCHEMA)
+        with conn:
+            yield conn
+
+
+def _serialiser(df):
+    table = pa.Table.from_pandas(df, preserve_index=False)
+    sortie = pa.BufferOutputStream()
+    with pa.ipc.new_file(sortie, table.schema, options=pa.ipc.IpcWriteOptions(compression='zstd')) as ecrivain:
+        ecrivain.write_table(table)
+    return sortie.getvalue().to_pybytes()
+
+
+def _deserialiser(blob):
+    return pa.ipc.open_file(pa.BufferReader(blob)).read_all().to_pandas()
+
+
+def _sites_texte(sites):
+    return ', '.join(sorted(sites)) if sites else TOUS_SITES
+
+
+def _json(valeur):
+    # Les valeurs des widgets peuvent être des scalaires NumPy
+    return json.dumps(valeur, ensure_ascii=False, default=lambda x: x.item() if isinstance(x, np.generic) else str(x))
+
+
+def enregistrer(nom, periode, valeurs, prix, resultat, cle_resultats, solution_solveur=None, chemin=CHEMIN_BASE):
+    """Enregistre (ou remplace, à nom égal) un scénario et ses résultats ; renvoie son identifiant.
+
+    ``periode`` est le triplet (mois, sites, fenêtre) ; ``prix`` associe à chaque
+    produit modifié son prix TTC.
+    """
+    mois, sites, fenetre = periode
+    totaux = resultat.totaux
+    solveur = None
+    if solution_solveur is not None:
+        solveur = {'statut': solution_solveur.statut, 'optimal': solution_solveur.optimal,
+                   'duree_ms': solution_solveur.duree_ms}
+
+    with connexion(chemin) as conn:
+        conn.execute("DELETE FROM scenarios WHERE nom = ?", (nom,))
+        curseur = conn.execute(
+            "INSERT INTO scenarios (nom, enregistre_le, mois, sites, fenetre, mode_optimisation, ca_optimise, "
+            "resultat_net_optimise, cle_resultats, valeurs, totaux, solveur) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)",
+            (nom, datetime.now().isoformat(timespec='seconds'), str(mois), _sites_texte(sites), int(fenetre),
+             valeurs.get('mode_optimisation', ''), totaux.ca_optimise, totaux.resultat_net_optimise, cle_resultats,
+             _json(valeurs), _json(totaux.en_dict()), None if solveur is None else _json(solveur)),
+        )
+        identifiant = curseur.lastrowid
+        conn.executemany(
+            "INSERT INTO prix_modifies (scenario_id, produit, prix_ttc) VALUES (?, ?, ?)",
+            [(identifiant, produit, float(p)) for produit, p in prix.items()],
+        )
+        conn.execute("INSERT INTO resultats (scenario_id, produits) VALUES (?, ?)",
+                     (identifiant, _serialiser(resultat.df_optimise)))
+    return identifiant
+
+
+def lister(mois=None, site=None, chemin=CHEMIN_BASE):
+    """Scénarios enregistrés, du plus récent au plus ancien (sans leurs résultats)."""
+    requete = f"SELECT {', '.join(COLONNES_LISTE)} FROM scenarios"
+    conditions, valeurs = [], []
+    if mois is not None:
+        conditions.append("mois = ?")
+        valeurs.append(str(mois))
+    if site is not None:
+        conditions.append("(sites = ? OR ', ' || sites || ',' LIKE ?)")
+        valeurs += [TOUS_SITES, f"%, {site},%"]
+    if conditions:
+        requete += " WHERE " + " AND ".join(conditions)
+    with connexion(chemin) as conn:
+        return pd.read_sql_query(requete + " ORDER BY enregistre_le DESC, id DESC", conn, params=valeurs)
+
+
+def charger(identifiant, chemin=CHEMIN_BASE):
+    with connexion(chemin) as conn:
+        ligne = conn.execute(
+            "SELECT id, nom, enregistre_le, mois, sites, fenetre, mode_optimisation, cle_resultats, valeurs, "
+            "totaux, solveur FROM scenarios WHERE id = ?", (int(identifiant),)
+        ).fetchone()
+        if ligne is None:
+            raise KeyError(f"Scénario {identifiant} introuvable")
+        prix = dict(conn.execute("SELECT produit, prix_ttc FROM prix_modifies WHERE scenario_id = ?", (ligne[0],)))
+        (blob,) = conn.execute("SELECT produits FROM resultats WHERE scenario_id = ?", (ligne[0],)).fetchone()
+
+    id_, nom, enregistre_le, mois, sites, fenetre, mode, cle, valeurs, totaux, solveur = ligne
+    return ScenarioEnregistre(
+        id=id_, nom=nom, enregistre_le=enregistre_le, mois=mois,
+        sites=() if sites == TOUS_SITES else tuple(sites.split(', ')), fenetre=fenetre, mode_optimisation=mode,
+        cle_resultats=cle, valeurs=json.loads(valeurs), totaux=Totaux(**json.loads(totaux)),
+        solveur=None if solveur is None else json.loads(solveur), prix=prix, produits=_deserialiser(blob),
+    )
+
+
+def supprimer(identifiant, chemin=CHEMIN_BASE):
+    with connexion(chemin) as conn:
+        conn.execute("DELETE FROM scenarios WHERE id = ?", (int(identifiant),))
+
+
+def resultats_enregistres(scenario):
+    """Résultats au format de l'optimisation de l'application : (résultat, solution du solveur, catégories)."""
+    solution = None
+    if scenario.solveur is not None:
+        solution = SolutionSolveur(quantites=scenario.produits['Quantité Optimisée'].to_numpy(), amorce=False,
+                                   **scenario.solveur)
+    resultat = ResultatSimulation(df_optimise=scenario.produits, totaux=scenario.totaux)
+    return resultat, solution, comparer_categories(scenario.produits, scenario.produits)
+
+
+def comparer(produits_a, produits_b):
+    """Écarts B − A par produit (jointure externe sur catégorie et produit) et par catégorie.
+
+    Un produit absent d'un scénario compte pour zéro dans les sommes par catégorie.
+    Les colonnes comparées qui ne sont pas stockées sont calculées.
+    """
+    cles = ['Catégorie', 'Produit']
+    jointure = avec_colonnes(produits_a, COLONNES_COMPARAISON)[cles + COLONNES_COMPARAISON].merge(
+        avec_colonnes(produits_b, COLONNES_COMPARAISON)[cles + COLONNES_COMPARAISON], on=cles, how='outer',
+        suffixes=(' A', ' B')
+    )
+    for col in COLONNES_COMPARAISON:
+        jointure[f'Δ {col}'] = jointure[f'{col} B'] - jointure[f'{col} A']
+
+    sommes = jointure[cles[:1]].copy()
+    for col in COLONNES_SOMMABLES:
+        for cote in ('A', 'B'):
+            sommes[f'{col} {cote}'] = jointure[f'{col} {cote}'].fillna(0)
+    par_categorie = sommes.groupby('Catégorie', observed=True).sum()
+    for col in COLONNES_SOMMABLES:
+        par_categorie[f'Δ {col}'] = par_categorie[f'{col} B'] - par_categorie[f'{col} A']
+
+    ordre = jointure['Δ Marge Valeur Optimisée'].abs().sort_values(ascending=False, na_position='first').index
+    return (jointure.loc[ordre].reset_index(drop=True),
+            par_categorie.sort_values('Δ CA Optimisé', key=np.abs, ascending=False).reset_index())
@@ -0,0 +1,258 @@
+"""Évaluation en lot de scénarios « what-if », sans interface.
+
+Un fichier de scénarios (YAML ou JSON) décrit des variantes des paramètres de
+la barre latérale ; chaque scénario est évalué comme dans l'application (prix
+arrondis puis prix modifiés, période choisie, optimisation) et le rapport
+consolidé reprend les totaux affichés. Les scénarios sont répartis sur un pool
+de processus ; ce module n'importe ni Streamlit ni Plotly.
+
+Format du fichier :
+
+    catalogue: produits_par_categorie_avril.csv   # facultatif
+    agregats: .ingestion/agregats.csv             # facultatif, pour mois/sites/fenetre
+    base:                                         # valeurs communes à tous les scénarios
+      cout_variable: 27540
+      couts_fixes: {loyer: 400000, erp: 90000}
+    scenarios:
+      - nom: Loyer renégocié
+        couts_fixes: {loyer: 300000}
+      - nom: Solveur, serveuses mieux payées
+        mode_optimisation: Solveur
+        couts_fixes: {salaire_serveuse_1: 75000, salaire_serveuse_2: 75000}
+        contraintes: {plafond_produit: 2.0}
+      - nom: Hausse des bières
+        prix_ttc: {"86 ORIGINAL": 1700}
+        prix_ttc_fichier: prix_mai.csv          # colonnes Produit, Prix Unitaire (FCFA)
+        elasticite_a_priori: -1.5               # facultatif, -1 par défaut comme dans l'application
+
+Les clés d'un scénario sont les champs de ``ParametresSimulation`` ;
+``couts_fixes`` et ``contraintes`` complètent ceux de ``base`` champ par champ.
+Comme dans l'application, la quantité d'un produit dont le prix est modifié
+suit son élasticité-prix, estimée sur l'historique.
+
+Usage :
+
+    python -m kizuna.scenarios scenarios.yaml --sortie rapport.parquet [--processus 4]
+"""
+import argparse
+import json
+import multiprocessing
+import os
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor
+from dataclasses import fields
+
+import pandas as pd
+
+from kizuna.catalogue import charger_catalogue
+from kizuna.edition_prix import appliquer_modifications, catalogue_de_base, catalogue_edite, initialiser_etat
+from kizuna.elasticite import ELASTICITE_A_PRIORI, ajuster_elasticites, elasticites_catalogue
+from kizuna.historique import appliquer_periode, construire_historique, historique_depuis_catalogue
+from kizuna.moteur import MODES_OPTIMISATION, CoutsFixes, ParametresSimulation, simuler
+from kizuna.solveur import MODE_SOLVEUR, ContraintesSolveur, simuler_solveur
+
+CATALOGUE_PAR_DEFAUT = 'produits_par_categorie_avril.csv'
+MOIS_CATALOGUE = '2025-04'  # mois couvert par le catalogue, utilisé sans agrégats
+
+CLES_PERIODE = ('mois', 'sites', 'fenetre')
+CLES_PRIX = ('prix_ttc', 'prix_ttc_fichier')
+CLES_DICTIONNAIRES = ('couts_fixes', 'contraintes')
+CHAMPS_PARAMETRES = {f.name for f in fields(ParametresSimulation)}
+CLES_SCENARIO = {'nom', 'contraintes', 'elasticite_a_priori', *CLES_PERIODE, *CLES_PRIX} | CHAMPS_PARAMETRES
+
+
+def charger_scenarios(chemin):
+    """Lit un fichier de scénarios YAML ou JSON ; les chemins relatifs partent de son dossier."""
+    with open(chemin, encoding='utf-8') as f:
+        if chemin.endswith(('.yaml', '.yml')):
+            import yaml  # seulement pour les fichiers YAML
+            contenu = yaml.safe_load(f)
+        else:
+            contenu = json.load(f)
+
+    if not contenu or not contenu.get('scenarios'):
+        raise ValueError(f"{chemin} ne définit aucun scénario")
+    dossier = os.path.dirname(os.path.abspath(chemin))
+
+    def resoudre(relatif):
+        return relatif if relatif is None else os.path.join(dossier, relatif)
+
+    base = contenu.get('base') or {}
+    scenarios = []
+    for i, scenario in enumerate(contenu['scenarios']):
+        definition = fusionner_definitions(base, scenario)
+        definition.setdefault('nom', f"Scénario {i + 1}")
+        definition['prix_ttc_fichier'] = resoudre(definition.get('prix_ttc_fichier'))
+        valider_definition(definition)
+        scenarios.append(definition)
+    return {
+        'catalogue': resoudre(contenu.get('catalogue', CATALOGUE_PAR_DEFAUT)),
+        'agregats': resoudre(contenu.get('agregats')),
+        'scenarios': scenarios,
+    }
+
+
+def fusionner_definitions(base, scenario):
+    definition = {**base, **scenario}
+    for cle in CLES_DICTIONNAIRES + ('prix_ttc',):
+        if cle in base or cle in scenario:
+            definition[cle] = {**(base.get(cle) or {}), **(scenario.get(cle) or {})}
+    return definition
+
+
+def valider_definition(definition):
+    nom = definition['nom']
+    inconnues = set(definition) - CLES_SCENARIO
+    if inconnues:
+        raise ValueError(f"Scénario {nom!r} : clé(s) inconnue(s) {sorted(inconnues)}")
+    mode = definition.get('mode_optimisation', ParametresSimulation.mode_optimisation)
+    if mode not in MODES_OPTIMISATION + [MODE_SOLVEUR]:
+        raise ValueError(f"Scénario {nom!r} : mode d'optimisation inconnu {mode!r}")
+    for cle, classe in (('couts_fixes', CoutsFixes), ('contraintes', ContraintesSolveur)):
+        inconnus = set(definition.get(cle) or {}) - {f.name for f in fields(classe)}
+        if inconnus:
+            raise ValueError(f"Scénario {nom!r} : champ(s) de {cle} inconnu(s) {sorted(inconnus)}")
+
+
+def construire_parametres(definition):
+    """``ParametresSimulation`` et ``ContraintesSolveur`` (mode Solveur seulement) d'un scénario."""
+    valeurs = {cle: definition[cle] for cle in CHAMPS_PARAMETRES - {'couts_fixes'} if cle in definition}
+    params = ParametresSimulation(couts_fixes=CoutsFixes(**(definition.get('couts_fixes') or {})), **valeurs)
+    contraintes = None
+    if params.mode_optimisation == MODE_SOLVEUR:
+        contraintes = ContraintesSolveur(**(definition.get('contraintes') or {}))
+    return params, contraintes
+
+
+def prix_du_scenario(catalogue, definition):
+    """Prix TTC du catalogue après les modifications du scénario (fichier puis saisies)."""
+    prix = pd.Series(catalogue['Prix Unitaire (FCFA)'].round().to_numpy(), index=catalogue['Produit'])
+    modifications = {}
+    if definition.get('prix_ttc_fichier'):
+        fichier = pd.read_csv(definition['prix_ttc_fichier'])
+        modifications.update(zip(fichier['Produit'], fichier['Prix Unitaire (FCFA)']))
+    modifications.update(definition.get('prix_ttc') or {})
+
+    inconnus = set(modifications) - set(prix.index)
+    if inconnus:
+        raise ValueError(f"Scénario {definition['nom']!r} : produit(s) inconnu(s) {sorted(inconnus)[:5]}")
+    prix.update(pd.Series(modifications, dtype=float))
+    return prix.to_numpy(dtype=float)
+
+
+# Données partagées par les scénarios d'un même processus
+_catalogue = None
+_historique = None
+_elasticites = {}  # a priori -> table des élasticités, estimée une fois par processus
+
+
+def _initialiser(chemin_catalogue, chemin_agregats):
+    global _catalogue, _historique
+    _elasticites.clear()
+    _catalogue = charger_catalogue(chemin_catalogue)
+    if chemin_agregats is None:
+        _historique = historique_depuis_catalogue(_catalogue, MOIS_CATALOGUE)
+    else:
+        agregats = pd.read_csv(chemin_agregats, dtype={'Mois': str, 'Site': str})
+        _historique = construire_historique(agregats, _catalogue)
+
+
+def _elasticites_a_priori(a_priori):
+    """Élasticités estimées sur l'historique, comme ``ressources.charger_elasticites``."""
+    if a_priori not in _elasticites:
+        _elasticites[a_priori] = ajuster_elasticites(_historique, a_priori)
+    return _elasticites[a_priori]
+
+
+def evaluer_scenario(definition):
+    """Ligne du rapport pour un scénario : paramètres et totaux de l'optimisation."""
+    debut = time.perf_counter()
+    params, contraintes = construire_parametres(definition)
+
+    mois = str(definition.get('mois') or _historique.mois[-1])
+    sites = definition.get('sites')
+    fenetre = int(definition.get('fenetre', 1))
+    base = catalogue_de_base(appliquer_periode(_catalogue, _historique, mois, sites, fenetre))
+
+    a_priori = float(definition.get('elasticite_a_priori', ELASTICITE_A_PRIORI))
+    etat = initialiser_etat(base, elasticites_catalogue(_elasticites_a_priori(a_priori), base, a_priori))
+    prix_modifies = appliquer_modifications(etat, prix_du_scenario(base, definition))
+    df = catalogue_edite(etat)
+
+    statut_solveur = None
+    if contraintes is not None:
+        resultat, solution = simuler_solveur(df, params, contraintes)
+        statut_solveur = solution.statut
+    else:
+        resultat = simuler(df, params)
+    totaux = resultat.totaux
+
+    return {
+        'scenario': definition['nom'],
+        'mois': mois,
+        'sites': ', '.join(sites) if sites else 'Tous',
+        'fenetre': fenetre,
+        'mode_optimisation': params.mode_optimisation,
+        'marge_brute_visee_pct': params.marge_brute_visee_pct,
+        'cout_variable': params.cout_variable,
+        'facteur_prod_forte_marge': params.facteur_prod_forte_marge,
+        'facteur_prod_moy_marge': params.facteur_prod_moy_marge,
+        'facteur_prod_faible_marge': params.facteur_prod_faible_marge,
+        'facteur_prod_tres_faible_marge': params.facteur_prod_tres_faible_marge,
+        **{f.name: getattr(params.couts_fixes, f.name) for f in fields(CoutsFixes)},
+        'prix_modifies': len(prix_modifies),
+        'elasticite_a_priori': a_priori,
+        **totaux.en_dict(),
+        'objectif_atteint': totaux.ca_optimise >= totaux.seuil_rentabilite,
+        'statut_solveur': statut_solveur,
+        'duree_ms': (time.perf_counter() - debut) * 1000,
+    }
+
+
+def executer(fichier, processus=0):
+    """Évalue tous les scénarios de ``fichier`` ; renvoie le rapport (une ligne par scénario)."""
+    definitions = fichier['scenarios']
+    initialisation = (fichier['catalogue'], fichier['agregats'])
+    processus = min(processus or os.cpu_count() or 1, len(definitions))
+
+    if processus == 1:
+        _initialiser(*initialisation)
+        lignes = [evaluer_scenario(d) for d in definitions]
+    else:
+        # Chaque processus charge le catalogue une fois (depuis le cache Arrow) puis enchaîne les scénarios
+        contexte = multiprocessing.get_context('spawn')
+        with ProcessPoolExecutor(
+            max_workers=processus, mp_context=contexte, initializer=_initialiser, initargs=initialisation
+        ) as pool:
+            lignes = list(pool.map(evaluer_scenario, definitions))
+    return pd.DataFrame(lignes)
+
+
+def ecrire_rapport(rapport, chemin):
+    if chemin.endswith('.parquet'):
+        rapport.to_parquet(chemin, index=False)
+    else:
+        rapport.to_csv(chemin, index=False)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Évaluation en lot de scénarios de simulation KIZUNA.")
+    parser.add_argument('scenarios', help="fichier de scénarios (YAML ou JSON)")
+    parser.add_argument('--sortie', required=True, help="rapport consolidé (.parquet ou .csv)")
+    parser.add_argument('--processus', type=int, default=0, help="taille du pool (0 : un par processeur)")
+    args = parser.parse_args(argv)
+
+    debut = time.perf_counter()
+    fichier = charger_scenarios(args.scenarios)
+    rapport = executer(fichier, args.processus)
+    ecrire_rapport(rapport, args.sortie)
+
+    print(f"{len(rapport)} scénario(s) évalué(s) en {time.perf_counter() - debut:.1f} s -> {args.sortie}")
+    colonnes = ['scenario', 'mode_optimisation', 'ca_optimise', 'resultat_net_optimise', 'objectif_atteint']
+    print(rapport[colonnes].to_string(index=False, float_format=lambda x: f"{x:,.0f}"))
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,60 @@
+"""Schéma compact en mémoire du catalogue et des tableaux qui en dérivent.
+
+* ``Catégorie`` et ``Produit`` sont des catégorielles (dictionnaire trié) ; les
+  tableaux dérivés partagent ces colonnes, donc leurs dictionnaires, et les
+  regroupements par catégorie se font sur les codes.
+* Les quantités sont des entiers 32 bits.
+* Les montants stockés (prix TTC, CA TTC de référence) sont des entiers 64 bits
+  en FCFA : leurs sommes sont exactes.
+* Les colonnes qui se déduisent des autres (HT, coût unitaire, marges en
+  valeur, CA et dépenses optimisés…) ne sont pas stockées : elles sont
+  calculées à la demande (voir ``moteur.COLONNES_CALCULEES``).
+"""
+import numpy as np
+import pandas as pd
+
+TYPE_QUANTITE = np.int32
+TYPE_MONTANT = np.int64  # FCFA
+
+COLONNES_CATEGORIELLES = ['Catégorie', 'Produit']
+
+SCHEMA_CATALOGUE = {
+    'Catégorie': 'category',
+    'Produit': 'category',
+    'Prix Unitaire (FCFA)': TYPE_MONTANT,
+    'Marge (%)': np.float64,
+    'Quantité Période': TYPE_QUANTITE,
+    'CA TTC': TYPE_MONTANT,
+}
+
+
+def en_montants(valeurs):
+    """Montants arrondis au FCFA."""
+    return np.rint(np.asarray(valeurs, dtype=float)).astype(TYPE_MONTANT)
+
+
+def en_quantites(valeurs):
+    """Quantités entières (arrondies à l'unité si elles arrivent en flottants)."""
+    valeurs = np.asarray(valeurs)
+    if valeurs.dtype.kind == 'f':
+        valeurs = np.rint(valeurs)
+    return valeurs.astype(TYPE_QUANTITE)
+
+
+def categorielle(valeurs):
+    """Colonne catégorielle ; une colonne qui l'est déjà garde son dictionnaire."""
+    if isinstance(valeurs.dtype, pd.CategoricalDtype):
+        return valeurs
+    return valeurs.astype('category')
+
+
+def typer_catalogue(df):
+    """Catalogue au schéma compact ; les colonnes hors schéma sont retirées."""
+    return pd.DataFrame({
+        'Catégorie': categorielle(df['Catégorie']),
+        'Produit': categorielle(df['Produit']),
+        'Prix Unitaire (FCFA)': en_montants(df['Prix Unitaire (FCFA)']),
+        'Marge (%)': df['Marge (%)'].to_numpy(dtype=np.float64),
+        'Quantité Période': en_quantites(df['Quantité Période']),
+        'CA TTC': en_montants(df['CA TTC']),
+    }, index=df.index)
@@ -0,0 +1,230 @@
+"""Analyse de sensibilité (tornado) du résultat net et du seuil de rentabilité.
+
+Chaque entrée (coût fixe, coûts variables, marge visée, facteur par tranche,
+prix TTC de chaque produit) est variée de ±``variation`` toutes les autres
+restant fixes, par différences finies évaluées en lot :
+
+* coûts et marge visée n'agissent sur les quantités qu'à travers le seuil de
+  rentabilité (mode « Augmentation uniforme ») : les seuils perturbés sont
+  calculés d'un coup et la marge optimisée l'est pour chaque facteur uniforme
+  distinct par une seule opération diffusée ;
+* les facteurs par tranche sont évalués comme une petite grille de scénarios ;
+* le prix d'un produit modifie sa propre ligne (marge, tranche, quantité de
+  la période selon son élasticité-prix, CA TTC valorisé au nouveau prix comme
+  dans l'éditeur de prix, quantité optimisée). Tous les prix sont perturbés
+  ensemble, chaque ligne étant lue comme le scénario où seul son prix change.
+  En mode « Augmentation uniforme », le CA TTC de la ligne déplace aussi le
+  CA de référence, donc le facteur uniforme de tout le catalogue : la marge
+  optimisée est calculée pour chaque facteur distinct, puis corrigée de la
+  ligne perturbée. En mode « Maximiser les produits rentables », un prix peut
+  déplacer le meilleur score : le calcul en lot se fait à score de référence
+  fixe, et seuls les produits qui déplacent ce score sont réévalués
+  individuellement.
+"""
+from dataclasses import fields, replace
+
+import numpy as np
+import pandas as pd
+
+from kizuna.elasticite import quantites_ajustees
+from kizuna.grille import FACTEURS, _totaux_par_valeur, evaluer_grille
+from kizuna.moteur import CoutsFixes, calculer_facteurs, calculer_situation_actuelle, ttc_to_ht, valeurs
+
+VARIATION = 0.10  # ±10 %
+
+LIBELLES = {
+    'salaire_directeur': "Salaire Directeur",
+    'salaire_serveuse': "Salaire Serveuse",
+    'electricite': "Facture Electricité",
+    'abonnement_canal': "Abonnement CANAL+",
+    'transport': "Transport",
+    'recharge_infinity': "Recharge Infinity",
+    'carnet_recu': "Carnet de reçu",
+    'boite_cure_dents': "Boite de cure dents",
+    'emballage_oumbe': "Emballage oumbe",
+    'salaire_serveuse_1': "Serveuse 1",
+    'salaire_serveuse_2': "Serveuse 2",
+    'loyer': "Loyer",
+    'erp': "ERP (2 utilisateurs)",
+    'web_email': "Site web + email",
+    'cout_variable': "Coûts variables",
+    'marge_brute_visee_pct': "Marge brute visée (%)",
+    'facteur_prod_forte_marge': "Facteur forte marge (>50%)",
+    'facteur_prod_moy_marge': "Facteur marge moyenne (35-50%)",
+    'facteur_prod_faible_marge': "Facteur faible marge (20-35%)",
+    'facteur_prod_tres_faible_marge': "Facteur très faible marge (<20%)",
+}
+
+COLONNES = [
+    'Entrée', 'Type', 'Valeur', 'Δ Résultat net bas', 'Δ Résultat net haut',
+    'Δ Seuil bas', 'Δ Seuil haut', 'Amplitude',
+]
+
+
+def _facteur_uniforme(seuil_rentabilite, ca_total_actuel):
+    """Facteur du mode « Augmentation uniforme » (voir ``moteur.calculer_facteurs``)."""
+    return np.clip(seuil_rentabilite / ca_total_actuel * 0.8, 1.1, 4.0)
+
+
+def _sensibilite_parametres(df, params, actuel, marge_base, multiplicateurs):
+    """Coûts fixes, coûts variables et marge visée : (entrées, valeurs, résultats nets, seuils)."""
+    entrees, valeurs, perturbes = [], [], []
+    for champ in fields(CoutsFixes):
+        valeur = getattr(params.couts_fixes, champ.name)
+        entrees.append(champ.name)
+        valeurs.append(valeur)
+        perturbes += [replace(params, couts_fixes=replace(params.couts_fixes, **{champ.name: valeur * m}))
+                      for m in multiplicateurs]
+    for champ in ('cout_variable', 'marge_brute_visee_pct'):
+        entrees.append(champ)
+        valeurs.append(getattr(params, champ))
+        perturbes += [replace(params, **{champ: getattr(params, champ) * m}) for m in multiplicateurs]
+
+    fixes = np.array([p.couts_fixes.total_projetes for p in perturbes])
+    variables = np.array([p.cout_variable for p in perturbes])
+    seuils = np.array([p.seuil_rentabilite for p in perturbes])
+
+    marge_optimisee = np.full(len(perturbes), marge_base)
+    if params.mode_optimisation == "Augmentation uniforme":
+        # Seul mode où le seuil pilote les quantités, par le facteur uniforme des produits à marge positive
+        positifs = df['Marge (%)'].to_numpy(dtype=float) >= 0
+        facteurs, indices = np.unique(_facteur_uniforme(seuils, actuel['ca_total_actuel']), return_inverse=True)
+        facteur_base = _facteur_uniforme(actuel['seuil_rentabilite'], actuel['ca_total_actuel'])
+        _, marges, _ = _totaux_par_valeur(df, positifs, np.ones(len(df)), np.append(facteurs, facteur_base))
+        marge_optimisee += marges[indices] - marges[-1]
+
+    resultats = marge_optimisee - fixes - variables
+    return entrees, valeurs, resultats.reshape(-1, 2), seuils.reshape(-1, 2)
+
+
+def _sensibilite_facteurs(df, params, multiplicateurs):
+    """Facteurs par tranche : une grille de 2 × 4 scénarios autour des valeurs courantes."""
+    courant = {nom: getattr(params, nom) for nom in FACTEURS}
+    grille = pd.DataFrame([{**courant, nom: courant[nom] * m} for nom in FACTEURS for m in multiplicateurs])
+    resultats = evaluer_grille(df, params, grille)['resultat_net_optimise'].to_numpy()
+    return FACTEURS, [courant[nom] for nom in FACTEURS], resultats.reshape(-1, 2)
+
+
+def _marge_pct(df, prix_ttc):
+    """Marge (%) à coût unitaire constant pour des prix TTC donnés (calcul de l'éditeur de prix)."""
+    prix_ht = ttc_to_ht(prix_ttc)
+    with np.errstate(divide='ignore', invalid='ignore'):
+        return np.where(prix_ht > 0, (1 - valeurs(df, 'Coût Unitaire') / prix_ht) * 100, 0.0)
+
+
+def _marge_produits(df, params, actuel, prix_ttc, marge_pct, max_score=None, quantite=None):
+    """Marge optimisée et score de chaque produit pour des prix TTC, marges (et quantités de la période) donnés."""
+    lignes = pd.DataFrame({'Marge (%)': marge_pct, 'Prix Unitaire (FCFA)': prix_ttc})
+    facteurs = calculer_facteurs(lignes, params, actuel['seuil_rentabilite'], actuel['ca_total_actuel'], max_score)
+    quantite = df['Quantité Période'].to_numpy() if quantite is None else quantite
+    quantite_optimisee = np.round(quantite * facteurs)
+    return quantite_optimisee * prix_ttc * marge_pct / 100, marge_pct * prix_ttc / 1000
+
+
+def _sensibilite_prix_uniforme(df, params, actuel, multiplicateurs, quantites):
+    """Prix TTC en mode « Augmentation uniforme » : le CA de la ligne déplace le facteur de tout le catalogue."""
+    prix_ttc = df['Prix Unitaire (FCFA)'].to_numpy(dtype=float)
+    marge_pct = df['Marge (%)'].to_numpy(dtype=float)
+    quantite = df['Quantité Période'].to_numpy()
+    positifs = marge_pct >= 0
+    facteur_base = _facteur_uniforme(actuel['seuil_rentabilite'], actuel['ca_total_actuel'])
+
+    ecarts = np.empty((len(df), len(multiplicateurs)))
+    for j, m in enumerate(multiplicateurs):
+        prix_perturbes = prix_ttc * m
+        marges_perturbees = _marge_pct(df, prix_perturbes)
+        quantite_perturbee = quantites(prix_perturbes)
+        ca_totaux = actuel['ca_total_actuel'] - df['CA TTC'].to_numpy() + prix_perturbes * quantite_perturbee
+        facteurs = _facteur_uniforme(actuel['seuil_rentabilite'], ca_totaux)
+
+        # Catalogue inchangé à chaque facteur distinct (les produits à marge négative n'en dépendent pas)...
+        niveaux, indices = np.unique(np.append(facteurs, facteur_base), return_inverse=True)
+        _, marges, _ = _totaux_par_valeur(df, positifs, np.ones(len(df)), niveaux)
+        ecarts[:, j] = marges[indices[:-1]] - marges[indices[-1]]
+
+        # ... dont la ligne perturbée remplace la ligne de base
+        tres_faible = params.facteur_prod_tres_faible_marge
+        facteurs_base = np.where(positifs, facteurs, tres_faible)
+        facteurs_perturbes = np.where(marges_perturbees >= 0, facteurs, tres_faible)
+        ecarts[:, j] += (np.round(quantite_perturbee * facteurs_perturbes) * prix_perturbes * marges_perturbees
+                         - np.round(quantite * facteurs_base) * prix_ttc * marge_pct) / 100
+    return ecarts
+
+
+def _sensibilite_prix(df, params, actuel, multiplicateurs, elasticites=None):
+    """Prix TTC de chaque produit : écart de résultat net quand seul ce prix varie.
+
+    Avec ``elasticites``, la quantité de la période suit le prix perturbé
+    (arrondie à l'unité comme dans l'éditeur de prix) ; sinon elle reste fixe.
+    Le CA TTC de la ligne est cette quantité au prix perturbé.
+    """
+    prix_ttc = df['Prix Unitaire (FCFA)'].to_numpy(dtype=float)
+    marge_pct = df['Marge (%)'].to_numpy(dtype=float)
+    quantite_base = df['Quantité Période'].to_numpy()
+
+    def quantites(prix):
+        if elasticites is None:
+            return quantite_base
+        return np.rint(quantites_ajustees(quantite_base, prix_ttc, prix, elasticites))
+
+    if params.mode_optimisation == "Augmentation uniforme":
+        return _sensibilite_prix_uniforme(df, params, actuel, multiplicateurs, quantites)
+
+    marge_base, score = _marge_produits(df, params, actuel, prix_ttc, marge_pct)
+    max_score = score.max() if len(score) else 1.0
+
+    ecarts = np.empty((len(df), len(multiplicateurs)))
+    for j, m in enumerate(multiplicateurs):
+        # Tous les prix perturbés d'un coup : chaque ligne ne dépend que de son propre prix...
+        prix_perturbes = prix_ttc * m
+        marges_perturbees = _marge_pct(df, prix_perturbes)
+        marge, score_perturbe = _marge_produits(df, params, actuel, prix_perturbes, marges_perturbees, max_score,
+                                                quantites(prix_perturbes))
+        ecarts[:, j] = marge - marge_base
+
+        # ... sauf si ce prix déplace le meilleur score du mode « Maximiser les produits rentables »
+        if params.mode_optimisation == "Maximiser les produits rentables":
+            deplace = (score_perturbe > max_score) | ((score == max_score) & (score_perturbe < max_score))
+            for i in np.flatnonzero(deplace):
+                prix, marges = prix_ttc.copy(), marge_pct.copy()
+                prix[i], marges[i] = prix_perturbes[i], marges_perturbees[i]
+                ecarts[i, j] = (_marge_produits(df, params, actuel, prix, marges, quantite=quantites(prix))[0].sum()
+                                - marge_base.sum())
+    return ecarts
+
+
+def analyser_sensibilite(df, params, variation=VARIATION, elasticites=None):
+    """Écarts de résultat net optimisé et de seuil de rentabilité pour ±``variation`` sur chaque entrée.
+
+    Une ligne par entrée, triée par amplitude décroissante de l'effet sur le
+    résultat net. Les prix sont perturbés à coût unitaire constant, comme dans
+    l'éditeur de prix, et la demande suit ``elasticites`` (une par ligne de
+    ``df``) si elles sont données.
+    """
+    multiplicateurs = (1 - variation, 1 + variation)
+    actuel = calculer_situation_actuelle(df, params)
+    base = evaluer_grille(df, params, pd.DataFrame([{nom: getattr(params, nom) for nom in FACTEURS}])).iloc[0]
+    resultat_base = base['resultat_net_optimise']
+    seuil_base = actuel['seuil_rentabilite']
+
+    entrees, valeurs, resultats, seuils = _sensibilite_parametres(
+        df, params, actuel, base['marge_optimisee'], multiplicateurs
+    )
+    noms_facteurs, valeurs_facteurs, resultats_facteurs = _sensibilite_facteurs(df, params, multiplicateurs)
+    ecarts_prix = _sensibilite_prix(df, params, actuel, multiplicateurs, elasticites)
+
+    n_couts = len(fields(CoutsFixes))
+    sensibilites = pd.DataFrame({
+        'Entrée': [LIBELLES[e] for e in entrees + noms_facteurs] + list(df['Produit']),
+        'Type': (['Coût fixe'] * n_couts + ['Paramètre'] * (len(entrees) - n_couts)
+                 + ['Facteur'] * len(noms_facteurs) + ['Prix TTC'] * len(df)),
+        'Valeur': np.concatenate((valeurs, valeurs_facteurs, df['Prix Unitaire (FCFA)'].to_numpy(dtype=float))),
+        'Δ Résultat net bas': np.concatenate((resultats[:, 0] - resultat_base,
+                                              resultats_facteurs[:, 0] - resultat_base, ecarts_prix[:, 0])),
+        'Δ Résultat net haut': np.concatenate((resultats[:, 1] - resultat_base,
+                                               resultats_facteurs[:, 1] - resultat_base, ecarts_prix[:, 1])),
+        'Δ Seuil bas': np.concatenate((seuils[:, 0] - seuil_base, np.zeros(len(noms_facteurs) + len(df)))),
+        'Δ Seuil haut': np.concatenate((seuils[:, 1] - seuil_base, np.zeros(len(noms_facteurs) + len(df)))),
+    })
+    sensibilites['Amplitude'] = (sensibilites['Δ Résultat net haut'] - sensibilites['Δ Résultat net bas']).abs()
+    return sensibilites[COLONNES].sort_values('Amplitude', ascending=False, ignore_index=True)
@@ -0,0 +1,196 @@
+"""Mode « Solveur » : quantités optimales par programmation linéaire.
+
+On cherche les quantités ``q`` qui minimisent les dépenses additionnelles
+``Σ coût_i × (q_i - Quantité Période_i)`` sous les contraintes :
+
+* CA TTC optimisé ``Σ prix_i × q_i`` au moins égal au seuil de rentabilité ;
+* marge brute optimisée au moins égale à ``marge_brute_visee_pct`` du CA,
+  soit ``Σ prix_i × (marge_i - cible) × q_i >= 0`` ;
+* bornes par produit et plafond de volume par catégorie, exprimés en
+  multiples des quantités de la période de référence.
+
+Le modèle est résolu localement par HiGHS (``highspy``). Par défaut on résout la
+relaxation continue (quelques ms pour des milliers de produits) puis on arrondit
+à l'unité supérieure les rares quantités fractionnaires de la base, ce qui garde
+le CA au-dessus du seuil (dans une catégorie que l'arrondi ferait dépasser son
+plafond de volume, les produits les moins chers sont arrondis à l'unité
+inférieure) ; ``entier=True`` impose des quantités entières exactes
+(PLNE, nettement plus lent). La solution précédente sert d'amorce : base du
+simplexe en continu, solution initiale en entier. ``highspy`` n'est importé
+qu'à la première résolution : l'application n'en a besoin qu'en mode Solveur.
+"""
+import time
+from dataclasses import dataclass
+
+import numpy as np
+
+from kizuna.moteur import (
+    ResultatSimulation,
+    calculer_situation_actuelle,
+    completer_optimisation,
+    totaliser,
+    valeurs,
+)
+
+MODE_SOLVEUR = "Solveur"
+
+
+@dataclass(frozen=True)
+class ContraintesSolveur:
+    plancher_produit: float = 0.5  # quantité minimale = plancher × Quantité Période
+    plafond_produit: float = 3.0  # quantité maximale = plafond × Quantité Période
+    plafond_categorie: float = 2.5  # volume max d'une catégorie = plafond × volume de la période
+    entier: bool = False
+    limite_temps: float = 2.0  # secondes
+
+
+@dataclass
+class SolutionSolveur:
+    quantites: np.ndarray
+    statut: str
+    optimal: bool
+    duree_ms: float
+    amorce: bool
+    base: object = None
+    arrondi_sous_objectif: bool = False  # solution continue optimale, mais l'arrondi manque le seuil ou la marge
+
+
+def _bornes(df, contraintes):
+    quantite = df['Quantité Période'].to_numpy(dtype=float)
+    bas = np.ceil(quantite * contraintes.plancher_produit)
+    haut = np.maximum(np.floor(quantite * contraintes.plafond_produit), bas)
+    return bas, haut
+
+
+def _volumes_max(codes, quantite, n_categories, contraintes):
+    return np.floor(np.bincount(codes, weights=quantite, minlength=n_categories) * contraintes.plafond_categorie)
+
+
+def arrondir(df, valeurs_continues, contraintes):
+    """Quantités entières les plus proches par excès qui respectent les plafonds de catégorie.
+
+    Arrondir vers le haut plusieurs quantités fractionnaires d'une même
+    catégorie peut dépasser son plafond (entier) : l'excédent est retiré en
+    arrondissant vers le bas autant de quantités fractionnaires, en commençant
+    par les moins chères (moindre perte de CA). La somme des parties entières
+    respectant le plafond, l'excédent ne dépasse jamais ce nombre.
+    """
+    valeurs_continues = np.asarray(valeurs_continues, dtype=float)
+    # Tolérance pour ne pas arrondir vers le haut un entier calculé à 1e-9 près
+    quantites = np.ceil(valeurs_continues - 1e-6)
+    fractionnaires = np.flatnonzero(quantites - valeurs_continues > 1e-6)
+    if len(fractionnaires):
+        codes, categories = df['Catégorie'].factorize()
+        plafonds = _volumes_max(codes, df['Quantité Période'].to_numpy(dtype=float), len(categories), contraintes)
+        excedent = np.bincount(codes, weights=quantites, minlength=len(categories)) - plafonds
+        if (excedent > 0).any():
+            prix_ttc = df['Prix Unitaire (FCFA)'].to_numpy(dtype=float)
+            ordre = fractionnaires[np.lexsort((prix_ttc[fractionnaires], codes[fractionnaires]))]
+            # Rang de chaque quantité fractionnaire parmi celles de sa catégorie, du prix le plus bas au plus haut
+            codes_ordre = codes[ordre]
+            debuts = np.flatnonzero(np.r_[True, codes_ordre[1:] != codes_ordre[:-1]])
+            rang = np.arange(len(ordre)) - np.repeat(debuts, np.diff(np.r_[debuts, len(ordre)]))
+            a_reduire = ordre[rang < excedent[codes_ordre]]
+            quantites[a_reduire] = np.floor(valeurs_continues[a_reduire] + 1e-6)
+    return quantites.astype(int)
+
+
+def respecte_seuils(df, params, quantites):
+    """Vrai si ``quantites`` atteint le seuil de rentabilité et la marge visée."""
+    prix_ttc = df['Prix Unitaire (FCFA)'].to_numpy(dtype=float)
+    marge = df['Marge (%)'].to_numpy(dtype=float) / 100
+    chiffre = prix_ttc @ quantites
+    return (chiffre >= params.seuil_rentabilite - 1e-6
+            and prix_ttc * (marge - params.marge_brute_visee_pct / 100) @ quantites >= -1e-6)
+
+
+def construire_modele(df, params, contraintes):
+    """Programme linéaire HiGHS (matrice stockée par colonnes, 3 coefficients par produit)."""
+    import highspy
+
+    n = len(df)
+    prix_ttc = df['Prix Unitaire (FCFA)'].to_numpy(dtype=float)
+    marge = df['Marge (%)'].to_numpy(dtype=float) / 100
+    cout_unitaire = valeurs(df, 'Coût Unitaire')
+    codes, categories = df['Catégorie'].factorize()
+    quantite = df['Quantité Période'].to_numpy(dtype=float)
+    bas, haut = _bornes(df, contraintes)
+
+    lp = highspy.HighsLp()
+    lp.num_col_ = n
+    lp.num_row_ = 2 + len(categories)
+    lp.col_cost_ = cout_unitaire
+    lp.offset_ = -float(cout_unitaire @ quantite)
+    lp.col_lower_ = bas
+    lp.col_upper_ = haut
+
+    lp.row_lower_ = np.concatenate(([params.seuil_rentabilite, 0.0], np.zeros(len(categories))))
+    lp.row_upper_ = np.concatenate(([highspy.kHighsInf, highspy.kHighsInf],
+                                    _volumes_max(codes, quantite, len(categories), contraintes)))
+
+    # Colonne i : ligne 0 (CA), ligne 1 (marge visée), ligne 2 + catégorie (volume)
+    cible = params.marge_brute_visee_pct / 100
+    lp.a_matrix_.format_ = highspy.MatrixFormat.kColwise
+    lp.a_matrix_.start_ = np.arange(0, 3 * n + 1, 3, dtype=np.int32)
+    lp.a_matrix_.index_ = np.column_stack((np.zeros(n), np.ones(n), 2 + codes)).astype(np.int32).ravel()
+    lp.a_matrix_.value_ = np.column_stack((prix_ttc, prix_ttc * (marge - cible), np.ones(n))).ravel()
+
+    if contraintes.entier:
+        lp.integrality_ = [highspy.HighsVarType.kInteger] * n
+    return lp
+
+
+def resoudre(df, params, contraintes=None, amorce=None):
+    """Résout le modèle ; ``amorce`` est la ``SolutionSolveur`` du rerun précédent."""
+    import highspy
+
+    contraintes = contraintes or ContraintesSolveur()
+    debut = time.perf_counter()
+
+    h = highspy.Highs()
+    h.setOptionValue('output_flag', False)
+    h.setOptionValue('time_limit', float(contraintes.limite_temps))
+    h.passModel(construire_modele(df, params, contraintes))
+
+    amorce_utilisee = amorce is not None and len(amorce.quantites) == len(df)
+    if amorce_utilisee:
+        if contraintes.entier:
+            depart = highspy.HighsSolution()
+            depart.col_value = list(amorce.quantites.astype(float))
+            h.setSolution(depart)
+        elif amorce.base is not None:
+            h.setBasis(amorce.base)
+
+    h.run()
+    statut = h.getModelStatus()
+    optimal = statut == highspy.HighsModelStatus.kOptimal
+    arrondi_sous_objectif = False
+    if h.getInfo().primal_solution_status == 2:  # solution réalisable disponible
+        quantites = arrondir(df, h.getSolution().col_value, contraintes)
+        if not contraintes.entier and not respecte_seuils(df, params, quantites):
+            # Les arrondis à l'unité inférieure ont fait repasser le CA ou la marge sous l'objectif
+            arrondi_sous_objectif, optimal = optimal, False
+    else:
+        quantites = df['Quantité Période'].to_numpy().copy()
+        optimal = False
+
+    return SolutionSolveur(
+        quantites=quantites,
+        statut=h.modelStatusToString(statut),
+        optimal=optimal,
+        duree_ms=(time.perf_counter() - debut) * 1000,
+        amorce=amorce_utilisee,
+        base=None if contraintes.entier else h.getBasis(),
+        arrondi_sous_objectif=arrondi_sous_objectif,
+    )
+
+
+def simuler_solveur(df, params, contraintes=None, amorce=None):
+    """Équivalent de ``moteur.simuler`` pour le mode Solveur."""
+    solution = resoudre(df, params, contraintes, amorce)
+    actuel = calculer_situation_actuelle(df, params)
+    quantite = df['Quantité Période'].to_numpy(dtype=float)
+    with np.errstate(divide='ignore', invalid='ignore'):
+        facteurs = np.where(quantite > 0, solution.quantites / quantite, 0.0)
+    df_optimise = completer_optimisation(df, facteurs, quantite_optimisee=solution.quantites)
+    return ResultatSimulation(df_optimise=df_optimise, totaux=totaliser(df_optimise, params, actuel)), solution
@@ -0,0 +1,196 @@
+"""Recommandations de prix TTC pour tout le catalogue à la fois.
+
+Deux questions, à coût unitaire constant :
+
+* quel est le prix TTC minimal de chaque produit pour atteindre une marge
+  cible, arrondi au palier de carte supérieur (100 FCFA par défaut) ;
+* quelle est la plus petite hausse de prix, uniforme ou limitée à une seule
+  catégorie, qui amène le CA optimisé au seuil de rentabilité. La hausse est
+  cherchée par dichotomie, toutes les catégories avançant ensemble : à chaque
+  itération, les quantités optimisées de tous les produits sont recalculées en
+  une passe et sommées par catégorie. Avec des élasticités-prix, la demande
+  de départ de chaque produit baisse avec la hausse de son prix ; une demande
+  assez élastique peut alors rendre le seuil hors d'atteinte.
+"""
+import numpy as np
+import pandas as pd
+
+from kizuna.elasticite import quantites_ajustees
+from kizuna.moteur import TAUX_TVA, calculer_facteurs, calculer_situation_actuelle, ttc_to_ht, valeurs
+
+MARGES_CIBLES = (25, 35, 50)
+ARRONDI_PRIX = 100  # FCFA
+HAUSSE_MAX = 1.0  # +100 % : au-delà, la hausse est jugée hors d'atteinte
+ITERATIONS_DICHOTOMIE = 30
+
+
+def cout_ttc(df):
+    """Coût unitaire ramené en TTC, comparable au prix de vente affiché."""
+    return valeurs(df, 'Coût Unitaire') * (1 + TAUX_TVA)
+
+
+def arrondir_prix(prix_ttc, arrondi=ARRONDI_PRIX):
+    """Palier de carte supérieur ou égal à ``prix_ttc``."""
+    return np.ceil(np.round(prix_ttc / arrondi, 9)) * arrondi
+
+
+def prix_minimaux(df, marges_cibles=MARGES_CIBLES, arrondi=ARRONDI_PRIX):
+    """Prix TTC minimal (arrondi) de chaque produit pour chaque marge cible, et hausse correspondante."""
+    prix_ttc = df['Prix Unitaire (FCFA)'].to_numpy(dtype=float)
+    cout = cout_ttc(df)
+
+    # Toutes les cibles d'un coup : matrice produits × cibles
+    cibles = np.asarray(marges_cibles, dtype=float) / 100
+    prix_min = arrondir_prix(np.maximum(cout, 0)[:, None] / (1 - cibles), arrondi)
+    hausse = np.maximum(prix_min - prix_ttc[:, None], 0)
+
+    recommandations = pd.DataFrame({
+        'Catégorie': df['Catégorie'].to_numpy(),
+        'Produit': df['Produit'].to_numpy(),
+        'Quantité Période': df['Quantité Période'].to_numpy(),
+        'Prix TTC': prix_ttc,
+        'Marge (%)': df['Marge (%)'].to_numpy(dtype=float),
+    })
+    for j, cible in enumerate(marges_cibles):
+        recommandations[f'Prix TTC {cible}%'] = prix_min[:, j]
+        recommandations[f'Hausse {cible}%'] = hausse[:, j]
+    return recommandations
+
+
+def _totaux_par_groupe(df, params, actuel, codes, n_groupes, hausses, arrondi, score_hors_groupe, elasticites=None):
+    """CA et marge optimisés par groupe quand les prix du groupe ``g`` montent de ``hausses[g]``.
+
+    ``score_hors_groupe[g]`` est le meilleur score (mode « Maximiser les produits
+    rentables ») des produits hors du groupe, dont les prix ne bougent pas. Renvoie
+    aussi, par groupe, le score de référence de ce mode après la hausse.
+    """
+    prix_base = df['Prix Unitaire (FCFA)'].to_numpy(dtype=float)
+    hausse = hausses[codes]
+    augmente = hausse > 0
+    prix_ttc = np.where(augmente, arrondir_prix(prix_base * (1 + hausse), arrondi), prix_base)
+    # Même calcul que l'éditeur de prix, pour tomber dans les mêmes tranches de marge
+    with np.errstate(divide='ignore', invalid='ignore'):
+        marge_pct = np.where(
+            augmente, (1 - valeurs(df, 'Coût Unitaire') / ttc_to_ht(prix_ttc)) * 100,
+            df['Marge (%)'].to_numpy(dtype=float)
+        )
+
+    score = marge_pct * prix_ttc / 1000
+    meilleur_score = np.full(n_groupes, -np.inf)
+    np.maximum.at(meilleur_score, codes, score)
+    references = np.maximum(meilleur_score, score_hors_groupe)
+    max_score = references[codes]
+
+    lignes = pd.DataFrame({'Marge (%)': marge_pct, 'Prix Unitaire (FCFA)': prix_ttc})
+    facteurs = calculer_facteurs(lignes, params, actuel['seuil_rentabilite'], actuel['ca_total_actuel'], max_score)
+    quantite = df['Quantité Période'].to_numpy()
+    if elasticites is not None:
+        # Arrondie à l'unité comme dans l'éditeur de prix
+        quantite = np.rint(quantites_ajustees(quantite, prix_base, prix_ttc, elasticites))
+    ca = np.round(quantite * facteurs) * prix_ttc
+    return (np.bincount(codes, weights=ca, minlength=n_groupes),
+            np.bincount(codes, weights=ca * marge_pct / 100, minlength=n_groupes),
+            references)
+
+
+def _totaux_hors_groupe(df, params, actuel, codes, n_groupes, references):
+    """CA et marge optimisés, à prix inchangés, des produits hors de chaque groupe ``g``.
+
+    En mode « Maximiser les produits rentables », le facteur des produits
+    rentables dépend du meilleur score du catalogue : si la hausse d'un groupe
+    déplace ce score (``references[g]``), tout le reste du catalogue est recalculé.
+    Une passe par score de référence distinct, en général deux ou trois.
+    """
+    prix_ttc = df['Prix Unitaire (FCFA)'].to_numpy(dtype=float)
+    marge_pct = df['Marge (%)'].to_numpy(dtype=float)
+    quantite = df['Quantité Période'].to_numpy()
+    ca_hors = np.empty(n_groupes)
+    marge_hors = np.empty(n_groupes)
+    distinctes, inverse = np.unique(references, return_inverse=True)
+    for k, reference in enumerate(distinctes):
+        facteurs = calculer_facteurs(df, params, actuel['seuil_rentabilite'], actuel['ca_total_actuel'], reference)
+        ca = np.round(quantite * facteurs) * prix_ttc
+        ca_groupes = np.bincount(codes, weights=ca, minlength=n_groupes)
+        marge_groupes = np.bincount(codes, weights=ca * marge_pct / 100, minlength=n_groupes)
+        groupes = inverse == k
+        ca_hors[groupes] = ca_groupes.sum() - ca_groupes[groupes]
+        marge_hors[groupes] = marge_groupes.sum() - marge_groupes[groupes]
+    return ca_hors, marge_hors
+
+
+def _dichotomie(atteint, n_groupes):
+    """Plus petite hausse de chaque groupe pour laquelle ``atteint(hausses)`` est vrai (NaN si hors d'atteinte)."""
+    bas = np.zeros(n_groupes)
+    haut = np.full(n_groupes, HAUSSE_MAX)
+    deja_atteint = atteint(bas)
+    atteignable = atteint(haut)
+    for _ in range(ITERATIONS_DICHOTOMIE):
+        milieu = (bas + haut) / 2
+        ok = atteint(milieu)
+        haut = np.where(ok, milieu, haut)
+        bas = np.where(ok, bas, milieu)
+    return np.where(deja_atteint, 0.0, np.where(atteignable, haut, np.nan))
+
+
+def hausses_pour_seuil(df, params, arrondi=ARRONDI_PRIX, elasticites=None):
+    """Hausse de prix minimale (uniforme, puis par catégorie seule) pour que le CA optimisé atteigne le seuil.
+
+    Les prix relevés sont arrondis au palier supérieur ; les quantités optimisées
+    suivent les nouvelles marges selon le mode de ``params``, et la demande de
+    départ les nouveaux prix si ``elasticites`` (par ligne de ``df``) est fourni.
+    """
+    actuel = calculer_situation_actuelle(df, params)
+    seuil = actuel['seuil_rentabilite']
+    charges = params.couts_fixes.total_projetes + params.cout_variable
+    codes, categories = pd.factorize(df['Catégorie'])
+    n_categories = len(categories)
+
+    # Meilleur score des autres catégories : le premier, sauf pour la catégorie qui le détient
+    score = df['Marge (%)'].to_numpy(dtype=float) * df['Prix Unitaire (FCFA)'].to_numpy(dtype=float) / 1000
+    score_categorie = np.full(n_categories, -np.inf)
+    np.maximum.at(score_categorie, codes, score)
+    ordre = np.sort(score_categorie)[::-1]
+    score_hors_categorie = np.where(score_categorie == ordre[0], ordre[1] if n_categories > 1 else -np.inf, ordre[0])
+
+    # Situation sans hausse, par catégorie
+    ca_base, marge_base, _ = _totaux_par_groupe(
+        df, params, actuel, codes, n_categories, np.zeros(n_categories), arrondi, score_hors_categorie, elasticites
+    )
+    maximiser = params.mode_optimisation == "Maximiser les produits rentables"
+
+    # Hausse limitée à une catégorie : le reste du catalogue garde ses prix, et ses
+    # totaux de base sauf si le meilleur score du catalogue a bougé
+    def totaux_categories(hausses):
+        ca, marge, references = _totaux_par_groupe(
+            df, params, actuel, codes, n_categories, hausses, arrondi, score_hors_categorie, elasticites
+        )
+        if maximiser:
+            ca_hors, marge_hors = _totaux_hors_groupe(df, params, actuel, codes, n_categories, references)
+        else:
+            ca_hors, marge_hors = ca_base.sum() - ca_base, marge_base.sum() - marge_base
+        return ca_hors + ca, marge_hors + marge
+
+    # Hausse uniforme : un seul groupe
+    uniques = np.zeros(len(df), dtype=np.intp)
+
+    def totaux_uniformes(hausses):
+        return _totaux_par_groupe(df, params, actuel, uniques, 1, hausses, arrondi, np.full(1, -np.inf), elasticites)[:2]
+
+    lignes = []
+    for portee, totaux, n_groupes, noms in [
+        ("Uniforme", totaux_uniformes, 1, ["Toutes catégories"]),
+        ("Catégorie seule", totaux_categories, n_categories, list(categories)),
+    ]:
+        hausses = _dichotomie(lambda h: totaux(h)[0] >= seuil, n_groupes)
+        ca, marge = totaux(np.nan_to_num(hausses, nan=HAUSSE_MAX))
+        for g, nom in enumerate(noms):
+            atteignable = not np.isnan(hausses[g])
+            lignes.append({
+                'Portée': portee,
+                'Catégorie': nom,
+                'Hausse (%)': hausses[g] * 100,
+                'CA Optimisé': ca[g] if atteignable else np.nan,
+                'Résultat Net Projeté': marge[g] - charges if atteignable else np.nan,
+                'Seuil atteint': atteignable,
+            })
+    return pd.DataFrame(lignes)
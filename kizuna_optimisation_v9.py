@@ -1,64 +1,190 @@
+import os
+import time
+from dataclasses import replace
+
 import streamlit as st
 import pandas as pd
-import plotly.graph_objects as go
-import plotly.express as px
 import numpy as np
+# plotly n'est importé qu'aux graphiques (et SciPy, HiGHS, ReportLab là où ils servent) :
+# le début de la page s'affiche avant leur chargement
 
+from kizuna.moteur import (
+    MODES_OPTIMISATION,
+    CoutsFixes,
+    ParametresSimulation,
+    avec_colonnes,
+    comparer_categories,
+    simuler,
+    valeurs,
+)
+from kizuna.approvisionnement import FOURNISSEURS, simuler_approvisionnement
+from kizuna.cache import version_fichier
+from kizuna.edition_prix import (
+    appliquer_modifications,
+    catalogue_edite,
+    grille_aux_prix,
+    initialiser_etat,
+    prix_par_produit,
+)
+from kizuna.elasticite import ELASTICITE_A_PRIORI, elasticites_catalogue
+from kizuna.export import FORMATS, MIMES, Rapport, lancer_export, rapport_enregistre
+from kizuna.figures import figure_ca_categories, figure_marge_categories, figures_fournisseurs
+from kizuna.grille import FACTEURS, evaluer_grille, front_pareto
+from kizuna.historique import evolutions_categories
+from kizuna.memoire import formater_octets, memoire_session, tableaux
+from kizuna.precalcul import Precalculs, optimiser_mode
+from kizuna.profilage import Profileur
+from kizuna.ressources import (
+    ETAT_PANIERS,
+    cache_resultats,
+    catalogue_periode,
+    charger_donnees,
+    charger_elasticites,
+    charger_historique,
+    charger_paniers,
+    cle_optimisation,
+    executeur_export,
+    executeur_precalcul,
+    premier_plan,
+    version_agregats,
+    version_catalogue,
+)
+from kizuna.risque import LOIS_DEMANDE, PERCENTILES, ParametresRisque, simuler_risque
+from kizuna.sauvegarde import charger, comparer, enregistrer, lister, resultats_enregistres, supprimer
+from kizuna.sensibilite import analyser_sensibilite
+from kizuna.solveur import MODE_SOLVEUR, ContraintesSolveur, simuler_solveur
+from kizuna.tarification import MARGES_CIBLES, hausses_pour_seuil, prix_minimaux
 
 
-def ttc_to_ht(prix_ttc, taux_tva=0.1925):
-    return prix_ttc / (1 + taux_tva)
 st.set_page_config(page_title="Simulation Financière KIZUNA", layout="wide")
 
+# Profileur propre à la session (activé par la case « Profilage des reruns » ou l'URL ?profil=1)
+if 'profileur' not in st.session_state:
+    st.session_state['profileur'] = Profileur()
+profileur = st.session_state['profileur']
+profileur.debut_rerun()
+
+# Scénario rouvert : ses valeurs deviennent les valeurs par défaut des widgets, dont les clés
+# changent à chaque ouverture pour que Streamlit les recrée avec ces valeurs
+valeurs_chargees = st.session_state.get('valeurs_chargees', {})
+generation_widgets = st.session_state.get('generation_widgets', 0)
+
+def valeur_initiale(nom, defaut):
+    return valeurs_chargees.get(nom, defaut)
+
+def cle_widget(nom):
+    return f"{nom}_{generation_widgets}"
+
+# Widgets dont les valeurs sont enregistrées avec un scénario
+WIDGETS_SCENARIO = (
+    'ca_actuel', 'marge_brute_visee_pct', 'cout_matiere_actuel', 'cout_variable',
+    'salaire_directeur', 'salaire_serveuse', 'electricite', 'abonnement_canal', 'transport', 'recharge_infinity',
+    'carnet_recu', 'boite_cure_dents', 'emballage_oumbe', 'salaire_serveuse_1', 'salaire_serveuse_2', 'loyer', 'erp',
+    'web_email', 'mode_optimisation', 'plancher_produit', 'plafond_produit', 'plafond_categorie', 'quantites_entieres',
+    'facteur_prod_forte_marge', 'facteur_prod_moy_marge', 'facteur_prod_faible_marge',
+    'facteur_prod_tres_faible_marge', 'mois', 'sites', 'fenetre', 'elasticite_a_priori',
+)
+
+def montant(libelle, nom, defaut):
+    return st.sidebar.number_input(libelle, value=valeur_initiale(nom, defaut), key=cle_widget(nom))
+
 st.title("💼 Optimisation Rentabilité - Restaurant KIZUNA")
 
 # Sidebar pour les paramètres financiers
 st.sidebar.header("🔧 Paramètres Financiers")
 
 # Paramètres globaux
-ca_actuel = st.sidebar.number_input("Chiffre d'affaires mensuel actuel (FCFA)", value=1976150)
-marge_brute_visee_pct = st.sidebar.slider("Marge brute visée (%)", min_value=30, max_value=70, value=50, step=5)
-cout_matiere_actuel = st.sidebar.number_input("Coût matière actuel (FCFA)", value=1321893)
-cout_variable = st.sidebar.number_input("Coûts variables (FCFA)", value=27540)
+ca_actuel = montant("Chiffre d'affaires mensuel actuel (FCFA)", 'ca_actuel', 1976150)
+marge_brute_visee_pct = st.sidebar.slider("Marge brute visée (%)", min_value=30, max_value=70, step=5,
+                                          value=valeur_initiale('marge_brute_visee_pct', 50),
+                                          key=cle_widget('marge_brute_visee_pct'))
+cout_matiere_actuel = montant("Coût matière actuel (FCFA)", 'cout_matiere_actuel', 1321893)
+cout_variable = montant("Coûts variables (FCFA)", 'cout_variable', 27540)
 
 st.sidebar.markdown("### Coûts fixes")
 st.sidebar.markdown("#### Coûts fixes personnel")
-salaire_directeur = st.sidebar.number_input("Salaire Directeur", value=200000)
-salaire_serveuse = st.sidebar.number_input("Salaire Serveuse", value=40000)
+salaire_directeur = montant("Salaire Directeur", 'salaire_directeur', 200000)
+salaire_serveuse = montant("Salaire Serveuse", 'salaire_serveuse', 40000)
 
 st.sidebar.markdown("#### Coûts fixes divers")
-electricite = st.sidebar.number_input("Facture Electricité", value=67593)
-abonnement_canal = st.sidebar.number_input("Abonnement CANAL+", value=54000)
-transport = st.sidebar.number_input("Transport", value=50000)
-recharge_infinity = st.sidebar.number_input("Recharge Infinity BOX", value=30000)
-carnet_recu = st.sidebar.number_input("Carnet de Reçus", value=2050)
-boite_cure_dents = st.sidebar.number_input("Boite de cure dents", value=100)
-emballage_oumbe = st.sidebar.number_input("Emballage oumbe", value=100)
+electricite = montant("Facture Electricité", 'electricite', 67593)
+abonnement_canal = montant("Abonnement CANAL+", 'abonnement_canal', 54000)
+transport = montant("Transport", 'transport', 50000)
+recharge_infinity = montant("Recharge Infinity BOX", 'recharge_infinity', 30000)
+carnet_recu = montant("Carnet de Reçus", 'carnet_recu', 2050)
+boite_cure_dents = montant("Boite de cure dents", 'boite_cure_dents', 100)
+emballage_oumbe = montant("Emballage oumbe", 'emballage_oumbe', 100)
 
 # Coûts fixes projetés
 st.sidebar.markdown("#### Coûts fixes projetés")
-salaire_serveuse_1 = st.sidebar.number_input("Serveuse 1", value=60000)
-salaire_serveuse_2 = st.sidebar.number_input("Serveuse 2", value=60000)
-loyer = st.sidebar.number_input("Loyer", value=400000)
-erp = st.sidebar.number_input("ERP (2 utilisateurs)", value=90000)
-web_email = st.sidebar.number_input("Site web + email", value=40000)
+salaire_serveuse_1 = montant("Serveuse 1", 'salaire_serveuse_1', 60000)
+salaire_serveuse_2 = montant("Serveuse 2", 'salaire_serveuse_2', 60000)
+loyer = montant("Loyer", 'loyer', 400000)
+erp = montant("ERP (2 utilisateurs)", 'erp', 90000)
+web_email = montant("Site web + email", 'web_email', 40000)
 
 # Calcul des coûts totaux
-total_fixes_actuels = salaire_directeur + salaire_serveuse + electricite + abonnement_canal + transport + recharge_infinity + carnet_recu + boite_cure_dents + emballage_oumbe
-total_fixes_projetes = total_fixes_actuels + salaire_serveuse_1 + salaire_serveuse_2 + loyer + erp + web_email - salaire_serveuse  # On remplace le salaire actuel
+couts_fixes = CoutsFixes(
+    salaire_directeur=salaire_directeur,
+    salaire_serveuse=salaire_serveuse,
+    electricite=electricite,
+    abonnement_canal=abonnement_canal,
+    transport=transport,
+    recharge_infinity=recharge_infinity,
+    carnet_recu=carnet_recu,
+    boite_cure_dents=boite_cure_dents,
+    emballage_oumbe=emballage_oumbe,
+    salaire_serveuse_1=salaire_serveuse_1,
+    salaire_serveuse_2=salaire_serveuse_2,
+    loyer=loyer,
+    erp=erp,
+    web_email=web_email,
+)
+total_fixes_actuels = couts_fixes.total_actuels
+total_fixes_projetes = couts_fixes.total_projetes  # On remplace le salaire actuel
 
 # Paramètres d'optimisation
 st.sidebar.markdown("### 🎯 Paramètres d'Optimisation")
 mode_optimisation = st.sidebar.radio(
     "Mode d'optimisation",
-    ["Équilibré", "Maximiser les produits rentables", "Augmentation uniforme"]
+    MODES_OPTIMISATION + [MODE_SOLVEUR],
+    index=(MODES_OPTIMISATION + [MODE_SOLVEUR]).index(valeur_initiale('mode_optimisation', MODES_OPTIMISATION[0])),
+    key=cle_widget('mode_optimisation')
 )
+etat_precalcul = st.sidebar.empty()  # modes déjà calculés pour les entrées courantes
+
+if mode_optimisation == MODE_SOLVEUR:
+    with st.sidebar.expander("⚙️ Contraintes du solveur", expanded=True):
+        plancher_produit = st.slider(
+            "Quantité min par produit (× période)", min_value=0.0, max_value=1.0, step=0.1,
+            value=valeur_initiale('plancher_produit', 0.5), key=cle_widget('plancher_produit')
+        )
+        plafond_produit = st.slider(
+            "Quantité max par produit (× période)", min_value=1.0, max_value=5.0, step=0.5,
+            value=valeur_initiale('plafond_produit', 3.0), key=cle_widget('plafond_produit')
+        )
+        plafond_categorie = st.slider(
+            "Volume max par catégorie (× période)", min_value=1.0, max_value=5.0, step=0.5,
+            value=valeur_initiale('plafond_categorie', 2.5), key=cle_widget('plafond_categorie')
+        )
+        quantites_entieres = st.checkbox(
+            "Quantités entières exactes (plus lent)",
+            value=valeur_initiale('quantites_entieres', False), key=cle_widget('quantites_entieres'),
+            help="Résout le programme en nombres entiers au lieu d'arrondir la solution continue"
+        )
+    contraintes_solveur = ContraintesSolveur(
+        plancher_produit=plancher_produit,
+        plafond_produit=plafond_produit,
+        plafond_categorie=plafond_categorie,
+        entier=quantites_entieres,
+    )
 
 facteur_prod_forte_marge = st.sidebar.slider(
     "Facteur d'augmentation produits forte marge (>50%)",
     min_value=1.0, 
     max_value=5.0, 
-    value=2.5, 
+    value=valeur_initiale('facteur_prod_forte_marge', 2.5),
+    key=cle_widget('facteur_prod_forte_marge'),
     step=0.5,
     help="Coefficient multiplicateur des ventes pour les produits ayant une marge >50%"
 )
@@ -67,7 +193,8 @@ facteur_prod_moy_marge = st.sidebar.slider(
     "Facteur d'augmentation produits marge moyenne (35-50%)",
     min_value=1.0, 
     max_value=4.0, 
-    value=2.0, 
+    value=valeur_initiale('facteur_prod_moy_marge', 2.0),
+    key=cle_widget('facteur_prod_moy_marge'),
     step=0.5
 )
 
@@ -75,7 +202,8 @@ facteur_prod_faible_marge = st.sidebar.slider(
     "Facteur d'augmentation produits faible marge (20-35%)",
     min_value=1.0, 
     max_value=4.0, 
-    value=1.5, 
+    value=valeur_initiale('facteur_prod_faible_marge', 1.5),
+    key=cle_widget('facteur_prod_faible_marge'),
     step=0.5
 )
 
@@ -83,7 +211,8 @@ facteur_prod_tres_faible_marge = st.sidebar.slider(
     "Facteur d'augmentation produits très faible marge (<20%)",
     min_value=0.0, 
     max_value=2.0, 
-    value=0.9, 
+    value=valeur_initiale('facteur_prod_tres_faible_marge', 0.9),
+    key=cle_widget('facteur_prod_tres_faible_marge'),
     step=0.1,
     help="Valeur 0 pour arrêter de vendre les produits non rentables"
 )
@@ -111,88 +240,243 @@ with st.sidebar.expander("📘 Guide d'utilisation"):
 
 afficher_details = st.sidebar.checkbox("Afficher les détails par produit", value=False)
 afficher_depenses = st.sidebar.checkbox("Afficher les depenses par produit", value=False)
+afficher_grille = st.sidebar.checkbox("Explorer la grille de scénarios", value=False,
+                                      help="Évalue toutes les combinaisons des facteurs d'augmentation en une passe")
+afficher_sensibilite = st.sidebar.checkbox("Analyse de sensibilité", value=False,
+                                           help="Effet de ±x % sur chaque coût, facteur et prix, classé par importance")
+afficher_risque = st.sidebar.checkbox("Simulation du risque de demande", value=False,
+                                      help="Monte Carlo : distribution du résultat net si la demande varie")
+profileur.actif = st.sidebar.checkbox("Profilage des reruns", value=st.query_params.get("profil") == "1",
+                                      help="Mesure la durée de chaque étape du script (p50/p95 par session)")
 
-# Fonction pour charger et préparer les données
-@st.cache_data
-def charger_donnees():
-    try:
-        df = pd.read_csv("produits_par_categorie_avril.csv")
-
-        # Calcul des métriques par produit
-        df['Prix Unitaire HT'] = ttc_to_ht(df['Prix Unitaire (FCFA)'])
-        df['CA'] = df['Prix Unitaire HT'] * df['Quantité Avril']
-        df['CA TTC'] = df['Prix Unitaire (FCFA)'] * df['Quantité Avril']
-        df['Marge Valeur'] = df['CA'] * (df['Marge (%)'] / 100)
-        df['Marge Valeur TTC'] = df['CA TTC'] * (df['Marge (%)'] / 100)
-        df['Coût Unitaire'] = df['Prix Unitaire HT'] * (1 - df['Marge (%)'] / 100)
-        
-        return df
-    except Exception as e:
-        st.error(f"Erreur lors du chargement des données: {e}")
-        return None
+TAILLE_PAGE = 500  # lignes envoyées au navigateur par page de tableau
+
+def afficher_tableau(df, cle, formats, taille_page=TAILLE_PAGE):
+    """Tableau aux colonnes numériques, formatées à l'affichage, paginé côté serveur.
+
+    Seule la page courante est sérialisée ; au-delà d'une page, le tri est fait
+    ici sur tout le tableau (le tri du navigateur ne porterait que sur la page).
+    """
+    column_config = {col: st.column_config.NumberColumn(format=fmt) for col, fmt in formats.items()}
+    if len(df) <= taille_page:
+        st.dataframe(df, use_container_width=True, column_config=column_config)
+        return
+
+    n_pages = -(-len(df) // taille_page)
+    col1, col2, col3 = st.columns([2, 1, 1])
+    with col1:
+        tri = st.selectbox("Trier par", ["Ordre par défaut"] + list(df.columns), key=f"{cle}_tri")
+    with col2:
+        croissant = st.toggle("Croissant", value=False, key=f"{cle}_croissant", disabled=tri == "Ordre par défaut")
+    with col3:
+        page = st.number_input("Page", min_value=1, max_value=n_pages, value=1, step=1, key=f"{cle}_page")
+    if tri != "Ordre par défaut":
+        df = df.sort_values(tri, ascending=croissant, kind='stable')
+    debut = (page - 1) * taille_page
+    st.dataframe(df.iloc[debut:debut + taille_page], use_container_width=True, column_config=column_config)
+    st.caption(f"Lignes {debut + 1:,} à {min(debut + taille_page, len(df)):,} sur {len(df):,} — page {page}/{n_pages}")
 
 # Chargement des données
-df = charger_donnees()
+# (catalogue, historique, résultats et pools de threads sont partagés par toutes les sessions du processus,
+# et préchauffés au démarrage du serveur par python -m kizuna.demarrage)
+with profileur.etape("Chargement du catalogue"):
+    versions_sources = (version_catalogue(), version_agregats())
+    df = charger_donnees(versions_sources[0])
 
 # Calcul des métriques financières actuelles
 if df is not None:  
+    with profileur.etape("Chargement de l'historique"):
+        historique = charger_historique(*versions_sources)
+
+    # Sélection de la période : mois de référence, sites, éventuelle moyenne glissante
+    st.sidebar.markdown("### 📅 Période analysée")
+    liste_mois = list(historique.mois.astype(str)[::-1])
+    mois_charge = valeur_initiale('mois', liste_mois[0])
+    mois_selectionne = st.sidebar.selectbox(
+        "Mois de référence", liste_mois, index=liste_mois.index(mois_charge) if mois_charge in liste_mois else 0,
+        key=cle_widget('mois')
+    )
+    sites_selectionnes = None
+    if len(historique.sites) > 1:
+        sites_charges = [site for site in valeur_initiale('sites', []) if site in list(historique.sites)]
+        sites_selectionnes = st.sidebar.multiselect(
+            "Sites", list(historique.sites), default=sites_charges or list(historique.sites), key=cle_widget('sites')
+        )
+        if not sites_selectionnes:
+            # Une sélection vide n'est pas « tous les sites » : rien à afficher
+            st.warning("Sélectionnez au moins un site pour analyser la période.")
+            st.stop()
+    fenetre = st.sidebar.select_slider(
+        "Base de quantités",
+        options=[1, 3, 6, 12],
+        value=valeur_initiale('fenetre', 1),
+        format_func=lambda n: "Mois seul" if n == 1 else f"Moyenne glissante {n} mois",
+        disabled=len(historique.mois) == 1,
+        key=cle_widget('fenetre')
+    )
+    elasticite_a_priori = st.sidebar.slider(
+        "Élasticité-prix a priori", min_value=-3.0, max_value=0.0, step=0.1,
+        value=valeur_initiale('elasticite_a_priori', ELASTICITE_A_PRIORI), key=cle_widget('elasticite_a_priori'),
+        help="Retenue pour les produits dont le prix n'a pas varié dans l'historique : à -1, une hausse de prix "
+             "de 10 % fait perdre environ 10 % des ventes ; à 0, la demande ne suit pas les prix"
+    )
+    cle_periode = (mois_selectionne, tuple(sites_selectionnes or ()), fenetre)  # () : l'unique site de l'historique
+    with profileur.etape("Sélection de la période"):
+        base, grille_base = catalogue_periode(*versions_sources, cle_periode)
+
     st.header("🛠️ Modification des Prix de Vente (TTC)")
     st.markdown("Modifiez les prix **TTC** par produit. Les conversions HT seront faites automatiquement pour l'optimisation.")
-    prix_modifiables = {}
-
-    categories = df['Catégorie'].unique()
-    for cat in categories:
-        st.subheader(f"📦 {cat}")
-        cat_df = df[df['Catégorie'] == cat]
-
-        cols = st.columns(6)
-
-        for i, (idx, row) in enumerate(cat_df.iterrows()):
-            with cols[i % 6]:
-                prix_ttc = st.number_input(
-                    f"{row['Produit']}",
-                    value=float(f"{row['Prix Unitaire (FCFA)']:.0f}"),
-                    key=f"prix_{cat}_{i}",
-                    help="Prix TTC en FCFA"
+
+    # État d'édition propre à la session : surcouche des prix modifiés + agrégats par catégorie
+    # (reconstruit au changement de période ; les prix saisis dans la grille sont réappliqués).
+    # La grille de départ n'est qu'une référence au tableau partagé, sauf pour un scénario rouvert
+    # dont elle reprend les prix modifiés.
+    if st.session_state.get('etat_prix') is None or len(st.session_state['etat_prix'].base) != len(base):
+        st.session_state['grille_prix'] = grille_aux_prix(grille_base, valeur_initiale('prix_ttc', {}))
+    # Quantités des produits dont le prix est modifié : ajustées par leur élasticité-prix
+    with profileur.etape("Élasticités-prix"):
+        elasticites = charger_elasticites(*versions_sources, elasticite_a_priori)
+    cle_demande = (cle_periode, versions_sources[1], elasticite_a_priori)
+    if st.session_state.get('etat_prix') is None or st.session_state.get('etat_prix_periode') != cle_demande:
+        st.session_state['etat_prix'] = initialiser_etat(
+            base, elasticites_catalogue(elasticites, base, elasticite_a_priori)
+        )
+        st.session_state['etat_prix_periode'] = cle_demande
+    etat_prix = st.session_state['etat_prix']
+
+    with profileur.etape("Édition des prix"):
+        # Une seule grille éditable pour tout le catalogue (les prix de départ restent fixes)
+        prix_edites = st.data_editor(
+            st.session_state['grille_prix'],
+            key=cle_widget('editeur_prix'),
+            disabled=['Catégorie', 'Produit'],
+            hide_index=True,
+            use_container_width=True,
+            height=350,
+            column_config={
+                'Prix Unitaire (FCFA)': st.column_config.NumberColumn(
+                    "Prix TTC (FCFA)", min_value=0, step=50, format="%d FCFA", help="Prix TTC en FCFA"
                 )
-                prix_ht = prix_ttc / (1 + 0.1925)
-                df.at[idx, 'Prix Unitaire HT'] = prix_ht
-                df.at[idx, 'Prix Unitaire (FCFA)'] = prix_ttc  # mise à jour pour affichage cohérent
-                # Recalcul de la marge (%) en fonction du coût unitaire et nouveau prix HT
-                cout_unitaire = df.at[idx, 'Coût Unitaire']
-                if prix_ht > 0:
-                    marge_pct = (1 - (cout_unitaire / prix_ht)) * 100
-                else:
-                    marge_pct = 0
-                df.at[idx, 'Marge (%)'] = marge_pct
-
-
-    # Recalcul des métriques après modification
-    df['CA'] = df['Prix Unitaire HT'] * df['Quantité Avril']
-    df['Marge Valeur'] = df['CA'] * (df['Marge (%)'] / 100)
-    df['Coût Unitaire'] = df['Prix Unitaire HT'] * (1 - df['Marge (%)'] / 100)
-
-    df['CA'] = df['Prix Unitaire HT'] * df['Quantité Avril']
-    df['Marge Valeur'] = df['CA'] * (df['Marge (%)'] / 100)
-    df['Coût Unitaire'] = df['Prix Unitaire HT'] * (1 - df['Marge (%)'] / 100)
+            },
+        )
+
+        # Recalcul des seules lignes modifiées (HT, marge à coût unitaire constant, CA)
+        appliquer_modifications(etat_prix, prix_edites['Prix Unitaire (FCFA)'].to_numpy(dtype=float))
+        df = catalogue_edite(etat_prix)
+
+    if etat_prix.journal:
+        with st.expander(f"📝 Journal des modifications de prix ({len(etat_prix.journal)})"):
+            st.dataframe(pd.DataFrame(etat_prix.journal), use_container_width=True, hide_index=True)
+            if st.button("Réinitialiser les prix"):
+                st.session_state['etat_prix'] = None
+                st.session_state.pop(cle_widget('editeur_prix'), None)
+                valeurs_chargees.pop('prix_ttc', None)
+                st.rerun()
+
+    with st.expander("📉 Élasticités-prix de la demande"):
+        estimees = int(elasticites['Élasticité produit'].notna().sum())
+        st.caption(
+            f"Quantité attendue d'un produit au prix modifié = quantité de la période × (nouveau prix / prix de "
+            f"départ) ^ élasticité ; son CA TTC, qui entre dans le CA de référence du seuil de rentabilité, est "
+            f"cette quantité × le nouveau prix TTC. {estimees} produit(s) sur {len(elasticites)} ont une variation "
+            f"de prix dans l'historique ; les autres reçoivent l'élasticité de leur catégorie, à défaut la valeur "
+            f"a priori ({elasticite_a_priori:.1f})."
+        )
+        afficher_tableau(elasticites, "tableau_elasticites", {
+            'Variation log-prix': "%.4f",
+            **{col: "%.2f" for col in ['Élasticité produit', 'Élasticité catégorie', 'Élasticité']},
+        })
+
+    params = ParametresSimulation(
+        couts_fixes=couts_fixes,
+        cout_variable=cout_variable,
+        marge_brute_visee_pct=marge_brute_visee_pct,
+        mode_optimisation=mode_optimisation,
+        facteur_prod_forte_marge=facteur_prod_forte_marge,
+        facteur_prod_moy_marge=facteur_prod_moy_marge,
+        facteur_prod_faible_marge=facteur_prod_faible_marge,
+        facteur_prod_tres_faible_marge=facteur_prod_tres_faible_marge,
+    )
+    # Optimisation mémorisée par empreinte (sources, période et sites, catalogue édité, coûts, mode, facteurs)
+    cache = cache_resultats()
+    contraintes_cle = contraintes_solveur if mode_optimisation == MODE_SOLVEUR else None
+    cle_resultats = cle_optimisation(df, params, contraintes_cle, cle_periode)
+
+    # Précalcul en arrière-plan des modes heuristiques pour les mêmes entrées ; les tâches
+    # lancées pour des entrées qui ont changé depuis sont annulées
+    if st.session_state.get('precalculs') is None:
+        st.session_state['precalculs'] = Precalculs(executeur_precalcul(), cache, premier_plan())
+    precalculs = st.session_state['precalculs']
+    params_modes = {mode: replace(params, mode_optimisation=mode) for mode in MODES_OPTIMISATION}
+    cles_modes = {mode: cle_optimisation(df, params_mode, cle_periode=cle_periode)
+                  for mode, params_mode in params_modes.items()}
+    precalculs.garder(set(cles_modes.values()))
+    # Copie : l'édition des prix met à jour les agrégats de la session en place
+    agregats_categorie = etat_prix.agregats_categorie.copy()
+
+    def calcul_mode(params_mode):
+        return lambda annulation: optimiser_mode(df, params_mode, agregats_categorie, annulation)
+
+    def attendre(tache, libelle):
+        """Attend la fin de ``tache`` ; la page reste interactive pendant l'attente (chaque mise à jour
+        de l'indicateur permet à Streamlit d'interrompre le script si une entrée change)."""
+        indicateur = st.empty()
+        debut = time.perf_counter()
+        while not tache.terminee(delai=0.1):
+            indicateur.info(f"⏳ {libelle} — {time.perf_counter() - debut:.1f} s")
+        indicateur.empty()
+
+    def optimiser():
+        # Calcul de premier plan : le précalcul des autres modes attend qu'il soit fini
+        with premier_plan().calcul():
+            solution = None
+            if mode_optimisation == MODE_SOLVEUR:
+                # La solution du rerun précédent sert d'amorce au solveur
+                resultat, solution = simuler_solveur(
+                    df, params, contraintes_solveur, amorce=st.session_state.get('solution_solveur')
+                )
+            else:
+                resultat = simuler(df, params)
+            with profileur.etape("Comparaison par catégorie"):
+                cat_compare = comparer_categories(df, resultat.df_optimise, etat_prix.agregats_categorie)
+        return resultat, solution, cat_compare
+
+    with profileur.etape("Optimisation"):
+        # Mode affiché : calcul synchrone, hors du pool du précalcul. Sa tâche d'arrière-plan est
+        # retirée de la file, ou attendue si elle a déjà démarré.
+        tache = precalculs.reprendre(cle_resultats)
+        if tache is not None:
+            attendre(tache, f"Calcul du mode « {mode_optimisation} » en cours")
+        resultat, solution_solveur, cat_compare = cache.obtenir(cle_resultats, optimiser)
+
+    for mode, cle in cles_modes.items():
+        if cle != cle_resultats:
+            precalculs.lancer(cle, calcul_mode(params_modes[mode]))
+    etat_precalcul.caption("Précalcul : " + " · ".join(
+        f"{'⏳' if precalculs.en_cours(cle) else '✓'} {mode}" for mode, cle in cles_modes.items()
+    ))
+    if solution_solveur is not None:
+        st.session_state['solution_solveur'] = solution_solveur
+    df_optimise = resultat.df_optimise
+    totaux = resultat.totaux
 
     # Calculs financiers actuels
-    ca_total_actuel = df['CA TTC'].sum()
-    marge_brute_actuelle = df['Marge Valeur TTC'].sum()
-    marge_brute_pct_actuelle = (marge_brute_actuelle / ca_total_actuel) * 100 if ca_total_actuel > 0 else 0
-    cout_total_actuel = ca_total_actuel - marge_brute_actuelle
-    
-    # Coûts totaux et résultat
-    total_charges_actuel = cout_total_actuel + total_fixes_actuels + cout_variable
-    resultat_net_actuel = ca_total_actuel - total_charges_actuel
-    resultat_net_pct_actuel = (resultat_net_actuel / ca_total_actuel) * 100 if ca_total_actuel > 0 else 0
-    
+    ca_total_actuel = totaux.ca_total_actuel
+    marge_brute_actuelle = totaux.marge_brute_actuelle
+    marge_brute_pct_actuelle = totaux.marge_brute_pct_actuelle
+    resultat_net_actuel = totaux.resultat_net_actuel
+    resultat_net_pct_actuel = totaux.resultat_net_pct_actuel
+
     # Seuil de rentabilité
-    cout_fixe_total = total_fixes_projetes + cout_variable
-    seuil_rentabilite = cout_fixe_total / (marge_brute_visee_pct / 100)
+    seuil_rentabilite = totaux.seuil_rentabilite
     
     # Affichage des métriques actuelles
     st.header("📊 Situation Financière Actuelle")
+    st.caption(
+        f"Période : {mois_selectionne}"
+        + (f", moyenne glissante sur {fenetre} mois" if fenetre > 1 else "")
+        + (f" — sites : {', '.join(sites_selectionnes)}" if sites_selectionnes else "")
+    )
     col1, col2, col3 = st.columns(3)
     with col1:
         st.metric("Chiffre d'Affaires", f"{ca_total_actuel:,.0f} FCFA")
@@ -203,6 +487,32 @@ if df is not None:
     with col3:
         st.metric("Résultat Net", f"{resultat_net_actuel:,.0f} FCFA", f"{resultat_net_pct_actuel:.2f}%")
         st.metric("Seuil de Rentabilité Visé", f"{seuil_rentabilite:,.0f} FCFA")
+
+    # Évolution des ventes, à partir des cumuls par catégorie précalculés
+    if len(historique.mois) > 1:
+        with profileur.etape("Évolution des ventes"):
+            st.header("📅 Évolution des Ventes")
+            evolutions = evolutions_categories(historique, sites_selectionnes)
+            st.dataframe(
+                evolutions[evolutions['Mois'] == mois_selectionne].sort_values('CA TTC', ascending=False),
+                use_container_width=True,
+                hide_index=True,
+                column_config={
+                    'CA TTC': st.column_config.NumberColumn(format="%d FCFA"),
+                    'Variation CA M-1 (%)': st.column_config.NumberColumn(format="%.1f%%"),
+                    'Variation CA N-1 (%)': st.column_config.NumberColumn(format="%.1f%%"),
+                }
+            )
+            import plotly.express as px
+
+            fig_evolution = px.line(
+                evolutions,
+                x='Mois',
+                y='CA TTC',
+                color='Catégorie',
+                title="CA TTC mensuel par catégorie"
+            )
+            st.plotly_chart(fig_evolution, use_container_width=True)
     
     # Ligne de séparation
     st.markdown("---")
@@ -210,59 +520,14 @@ if df is not None:
     # Algorithme d'optimisation des ventes
     st.header("🧠 Optimisation des Ventes pour une Marge de 50%")
     
-    # Créer une copie du dataframe pour l'optimisation
-    df_optimise = df.copy()
-    
-    # Appliquer les facteurs d'augmentation selon la stratégie choisie
-    if mode_optimisation == "Équilibré":
-        # Stratégie équilibrée - basée sur la marge
-        df_optimise['Facteur Augmentation'] = df_optimise['Marge (%)'].apply(
-            lambda x: facteur_prod_tres_faible_marge if x < 20 else
-                     (facteur_prod_faible_marge if x < 35 else
-                     (facteur_prod_moy_marge if x < 50 else facteur_prod_forte_marge))
-        )
-    elif mode_optimisation == "Maximiser les produits rentables":
-        # Favoriser les produits rentables, réduire les produits à faible marge
-        df_optimise['Score'] = df_optimise['Marge (%)'] * df_optimise['Prix Unitaire (FCFA)'] / 1000
-        max_score = df_optimise['Score'].max()
-        df_optimise['Facteur Augmentation'] = df_optimise.apply(
-            lambda row: facteur_prod_tres_faible_marge if row['Marge (%)'] < 20 else
-                      (facteur_prod_faible_marge if row['Marge (%)'] < 35 else
-                      (facteur_prod_moy_marge if row['Marge (%)'] < 50 else 
-                       facteur_prod_forte_marge * (0.8 + 0.4 * (row['Score'] / max_score)))), axis=1
-        )
-    else:  # Augmentation uniforme
-        # Appliquer un facteur d'augmentation uniforme basé sur le ratio requis
-        ratio_augmentation_requis = seuil_rentabilite / ca_total_actuel
-        facteur_uniforme = min(4.0, max(1.1, ratio_augmentation_requis * 0.8))  # Limité entre 1.1 et 4.0
-        df_optimise['Facteur Augmentation'] = facteur_uniforme
-        # Mais garder facteur_prod_tres_faible_marge pour les produits non rentables
-        df_optimise.loc[df_optimise['Marge (%)'] < 0, 'Facteur Augmentation'] = facteur_prod_tres_faible_marge
-    
-    # Si le facteur est 0 pour les produits à très faible marge, mettre à 0 les quantités
-    df_optimise.loc[(df_optimise['Marge (%)'] < 0) & (facteur_prod_tres_faible_marge == 0), 'Facteur Augmentation'] = 0
-    
-    # Calculer les nouvelles quantités et métriques
-    df_optimise['Quantité Optimisée'] = (df_optimise['Quantité Avril'] * df_optimise['Facteur Augmentation']).round().astype(int)
-    df_optimise['CA Optimisé'] = df_optimise['Quantité Optimisée'] * df_optimise['Prix Unitaire (FCFA)']
-    df_optimise['Marge Valeur Optimisée'] = df_optimise['CA Optimisé'] * (df_optimise['Marge (%)'] / 100)
-    
-    # Calculer les variations et dépenses additionnelles
-    df_optimise['Variation Quantité'] = df_optimise['Quantité Optimisée'] - df_optimise['Quantité Avril']
-    df_optimise['Dépenses Additionnelles'] = df_optimise['Variation Quantité'] * df_optimise['Coût Unitaire']
-    df_optimise['CA Additionnel'] = df_optimise['Variation Quantité'] * df_optimise['Prix Unitaire (FCFA)']
-    
-    # Calcul des totaux après optimisation
-    ca_optimise = df_optimise['CA Optimisé'].sum()
-    marge_optimisee = df_optimise['Marge Valeur Optimisée'].sum()
-    marge_pct_optimisee = (marge_optimisee / ca_optimise) * 100 if ca_optimise > 0 else 0
-    cout_matiere_optimise = ca_optimise - marge_optimisee
-    depenses_additionnelles_total = df_optimise['Dépenses Additionnelles'].sum()
-    
-    # Résultat avec coûts projetés
-    total_charges_optimise = cout_matiere_optimise + total_fixes_projetes + cout_variable
-    resultat_net_optimise = ca_optimise - total_charges_optimise
-    resultat_net_pct_optimise = (resultat_net_optimise / ca_optimise) * 100 if ca_optimise > 0 else 0
+    # Totaux après optimisation
+    ca_optimise = totaux.ca_optimise
+    marge_optimisee = totaux.marge_optimisee
+    marge_pct_optimisee = totaux.marge_pct_optimisee
+    cout_matiere_optimise = totaux.cout_matiere_optimise
+    depenses_additionnelles_total = totaux.depenses_additionnelles_total
+    resultat_net_optimise = totaux.resultat_net_optimise
+    resultat_net_pct_optimise = totaux.resultat_net_pct_optimise
     
     # Affichage des résultats de l'optimisation
     col1, col2, col3 = st.columns(3)
@@ -282,222 +547,466 @@ if df is not None:
     else:
         st.warning(f"⚠️ OBJECTIF NON ATTEINT : Il manque encore {seuil_rentabilite - ca_optimise:,.0f} FCFA pour atteindre le seuil de rentabilité")
         st.info("Suggestions : Augmenter les prix des produits ou réduire les coûts fixes projetés")
+
+    if mode_optimisation == MODE_SOLVEUR:
+        amorce = " (amorcé par la solution précédente)" if solution_solveur.amorce else ""
+        if solution_solveur.optimal:
+            st.caption(f"Solveur HiGHS : {solution_solveur.statut} en {solution_solveur.duree_ms:.1f} ms{amorce}")
+        elif solution_solveur.arrondi_sous_objectif:
+            st.warning(
+                "Solveur HiGHS : l'arrondi aux unités entières, dans les plafonds de volume par catégorie, "
+                "passe sous le seuil de rentabilité ou la marge visée. Cochez « Quantités entières exactes » "
+                "pour une solution entière optimale."
+            )
+        else:
+            st.error(
+                f"Solveur HiGHS : {solution_solveur.statut}. Aucune combinaison de quantités ne respecte à la fois "
+                f"le seuil de rentabilité, la marge visée de {marge_brute_visee_pct}% et les plafonds de volume ; "
+                "quantités de la période conservées. Assouplissez les contraintes ou la marge visée."
+            )
+    
+    # Grille de scénarios sur les facteurs d'augmentation
+    if afficher_grille:
+        with profileur.etape("Grille de scénarios"):
+            st.header("🧮 Grille de Scénarios")
+            # Le solveur n'utilise pas les facteurs : la grille porte alors sur le mode Équilibré
+            params_grille = params if mode_optimisation in MODES_OPTIMISATION else replace(params, mode_optimisation="Équilibré")
+            resultats_grille = cache.obtenir(
+                ('grille', cle_resultats), lambda: evaluer_grille(df, params_grille)
+            )
+            pareto = front_pareto(resultats_grille)
+            st.markdown(
+                f"**{len(resultats_grille):,} combinaisons évaluées** en mode *{params_grille.mode_optimisation}* — "
+                f"{int(resultats_grille['objectif_atteint'].sum()):,} atteignent le seuil de rentabilité."
+            )
+
+            # Carte de chaleur forte × moyenne marge, aux valeurs courantes des deux autres curseurs
+            faible_proche = resultats_grille['facteur_prod_faible_marge'].sub(facteur_prod_faible_marge).abs()
+            tres_faible_proche = resultats_grille['facteur_prod_tres_faible_marge'].sub(facteur_prod_tres_faible_marge).abs()
+            coupe = resultats_grille[(faible_proche == faible_proche.min()) & (tres_faible_proche == tres_faible_proche.min())]
+            matrice = coupe.pivot_table(
+                index='facteur_prod_moy_marge',
+                columns='facteur_prod_forte_marge',
+                values='resultat_net_optimise'
+            )
+            import plotly.express as px
+            import plotly.graph_objects as go
+
+            fig_grille = go.Figure(go.Heatmap(
+                z=matrice.to_numpy(),
+                x=matrice.columns,
+                y=matrice.index,
+                colorscale='RdYlGn',
+                zmid=0,
+                colorbar=dict(title="Résultat net (FCFA)")
+            ))
+            fig_grille.update_layout(
+                title="Résultat Net Projeté selon les facteurs forte / moyenne marge",
+                xaxis_title="Facteur forte marge (>50%)",
+                yaxis_title="Facteur marge moyenne (35-50%)"
+            )
+            st.plotly_chart(fig_grille, use_container_width=True)
+
+            # Front de Pareto : résultat net maximal pour un budget d'approvisionnement donné
+            fig_pareto = px.scatter(
+                resultats_grille,
+                x='depenses_additionnelles_total',
+                y='resultat_net_optimise',
+                color='objectif_atteint',
+                hover_data=FACTEURS,
+                render_mode='webgl',
+                opacity=0.4,
+                labels={
+                    'depenses_additionnelles_total': "Dépenses Additionnelles (FCFA)",
+                    'resultat_net_optimise': "Résultat Net Projeté (FCFA)",
+                    'objectif_atteint': "Seuil atteint"
+                },
+                title="Dépenses additionnelles vs Résultat net (front de Pareto)"
+            )
+            fig_pareto.add_trace(go.Scatter(
+                x=pareto['depenses_additionnelles_total'],
+                y=pareto['resultat_net_optimise'],
+                mode='lines+markers',
+                name='Front de Pareto',
+                line=dict(color='black')
+            ))
+            st.plotly_chart(fig_pareto, use_container_width=True)
+
+            st.dataframe(
+                pareto[FACTEURS + ['ca_optimise', 'marge_pct_optimisee', 'resultat_net_optimise', 'depenses_additionnelles_total']],
+                use_container_width=True,
+                hide_index=True
+            )
+    
+    # Sensibilité : effet de chaque entrée sur le résultat net, en une évaluation groupée
+    @st.fragment
+    def section_sensibilite(df, params, cle_resultats):
+        with profileur.etape("Analyse de sensibilité"):
+            st.header("🌪️ Analyse de Sensibilité")
+            # Comme la grille, le mode Solveur est analysé sur le mode Équilibré
+            params_sensibilite = (
+                params if params.mode_optimisation in MODES_OPTIMISATION
+                else replace(params, mode_optimisation="Équilibré")
+            )
+            col1, col2 = st.columns(2)
+            with col1:
+                variation = st.slider("Variation appliquée à chaque entrée (±%)", min_value=1, max_value=50, value=10)
+            with col2:
+                n_entrees = st.slider("Entrées affichées", min_value=5, max_value=50, value=20, step=5)
+
+            sensibilites = cache.obtenir(
+                ('sensibilite', cle_resultats, variation, cle_demande),
+                lambda: analyser_sensibilite(df, params_sensibilite, variation / 100, etat_prix.elasticites)
+            )
+            st.markdown(
+                f"**{len(sensibilites):,} entrées analysées** en mode *{params_sensibilite.mode_optimisation}* — "
+                f"chaque barre montre l'écart de résultat net projeté pour -{variation}% / +{variation}% sur l'entrée."
+            )
+
+            # Tornado : entrées les plus influentes en haut
+            principales = sensibilites.head(n_entrees).iloc[::-1]
+            etiquettes = principales['Entrée'] + " (" + principales['Type'] + ")"
+            import plotly.graph_objects as go
+
+            fig_tornado = go.Figure()
+            fig_tornado.add_trace(go.Bar(
+                y=etiquettes, x=principales['Δ Résultat net bas'], orientation='h',
+                name=f"-{variation}%", marker_color='coral'
+            ))
+            fig_tornado.add_trace(go.Bar(
+                y=etiquettes, x=principales['Δ Résultat net haut'], orientation='h',
+                name=f"+{variation}%", marker_color='royalblue'
+            ))
+            fig_tornado.update_layout(
+                title="Sensibilité du Résultat Net Projeté",
+                xaxis_title="Écart de résultat net (FCFA)",
+                barmode='overlay',
+                height=max(400, 25 * len(principales))
+            )
+            st.plotly_chart(fig_tornado, use_container_width=True)
+
+            afficher_tableau(sensibilites, "tableau_sensibilite", {
+                'Valeur': "%.2f",
+                **{col: "%d FCFA" for col in [
+                    'Δ Résultat net bas', 'Δ Résultat net haut', 'Δ Seuil bas', 'Δ Seuil haut', 'Amplitude'
+                ]},
+            })
+
+    if afficher_sensibilite:
+        section_sensibilite(df, params, cle_resultats)
+    
+    # Risque de demande : distribution Monte Carlo du résultat net projeté
+    # (fragment : changer un réglage de la simulation ne relance que cette section)
+    @st.fragment
+    def section_risque(df_optimise, params, cle_resultats):
+        with profileur.etape("Risque de demande"):
+            st.header("🎲 Risque de Demande (Monte Carlo)")
+            col1, col2, col3, col4 = st.columns(4)
+            with col1:
+                n_scenarios = st.selectbox(
+                    "Nombre de scénarios", [10_000, 100_000, 250_000], index=1, format_func=lambda n: f"{n:,}"
+                )
+            with col2:
+                loi_demande = st.radio("Loi de la demande", LOIS_DEMANDE)
+            with col3:
+                dispersion = st.slider(
+                    "Dispersion (binomiale négative)", min_value=1.0, max_value=50.0, value=10.0, step=1.0,
+                    disabled=loi_demande != "Binomiale négative",
+                    help="Plus la valeur est faible, plus la demande est volatile (variance = μ + μ²/dispersion)"
+                )
+            with col4:
+                graine = st.number_input("Graine aléatoire", value=42, step=1)
+
+            parametres_risque = ParametresRisque(
+                n_scenarios=n_scenarios, loi=loi_demande, dispersion=dispersion, graine=int(graine)
+            )
+            with st.spinner("Simulation des scénarios de demande..."):
+                risque = cache.obtenir(
+                    ('risque', cle_resultats, parametres_risque),
+                    lambda: simuler_risque(df_optimise, params, parametres_risque)
+                )
+
+            percentiles = risque.percentiles()
+            col1, col2, col3 = st.columns(3)
+            col1.metric("Probabilité d'atteindre le seuil", f"{risque.probabilite_seuil:.1%}")
+            col2.metric("Probabilité de résultat net positif", f"{risque.probabilite_benefice:.1%}")
+            col3.metric("Résultat net médian", f"{percentiles['resultat_net'][50]:,.0f} FCFA")
+
+            # Histogramme précalculé : seules les classes sont envoyées au navigateur
+            effectifs, bornes = np.histogram(risque.resultat_net, bins=60)
+            import plotly.graph_objects as go
+
+            fig_risque = go.Figure(go.Bar(
+                x=(bornes[:-1] + bornes[1:]) / 2,
+                y=effectifs / len(risque.resultat_net) * 100,
+                width=np.diff(bornes),
+                marker_color='royalblue',
+                name='Scénarios'
+            ))
+            for rang, couleur in [(5, 'red'), (50, 'black'), (95, 'green')]:
+                fig_risque.add_vline(
+                    x=percentiles['resultat_net'][rang], line_dash='dash', line_color=couleur,
+                    annotation_text=f"P{rang}"
+                )
+            fig_risque.update_layout(
+                title=f"Distribution du Résultat Net Projeté ({len(risque.resultat_net):,} scénarios)",
+                xaxis_title="Résultat Net (FCFA)",
+                yaxis_title="Fréquence (%)",
+                bargap=0
+            )
+            st.plotly_chart(fig_risque, use_container_width=True)
+
+            st.dataframe(
+                pd.DataFrame({
+                    'Percentile': [f"P{p}" for p in PERCENTILES],
+                    'CA (FCFA)': [percentiles['ca'][p] for p in PERCENTILES],
+                    'Résultat Net (FCFA)': [percentiles['resultat_net'][p] for p in PERCENTILES],
+                }),
+                hide_index=True,
+                column_config={
+                    'CA (FCFA)': st.column_config.NumberColumn(format="%d"),
+                    'Résultat Net (FCFA)': st.column_config.NumberColumn(format="%d"),
+                }
+            )
+
+    if afficher_risque:
+        section_risque(df_optimise, params, cle_resultats)
     
     # Visualisation par catégorie
-    st.header("📈 Analyse par Catégorie")
-    
-    # Agrégation par catégorie
-    cat_actuel = df.groupby('Catégorie').agg({
-        'CA': 'sum',
-        'Marge Valeur': 'sum'
-    }).reset_index()
-    cat_actuel['Marge %'] = (cat_actuel['Marge Valeur'] / cat_actuel['CA']) * 100
-    
-    cat_optimise = df_optimise.groupby('Catégorie').agg({
-        'CA Optimisé': 'sum',
-        'Marge Valeur Optimisée': 'sum'
-    }).reset_index()
-    cat_optimise['Marge % Optimisée'] = (cat_optimise['Marge Valeur Optimisée'] / cat_optimise['CA Optimisé']) * 100
-    
-    # Fusion des données
-    cat_compare = pd.merge(cat_actuel, cat_optimise, on='Catégorie')
-    cat_compare['Variation CA %'] = ((cat_compare['CA Optimisé'] / cat_compare['CA']) - 1) * 100
-    cat_compare['Variation Marge %'] = cat_compare['Marge % Optimisée'] - cat_compare['Marge %']
-    
-    # Tri par CA optimisé décroissant
-    cat_compare = cat_compare.sort_values(by='CA Optimisé', ascending=False)
-    
-    # Visualisation graphique - Comparaison CA par catégorie
-    fig1 = go.Figure()
-    
-    fig1.add_trace(go.Bar(
-        x=cat_compare['Catégorie'],
-        y=cat_compare['CA'],
-        name='CA Actuel',
-        marker_color='lightgray'
-    ))
-    fig1.add_trace(go.Bar(
-        x=cat_compare['Catégorie'],
-        y=cat_compare['CA Optimisé'],
-        name='CA Optimisé',
-        marker_color='royalblue'
-    ))
-    fig1.update_layout(
-        title="Comparaison du CA par Catégorie",
-        xaxis_title="Catégorie",
-        yaxis_title="Chiffre d'Affaires (FCFA)",
-        barmode='group'
-    )
-    st.plotly_chart(fig1, use_container_width=True)
-    
-    # Visualisation graphique - Comparaison Marge % par catégorie
-    fig2 = go.Figure()
-    fig2.add_trace(go.Bar(
-        x=cat_compare['Catégorie'],
-        y=cat_compare['Marge %'],
-        name='Marge % Actuelle',
-        marker_color='coral'
-    ))
-    fig2.add_trace(go.Bar(
-        x=cat_compare['Catégorie'],
-        y=cat_compare['Marge % Optimisée'],
-        name='Marge % Optimisée',
-        marker_color='green'
-    ))
-    # Ligne de référence pour la marge visée
-    fig2.add_shape(
-        type="line",
-        x0=-0.5,
-        y0=marge_brute_visee_pct,
-        x1=len(cat_compare)-0.5,
-        y1=marge_brute_visee_pct,
-        line=dict(color="red", width=2, dash="dash")
-    )
-    fig2.add_annotation(
-        x=len(cat_compare)-1,
-        y=marge_brute_visee_pct,
-        text=f"Objectif: {marge_brute_visee_pct}%",
-        showarrow=False,
-        yshift=10
-    )
-    fig2.update_layout(
-        title="Comparaison de la Marge % par Catégorie",
-        xaxis_title="Catégorie",
-        yaxis_title="Marge (%)",
-        barmode='group'
-    )
-    st.plotly_chart(fig2, use_container_width=True)
+    # Les figures ne sont construites que pour l'indicateur affiché, puis gardées
+    # avec les résultats d'optimisation : un rerun qui ne les change pas les réutilise
+    # (constructeurs dans kizuna.figures, partagés avec les exports)
+    @st.fragment
+    def section_categories(cat_compare, marge_brute_visee_pct, cle_resultats):
+        with profileur.etape("Analyse par catégorie"):
+            st.header("📈 Analyse par Catégorie")
+            indicateur = st.radio(
+                "Indicateur", ["Chiffre d'affaires", "Marge %"], horizontal=True, label_visibility="collapsed"
+            )
+            if indicateur == "Chiffre d'affaires":
+                fig = cache.obtenir(
+                    ('figure', 'ca_categories', cle_resultats), lambda: figure_ca_categories(cat_compare)
+                )
+            else:
+                fig = cache.obtenir(
+                    ('figure', 'marge_categories', cle_resultats),
+                    lambda: figure_marge_categories(cat_compare, marge_brute_visee_pct)
+                )
+            st.plotly_chart(fig, use_container_width=True)
+
+    section_categories(cat_compare, marge_brute_visee_pct, cle_resultats)
     
-    # Détails par produit
-    if afficher_details:
-        st.header("🔍 Analyse Détaillée par Produit")
-        
-        # Tri par catégorie et marge optimisée
-        df_details = df_optimise.sort_values(by=['Catégorie', 'Marge Valeur Optimisée'], ascending=[True, False])
+    # Détails par produit (fragment : le choix de catégorie ne relance que ce tableau)
+    @st.fragment
+    def section_details(df_optimise, cle_resultats):
+        with profileur.etape("Détails par produit"):
+            st.header("🔍 Analyse Détaillée par Produit")
         
-        # Sélection des colonnes à afficher
-        df_details_affichage = df_details[[
-            'Catégorie', 'Produit', 'Prix Unitaire (FCFA)', 'Marge (%)', 
-            'Quantité Avril', 'Quantité Optimisée', 'CA', 'CA Optimisé',
-            'Marge Valeur', 'Marge Valeur Optimisée'
-        ]].copy()
+            # Tri par catégorie et marge optimisée
+            df_details = avec_colonnes(df_optimise, ['CA', 'CA Optimisé', 'Marge Valeur', 'Marge Valeur Optimisée'])
+            df_details = df_details.sort_values(by=['Catégorie', 'Marge Valeur Optimisée'], ascending=[True, False])
         
-        # Calcul de la variation
-        df_details_affichage['Variation Quantité'] = df_details_affichage['Quantité Optimisée'] - df_details_affichage['Quantité Avril']
-        df_details_affichage['Variation CA'] = df_details_affichage['CA Optimisé'] - df_details_affichage['CA']
+            # Sélection des colonnes à afficher
+            df_details_affichage = df_details[[
+                'Catégorie', 'Produit', 'Prix Unitaire (FCFA)', 'Marge (%)', 
+                'Quantité Période', 'Quantité Optimisée', 'CA', 'CA Optimisé',
+                'Marge Valeur', 'Marge Valeur Optimisée'
+            ]].copy()
         
-        # Affichage par catégorie
-        categories = df_details_affichage['Catégorie'].unique()
-        
-        cat_selectionnee = st.selectbox(
-            "Sélectionner une catégorie pour l'analyse détaillée",
-            ["Toutes les catégories"] + list(categories)
-        )
+            # Calcul de la variation
+            df_details_affichage['Variation Quantité'] = df_details_affichage['Quantité Optimisée'] - df_details_affichage['Quantité Période']
+            df_details_affichage['Variation CA'] = df_details_affichage['CA Optimisé'] - df_details_affichage['CA']
         
-        if cat_selectionnee == "Toutes les catégories":
-            df_affichage = df_details_affichage
-        else:
-            df_affichage = df_details_affichage[df_details_affichage['Catégorie'] == cat_selectionnee]
+            # Affichage par catégorie
+            categories = df_details_affichage['Catégorie'].unique()
         
-        # Graphique des produits par quantité
-        fig3 = px.bar(
-            df_affichage.sort_values('Quantité Optimisée', ascending=False).head(15),
-            x='Produit',
-            y=['Quantité Avril', 'Quantité Optimisée'],
-            barmode='group',
-            title=f"Top 15 Produits par Quantité - {cat_selectionnee}",
-            labels={'value': 'Quantité', 'variable': 'Période'}
-        )
-        st.plotly_chart(fig3, use_container_width=True)
+            cat_selectionnee = st.selectbox(
+                "Sélectionner une catégorie pour l'analyse détaillée",
+                ["Toutes les catégories"] + list(categories)
+            )
         
-        # Tableau détaillé
-        df_table = df_affichage.copy()
-        df_table['Variation %'] = (df_table['Variation Quantité'] / df_table['Quantité Avril'] * 100).fillna(0)
+            if cat_selectionnee == "Toutes les catégories":
+                df_affichage = df_details_affichage
+            else:
+                df_affichage = df_details_affichage[df_details_affichage['Catégorie'] == cat_selectionnee]
         
-        # Formatage des colonnes
-        df_table = df_table.rename(columns={
-            'Prix Unitaire (FCFA)': 'Prix',
-            'Quantité Avril': 'Qté Avril',
-            'Quantité Optimisée': 'Qté Optimisée',
-            'Variation Quantité': 'Var. Qté',
-            'Variation %': 'Var. %',
-            'Marge Valeur': 'Marge Actuelle',
-            'Marge Valeur Optimisée': 'Marge Optimisée'
-        })
+            # Graphique des produits par quantité
+            import plotly.express as px
+
+            fig3 = cache.obtenir(('figure', 'top_quantites', cle_resultats, cat_selectionnee), lambda: px.bar(
+                df_affichage.sort_values('Quantité Optimisée', ascending=False).head(15),
+                x='Produit',
+                y=['Quantité Période', 'Quantité Optimisée'],
+                barmode='group',
+                title=f"Top 15 Produits par Quantité - {cat_selectionnee}",
+                labels={'value': 'Quantité', 'variable': 'Période'}
+            ))
+            st.plotly_chart(fig3, use_container_width=True)
         
-        # Ordre des colonnes
-        colonnes_affichage = [
-            'Produit', 'Prix', 'Marge (%)', 'Qté Avril', 'Qté Optimisée', 
-            'Var. Qté', 'Var. %', 'CA', 'CA Optimisé', 'Marge Actuelle', 'Marge Optimisée'
-        ]
+            # Tableau détaillé
+            df_table = df_affichage.copy()
+            # Produits sans vente sur la période : variation relative non définie, affichée à 0
+            df_table['Variation %'] = (df_table['Variation Quantité'] / df_table['Quantité Période'].replace(0, np.nan) * 100).fillna(0)
         
-        if cat_selectionnee == "Toutes les catégories":
-            colonnes_affichage = ['Catégorie'] + colonnes_affichage
+            # Formatage des colonnes
+            df_table = df_table.rename(columns={
+                'Prix Unitaire (FCFA)': 'Prix',
+                'Quantité Période': 'Qté Période',
+                'Quantité Optimisée': 'Qté Optimisée',
+                'Variation Quantité': 'Var. Qté',
+                'Variation %': 'Var. %',
+                'Marge Valeur': 'Marge Actuelle',
+                'Marge Valeur Optimisée': 'Marge Optimisée'
+            })
         
-        df_table = df_table[colonnes_affichage]
+            # Ordre des colonnes
+            colonnes_affichage = [
+                'Produit', 'Prix', 'Marge (%)', 'Qté Période', 'Qté Optimisée', 
+                'Var. Qté', 'Var. %', 'CA', 'CA Optimisé', 'Marge Actuelle', 'Marge Optimisée'
+            ]
         
-        # Formatage numérique pour la lisibilité
-        for col in ['Prix', 'CA', 'CA Optimisé', 'Marge Actuelle', 'Marge Optimisée']:
-            df_table[col] = df_table[col].apply(lambda x: f"{x:,.0f} FCFA")
+            if cat_selectionnee == "Toutes les catégories":
+                colonnes_affichage = ['Catégorie'] + colonnes_affichage
         
-        df_table['Marge (%)'] = df_table['Marge (%)'].apply(lambda x: f"{x:.2f}%")
-        df_table['Var. %'] = df_table['Var. %'].apply(lambda x: f"{x:.1f}%")
+            df_table = df_table[colonnes_affichage]
         
-        st.dataframe(df_table, use_container_width=True)
-    
-    # Recommandations
-    st.header("💡 Recommandations d'Action")
-    
-    # Identifier les produits à forte amélioration
-    top_amelioration = df_optimise.copy()
-    top_amelioration['Gain CA'] = top_amelioration['CA Optimisé'] - top_amelioration['CA']
-    top_amelioration['Gain Marge'] = top_amelioration['Marge Valeur Optimisée'] - top_amelioration['Marge Valeur']
-    
-    # Top produits par gain de marge
-    top_marge = top_amelioration.sort_values('Gain Marge', ascending=False).head(5)
+            # Colonnes numériques, formatées à l'affichage (le tri reste numérique)
+            afficher_tableau(df_table, "tableau_details", {
+                **{col: "%d FCFA" for col in ['Prix', 'CA', 'CA Optimisé', 'Marge Actuelle', 'Marge Optimisée']},
+                'Marge (%)': "%.2f%%",
+                'Var. %': "%.1f%%",
+            })
+
+    if afficher_details:
+        section_details(df_optimise, cle_resultats)
     
-    # Produits à faible/négative marge
-    produits_problematiques = df[(df['Marge (%)'] < 20) & (df['Quantité Avril'] > 5)]
+    with profileur.etape("Recommandations"):
+        # Recommandations
+        st.header("💡 Recommandations d'Action")
     
-    col1, col2 = st.columns(2)
+        # Identifier les produits à forte amélioration
+        gain_marge = pd.Series(
+            valeurs(df_optimise, 'Marge Valeur Optimisée') - valeurs(df_optimise, 'Marge Valeur'), index=df_optimise.index
+        )
+
+        # Top produits par gain de marge (seules les 5 lignes retenues sont extraites)
+        top_marge = avec_colonnes(
+            df_optimise.loc[gain_marge.nlargest(5, keep='first').index], ['Prix Unitaire HT', 'Dépenses Additionnelles']
+        )
     
-    with col1:
-        st.subheader("Produits à Prioriser")
-        for i, row in top_marge.iterrows():
-            st.write(f"**{row['Produit']}** ({row['Catégorie']})")
-            st.write(f"- Prix: {row['Prix Unitaire HT']:,.0f} FCFA, Marge: {row['Marge (%)']:.2f}%")
-            st.write(f"- Qté actuelle: {row['Quantité Avril']} → Qté optimisée: {row['Quantité Optimisée']} (+{row['Quantité Optimisée']-row['Quantité Avril']})")
-            st.write(f"- Gain potentiel: {row['Gain Marge']:,.0f} FCFA")
-            st.write(f"- Dépenses additionnelles: {row['Dépenses Additionnelles']:,.0f} FCFA")
-            st.markdown("---")
+        col1, col2 = st.columns(2)
     
-    with col2:
-        st.subheader("Produits à Revoir")
-        if len(produits_problematiques) > 0:
-            for i, row in produits_problematiques.iterrows():
+        with col1:
+            st.subheader("Produits à Prioriser")
+            for i, row in top_marge.iterrows():
                 st.write(f"**{row['Produit']}** ({row['Catégorie']})")
-                st.write(f"- Prix: {row['Prix Unitaire HT']:,.0f} FCFA, **Marge: {row['Marge (%)']:.2f}%**")
-                nouveau_prix = row['Coût Unitaire'] / (1 - 0.35)
-                prix_ttc_suggere = nouveau_prix * 1.1925  # Pour une marge de 35%
-                st.write(f"- Prix suggéré pour 35% de marge: {prix_ttc_suggere:,.0f} FCFA TTC (+{prix_ttc_suggere - row['Prix Unitaire HT']:,.0f} FCFA)")
+                st.write(f"- Prix: {row['Prix Unitaire HT']:,.0f} FCFA, Marge: {row['Marge (%)']:.2f}%")
+                st.write(f"- Qté actuelle: {row['Quantité Période']} → Qté optimisée: {row['Quantité Optimisée']} (+{row['Quantité Optimisée']-row['Quantité Période']})")
+                st.write(f"- Gain potentiel: {gain_marge[i]:,.0f} FCFA")
+                st.write(f"- Dépenses additionnelles: {row['Dépenses Additionnelles']:,.0f} FCFA")
                 st.markdown("---")
-        else:
-            st.write("Aucun produit problématique identifié (marge < 20% et ventes > 5)")
     
-        # Détails des dépenses additionnelles par produit
+        with col2:
+            st.subheader("Produits à Revoir")
+            # Produits à faible/négative marge, avec le prix TTC minimal pour chaque marge cible
+            recommandations_prix = cache.obtenir(('prix_minimaux', cle_resultats), lambda: prix_minimaux(df))
+            produits_problematiques = recommandations_prix[
+                (recommandations_prix['Marge (%)'] < 20) & (recommandations_prix['Quantité Période'] > 5)
+            ]
+            if len(produits_problematiques) > 0:
+                st.dataframe(
+                    produits_problematiques[
+                        ['Produit', 'Marge (%)', 'Prix TTC'] + [f'Prix TTC {cible}%' for cible in MARGES_CIBLES]
+                    ].sort_values('Marge (%)'),
+                    use_container_width=True,
+                    hide_index=True,
+                    column_config={
+                        'Marge (%)': st.column_config.NumberColumn(format="%.2f%%"),
+                        **{col: st.column_config.NumberColumn(format="%d FCFA")
+                           for col in ['Prix TTC'] + [f'Prix TTC {cible}%' for cible in MARGES_CIBLES]},
+                    }
+                )
+            else:
+                st.write("Aucun produit problématique identifié (marge < 20% et ventes > 5)")
+
+    # Prix recommandés par marge cible et hausse minimale pour atteindre le seuil
+    @st.fragment
+    def section_tarification(df, params, cle_resultats):
+        with profileur.etape("Recommandations de prix"):
+            st.subheader("🏷️ Recommandations de Prix")
+            col1, col2, col3 = st.columns([2, 1, 1])
+            with col1:
+                marges_cibles = st.multiselect(
+                    "Marges cibles (%)", list(range(20, 65, 5)), default=list(MARGES_CIBLES)
+                )
+            with col2:
+                arrondi = st.selectbox(
+                    "Arrondi des prix", [50, 100, 500], index=1, format_func=lambda a: f"{a} FCFA"
+                )
+            with col3:
+                sous_cible = st.checkbox("Seulement les produits sous la cible la plus haute", value=True)
+
+            if marges_cibles:
+                marges_cibles = tuple(sorted(marges_cibles))
+                recommandations_prix = cache.obtenir(
+                    ('prix_minimaux', cle_resultats, marges_cibles, arrondi),
+                    lambda: prix_minimaux(df, marges_cibles, arrondi)
+                )
+                if sous_cible:
+                    recommandations_prix = recommandations_prix[
+                        recommandations_prix['Marge (%)'] < marges_cibles[-1]
+                    ]
+                afficher_tableau(recommandations_prix, "tableau_prix", {
+                    'Marge (%)': "%.2f%%",
+                    'Prix TTC': "%d FCFA",
+                    **{f'{colonne} {cible}%': "%d FCFA" for cible in marges_cibles for colonne in ['Prix TTC', 'Hausse']},
+                })
+
+            # Comme la grille, le mode Solveur est évalué sur le mode Équilibré
+            params_prix = (
+                params if params.mode_optimisation in MODES_OPTIMISATION
+                else replace(params, mode_optimisation="Équilibré")
+            )
+            st.markdown(
+                f"**Hausse de prix minimale pour que le CA optimisé atteigne le seuil de rentabilité** "
+                f"(prix arrondis à {arrondi} FCFA, quantités du mode *{params_prix.mode_optimisation}*)"
+            )
+            hausses = cache.obtenir(
+                ('hausses_prix', cle_resultats, arrondi, cle_demande),
+                lambda: hausses_pour_seuil(df, params_prix, arrondi, etat_prix.elasticites)
+            )
+            st.dataframe(
+                hausses,
+                use_container_width=True,
+                hide_index=True,
+                column_config={
+                    'Hausse (%)': st.column_config.NumberColumn(format="%.1f%%"),
+                    'CA Optimisé': st.column_config.NumberColumn(format="%d FCFA"),
+                    'Résultat Net Projeté': st.column_config.NumberColumn(format="%d FCFA"),
+                }
+            )
+
+    section_tarification(df, params, cle_resultats)
+    
+    # Détails des dépenses additionnelles par produit
     if afficher_depenses:
-        st.header("💰 Dépenses Additionnelles par Produit")
+        with profileur.etape("Dépenses par produit"):
+            st.header("💰 Dépenses Additionnelles par Produit")
         
-        # Top produits par dépenses additionnelles
-        top_depenses = df_optimise.sort_values('Dépenses Additionnelles', ascending=False).head(15)
+            # Top produits par dépenses additionnelles
+            top_depenses = avec_colonnes(df_optimise, ['Dépenses Additionnelles']).sort_values(
+                'Dépenses Additionnelles', ascending=False
+            ).head(15)
         
-        fig_top_depenses = px.bar(
-            top_depenses,
-            x='Produit',
-            y='Dépenses Additionnelles',
-            color_discrete_sequence=px.colors.qualitative.Set3
-        )
-        st.plotly_chart(fig_top_depenses, use_container_width=True)
+            import plotly.express as px
+
+            fig_top_depenses = cache.obtenir(('figure', 'top_depenses', cle_resultats), lambda: px.bar(
+                top_depenses,
+                x='Produit',
+                y='Dépenses Additionnelles',
+                color_discrete_sequence=px.colors.qualitative.Set3
+            ))
+            st.plotly_chart(fig_top_depenses, use_container_width=True)
         
     # Suggestions générales
     st.subheader("Plan d'Action Recommandé")
@@ -507,88 +1016,131 @@ if df is not None:
         "**2. Planification des achats**: Prévoir un budget d'approvisionnement de {depenses_additionnelles_total:,.0f} FCFA pour atteindre les objectifs de vente.",
         "**3. Promotions ciblées**: Mettre en avant les produits à forte marge comme les Ailes de Poulet, l'Eau Tangui et les autres boissons non-alcoolisées.",
         "**4. Standardisation des portions**: Établir des fiches techniques précises pour contrôler les coûts matière, notamment pour les plats cuisinés.",
-        "**5. Ventes croisées**: Encourager l'association des grillades avec les boissons à forte marge.",
+        "**5. Ventes croisées**: {ventes_croisees}",
         "**6. Happy Hours stratégiques**: Lancer des promotions sur les produits à forte marge pour augmenter le volume de ventes."
     ]
     
+    # Ventes croisées : paires réellement achetées ensemble (tickets de caisse), classées par lift pondéré par la marge.
+    # Seules les paires achetées ensemble plus souvent que par hasard (lift > 1) sont proposées.
+    paires, associees = None, []
+    if os.path.exists(ETAT_PANIERS):
+        from kizuna.paniers import classer_paires  # SciPy n'est chargé qu'avec une analyse des paniers
+
+        version_paniers = version_fichier(ETAT_PANIERS)
+        paires = cache.obtenir(('paniers', version_paniers, cle_resultats),
+                               lambda: classer_paires(charger_paniers(version_paniers), df_optimise))
+        associees = paires.loc[paires['Lift'] > 1, ['Produit A', 'Produit B', 'Lift']].head(3).to_numpy()
+    if len(associees):
+        ventes_croisees = "Proposer ensemble " + ", ".join(
+            f"{a} + {b} (lift {lift:.1f})" for a, b, lift in associees
+        ) + ", paires souvent achetées ensemble et rentables."
+    else:
+        ventes_croisees = "Encourager l'association des grillades avec les boissons à forte marge."
+
     actions[1] = actions[1].format(depenses_additionnelles_total=depenses_additionnelles_total)
+    actions[4] = actions[4].format(ventes_croisees=ventes_croisees)
     
     for action in actions:
         st.markdown(f"{action}")
+
+    if paires is not None and len(paires):
+        with st.expander("Produits achetés ensemble"):
+            afficher_tableau(paires, "tableau_paires", {
+                'Tickets': "%d", 'Support': "%.3f", 'Confiance A→B': "%.2f", 'Confiance B→A': "%.2f",
+                'Lift': "%.2f", 'Marge combinée (%)': "%.1f", 'Score': "%.2f",
+            })
     
-    # Calendrier suggéré
+    # Approvisionnement simulé jour par jour sur le mois, pour servir la demande optimisée
+    with profileur.etape("Approvisionnement"):
+        appro = cache.obtenir(('approvisionnement', cle_resultats), lambda: simuler_approvisionnement(df_optimise))
+
+    # Calendrier suggéré (commandes et décaissements issus de la simulation)
     st.subheader("Calendrier d'Implémentation Suggéré")
-    
-    st.markdown("""
-    | Semaine | Actions | Budget Requis |
-    |---------|---------|--------------|
-    | Semaine 1 | Révision des prix et mise à jour de la carte | Minimal |
-    | Semaine 2 | Formation du personnel et premières promotions | {form_budget:,.0f} FCFA |
-    | Semaine 3 | Premier réapprovisionnement majeur | {reappro_budget:,.0f} FCFA |
-    | Semaine 4 | Lancement des happy hours et second réapprovisionnement | {happy_budget:,.0f} FCFA |
-    """.format(
-        form_budget=10000,
-        reappro_budget=depenses_additionnelles_total * 0.4,
-        happy_budget=depenses_additionnelles_total * 0.6
-    ))
+
+    actions_semaine = {
+        1: "Révision des prix et mise à jour de la carte",
+        2: "Formation du personnel (10,000 FCFA) et premières promotions",
+        3: "Réapprovisionnement selon les bons de commande",
+        4: "Lancement des happy hours",
+    }
+    calendrier = [
+        "| Semaine | Actions | Commandes | Montant commandé | Décaissements |",
+        "|---------|---------|-----------|------------------|---------------|",
+    ]
+    for semaine, ligne in appro.par_semaine().iterrows():
+        calendrier.append(
+            f"| Semaine {semaine} | {actions_semaine.get(semaine, 'Réapprovisionnement courant')} "
+            f"| {ligne['Commandes']:.0f} | {ligne['Commandé']:,.0f} FCFA | {ligne['Décaissé']:,.0f} FCFA |"
+        )
+    st.markdown("\n".join(calendrier))
+    st.caption(
+        "Stocks simulés jour par jour (mois de 30 jours) : stock de départ calé sur la demande actuelle, "
+        "commande au point de commande de chaque fournisseur, paiement à la livraison plus son délai de paiement."
+    )
         
     # Tableau détaillé des dépenses par produit
-    col1, col2 = st.columns([1, 2])
-    
-    with col1:
-        categorie_filtree = st.selectbox(
-            "Filtrer par catégorie",
-            ["Toutes les catégories"] + sorted(df_optimise['Catégorie'].unique().tolist())
-        )
-    
-    with col2:
-        seuil_depenses = st.slider(
-            "Afficher les produits avec des dépenses supérieures à",
-            min_value=0,
-            max_value=int(df_optimise['Dépenses Additionnelles'].max()),
-            value=5000,
-            step=1000,
-            format="%d FCFA"
-        )
+    # (fragment : les filtres ne relancent que ce tableau)
+    @st.fragment
+    def section_depenses(df_optimise, depenses_additionnelles_total):
+        with profileur.etape("Tableau des dépenses"):
+            col1, col2 = st.columns([1, 2])
     
-    # Filtrage des données
-    if categorie_filtree == "Toutes les catégories":
-        df_depenses = df_optimise[df_optimise['Dépenses Additionnelles'] >= seuil_depenses].copy()
-    else:
-        df_depenses = df_optimise[(df_optimise['Catégorie'] == categorie_filtree) & 
-                                    (df_optimise['Dépenses Additionnelles'] >= seuil_depenses)].copy()
+            with col1:
+                categorie_filtree = st.selectbox(
+                    "Filtrer par catégorie",
+                    ["Toutes les catégories"] + sorted(df_optimise['Catégorie'].unique().tolist())
+                )
     
-    # Tri par dépenses additionnelles décroissantes
-    df_depenses = df_depenses.sort_values('Dépenses Additionnelles', ascending=False)
+            with col2:
+                seuil_depenses = st.slider(
+                    "Afficher les produits avec des dépenses supérieures à",
+                    min_value=0,
+                    max_value=int(df_optimise['Dépenses Additionnelles'].max()),
+                    value=5000,
+                    step=1000,
+                    format="%d FCFA"
+                )
     
-    # Sélection et renommage des colonnes pour l'affichage
-    df_depenses_aff = df_depenses[[
-        'Catégorie', 'Produit', 'Prix Unitaire (FCFA)', 'Coût Unitaire', 'Marge (%)',
-        'Quantité Avril', 'Quantité Optimisée', 'Variation Quantité', 
-        'Dépenses Additionnelles', 'CA Additionnel'
-    ]].copy()
+            # Filtrage des données
+            if categorie_filtree == "Toutes les catégories":
+                df_depenses = df_optimise[df_optimise['Dépenses Additionnelles'] >= seuil_depenses].copy()
+            else:
+                df_depenses = df_optimise[(df_optimise['Catégorie'] == categorie_filtree) & 
+                                            (df_optimise['Dépenses Additionnelles'] >= seuil_depenses)].copy()
     
-    df_depenses_aff = df_depenses_aff.rename(columns={
-        'Prix Unitaire (FCFA)': 'Prix',
-        'Quantité Avril': 'Qté Actuelle',
-        'Quantité Optimisée': 'Qté Optimisée',
-        'Variation Quantité': 'Var. Qté'
-    })
+            # Tri par dépenses additionnelles décroissantes
+            df_depenses = df_depenses.sort_values('Dépenses Additionnelles', ascending=False)
     
-    # Formatage des colonnes monétaires et pourcentages
-    for col in ['Prix', 'Coût Unitaire', 'Dépenses Additionnelles', 'CA Additionnel']:
-        df_depenses_aff[col] = df_depenses_aff[col].apply(lambda x: f"{x:,.0f} FCFA")
+            # Sélection et renommage des colonnes pour l'affichage
+            df_depenses_aff = df_depenses[[
+                'Catégorie', 'Produit', 'Prix Unitaire (FCFA)', 'Coût Unitaire', 'Marge (%)',
+                'Quantité Période', 'Quantité Optimisée', 'Variation Quantité', 
+                'Dépenses Additionnelles', 'CA Additionnel'
+            ]].copy()
     
-    df_depenses_aff['Marge (%)'] = df_depenses_aff['Marge (%)'].apply(lambda x: f"{x:.2f}%")
+            df_depenses_aff = df_depenses_aff.rename(columns={
+                'Prix Unitaire (FCFA)': 'Prix',
+                'Quantité Période': 'Qté Actuelle',
+                'Quantité Optimisée': 'Qté Optimisée',
+                'Variation Quantité': 'Var. Qté'
+            })
     
-    # Calcul du total des dépenses additionnelles filtrées
-    total_depenses_filtrees = df_depenses['Dépenses Additionnelles'].sum()
-    pct_total = (total_depenses_filtrees / depenses_additionnelles_total) * 100
+            # Calcul du total des dépenses additionnelles filtrées
+            total_depenses_filtrees = df_depenses['Dépenses Additionnelles'].sum()
+            pct_total = (total_depenses_filtrees / depenses_additionnelles_total) * 100 if depenses_additionnelles_total else 0
     
-    st.write(f"**Total des dépenses additionnelles sélectionnées:** {total_depenses_filtrees:,.0f} FCFA ({pct_total:.1f}% du total)")
+            st.write(f"**Total des dépenses additionnelles sélectionnées:** {total_depenses_filtrees:,.0f} FCFA ({pct_total:.1f}% du total)")
     
-    # Affichage du tableau
-    st.dataframe(df_depenses_aff, use_container_width=True)
+            # Affichage du tableau (colonnes monétaires et pourcentages formatées à l'affichage)
+            afficher_tableau(df_depenses_aff, "tableau_depenses", {
+                **{col: "%d FCFA" for col in ['Prix', 'Coût Unitaire', 'Dépenses Additionnelles', 'CA Additionnel']},
+                'Marge (%)': "%.2f%%",
+            })
+
+    section_depenses(
+        avec_colonnes(df_optimise, ['Coût Unitaire', 'Variation Quantité', 'Dépenses Additionnelles', 'CA Additionnel']),
+        depenses_additionnelles_total
+    )
     
     # Conseil sur les achats
     st.subheader("💡 Conseils pour la gestion des achats")
@@ -601,39 +1153,220 @@ if df is not None:
     4. **Échelonnez vos achats** sur plusieurs semaines pour répartir la charge financière
     """)
     
-    # Résumé par fournisseur (simulé)
-    st.subheader("Répartition estimée des dépenses par type de fournisseur")
-    
-    # Classification simplifiée par catégorie
-    fournisseurs = {
-        "Bières": "Distributeur de boissons",
-        "Grillades": "Boucher / Fournisseur de viande",
-        "Plats Chauds": "Fournisseur alimentaire",
-        "Accompagnements": "Fournisseur alimentaire",
-        "Boissons Gazeuses": "Distributeur de boissons",
-        "Eau Minérale et Gazeuse": "Distributeur de boissons",
-        "Alcool Mix": "Distributeur de boissons",
-        "Liqueur": "Distributeur de boissons",
-        "Services": "Non applicable"
+    with profileur.etape("Fournisseurs"):
+        # Commandes et décaissements par fournisseur (simulation d'approvisionnement)
+        st.subheader("Commandes et décaissements par fournisseur")
+        fig_fournisseurs, fig_decaissements = cache.obtenir(
+            ('figure', 'fournisseurs', cle_resultats), lambda: figures_fournisseurs(appro)
+        )
+        col1, col2 = st.columns(2)
+        with col1:
+            st.plotly_chart(fig_fournisseurs, use_container_width=True)
+        with col2:
+            st.plotly_chart(fig_decaissements, use_container_width=True)
+
+        ruptures = appro.ruptures.sum()
+        if ruptures > 0:
+            st.warning(f"{ruptures:,.0f} unités demandées ne seraient pas servies faute de stock "
+                       f"({np.count_nonzero(appro.ruptures)} produits).")
+
+        with st.expander("Bons de commande"):
+            afficher_tableau(appro.bons_commande, "bons_commande", {'Unités': "%d", 'Montant': "%d FCFA"})
+            st.caption("Paramètres des fournisseurs (point de commande et stock cible en jours de demande)")
+            st.dataframe(pd.DataFrame({nom: vars(f) for nom, f in FOURNISSEURS.items()}).T, use_container_width=True)
+
+    # Scénarios enregistrés : valeurs de la barre latérale, prix modifiés et résultats, dans une base SQLite locale
+    valeurs_scenario = {
+        nom: st.session_state[cle_widget(nom)] for nom in WIDGETS_SCENARIO if cle_widget(nom) in st.session_state
     }
-    
-    # Créer un DataFrame pour les fournisseurs
-    df_fournisseurs = df_optimise.copy()
-    df_fournisseurs['Fournisseur'] = df_fournisseurs['Catégorie'].map(fournisseurs)
-    
-    # Agréger les dépenses par fournisseur
-    fournisseur_sum = df_fournisseurs.groupby('Fournisseur')['Dépenses Additionnelles'].sum().reset_index()
-    fournisseur_sum = fournisseur_sum.sort_values('Dépenses Additionnelles', ascending=False)
-    
-    # Graphique de répartition des dépenses par fournisseur
-    fig_fournisseurs = px.pie(
-        fournisseur_sum, 
-        values='Dépenses Additionnelles', 
-        names='Fournisseur',
-        title="Répartition des dépenses additionnelles par fournisseur",
-        hole=0.4,
-        color_discrete_sequence=px.colors.qualitative.Set3
-    )
-    st.plotly_chart(fig_fournisseurs, use_container_width=True)
+
+    @st.fragment
+    def section_scenarios(valeurs, periode, prix, resultat, solution_solveur, cle_resultats):
+        with profileur.etape("Scénarios enregistrés"):
+            st.header("💾 Scénarios Enregistrés")
+            col1, col2 = st.columns([3, 1], vertical_alignment="bottom")
+            with col1:
+                nom = st.text_input("Nom du scénario", placeholder="ex. Loyer renégocié",
+                                    help="Un scénario de même nom est remplacé")
+            with col2:
+                if st.button("Enregistrer le scénario", disabled=not nom.strip(), use_container_width=True):
+                    enregistrer(nom.strip(), periode, valeurs, prix, resultat, cle_resultats, solution_solveur)
+                    st.toast(f"Scénario « {nom.strip()} » enregistré")
+
+            liste = lister()
+            if liste.empty:
+                st.info("Aucun scénario enregistré.")
+                return
+            # Libellé affiché -> identifiant (les noms sont uniques)
+            identifiants = dict(zip(liste['nom'] + " — " + liste['enregistre_le'].str.replace('T', ' '), liste['id'].tolist()))
+
+            st.dataframe(
+                liste.drop(columns='id').rename(columns={
+                    'nom': 'Scénario', 'enregistre_le': 'Enregistré le', 'mois': 'Mois', 'sites': 'Sites',
+                    'fenetre': 'Fenêtre (mois)', 'mode_optimisation': 'Mode', 'ca_optimise': 'CA Optimisé',
+                    'resultat_net_optimise': 'Résultat Net Projeté',
+                }),
+                use_container_width=True, hide_index=True, height=min(35 * (len(liste) + 1) + 3, 300),
+                column_config={col: st.column_config.NumberColumn(format="%d FCFA")
+                               for col in ['CA Optimisé', 'Résultat Net Projeté']}
+            )
+
+            col1, col2, col3 = st.columns([3, 1, 1], vertical_alignment="bottom")
+            with col1:
+                choisi = identifiants[st.selectbox("Scénario", list(identifiants), key="scenario_choisi")]
+            with col2:
+                if st.button("Ouvrir", use_container_width=True,
+                             help="Rétablit les paramètres et les prix ; les résultats enregistrés sont réutilisés"):
+                    scenario = charger(choisi)
+                    cache.set(scenario.cle_resultats, resultats_enregistres(scenario))
+                    st.session_state['valeurs_chargees'] = {**scenario.valeurs, 'prix_ttc': scenario.prix}
+                    st.session_state['generation_widgets'] = generation_widgets + 1
+                    st.session_state['etat_prix'] = None
+                    st.rerun()
+            with col3:
+                if st.button("Supprimer", use_container_width=True):
+                    supprimer(choisi)
+                    st.rerun(scope="fragment")
+
+            if len(liste) < 2:
+                return
+            st.subheader("Comparaison de deux scénarios")
+            col1, col2 = st.columns(2)
+            with col1:
+                id_a = identifiants[st.selectbox("Scénario A", list(identifiants), index=1, key="scenario_a")]
+            with col2:
+                id_b = identifiants[st.selectbox("Scénario B", list(identifiants), index=0, key="scenario_b")]
+            scenario_a, scenario_b = charger(id_a), charger(id_b)
+            par_produit, par_categorie = comparer(scenario_a.produits, scenario_b.produits)
+
+            col1, col2, col3 = st.columns(3)
+            for col, libelle, champ in [
+                (col1, "CA Optimisé (B)", 'ca_optimise'),
+                (col2, "Marge Brute Optimisée (B)", 'marge_optimisee'),
+                (col3, "Résultat Net Projeté (B)", 'resultat_net_optimise'),
+            ]:
+                valeur_b = getattr(scenario_b.totaux, champ)
+                col.metric(libelle, f"{valeur_b:,.0f} FCFA", f"{valeur_b - getattr(scenario_a.totaux, champ):+,.0f} FCFA vs A")
+
+            st.markdown("**Écarts par catégorie (B − A)**")
+            st.dataframe(
+                par_categorie, use_container_width=True, hide_index=True,
+                column_config={col: st.column_config.NumberColumn(format="%.0f")
+                               for col in par_categorie.columns if col != 'Catégorie'}
+            )
+            st.markdown("**Écarts par produit (B − A)**, triés par écart de marge")
+            afficher_tableau(
+                par_produit, "comparaison_scenarios",
+                {col: "%.2f" if 'Marge (%)' in col else "%.0f"
+                 for col in par_produit.columns if col not in ('Catégorie', 'Produit')}
+            )
+
+    section_scenarios(valeurs_scenario, cle_periode, prix_par_produit(etat_prix), resultat, solution_solveur,
+                      cle_resultats)
+
+    # Export des rapports (scénario courant et/ou scénarios enregistrés), préparé en arrière-plan
+    def section_export(rapport_courant):
+        with profileur.etape("Export"):
+            st.header("📤 Export des Rapports")
+            liste = lister()
+            enregistres = dict(zip(liste['nom'], liste['id'].tolist()))
+            col1, col2, col3 = st.columns([3, 2, 1], vertical_alignment="bottom")
+            with col1:
+                choisis = st.multiselect("Scénarios", ["Scénario courant"] + list(enregistres),
+                                         default=["Scénario courant"], key="export_scenarios")
+            with col2:
+                formats = st.multiselect("Formats", FORMATS, default=FORMATS, key="export_formats")
+            with col3:
+                if st.button("Exporter", disabled=not (choisis and formats), use_container_width=True):
+                    identifiants = [enregistres[nom] for nom in choisis if nom in enregistres]
+                    courant = "Scénario courant" in choisis
+
+                    # Les scénarios enregistrés sont relus (et leur approvisionnement simulé) dans le thread d'export
+                    def preparer():
+                        return ([rapport_courant] if courant else []) + [
+                            rapport_enregistre(charger(identifiant)) for identifiant in identifiants
+                        ]
+                    st.session_state['export'] = lancer_export(executeur_export(), preparer, formats)
+                    st.rerun()  # la section se met à jour seule tant que l'export est en cours
+
+            export = st.session_state.get('export')
+            if export is None:
+                return
+            if not export.done():
+                st.info("⏳ Export en cours… La page reste utilisable, les fichiers apparaîtront ici.")
+            elif export.exception() is not None:
+                st.error(f"Échec de l'export : {export.exception()}")
+            else:
+                if st.session_state.get('export_en_attente'):
+                    st.session_state['export_en_attente'] = False
+                    st.rerun()  # arrêt du rafraîchissement périodique
+                colonnes = st.columns(len(export.result()))
+                for col, (nom_fichier, contenu) in zip(colonnes, export.result().items()):
+                    col.download_button(f"Télécharger {os.path.splitext(nom_fichier)[1][1:].upper()}", contenu,
+                                        file_name=nom_fichier, mime=MIMES[os.path.splitext(nom_fichier)[1]],
+                                        use_container_width=True)
+
+    # Rafraîchie chaque seconde, seule, tant qu'un export est en cours
+    export = st.session_state.get('export')
+    st.session_state['export_en_attente'] = export is not None and not export.done()
+    st.fragment(section_export, run_every=1.0 if st.session_state['export_en_attente'] else None)(Rapport(
+        nom="Scénario courant",
+        periode=mois_selectionne + (f" — sites : {', '.join(sites_selectionnes)}" if sites_selectionnes else ""),
+        totaux=totaux, df_optimise=df_optimise, categories=cat_compare, appro=appro,
+        marge_brute_visee_pct=marge_brute_visee_pct,
+    ))
+
+    # Panneau de debug : état du cache des résultats
+    with st.sidebar.expander("🐞 Debug"):
+        stats = cache.stats
+        st.markdown(f"**Cache des résultats** : {len(cache)}/{cache.taille_max} entrées, TTL {cache.ttl:.0f} s")
+        col1, col2 = st.columns(2)
+        col1.metric("Succès", stats.succes)
+        col2.metric("Échecs", stats.echecs)
+        col1.metric("Évictions", stats.evictions)
+        col2.metric("Expirations", stats.expirations)
+        st.caption(f"Taux de succès : {stats.taux_succes:.0%} — empreinte courante `{cle_resultats[:12]}`")
+        if st.button("Vider le cache"):
+            cache.vider()
+
+        # Mémoire : catalogue partagé par le processus, et ce que la session y ajoute
+        partages = tableaux(charger_donnees(versions_sources[0])) + tableaux(base)
+        memoire = memoire_session(
+            st.session_state.to_dict(), partages, [cache, executeur_precalcul(), premier_plan()]
+        )
+        octets_base = base.memory_usage(deep=True).sum()
+        st.markdown(
+            f"**Mémoire** : catalogue partagé {formater_octets(octets_base)} "
+            f"({octets_base / max(len(base), 1):,.0f} o/produit), session {formater_octets(memoire.sum())}"
+        )
+        st.dataframe(
+            memoire.head(8).map(formater_octets).rename_axis('Entrée').rename('Taille').reset_index(),
+            use_container_width=True, hide_index=True
+        )
 else:
-    st.error("Impossible de charger les données. Vérifiez que le fichier CSV est présent dans le dossier de l'application.")
\ No newline at end of file
+    st.error("Impossible de charger les données. Vérifiez que le fichier CSV est présent dans le dossier de l'application.")
+
+# Profilage : clôture du rerun et durées par étape de la session
+profileur.fin_rerun()
+if profileur.actif:
+    with st.expander("⏱️ Profilage des reruns"):
+        if profileur.reruns:
+            dernier = profileur.reruns[-1]
+            st.caption(f"Dernier rerun complet : {dernier['total_ms']:.0f} ms ({len(profileur.reruns)} reruns mesurés)")
+        st.dataframe(
+            profileur.statistiques(),
+            use_container_width=True,
+            hide_index=True,
+            column_config={
+                col: st.column_config.NumberColumn(format="%.1f")
+                for col in ['Dernier (ms)', 'p50 (ms)', 'p95 (ms)', 'Max (ms)']
+            }
+        )
+        col1, col2 = st.columns(2)
+        with col1:
+            st.download_button(
+                "Exporter en JSON", profileur.exporter_json(), file_name="profil_reruns.json", mime="application/json"
+            )
+        with col2:
+            if st.button("Réinitialiser le profilage"):
+                profileur.vider()
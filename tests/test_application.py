@@ -0,0 +1,75 @@
+from streamlit.testing.v1 import AppTest
+
+from benchmarks.bench_demarrage import SCRIPT
+from benchmarks.bench_moteur import catalogue_synthetique
+from kizuna import figures
+from kizuna.ressources import FICHIER_CATALOGUE, cache_resultats, contexte_hors_session
+
+DELAI = 120  # secondes, premier rendu compris
+
+
+def lancer_application(tmp_path, monkeypatch):
+    """Application sur un catalogue synthétique, dans un répertoire neuf (caches disque compris)."""
+    monkeypatch.chdir(tmp_path)
+    catalogue_synthetique(1_200).to_csv(FICHIER_CATALOGUE, index=False)
+    contexte_hors_session()  # pour lire le cache des résultats partagé avec l'application
+    cache_resultats().vider()
+    at = AppTest.from_file(SCRIPT, default_timeout=DELAI)
+    at.run()
+    assert not at.exception
+    return at
+
+
+def element(elements, libelle):
+    return next(e for e in elements if e.label == libelle)
+
+
+def test_seule_la_figure_affichee_est_construite_puis_reutilisee(tmp_path, monkeypatch):
+    construites = []
+
+    def compter(nom, fonction):
+        def construire(*args):
+            construites.append(nom)
+            return fonction(*args)
+        monkeypatch.setattr(figures, nom, construire)
+
+    compter('figure_ca_categories', figures.figure_ca_categories)
+    compter('figure_marge_categories', figures.figure_marge_categories)
+    at = lancer_application(tmp_path, monkeypatch)
+    assert construites == ['figure_ca_categories']
+
+    element(at.radio, "Indicateur").set_value("Marge %")
+    at.run()
+    # Retour à l'indicateur précédent, puis rerun sans changement : les figures sont relues du cache
+    element(at.radio, "Indicateur").set_value("Chiffre d'affaires")
+    at.run()
+    at.run()
+    assert not at.exception
+    assert construites == ['figure_ca_categories', 'figure_marge_categories']
+
+
+def tableau_details(at):
+    return next(t.value for t in at.dataframe if 'Qté Optimisée' in t.value.columns)
+
+
+def test_tableau_des_details_numerique_et_pagine(tmp_path, monkeypatch):
+    at = lancer_application(tmp_path, monkeypatch)
+    element(at.sidebar.checkbox, "Afficher les détails par produit").set_value(True)
+    at.run()
+
+    page = tableau_details(at)
+    assert len(page) == 500  # TAILLE_PAGE lignes sur 1 200
+    assert all(page[col].dtype.kind in 'iuf' for col in ['Prix', 'Marge (%)', 'CA Optimisé', 'Var. %'])
+    assert "Lignes 1 à 500 sur 1,200 — page 1/3" in [c.value for c in at.caption]
+
+    # Le tri porte sur tout le tableau, pas sur la page affichée
+    at.selectbox(key='tableau_details_tri').set_value('CA Optimisé')
+    at.run()
+    premiere = tableau_details(at)
+    at.number_input(key='tableau_details_page').set_value(3)
+    at.run()
+    derniere = tableau_details(at)
+    assert not at.exception
+    assert len(derniere) == 200
+    assert premiere['CA Optimisé'].is_monotonic_decreasing
+    assert premiere['CA Optimisé'].min() >= derniere['CA Optimisé'].max()
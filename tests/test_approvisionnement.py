@@ -0,0 +1,63 @@
+import numpy as np
+import pandas as pd
+
+from kizuna.approvisionnement import (
+    Fournisseur,
+    ParametresApprovisionnement,
+    simuler_approvisionnement,
+)
+
+FOURNISSEURS = {'F': Fournisseur(delai_livraison=2, quantite_minimale=1, point_commande=3, stock_cible=6,
+                                 delai_paiement=1)}
+
+
+def catalogue():
+    # Une bière : 2 unités demandées par jour, 1 par jour avant optimisation ; un service jamais stocké
+    return pd.DataFrame({
+        'Catégorie': ['Bières', 'Services'],
+        'Produit': ['Bière', 'Livraison'],
+        'Quantité Période': [30, 30],
+        'Quantité Optimisée': [60, 60],
+        'Coût Unitaire': [500.0, 100.0],
+    })
+
+
+def simuler(stock_initial, fournisseurs=FOURNISSEURS):
+    return simuler_approvisionnement(
+        catalogue(), ParametresApprovisionnement(horizon=6, stock_initial=stock_initial), fournisseurs,
+        {'Bières': 'F', 'Services': "Non applicable"},
+    )
+
+
+def test_politique_s_S_sur_une_serie_verifiee_a_la_main():
+    # Point de commande 6 unités, stock cible 12, stock de départ 5 :
+    # jour 1 : 5 - 2 = 3 <= 6, commande 9 (livrée jour 3) ; jour 3 : 1 + 9 - 2 = 8 ;
+    # jour 4 : 6 <= 6, commande 6 (livrée jour 6) ; jour 6 : 4 + 6 - 2 = 8
+    resultat = simuler(stock_initial=5)
+    lignes = resultat.lignes_commande
+    assert lignes['Jour'].tolist() == [1, 4]
+    assert lignes['Quantité'].tolist() == [9, 6]
+    assert lignes['Livraison'].tolist() == [3, 6]
+    assert lignes['Paiement'].tolist() == [4, 7]
+    assert lignes['Montant'].tolist() == [4_500, 3_000]
+    assert (lignes['Produit'] == 'Bière').all()
+    np.testing.assert_array_equal(resultat.stock_final, [8, 0])
+    np.testing.assert_array_equal(resultat.ruptures, [0, 0])
+
+    # Le second paiement (jour 7) tombe après l'horizon
+    assert resultat.decaissements['F'].tolist() == [0, 0, 0, 4_500, 0, 0]
+    assert resultat.achats_par_fournisseur().to_dict() == {'F': 7_500}
+
+
+def test_ruptures_tant_que_la_premiere_livraison_n_est_pas_arrivee():
+    # Sans stock : 2 unités manquées les jours 1 et 2, commande 12 livrée jour 3
+    resultat = simuler(stock_initial=0)
+    assert resultat.lignes_commande['Quantité'].tolist()[0] == 12
+    np.testing.assert_array_equal(resultat.ruptures, [4, 0])
+
+
+def test_quantite_minimale_de_commande():
+    fournisseurs = {'F': Fournisseur(delai_livraison=2, quantite_minimale=24, point_commande=3, stock_cible=6)}
+    resultat = simuler(stock_initial=5, fournisseurs=fournisseurs)
+    assert resultat.lignes_commande['Quantité'].tolist() == [24]
+    assert resultat.bons_commande[['Jour', 'Livraison', 'Paiement', 'Lignes']].values.tolist() == [[1, 3, 3, 1]]
@@ -0,0 +1,35 @@
+import json
+
+import pytest
+
+from benchmarks.bench_sessions import comparer, entiers, main, percentiles
+
+
+def test_percentiles():
+    assert percentiles([]) == {}
+    stats = percentiles(range(1, 101))
+    assert stats['p50'] == pytest.approx(50.5) and stats['max'] == 100 and stats['mesures'] == 100
+    assert stats['p50'] <= stats['p95'] <= stats['p99'] <= stats['max']
+
+
+def test_comparaison_sur_les_configurations_communes():
+    def configuration(produits, p50, rss):
+        return {'produits': produits, 'sessions': 2, 'latence_ms': {'p50': p50, 'p95': 2 * p50}, 'rss_max_mo': rss}
+
+    reference = {'configurations': [configuration(57, 100, 200), configuration(1_000, 400, 300)]}
+    rapport = {'configurations': [configuration(57, 50, 180), configuration(10_000, 900, 500)]}
+    lignes = comparer(rapport, reference)
+    assert len(lignes) == 1
+    assert "57 produits" in lignes[0] and "(-50%)" in lignes[0] and "RSS 200 -> 180 Mo" in lignes[0]
+    assert entiers("57,1000") == (57, 1_000)
+
+
+def test_sessions_concurrentes_sans_erreur(tmp_path):
+    sortie = tmp_path / 'bench.json'
+    code = main(['--produits', '57', '--sessions', '2', '--sortie', str(sortie)])
+
+    (configuration,) = json.loads(sortie.read_text(encoding='utf-8'))['configurations']
+    assert configuration['erreurs'] == [] and code == 0
+    assert configuration['reruns'] == 2 * 10  # deux sessions × séquence de revue
+    assert configuration['latence_par_action_ms']['Modification des prix']['mesures'] == 4
+    assert configuration['etapes_ms'] and configuration['rss_max_mo'] > 0
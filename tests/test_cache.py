@@ -0,0 +1,50 @@
+import numpy as np
+import pandas as pd
+
+from kizuna import cache as module_cache
+from kizuna.cache import CacheResultats, empreinte
+from kizuna.moteur import ParametresSimulation
+
+
+def test_eviction_lru_et_statistiques():
+    cache = CacheResultats(taille_max=2, ttl=60)
+    cache.set('a', 1)
+    cache.set('b', 2)
+    assert cache.get('a') == 1  # 'a' devient la plus récente
+    cache.set('c', 3)  # évince 'b'
+
+    assert 'b' not in cache and cache.get('b') is None
+    assert cache.get('a') == 1 and cache.get('c') == 3
+    assert cache.stats.evictions == 1
+    assert (cache.stats.succes, cache.stats.echecs) == (3, 1)
+    assert cache.stats.taux_succes == 0.75
+
+    calculs = []
+    assert cache.obtenir('d', lambda: calculs.append('d') or 4) == 4
+    assert cache.obtenir('d', lambda: calculs.append('d') or 5) == 4
+    assert calculs == ['d'] and len(cache) == 2
+
+
+def test_expiration_apres_ttl(monkeypatch):
+    horloge = [1000.0]
+    monkeypatch.setattr(module_cache.time, 'monotonic', lambda: horloge[0])
+    cache = CacheResultats(taille_max=8, ttl=10)
+    cache.set('a', 1)
+
+    horloge[0] += 9
+    assert cache.get('a') == 1
+    horloge[0] += 2
+    assert cache.get('a') is None
+    assert cache.stats.expirations == 1 and len(cache) == 0
+
+
+def test_empreinte_stable_et_sensible_aux_entrees():
+    quantites = np.arange(10)
+    params = ParametresSimulation()
+    cle = empreinte(quantites, params, 'Équilibré')
+
+    assert empreinte(quantites.copy(), ParametresSimulation(), 'Équilibré') == cle
+    assert empreinte(quantites.astype(float), params, 'Équilibré') != cle  # même valeurs, autre type
+    assert empreinte(quantites, ParametresSimulation(cout_variable=1), 'Équilibré') != cle
+    serie = pd.Series([1.0, 2.0])
+    assert empreinte(serie) == empreinte(serie.copy()) != empreinte(serie.set_axis([1, 0]))
@@ -0,0 +1,37 @@
+import os
+
+import pandas as pd
+
+from benchmarks.bench_moteur import catalogue_synthetique
+from kizuna.catalogue import charger_catalogue
+from kizuna.moteur import preparer_catalogue
+
+
+def test_cache_disque_invalide_seulement_si_le_contenu_change(tmp_path):
+    source = tmp_path / 'catalogue.csv'
+    catalogue_synthetique(200).to_csv(source, index=False)
+    dossier = tmp_path / 'cache'
+    preparations = []
+
+    def preparer(df):
+        preparations.append(len(df))
+        return preparer_catalogue(df)
+
+    premier = charger_catalogue(str(source), str(dossier), preparer)
+    relu = charger_catalogue(str(source), str(dossier), preparer)
+    assert len(preparations) == 1
+    pd.testing.assert_frame_equal(relu, premier)  # types compris (catégorielles, entiers)
+
+    # Date de modification changée, contenu identique : toujours le cache
+    stat = os.stat(source)
+    os.utime(source, ns=(stat.st_atime_ns, stat.st_mtime_ns + 10**9))
+    charger_catalogue(str(source), str(dossier), preparer)
+    assert len(preparations) == 1
+
+    # Contenu changé : reconstruit
+    modifie = catalogue_synthetique(200)
+    modifie.loc[0, 'Prix Unitaire (FCFA)'] += 100
+    modifie.to_csv(source, index=False)
+    recharge = charger_catalogue(str(source), str(dossier), preparer)
+    assert len(preparations) == 2
+    assert recharge['Prix Unitaire (FCFA)'].iloc[0] == premier['Prix Unitaire (FCFA)'].iloc[0] + 100
@@ -0,0 +1,60 @@
+import subprocess
+import sys
+
+from streamlit.testing.v1 import AppTest
+
+from benchmarks.bench_demarrage import RACINE, SCRIPT, comparer
+from benchmarks.bench_moteur import catalogue_synthetique
+from kizuna import moteur, precalcul
+from kizuna.moteur import MODES_OPTIMISATION
+from kizuna.ressources import FICHIER_CATALOGUE, cache_resultats, contexte_hors_session, prechauffer
+
+DELAI = 120  # secondes
+
+
+def test_imports_du_script_sans_modules_lourds():
+    # Processus neuf : les tests précédents ont pu charger ces modules
+    code = ("from benchmarks.bench_demarrage import imports_du_script, modules_lourds_charges\n"
+            "exec(imports_du_script(), {'__name__': 'imports'})\n"
+            "print(','.join(modules_lourds_charges()))")
+    sortie = subprocess.run([sys.executable, '-c', code], cwd=RACINE, capture_output=True, text=True, check=True)
+    assert sortie.stdout.strip() == ''
+
+
+def test_premier_rendu_lit_les_caches_prechauffes(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    catalogue_synthetique(300).to_csv(FICHIER_CATALOGUE, index=False)
+    contexte_hors_session()
+    cache = cache_resultats()
+    cache.vider()
+    succes, echecs = cache.stats.succes, cache.stats.echecs
+
+    durees = prechauffer()
+    assert list(durees) == ["Catalogue", "Historique", "Catalogue de la période", "Élasticités-prix",
+                            "Optimisation des modes", "Première figure"]
+    assert (cache.stats.succes - succes, cache.stats.echecs - echecs) == (0, len(MODES_OPTIMISATION))
+
+    # Le script importe ces fonctions à chaque rerun : les versions comptées sont celles qu'il appelle
+    calculs = []
+    for module, nom in ((moteur, 'simuler'), (precalcul, 'optimiser_mode')):
+        def compter(*args, _nom=nom, _fonction=getattr(module, nom)):
+            calculs.append(_nom)
+            return _fonction(*args)
+        monkeypatch.setattr(module, nom, compter)
+
+    at = AppTest.from_file(SCRIPT, default_timeout=DELAI)
+    at.run()
+    assert not at.exception
+    # Le mode affiché et les modes précalculés sont lus dans le cache
+    assert calculs == []
+    assert cache.stats.succes > succes
+
+
+def test_comparaison_des_indicateurs():
+    reference = {'configurations': [{'produits': 57, 'imports_s': 2.0, 'prechauffage_s': 1.0}]}
+    rapport = {'configurations': [{'produits': 57, 'imports_s': 1.0, 'prechauffage_s': 1.5},
+                                  {'produits': 10_000, 'imports_s': 1.0}]}
+    (ligne,) = comparer(rapport, reference)
+    assert "Imports du script 2.00 -> 1.00 s (-50%)" in ligne
+    assert "Préchauffage 1.00 -> 1.50 s (+50%)" in ligne
+    assert "Premier rendu" not in ligne
@@ -0,0 +1,88 @@
+import numpy as np
+import pandas as pd
+
+from benchmarks.bench_moteur import catalogue_synthetique
+from kizuna.edition_prix import (
+    agreger_par_categorie,
+    appliquer_modifications,
+    catalogue_de_base,
+    catalogue_edite,
+    grille_aux_prix,
+    initialiser_etat,
+    prix_par_produit,
+)
+from kizuna.memoire import tableaux
+from kizuna.moteur import appliquer_prix_ttc, preparer_catalogue
+
+
+def test_recalcul_incremental_egal_au_recalcul_complet():
+    base = catalogue_de_base(preparer_catalogue(catalogue_synthetique(300)))
+    copie_base = base.copy()
+    etat = initialiser_etat(base)
+    rng = np.random.default_rng(0)
+
+    prix = base['Prix Unitaire (FCFA)'].to_numpy(dtype=float)
+    for _ in range(5):
+        prix = prix.copy()
+        positions = rng.choice(len(base), 20, replace=False)
+        prix[positions] = np.rint(prix[positions] * rng.uniform(0.8, 1.3, 20))
+        appliquer_modifications(etat, prix)
+
+        edite = catalogue_edite(etat)
+        attendu = appliquer_prix_ttc(base, prix)
+        pd.testing.assert_frame_equal(edite, attendu, check_like=True)
+        pd.testing.assert_frame_equal(etat.agregats_categorie, agreger_par_categorie(attendu), rtol=1e-9)
+
+    # Cellules vidées ignorées ; revenir au prix de base retire la ligne de la surcouche
+    vides = np.full(len(base), np.nan)
+    assert len(appliquer_modifications(etat, vides)) == 0
+    appliquer_modifications(etat, base['Prix Unitaire (FCFA)'].to_numpy())
+    assert etat.modifications == {} and catalogue_edite(etat) is base
+    pd.testing.assert_frame_equal(etat.agregats_categorie, agreger_par_categorie(base), rtol=1e-9)
+    pd.testing.assert_frame_equal(base, copie_base)  # base partagée jamais modifiée
+    assert len(etat.journal) > 0
+
+
+def test_surcouche_par_produit_reportee_dans_la_grille():
+    base = catalogue_de_base(preparer_catalogue(catalogue_synthetique(50)))
+    etat = initialiser_etat(base)
+    prix = base['Prix Unitaire (FCFA)'].to_numpy().copy()
+    prix[[2, 9]] += 100
+    appliquer_modifications(etat, prix)
+
+    surcouche = prix_par_produit(etat)
+    assert surcouche == {base['Produit'].iloc[2]: prix[2], base['Produit'].iloc[9]: prix[9]}
+    grille = base[['Catégorie', 'Produit', 'Prix Unitaire (FCFA)']]
+    np.testing.assert_array_equal(grille_aux_prix(grille, {**surcouche, 'Produit inconnu': 1})['Prix Unitaire (FCFA)'],
+                                  prix)
+
+
+def test_ca_d_une_ligne_modifiee_valorise_la_quantite_ajustee_au_nouveau_prix():
+    base = catalogue_de_base(preparer_catalogue(catalogue_synthetique(50)))
+    etat = initialiser_etat(base, np.full(len(base), -1.0))
+    prix = base['Prix Unitaire (FCFA)'].to_numpy().copy()
+    prix[[3, 7]] *= 2
+    appliquer_modifications(etat, prix)
+
+    edite = catalogue_edite(etat)
+    modifiees = edite.iloc[[3, 7]]
+    # Élasticité -1 : la quantité est divisée par deux, valorisée au nouveau prix
+    np.testing.assert_array_equal(modifiees['CA TTC'], modifiees['Prix Unitaire (FCFA)'] * modifiees['Quantité Période'])
+    assert (modifiees['Quantité Période'] < base['Quantité Période'].iloc[[3, 7]].to_numpy()).all()
+    # Les autres lignes gardent leur demande et leur CA de référence
+    autres = np.setdiff1d(np.arange(len(base)), [3, 7])
+    np.testing.assert_array_equal(edite['CA TTC'].iloc[autres], base['CA TTC'].iloc[autres])
+
+
+def test_catalogue_edite_partage_la_base_sauf_les_colonnes_editees():
+    base = catalogue_de_base(preparer_catalogue(catalogue_synthetique(300)))
+    copie_base = base.copy()
+    etat = initialiser_etat(base)
+    prix = base['Prix Unitaire (FCFA)'].to_numpy() * 2
+    appliquer_modifications(etat, prix)
+
+    edite = catalogue_edite(etat)
+    for col in base.columns:
+        partagee = any(np.shares_memory(a, b) for a, b in zip(tableaux(edite[col]), tableaux(base[col])))
+        assert partagee == (col not in etat.colonnes_editees), col
+    pd.testing.assert_frame_equal(base, copie_base)
@@ -0,0 +1,105 @@
+import io
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from benchmarks.bench_moteur import catalogue_synthetique
+from kizuna.approvisionnement import simuler_approvisionnement
+from kizuna.export import (
+    CacheImages,
+    Rapport,
+    exporter,
+    exporter_excel,
+    feuilles,
+    rapport_enregistre,
+)
+from kizuna.moteur import ParametresSimulation, comparer_categories, preparer_catalogue, simuler, valeurs
+from kizuna.sauvegarde import charger, enregistrer
+
+
+@pytest.fixture(scope='module')
+def rapports():
+    df = preparer_catalogue(catalogue_synthetique(150))
+    resultats = []
+    for mode in ("Équilibré", "Maximiser les produits rentables"):
+        resultat = simuler(df, ParametresSimulation(mode_optimisation=mode))
+        resultats.append(Rapport(
+            nom=mode, periode='2024-05', totaux=resultat.totaux, df_optimise=resultat.df_optimise,
+            categories=comparer_categories(df, resultat.df_optimise),
+            appro=simuler_approvisionnement(resultat.df_optimise), marge_brute_visee_pct=50,
+        ))
+    return resultats
+
+
+def test_contenu_des_feuilles(rapports):
+    rapport = rapports[0]
+    df = rapport.df_optimise
+    tableaux = feuilles(rapport)
+    assert list(tableaux) == ['Synthèse', 'Catégories', 'Produits', 'Dépenses', 'Fournisseurs', 'Bons de commande']
+
+    synthese = tableaux['Synthèse'].set_index('Indicateur')['Valeur']
+    assert synthese["CA optimisé"] == rapport.totaux.ca_optimise
+    assert synthese["Résultat net projeté"] == rapport.totaux.resultat_net_optimise
+
+    produits = tableaux['Produits']
+    assert len(produits) == len(df)
+    assert produits['CA Optimisé'].sum() == valeurs(df, 'CA Optimisé').sum()
+    for _, groupe in produits.groupby('Catégorie', observed=True):
+        assert groupe['Marge Optimisée'].is_monotonic_decreasing
+
+    depenses = tableaux['Dépenses']
+    assert (depenses['Dépenses Additionnelles'] > 0).all() and depenses['Dépenses Additionnelles'].is_monotonic_decreasing
+    assert len(depenses) == (valeurs(df, 'Dépenses Additionnelles') > 0).sum()
+
+    fournisseurs = tableaux['Fournisseurs'].set_index('Fournisseur')
+    pd.testing.assert_series_equal(fournisseurs['Commandé'], rapport.appro.achats_par_fournisseur(),
+                                   check_names=False)
+    assert fournisseurs['Bons'].sum() == len(rapport.appro.bons_commande)
+
+
+def test_classeur_empile_les_scenarios(rapports):
+    classeur = pd.read_excel(io.BytesIO(exporter_excel(rapports)), sheet_name=None)
+    assert list(classeur) == list(feuilles(rapports[0]))
+    for nom, feuille in classeur.items():
+        assert feuille.columns[0] == 'Scénario'
+        attendus = [len(feuilles(r)[nom]) for r in rapports]
+        assert feuille['Scénario'].value_counts().reindex([r.nom for r in rapports]).tolist() == attendus
+    produits = classeur['Produits']
+    premier = feuilles(rapports[0])['Produits']
+    np.testing.assert_array_equal(produits['CA Optimisé'].to_numpy()[:len(premier)], premier['CA Optimisé'])
+    assert produits['Produit'].tolist()[:len(premier)] == premier['Produit'].astype(str).tolist()
+
+
+def test_images_reutilisees_par_empreinte_de_figure(rapports, tmp_path, monkeypatch):
+    import plotly.io as pio
+
+    from PIL import Image
+
+    # Rendu Kaleido remplacé par une image fixe, en comptant les appels
+    png = io.BytesIO()
+    Image.new('RGB', (9, 4)).save(png, format='PNG')
+    rendus = []
+    monkeypatch.setattr(pio, 'to_image', lambda fig, **options: rendus.append(fig) or png.getvalue())
+    images = CacheImages(dossier=str(tmp_path))
+
+    fichiers = exporter(rapports[:1], ['Excel', 'PDF'], images)
+    assert sorted(nom.rsplit('.', 1)[1] for nom in fichiers) == ['pdf', 'xlsx']
+    assert next(v for nom, v in fichiers.items() if nom.endswith('.pdf')).startswith(b'%PDF')
+    assert images.rendus == 4 and images.reutilises == 0
+
+    exporter(rapports[:1], ['PDF'], images)
+    assert images.rendus == 4 and images.reutilises == 4 and len(rendus) == 4
+
+
+def test_rapport_d_un_scenario_enregistre(rapports, tmp_path):
+    rapport = rapports[0]
+    chemin = str(tmp_path / 'scenarios.db')
+    identifiant = enregistrer('Revue', ('2024-05', ('Plateau',), 1), {'marge_brute_visee_pct': 40}, {},
+                              simuler(preparer_catalogue(catalogue_synthetique(150)), ParametresSimulation()),
+                              'cle', chemin=chemin)
+    relu = rapport_enregistre(charger(identifiant, chemin))
+    assert relu.periode == '2024-05 — sites : Plateau' and relu.marge_brute_visee_pct == 40
+    for nom, tableau in feuilles(relu).items():
+        pd.testing.assert_frame_equal(tableau, feuilles(rapport)[nom], check_dtype=False, check_categorical=False,
+                                      obj=nom)
@@ -0,0 +1,40 @@
+from dataclasses import replace
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from benchmarks.bench_moteur import catalogue_synthetique
+from kizuna.grille import FACTEURS, PLAGES_FACTEURS, construire_grille, evaluer_grille, front_pareto
+from kizuna.moteur import MODES_OPTIMISATION, ParametresSimulation, preparer_catalogue, simuler
+
+COLONNES = ['ca_optimise', 'marge_optimisee', 'resultat_net_optimise', 'depenses_additionnelles_total']
+
+
+@pytest.mark.parametrize('mode', MODES_OPTIMISATION)
+def test_grille_egale_simuler_scenario_par_scenario(mode):
+    df = preparer_catalogue(catalogue_synthetique(500))
+    params = ParametresSimulation(mode_optimisation=mode)
+    # Quelques scénarios tirés de la grille complète, dont un facteur nul pour les produits non rentables
+    grille = construire_grille().sample(25, random_state=0)
+    grille.iloc[0, FACTEURS.index('facteur_prod_tres_faible_marge')] = 0.0
+
+    resultats = evaluer_grille(df, params, grille)
+    for (_, scenario), (_, resultat) in zip(grille.iterrows(), resultats.iterrows()):
+        totaux = simuler(df, replace(params, **scenario.to_dict())).totaux
+        for colonne in COLONNES:
+            assert resultat[colonne] == pytest.approx(getattr(totaux, colonne), rel=1e-9), colonne
+        assert resultat['objectif_atteint'] == (totaux.ca_optimise >= totaux.seuil_rentabilite)
+
+
+def test_grille_complete_et_front_pareto():
+    grille = construire_grille()
+    tailles = [len(np.arange(mini, maxi + pas / 2, pas)) for mini, maxi, pas in PLAGES_FACTEURS.values()]
+    assert len(grille) == np.prod(tailles)
+
+    resultats = pd.DataFrame({
+        'depenses_additionnelles_total': [10, 20, 20, 30, 40],
+        'resultat_net_optimise': [5, 4, 8, 8, 9],
+    })
+    # (20, 4) est dominé par (10, 5) ; (30, 8) par (20, 8)
+    assert front_pareto(resultats).index.tolist() == [0, 2, 4]
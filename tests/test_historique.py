@@ -0,0 +1,33 @@
+import numpy as np
+import pandas as pd
+
+from kizuna.catalogue import charger_catalogue
+from kizuna.historique import appliquer_periode, construire_historique, evolutions_categories
+
+
+def agregats_deux_mois(catalogue, hausse=0.10):
+    """Avril aux ventes du catalogue, mai aux mêmes quantités sur deux sites avec des prix plus élevés."""
+    avril = pd.DataFrame({
+        'Site': 'A', 'Mois': '2025-04', 'Catégorie': catalogue['Catégorie'], 'Produit': catalogue['Produit'],
+        'Quantité': catalogue['Quantité Période'], 'CA TTC': catalogue['CA TTC'],
+    })
+    mai = [avril.assign(Site=site, Mois='2025-05', **{'CA TTC': avril['CA TTC'] * (1 + hausse)}) for site in 'AB']
+    return pd.concat([avril, *mai], ignore_index=True)
+
+
+def test_ca_de_la_periode_vient_de_l_historique():
+    catalogue = charger_catalogue('produits_par_categorie_avril.csv')
+    agregats = agregats_deux_mois(catalogue)
+    historique = construire_historique(agregats, catalogue)
+
+    for sites, fenetre in [(None, 1), (['B'], 1), (None, 2)]:
+        periode = appliquer_periode(catalogue, historique, '2025-05', sites, fenetre)
+        selection = agregats[agregats['Mois'].isin(['2025-04', '2025-05'][-fenetre:])
+                             & agregats['Site'].isin(sites or ['A', 'B'])]
+        attendu = selection['CA TTC'].sum() / fenetre
+        assert abs(periode['CA TTC'].sum() - attendu) <= len(catalogue)  # arrondi au FCFA par produit
+
+    # Même total que l'évolution des ventes par catégorie pour le mois seul
+    mai = evolutions_categories(historique).query("Mois == '2025-05'")['CA TTC'].sum()
+    periode = appliquer_periode(catalogue, historique, '2025-05')
+    assert np.isclose(periode['CA TTC'].sum(), mai, atol=len(catalogue))
@@ -0,0 +1,37 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+import kizuna.ingestion as ingestion
+from benchmarks.bench_paniers import ecrire_export_jour
+
+
+class Panne(Exception):
+    pass
+
+
+@pytest.mark.parametrize('etape', ['write_feather', 'exporter_agregats'])
+def test_reprise_apres_interruption_ne_recompte_aucun_bloc(tmp_path, monkeypatch, etape):
+    export = tmp_path / 'tickets.csv'
+    ecrire_export_jour(export, '2025-04-01', 20_000, 50, np.random.default_rng(0))
+    attendu = pd.read_csv(export)['Quantité'].sum()
+
+    # Interruption au troisième point de reprise, avant ou après le remplacement du fichier d'état
+    module = ingestion.feather if etape == 'write_feather' else ingestion
+    original = getattr(module, etape)
+    appels = []
+
+    def en_panne(*args, **kwargs):
+        appels.append(None)
+        if len(appels) == 3:
+            raise Panne
+        return original(*args, **kwargs)
+
+    monkeypatch.setattr(module, etape, en_panne)
+    with pytest.raises(Panne):
+        ingestion.ingerer([str(export)], str(tmp_path / 'etat'), taille_bloc=100_000)
+    monkeypatch.setattr(module, etape, original)
+
+    etat = ingestion.ingerer([str(export)], str(tmp_path / 'etat'), taille_bloc=100_000)
+    assert etat.agregats['Quantité'].sum() == attendu
+    assert pd.read_csv(etat.chemin_agregats)['Quantité'].sum() == attendu
@@ -0,0 +1,39 @@
+import numpy as np
+
+from benchmarks.bench_moteur import catalogue_synthetique
+from kizuna.edition_prix import appliquer_modifications, catalogue_de_base, catalogue_edite, initialiser_etat
+from kizuna.memoire import formater_octets, memoire_session, tableaux, taille_objet
+from kizuna.moteur import preparer_catalogue
+
+
+def test_session_ne_paie_que_sa_surcouche():
+    base = catalogue_de_base(preparer_catalogue(catalogue_synthetique(2_000)))
+    partages = tableaux(base)
+    taille_base = taille_objet(base)
+    assert taille_objet(base, partages) == 0
+
+    etat = initialiser_etat(base)
+    prix = base['Prix Unitaire (FCFA)'].to_numpy().copy()
+    prix[:10] += 100
+    appliquer_modifications(etat, prix)
+    session = {'etat_prix': etat, 'df': catalogue_edite(etat), 'base': base}
+    tailles = memoire_session(session, partages)
+
+    assert tailles['base'] == 0
+    # Le catalogue édité ne détient que ses colonnes prix et marge
+    colonnes = catalogue_edite(etat)[etat.colonnes_editees]
+    assert tailles['df'] == sum(t.nbytes for t in tableaux(colonnes))
+    assert tailles.sum() < taille_base / 4
+    assert list(tailles.index) == list(tailles.sort_values(ascending=False).index)
+
+
+def test_objets_partages_non_parcourus_et_comptes_une_fois():
+    gros = np.zeros(100_000)
+    assert taille_objet([gros, gros]) < 2 * gros.nbytes
+    assert memoire_session({'cache': gros}, objets_partages=[gros])['cache'] < 1_000
+
+
+def test_formater_octets():
+    assert formater_octets(512) == "512 o"
+    assert formater_octets(1536) == "1.5 Ko"
+    assert formater_octets(3 * 1024 ** 3) == "3.0 Go"
@@ -0,0 +1,81 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from kizuna.moteur import MODES_OPTIMISATION, ParametresSimulation, preparer_catalogue, simuler, valeurs
+
+FICHIER = 'produits_par_categorie_avril.csv'
+
+
+def simulation_ligne_a_ligne(df, params):
+    """Calcul du script d'origine, produit par produit (``apply``), pour les paramètres ``params``."""
+    df = df.copy()
+    df['Prix Unitaire HT'] = df['Prix Unitaire (FCFA)'] / 1.1925
+    df['CA TTC'] = df['Prix Unitaire (FCFA)'] * df['Quantité Avril']
+    df['Marge Valeur TTC'] = df['CA TTC'] * (df['Marge (%)'] / 100)
+    df['Coût Unitaire'] = df['Prix Unitaire HT'] * (1 - df['Marge (%)'] / 100)
+    # Éditeur de prix laissé tel quel : chaque prix est ressaisi arrondi au FCFA, marge recalculée
+    for idx, row in df.iterrows():
+        prix_ttc = float(f"{row['Prix Unitaire (FCFA)']:.0f}")
+        prix_ht = prix_ttc / (1 + 0.1925)
+        df.at[idx, 'Prix Unitaire HT'] = prix_ht
+        df.at[idx, 'Prix Unitaire (FCFA)'] = prix_ttc
+        df.at[idx, 'Marge (%)'] = (1 - (df.at[idx, 'Coût Unitaire'] / prix_ht)) * 100 if prix_ht > 0 else 0
+    df['Coût Unitaire'] = df['Prix Unitaire HT'] * (1 - df['Marge (%)'] / 100)
+    couts = params.couts_fixes
+    total_fixes_projetes = (200000 + 67593 + 54000 + 50000 + 30000 + 2050 + 100 + 100
+                            + couts.salaire_serveuse_1 + couts.salaire_serveuse_2 + couts.loyer + couts.erp
+                            + couts.web_email)
+    ca_total_actuel = df['CA TTC'].sum()
+    seuil_rentabilite = (total_fixes_projetes + params.cout_variable) / (params.marge_brute_visee_pct / 100)
+
+    forte, moyenne = params.facteur_prod_forte_marge, params.facteur_prod_moy_marge
+    faible, tres_faible = params.facteur_prod_faible_marge, params.facteur_prod_tres_faible_marge
+    if params.mode_optimisation == "Équilibré":
+        df['Facteur Augmentation'] = df['Marge (%)'].apply(
+            lambda x: tres_faible if x < 20 else (faible if x < 35 else (moyenne if x < 50 else forte))
+        )
+    elif params.mode_optimisation == "Maximiser les produits rentables":
+        df['Score'] = df['Marge (%)'] * df['Prix Unitaire (FCFA)'] / 1000
+        max_score = df['Score'].max()
+        df['Facteur Augmentation'] = df.apply(
+            lambda row: tres_faible if row['Marge (%)'] < 20 else
+            (faible if row['Marge (%)'] < 35 else
+             (moyenne if row['Marge (%)'] < 50 else forte * (0.8 + 0.4 * (row['Score'] / max_score)))), axis=1
+        )
+    else:
+        df['Facteur Augmentation'] = min(4.0, max(1.1, seuil_rentabilite / ca_total_actuel * 0.8))
+        df.loc[df['Marge (%)'] < 0, 'Facteur Augmentation'] = tres_faible
+    df.loc[(df['Marge (%)'] < 0) & (tres_faible == 0), 'Facteur Augmentation'] = 0
+
+    df['Quantité Optimisée'] = (df['Quantité Avril'] * df['Facteur Augmentation']).round().astype(int)
+    df['CA Optimisé'] = df['Quantité Optimisée'] * df['Prix Unitaire (FCFA)']
+    df['Marge Valeur Optimisée'] = df['CA Optimisé'] * (df['Marge (%)'] / 100)
+    df['Dépenses Additionnelles'] = (df['Quantité Optimisée'] - df['Quantité Avril']) * df['Coût Unitaire']
+    ca_optimise = df['CA Optimisé'].sum()
+    marge_optimisee = df['Marge Valeur Optimisée'].sum()
+    return df, {
+        'ca_total_actuel': ca_total_actuel,
+        'marge_brute_actuelle': df['Marge Valeur TTC'].sum(),
+        'seuil_rentabilite': seuil_rentabilite,
+        'ca_optimise': ca_optimise,
+        'marge_optimisee': marge_optimisee,
+        'depenses_additionnelles_total': df['Dépenses Additionnelles'].sum(),
+        'resultat_net_optimise': marge_optimisee - total_fixes_projetes - params.cout_variable,
+    }
+
+
+@pytest.mark.parametrize('mode', MODES_OPTIMISATION)
+@pytest.mark.parametrize('tres_faible', [0.9, 0.0])
+def test_simuler_reproduit_le_calcul_d_origine(mode, tres_faible):
+    brut = pd.read_csv(FICHIER)
+    params = ParametresSimulation(mode_optimisation=mode, facteur_prod_tres_faible_marge=tres_faible)
+
+    attendu, totaux_attendus = simulation_ligne_a_ligne(brut, params)
+    resultat = simuler(preparer_catalogue(brut), params)
+
+    np.testing.assert_array_equal(resultat.df_optimise['Quantité Optimisée'], attendu['Quantité Optimisée'])
+    np.testing.assert_allclose(resultat.df_optimise['Facteur Augmentation'], attendu['Facteur Augmentation'])
+    np.testing.assert_allclose(valeurs(resultat.df_optimise, 'CA Optimisé'), attendu['CA Optimisé'])
+    for nom, valeur in totaux_attendus.items():
+        assert getattr(resultat.totaux, nom) == pytest.approx(valeur, rel=1e-9), nom
@@ -0,0 +1,38 @@
+import numpy as np
+import pytest
+
+import kizuna.paniers as paniers
+from benchmarks.bench_paniers import ecrire_export_jour
+
+
+class Panne(Exception):
+    pass
+
+
+@pytest.mark.parametrize('apres_ecriture', [False, True])
+def test_reprise_apres_interruption_ne_recompte_aucun_bloc(tmp_path, monkeypatch, apres_ecriture):
+    export = tmp_path / 'tickets.csv'
+    ecrire_export_jour(export, '2025-04-01', 20_000, 50, np.random.default_rng(0))
+    reference = paniers.ingerer([str(export)], str(tmp_path / 'reference'), taille_bloc=100_000)
+
+    # Interruption au troisième point de reprise, avant ou après le remplacement du fichier d'état
+    original = paniers._ecrire_atomique
+    appels = []
+
+    def en_panne(chemin, ecrire):
+        appels.append(chemin)
+        if len(appels) == 3:
+            if apres_ecriture:
+                original(chemin, ecrire)
+            raise Panne
+        original(chemin, ecrire)
+
+    monkeypatch.setattr(paniers, '_ecrire_atomique', en_panne)
+    with pytest.raises(Panne):
+        paniers.ingerer([str(export)], str(tmp_path / 'etat'), taille_bloc=100_000)
+    monkeypatch.setattr(paniers, '_ecrire_atomique', original)
+
+    etat = paniers.ingerer([str(export)], str(tmp_path / 'etat'), taille_bloc=100_000)
+    assert etat.tickets == reference.tickets
+    assert etat.produits == reference.produits
+    assert (etat.paires != reference.paires).nnz == 0
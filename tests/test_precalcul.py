@@ -0,0 +1,60 @@
+import threading
+import time
+
+from benchmarks.bench_moteur import catalogue_synthetique
+from kizuna.cache import CacheResultats
+from kizuna.edition_prix import agreger_par_categorie
+from kizuna.moteur import ParametresSimulation, comparer_categories, preparer_catalogue, simuler
+from kizuna.precalcul import PremierPlan, Precalculs, creer_executeur, optimiser_mode
+
+
+def test_precalcul_range_le_meme_resultat_que_le_calcul_synchrone():
+    df = preparer_catalogue(catalogue_synthetique(200))
+    agregats = agreger_par_categorie(df)
+    params = ParametresSimulation(mode_optimisation="Augmentation uniforme")
+    cache = CacheResultats()
+    with creer_executeur() as executeur:
+        precalculs = Precalculs(executeur, cache)
+        tache = precalculs.lancer('cle', lambda annulation: optimiser_mode(df, params, agregats, annulation))
+        assert tache.terminee(delai=10)
+
+    resultat, solution, cat_compare = cache.get('cle')
+    attendu = simuler(df, params)
+    assert solution is None
+    assert resultat.totaux == attendu.totaux
+    assert cat_compare.equals(comparer_categories(df, attendu.df_optimise, agregats))
+    # Déjà en cache : rien n'est relancé
+    assert precalculs.lancer('cle', lambda annulation: None) is None
+
+
+def test_l_arriere_plan_attend_la_fin_du_premier_plan():
+    premier_plan = PremierPlan()
+    cache = CacheResultats()
+    demarrages = []
+    with creer_executeur(1) as executeur:
+        precalculs = Precalculs(executeur, cache, premier_plan)
+        with premier_plan.calcul():
+            tache = precalculs.lancer('autre mode', lambda annulation: demarrages.append(time.monotonic()))
+            time.sleep(0.3)
+            assert demarrages == [] and not tache.terminee(delai=0)
+            fin_premier_plan = time.monotonic()
+        assert tache.terminee(delai=5)
+    assert demarrages[0] >= fin_premier_plan and 'autre mode' in cache
+
+
+def test_reprendre_retire_une_tache_en_file():
+    cache = CacheResultats()
+    liberer = threading.Event()
+    with creer_executeur(1) as executeur:
+        precalculs = Precalculs(executeur, cache)
+        occupee = precalculs.lancer('occupe', lambda annulation: liberer.wait(5))
+        precalculs.lancer('affiche', lambda annulation: 'calcul spéculatif')
+        # Encore en file derrière la première tâche : annulée, l'appelant calcule lui-même
+        assert precalculs.reprendre('affiche') is None
+        assert not precalculs.en_cours('affiche')
+        # Déjà démarrée : renvoyée pour être attendue
+        time.sleep(0.1)
+        assert precalculs.reprendre('occupe') is occupee
+        liberer.set()
+        assert occupee.terminee(delai=5)
+    assert 'affiche' not in cache
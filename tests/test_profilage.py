@@ -0,0 +1,55 @@
+import json
+
+from kizuna import profilage
+from kizuna.profilage import Profileur
+
+
+class Horloge:
+    def __init__(self):
+        self.secondes = 0.0
+
+    def __call__(self):
+        return self.secondes
+
+
+def test_profileur_inactif_ne_mesure_rien():
+    profileur = Profileur()
+    profileur.debut_rerun()
+    with profileur.etape("Optimisation"):
+        pass
+    profileur.fin_rerun()
+    assert not profileur.durees and not profileur.reruns
+
+
+def test_durees_par_etape_et_par_rerun(monkeypatch):
+    horloge = Horloge()
+    monkeypatch.setattr(profilage.time, 'perf_counter', horloge)
+    profileur = Profileur(taille_historique=3)
+    profileur.actif = True
+
+    for duree in (0.25, 0.5, 0.75, 1.0):  # secondes exactes en binaire
+        profileur.debut_rerun()
+        with profileur.etape("Optimisation"):
+            horloge.secondes += duree
+        # Une étape répétée dans un rerun est cumulée
+        for _ in range(2):
+            with profileur.etape("Figures"):
+                horloge.secondes += 0.125
+        profileur.fin_rerun()
+
+    statistiques = profileur.statistiques().set_index('Étape')
+    optimisation = statistiques.loc["Optimisation"]
+    assert optimisation['Mesures'] == 3  # historique glissant
+    assert optimisation['Dernier (ms)'] == optimisation['Max (ms)'] == 1000.0
+    assert optimisation['p50 (ms)'] == 750.0
+    assert statistiques.index[0] == "Rerun complet"  # tri par médiane décroissante
+
+    dernier = profileur.reruns[-1]
+    assert dernier['etapes']["Figures"] == 250.0
+    assert dernier['total_ms'] == 1250.0
+
+    export = json.loads(profileur.exporter_json())
+    assert export['durees_ms']["Optimisation"] == [500.0, 750.0, 1000.0]
+    assert len(export['reruns']) == 3
+    profileur.vider()
+    assert profileur.statistiques().empty
@@ -0,0 +1,16 @@
+from benchmarks.bench_moteur import catalogue_synthetique
+from kizuna.moteur import ParametresSimulation, preparer_catalogue
+from kizuna.ressources import cle_optimisation
+
+
+def test_cle_optimisation_distingue_ca_et_periode():
+    df = preparer_catalogue(catalogue_synthetique(100))
+    params = ParametresSimulation()
+    cle = cle_optimisation(df, params, cle_periode=('2025-04', (), 1))
+
+    assert cle_optimisation(df.copy(), params, cle_periode=('2025-04', (), 1)) == cle
+    # Mêmes quantités et prix, CA TTC d'un autre mois ou d'autres sites
+    autre_ca = df.assign(**{'CA TTC': df['CA TTC'] + 1})
+    assert cle_optimisation(autre_ca, params, cle_periode=('2025-04', (), 1)) != cle
+    assert cle_optimisation(df, params, cle_periode=('2025-05', (), 1)) != cle
+    assert cle_optimisation(df, params, cle_periode=('2025-04', ('B',), 1)) != cle
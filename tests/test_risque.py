@@ -0,0 +1,49 @@
+from dataclasses import replace
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from kizuna import risque
+from kizuna.moteur import ParametresSimulation
+from kizuna.risque import ParametresRisque, pool_processus, simuler_risque
+
+
+def produits_optimises(n=40):
+    rng = np.random.default_rng(0)
+    return pd.DataFrame({
+        'Quantité Optimisée': rng.integers(0, 80, n),  # des deux côtés du seuil d'approximation normale
+        'Prix Unitaire (FCFA)': rng.integers(500, 5_000, n),
+        'Marge (%)': rng.uniform(-10, 60, n),
+    })
+
+
+@pytest.mark.parametrize('loi', ["Poisson", "Binomiale négative"])
+def test_risque_reproductible_quel_que_soit_le_nombre_de_processus(loi, monkeypatch):
+    df = produits_optimises()
+    params = ParametresSimulation()
+    parametres = ParametresRisque(n_scenarios=4_500, loi=loi, graine=7, taille_lot=1_000, processus=1)
+
+    sequentiel = simuler_risque(df, params, parametres)
+    np.testing.assert_array_equal(simuler_risque(df, params, parametres).ca, sequentiel.ca)
+
+    monkeypatch.setattr(risque, 'SEUIL_TIRAGES_POOL', 0)
+    parallele = simuler_risque(df, params, replace(parametres, processus=2))
+    np.testing.assert_array_equal(parallele.ca, sequentiel.ca)
+    np.testing.assert_array_equal(parallele.resultat_net, sequentiel.resultat_net)
+    # Le pool est gardé pour les simulations suivantes
+    assert pool_processus(2) is pool_processus(2)
+
+    autre_graine = simuler_risque(df, params, replace(parametres, graine=8))
+    assert not np.array_equal(autre_graine.ca, sequentiel.ca)
+
+
+def test_moyenne_des_scenarios_proche_du_resultat_projete():
+    df = produits_optimises()
+    params = ParametresSimulation()
+    resultat = simuler_risque(df, params, ParametresRisque(n_scenarios=20_000, processus=1))
+
+    prix = df['Prix Unitaire (FCFA)'].to_numpy(dtype=float)
+    ca_projete = (df['Quantité Optimisée'] * prix).sum()
+    assert resultat.ca.mean() == pytest.approx(ca_projete, rel=0.005)
+    assert len(resultat.ca) == 20_000
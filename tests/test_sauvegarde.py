@@ -0,0 +1,80 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from benchmarks.bench_moteur import catalogue_synthetique
+from kizuna.moteur import ParametresSimulation, avec_colonnes, preparer_catalogue, simuler
+from kizuna.sauvegarde import charger, comparer, connexion, enregistrer, lister, resultats_enregistres, supprimer
+
+
+@pytest.fixture
+def chemin(tmp_path):
+    return str(tmp_path / 'scenarios.db')
+
+
+@pytest.fixture(scope='module')
+def resultats():
+    df = preparer_catalogue(catalogue_synthetique(200))
+    return {mode: simuler(df, ParametresSimulation(mode_optimisation=mode))
+            for mode in ("Équilibré", "Maximiser les produits rentables")}
+
+
+def test_aller_retour_sans_relancer_l_optimisation(chemin, resultats):
+    resultat = resultats["Équilibré"]
+    valeurs = {'mode_optimisation': "Équilibré", 'seuil': np.int64(2_000_000), 'taux': np.float32(0.5)}
+    prix = {'Produit 3': 1500, 'Produit 7': 2200}
+    identifiant = enregistrer('Base', ('2024-05', ('Plateau', 'Cocody'), 1), valeurs, prix, resultat, 'cle',
+                              chemin=chemin)
+
+    scenario = charger(identifiant, chemin)
+    assert scenario.nom == 'Base' and scenario.mois == '2024-05' and scenario.sites == ('Cocody', 'Plateau')
+    assert scenario.valeurs == {'mode_optimisation': "Équilibré", 'seuil': 2_000_000, 'taux': 0.5}
+    assert scenario.prix == prix
+    assert scenario.totaux == resultat.totaux
+    pd.testing.assert_frame_equal(scenario.produits, resultat.df_optimise.reset_index(drop=True))
+
+    relu, solution, categories = resultats_enregistres(scenario)
+    assert solution is None and relu.totaux == resultat.totaux
+    assert len(categories) == scenario.produits['Catégorie'].nunique()
+
+
+def test_liste_filtree_remplacement_et_suppression(chemin, resultats):
+    resultat = resultats["Équilibré"]
+    a = enregistrer('A', ('2024-05', (), 1), {}, {}, resultat, 'a', chemin=chemin)
+    b = enregistrer('B', ('2024-05', ('Plateau',), 1), {}, {}, resultat, 'b', chemin=chemin)
+    c = enregistrer('C', ('2024-06', ('Cocody',), 3), {}, {}, resultat, 'c', chemin=chemin)
+
+    assert lister(chemin=chemin)['nom'].tolist() == ['C', 'B', 'A']
+    assert lister(mois='2024-05', chemin=chemin)['nom'].tolist() == ['B', 'A']
+    # « Tous » les sites inclut chaque site
+    assert lister(site='Plateau', chemin=chemin)['nom'].tolist() == ['B', 'A']
+    assert lister(site='Cocody', chemin=chemin)['nom'].tolist() == ['C', 'A']
+
+    # Même nom : remplacé, sans résultats orphelins
+    b2 = enregistrer('B', ('2024-05', ('Plateau',), 1), {}, {'Produit 1': 900}, resultat, 'b2', chemin=chemin)
+    assert b2 != b and len(lister(chemin=chemin)) == 3
+    supprimer(a, chemin)
+    with pytest.raises(KeyError):
+        charger(a, chemin)
+    with connexion(chemin) as conn:
+        assert conn.execute("SELECT COUNT(*) FROM resultats").fetchone() == (2,)
+        assert conn.execute("SELECT COUNT(*) FROM prix_modifies").fetchone() == (1,)
+    assert charger(c, chemin).fenetre == 3
+
+
+def test_comparaison_par_produit_et_par_categorie(resultats):
+    a = resultats["Équilibré"].df_optimise
+    b = resultats["Maximiser les produits rentables"].df_optimise.iloc[5:]
+    par_produit, par_categorie = comparer(a, b)
+
+    assert len(par_produit) == len(a)
+    absents = par_produit[par_produit['Produit'].isin(a['Produit'].iloc[:5])]
+    assert absents['Δ CA Optimisé'].isna().all()
+
+    ca = {cote: avec_colonnes(df, ['CA Optimisé']).groupby('Catégorie', observed=True)['CA Optimisé'].sum()
+          for cote, df in (('A', a), ('B', b))}
+    attendu = ca['B'].sub(ca['A'], fill_value=0)
+    obtenu = par_categorie.set_index('Catégorie')['Δ CA Optimisé']
+    pd.testing.assert_series_equal(obtenu.sort_index(), attendu.sort_index(), check_names=False,
+                                   check_index_type=False, check_dtype=False)
+    assert obtenu.abs().is_monotonic_decreasing
@@ -0,0 +1,72 @@
+import json
+import re
+import shutil
+
+import pandas as pd
+import pytest
+
+from kizuna.catalogue import charger_catalogue
+from kizuna.edition_prix import catalogue_de_base
+from kizuna.moteur import CoutsFixes, ParametresSimulation, simuler
+from kizuna.scenarios import charger_scenarios, executer, main
+
+CATALOGUE = 'produits_par_categorie_avril.csv'
+
+
+def ecrire_scenarios(dossier, contenu):
+    chemin = dossier / 'scenarios.json'
+    chemin.write_text(json.dumps(contenu), encoding='utf-8')
+    return str(chemin)
+
+
+@pytest.fixture
+def dossier(tmp_path, monkeypatch):
+    shutil.copy(CATALOGUE, tmp_path / CATALOGUE)
+    monkeypatch.chdir(tmp_path)  # cache disque du catalogue
+    return tmp_path
+
+
+def test_rapport_identique_en_serie_et_en_parallele(dossier):
+    chemin = ecrire_scenarios(dossier, {
+        'catalogue': CATALOGUE,
+        'base': {'couts_fixes': {'loyer': 350000}},
+        'scenarios': [
+            {'nom': 'Référence'},
+            {'nom': 'Loyer renégocié', 'couts_fixes': {'loyer': 300000}, 'mode_optimisation': 'Augmentation uniforme'},
+            {'nom': 'Hausse', 'prix_ttc': {'86 ORIGINAL': 1700}},
+            {'nom': 'Solveur', 'mode_optimisation': 'Solveur', 'contraintes': {'plafond_produit': 2.0}},
+        ],
+    })
+    fichier = charger_scenarios(chemin)
+    serie = executer(fichier, processus=1)
+    parallele = executer(fichier, processus=2)
+    colonnes = [c for c in serie.columns if c != 'duree_ms']
+    pd.testing.assert_frame_equal(serie[colonnes], parallele[colonnes])
+
+    # Scénario de référence : l'optimisation de l'application sur le catalogue aux prix arrondis
+    reference = serie.iloc[0]
+    params = ParametresSimulation(couts_fixes=CoutsFixes(loyer=350000))
+    attendu = simuler(catalogue_de_base(charger_catalogue(CATALOGUE)), params).totaux
+    assert reference['resultat_net_optimise'] == pytest.approx(attendu.resultat_net_optimise)
+    assert serie['loyer'].tolist() == [350000, 300000, 350000, 350000]
+    assert serie['prix_modifies'].tolist() == [0, 0, 1, 0]
+    assert serie['statut_solveur'].iloc[3] is not None
+
+
+def test_scenario_invalide_refuse(dossier):
+    for scenario, message in [
+        ({'remise': 5}, "clé(s) inconnue(s)"),
+        ({'mode_optimisation': 'Au hasard'}, "mode d'optimisation inconnu"),
+        ({'couts_fixes': {'piscine': 1}}, "champ(s) de couts_fixes inconnu(s)"),
+    ]:
+        with pytest.raises(ValueError, match=re.escape(message)):
+            charger_scenarios(ecrire_scenarios(dossier, {'scenarios': [scenario]}))
+
+
+def test_ligne_de_commande_ecrit_le_rapport(dossier, capsys):
+    chemin = ecrire_scenarios(dossier, {'scenarios': [{'nom': 'A'}, {'nom': 'B', 'cout_variable': 0}]})
+    assert main([chemin, '--sortie', str(dossier / 'rapport.parquet'), '--processus', '1']) == 0
+    rapport = pd.read_parquet(dossier / 'rapport.parquet')
+    assert rapport['scenario'].tolist() == ['A', 'B']
+    assert rapport['cout_variable'].tolist() == [27540, 0]
+    assert "2 scénario(s) évalué(s)" in capsys.readouterr().out
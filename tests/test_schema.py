@@ -0,0 +1,79 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from benchmarks.bench_memoire import disposition_historique, octets_par_colonne
+from benchmarks.bench_moteur import catalogue_synthetique
+from kizuna.moteur import TAUX_TVA, ParametresSimulation, preparer_catalogue, simuler, sommes_par_categorie, valeurs
+from kizuna.schema import SCHEMA_CATALOGUE, en_montants, en_quantites, typer_catalogue
+
+
+@pytest.fixture(scope='module')
+def catalogue():
+    return preparer_catalogue(catalogue_synthetique(500))
+
+
+def test_typage_du_catalogue():
+    brut = pd.DataFrame({
+        'Catégorie': ['Bières', 'Liqueur'], 'Produit': ['B', 'L'], 'Prix Unitaire (FCFA)': [1200.4, 999.6],
+        'Marge (%)': [30, 45], 'Quantité Période': [10.0, 3.0], 'CA TTC': [12004.2, 2998.8], 'Commentaire': ['', ''],
+    })
+    df = typer_catalogue(brut)
+    assert df.dtypes.to_dict() == {nom: pd.CategoricalDtype(brut[nom].unique()) if t == 'category' else np.dtype(t)
+                                   for nom, t in SCHEMA_CATALOGUE.items()}
+    assert df['Prix Unitaire (FCFA)'].tolist() == [1200, 1000] and df['CA TTC'].tolist() == [12004, 2999]
+    # Une catégorielle garde son dictionnaire
+    assert typer_catalogue(df)['Produit'].cat.categories is df['Produit'].cat.categories
+
+    assert en_montants([0.4, 1.6, -2.7]).tolist() == [0, 2, -3]
+    assert en_quantites(np.array([2.6, 3.2])).tolist() == [3, 3]
+    assert en_quantites(np.array([7], dtype=np.int64)).dtype == np.int32
+
+
+def test_colonnes_calculees_egales_aux_formules(catalogue):
+    df = simuler(catalogue, ParametresSimulation()).df_optimise
+    prix = df['Prix Unitaire (FCFA)'].to_numpy(dtype=float)
+    marge = df['Marge (%)'].to_numpy() / 100
+    quantite = df['Quantité Période'].to_numpy()
+    optimisee = df['Quantité Optimisée'].to_numpy()
+    prix_ht = prix / (1 + TAUX_TVA)
+    cout = prix_ht * (1 - marge)
+
+    attendues = {
+        'Prix Unitaire HT': prix_ht,
+        'Coût Unitaire': cout,
+        'CA': prix_ht * quantite,
+        'Marge Valeur': prix_ht * quantite * marge,
+        'Marge Valeur TTC': df['CA TTC'].to_numpy() - cout * (1 + TAUX_TVA) * quantite,
+        'Variation Quantité': optimisee - quantite,
+        'CA Optimisé': optimisee * prix,
+        'Marge Valeur Optimisée': optimisee * prix * marge,
+        'Dépenses Additionnelles': (optimisee - quantite) * cout,
+        'CA Additionnel': (optimisee - quantite) * prix,
+    }
+    for nom, attendu in attendues.items():
+        assert nom not in df.columns
+        np.testing.assert_allclose(valeurs(df, nom), attendu, rtol=1e-12, err_msg=nom)
+    # Montants entiers : le total du CA optimisé est exact
+    assert valeurs(df, 'CA Optimisé').dtype.kind == 'i'
+
+
+def test_tableau_optimise_partage_les_dictionnaires_du_catalogue(catalogue):
+    df = simuler(catalogue, ParametresSimulation()).df_optimise
+    for nom in ('Catégorie', 'Produit'):
+        assert np.shares_memory(df[nom].cat.categories.to_numpy(), catalogue[nom].cat.categories.to_numpy())
+    assert df['Quantité Optimisée'].dtype == np.int32
+
+    sommes = sommes_par_categorie(df, ['CA Optimisé', 'Quantité Optimisée'])
+    attendu = pd.DataFrame({'Catégorie': df['Catégorie'].astype(str), 'CA Optimisé': valeurs(df, 'CA Optimisé'),
+                            'Quantité Optimisée': df['Quantité Optimisée']}).groupby('Catégorie').sum()
+    pd.testing.assert_frame_equal(sommes.set_axis(sommes.index.astype(str)).sort_index(), attendu,
+                                  check_dtype=False, check_names=False)
+
+
+def test_schema_compact_plus_petit_que_l_ancienne_disposition(catalogue):
+    df = simuler(catalogue, ParametresSimulation()).df_optimise
+    historique = disposition_historique(df)
+    assert octets_par_colonne(df).sum() < octets_par_colonne(historique).sum() / 1.5
+    # Dictionnaires comptés une fois, dans le catalogue : le tableau dérivé ne paie que ses codes
+    assert octets_par_colonne(df, partage=True).sum() < octets_par_colonne(historique, partage=True).sum() / 3
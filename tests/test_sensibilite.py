@@ -0,0 +1,67 @@
+import numpy as np
+import pytest
+
+from benchmarks.bench_moteur import catalogue_synthetique
+from kizuna.elasticite import quantites_ajustees
+from kizuna.moteur import (
+    ParametresSimulation,
+    appliquer_prix_ttc,
+    appliquer_quantites,
+    preparer_catalogue,
+    simuler,
+)
+from kizuna.sensibilite import analyser_sensibilite
+
+
+def barres_prix(sensibilites):
+    prix = sensibilites[sensibilites['Type'] == 'Prix TTC'].set_index('Entrée')
+    return prix['Δ Résultat net haut']
+
+
+def test_elasticite_negative_reduit_l_effet_d_une_hausse_de_prix():
+    df = preparer_catalogue(catalogue_synthetique(200))
+    params = ParametresSimulation()
+
+    fixes = barres_prix(analyser_sensibilite(df, params))
+    nulles = barres_prix(analyser_sensibilite(df, params, elasticites=np.zeros(len(df))))
+    elastiques = barres_prix(analyser_sensibilite(df, params, elasticites=np.full(len(df), -1.5)))
+
+    # Élasticité nulle : la demande ne bouge pas, mêmes barres qu'à quantités fixes
+    np.testing.assert_allclose(nulles.loc[fixes.index], fixes)
+    # Élasticité négative : une hausse de prix fait perdre des ventes, le gain projeté des produits
+    # rentables diminue (vendre moins d'un produit à marge négative améliore au contraire le résultat)
+    produits = df.set_index('Produit').loc[fixes.index]
+    rentables = fixes.index[(produits['Marge (%)'] > 0) & (produits['Quantité Période'] >= 20)]
+    assert len(rentables) > 0
+    assert (elastiques.loc[rentables] < fixes.loc[rentables]).all()
+
+
+def prix_modifie(df, position, prix, elasticite):
+    """Catalogue où seul le prix de ``position`` change, simulé directement (demande et CA TTC au nouveau prix)."""
+    prix_ttc = df['Prix Unitaire (FCFA)'].to_numpy().copy()
+    quantites = df['Quantité Période'].to_numpy().copy()
+    ca_ttc = df['CA TTC'].to_numpy().astype(float)
+    quantites[position] = np.rint(quantites_ajustees(quantites[position], prix_ttc[position], prix, elasticite))
+    prix_ttc[position] = prix
+    ca_ttc[position] = prix * quantites[position]
+    return appliquer_quantites(appliquer_prix_ttc(df, prix_ttc), quantites, ca_ttc)
+
+
+@pytest.mark.parametrize('mode', ["Équilibré", "Maximiser les produits rentables", "Augmentation uniforme"])
+@pytest.mark.parametrize('elasticite', [None, -1.5])
+def test_barre_de_prix_egale_a_une_simulation_directe(mode, elasticite):
+    # Quantités réduites : le facteur uniforme n'est pas borné et dépend du CA de référence
+    df = preparer_catalogue(catalogue_synthetique(20))
+    quantites = np.maximum(df['Quantité Période'].to_numpy() // 4, 1)
+    df = appliquer_quantites(df, quantites, df['Prix Unitaire (FCFA)'].to_numpy() * quantites)
+    df = df.assign(**{'Prix Unitaire (FCFA)': df['Prix Unitaire (FCFA)'] // 10 * 10})  # +10 % tombe au FCFA
+    params = ParametresSimulation(mode_optimisation=mode)
+    elasticites = None if elasticite is None else np.full(len(df), elasticite)
+
+    sensibilites = analyser_sensibilite(df, params, elasticites=elasticites).set_index('Entrée')
+    base = simuler(df, params).totaux.resultat_net_optimise
+    for position in range(len(df)):
+        prix = df['Prix Unitaire (FCFA)'].iloc[position] * 1.1
+        direct = simuler(prix_modifie(df, position, prix, elasticite or 0.0), params).totaux.resultat_net_optimise
+        barre = sensibilites.loc[df['Produit'].iloc[position], 'Δ Résultat net haut']
+        assert barre == pytest.approx(direct - base, abs=1e-6 * abs(base))
@@ -0,0 +1,41 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from benchmarks.bench_moteur import catalogue_synthetique
+from kizuna.moteur import ParametresSimulation, preparer_catalogue
+from kizuna.solveur import ContraintesSolveur, arrondir, resoudre
+
+
+def volumes_et_plafonds(df, quantites, contraintes):
+    codes, categories = df['Catégorie'].factorize()
+    volumes = np.bincount(codes, weights=quantites, minlength=len(categories))
+    periode = np.bincount(codes, weights=df['Quantité Période'].to_numpy(dtype=float), minlength=len(categories))
+    return volumes, np.floor(periode * contraintes.plafond_categorie)
+
+
+def test_arrondi_reste_sous_le_plafond_de_categorie():
+    # Plafond de la catégorie A : floor(4 × 2.5) = 10 ; trois quantités fractionnaires qui y somment
+    df = pd.DataFrame({
+        'Catégorie': ['A', 'A', 'A', 'B'],
+        'Quantité Période': [1, 1, 2, 3],
+        'Prix Unitaire (FCFA)': [500, 2000, 1000, 800],
+    })
+    contraintes = ContraintesSolveur(plafond_categorie=2.5)
+    quantites = arrondir(df, [2.5, 2.5, 5.0, 4.2], contraintes)
+
+    volumes, plafonds = volumes_et_plafonds(df, quantites, contraintes)
+    assert (volumes <= plafonds).all()
+    # Le produit le moins cher de A est arrondi vers le bas, le plus cher vers le haut
+    assert quantites.tolist() == [2, 3, 5, 5]
+
+
+# Avec un plafond de catégorie de 1, l'arrondi par excès seul dépassait le plafond d'une unité
+@pytest.mark.parametrize('plafond_categorie', [1.0, 1.5, 2.5])
+def test_solveur_respecte_les_plafonds_de_categorie(plafond_categorie):
+    df = preparer_catalogue(catalogue_synthetique(2_000))
+    contraintes = ContraintesSolveur(plafond_categorie=plafond_categorie)
+    solution = resoudre(df, ParametresSimulation(), contraintes)
+
+    volumes, plafonds = volumes_et_plafonds(df, solution.quantites, contraintes)
+    assert (volumes <= plafonds).all()
@@ -0,0 +1,59 @@
+import numpy as np
+import pytest
+
+from benchmarks.bench_moteur import catalogue_synthetique
+from kizuna.moteur import ParametresSimulation, appliquer_prix_ttc, appliquer_quantites, preparer_catalogue, simuler
+from kizuna.tarification import arrondir_prix, cout_ttc, hausses_pour_seuil, prix_minimaux
+
+
+def catalogue_sous_le_seuil():
+    """Catalogue dont le CA optimisé (mode Équilibré) reste juste sous le seuil de rentabilité par défaut."""
+    df = preparer_catalogue(catalogue_synthetique(60))
+    quantites = np.maximum(df['Quantité Période'].to_numpy() // 12, 1)
+    return appliquer_quantites(df, quantites, df['Prix Unitaire (FCFA)'].to_numpy() * quantites)
+
+
+def test_prix_minimal_au_palier_qui_atteint_la_marge_cible():
+    df = preparer_catalogue(catalogue_synthetique(300))
+    recommandations = prix_minimaux(df, marges_cibles=(25, 50), arrondi=100)
+    cout = cout_ttc(df)
+    for cible in (25, 50):
+        prix = recommandations[f'Prix TTC {cible}%'].to_numpy()
+        assert (prix % 100 == 0).all()
+        assert (1 - cout / prix >= cible / 100 - 1e-12).all()
+        # Le palier inférieur n'atteint pas la cible
+        au_dessus = prix > 100
+        assert (1 - cout[au_dessus] / (prix[au_dessus] - 100) < cible / 100).all()
+        np.testing.assert_array_equal(recommandations[f'Hausse {cible}%'],
+                                      np.maximum(prix - df['Prix Unitaire (FCFA)'].to_numpy(), 0))
+    assert arrondir_prix(np.array([1200.0, 1200.4, 1250.0])).tolist() == [1200, 1300, 1300]
+
+
+@pytest.mark.parametrize('mode', ["Équilibré", "Maximiser les produits rentables"])
+def test_hausse_trouvee_atteint_le_seuil_avec_simuler(mode):
+    df = catalogue_sous_le_seuil()
+    params = ParametresSimulation(mode_optimisation=mode)
+    assert simuler(df, params).totaux.ca_optimise < params.seuil_rentabilite
+
+    hausses = hausses_pour_seuil(df, params)
+    assert hausses['Seuil atteint'].all()
+    prix = df['Prix Unitaire (FCFA)'].to_numpy(dtype=float)
+    for _, ligne in hausses.iterrows():
+        concernes = np.ones(len(df), dtype=bool) if ligne['Portée'] == "Uniforme" else (
+            (df['Catégorie'] == ligne['Catégorie']).to_numpy())
+        nouveaux = np.where(concernes, arrondir_prix(prix * (1 + ligne['Hausse (%)'] / 100)), prix)
+        totaux = simuler(appliquer_prix_ttc(df, nouveaux), params).totaux
+        assert totaux.ca_optimise == pytest.approx(ligne['CA Optimisé'])
+        assert totaux.resultat_net_optimise == pytest.approx(ligne['Résultat Net Projeté'])
+        assert totaux.ca_optimise >= params.seuil_rentabilite
+
+
+def test_demande_tres_elastique_rend_le_seuil_hors_d_atteinte():
+    df = catalogue_sous_le_seuil()
+    params = ParametresSimulation()
+    assert hausses_pour_seuil(df, params)['Seuil atteint'].all()
+
+    hausses = hausses_pour_seuil(df, params, elasticites=np.full(len(df), -3.0))
+    assert not hausses['Seuil atteint'].any()
+    assert hausses['Hausse (%)'].isna().all()
+    assert hausses['CA Optimisé'].isna().all()